@@ -0,0 +1,81 @@
+"""
+Event-loop lag while aggregators run, with the aggregation on the event loop or on the compute executor.
+
+`LoopLagMonitor` measures how late the loop wakes up a task sleeping for a short interval, which is the delay
+heartbeats, beacons and connection reads would suffer. Each aggregator aggregates `--updates` CIFAR-10 ResNet
+updates through the "inline" executor (the aggregation blocks the loop, as it used to) and through the "thread"
+executor.
+
+The benchmark exits with status 1 if the worst lag measured with the thread executor exceeds `--threshold`.
+
+Usage:
+    python -m analysis.benchmarks.aggregation_loop_lag [--updates 10] [--threshold 0.1]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import torch
+
+from analysis.benchmarks.utils import make_config, print_table
+from nebula.core.aggregation.fedavg import FedAvg
+from nebula.core.aggregation.krum import Krum
+from nebula.core.aggregation.median import Median
+from nebula.core.aggregation.trimmedmean import TrimmedMean
+from nebula.core.models.cifar10.resnet import CIFAR10ModelResNet
+from nebula.core.utils.flatmodel import FlatModel
+from nebula.core.utils.looplag import LoopLagMonitor
+
+PROBE_INTERVAL = 0.005
+
+
+async def _run(aggregator, updates: dict) -> tuple[float, float]:
+    monitor = LoopLagMonitor(interval=PROBE_INTERVAL)
+    await monitor.start()
+    await asyncio.sleep(PROBE_INTERVAL * 4)
+    start = time.monotonic()
+    await aggregator.compute.run(aggregator.run_aggregation, updates)
+    end = time.monotonic()
+    await asyncio.sleep(PROBE_INTERVAL * 4)
+    await monitor.stop()
+    return end - start, monitor.get_stats(since=start, until=end).max
+
+
+def main(total_updates: int, threshold: float) -> int:
+    template = CIFAR10ModelResNet().state_dict()
+    updates = {}
+    for i in range(total_updates):
+        params = {
+            layer: param + 0.01 * torch.randn_like(param) if param.is_floating_point() else param.clone()
+            for layer, param in template.items()
+        }
+        updates[f"node{i}"] = (FlatModel.from_state_dict(params), 1)
+
+    rows, worst = [], 0.0
+    for cls in (FedAvg, Median, TrimmedMean, Krum):
+        row = [cls.__name__]
+        for executor in ("inline", "thread"):
+            aggregator = cls(config=make_config(compute_executor=executor, trimmedmean_beta=1))
+            elapsed, max_lag = asyncio.run(_run(aggregator, updates))
+            aggregator.shutdown()
+            row += [f"{elapsed * 1000:.0f}", f"{max_lag * 1000:.1f}"]
+            if executor == "thread":
+                worst = max(worst, max_lag)
+        rows.append(row)
+
+    print(f"{total_updates} CIFAR-10 ResNet updates, times in ms\n")
+    print_table(["aggregator", "inline time", "inline max lag", "thread time", "thread max lag"], rows)
+    if worst > threshold:
+        print(f"\nFAIL: max loop lag with the thread executor {worst * 1000:.1f} ms > {threshold * 1000:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=10, help="Updates aggregated")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Maximum loop lag allowed (seconds)")
+    args = parser.parse_args()
+    sys.exit(main(args.updates, args.threshold))
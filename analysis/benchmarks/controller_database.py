@@ -0,0 +1,232 @@
+"""
+Controller database reads under concurrent requests, with blocking `sqlite3` calls or the async connection pools.
+
+Requests arrive at `--rate` per second for `--duration` seconds, each one a concurrent task as in the controller,
+alternating the scenario list (`/scenarios/{user}/{role}`: `get_all_scenarios_and_check_completed` and
+`get_running_scenario`) and the node list of a running scenario (`/nodes/{scenario_name}`:
+`list_nodes_by_scenario_name`). The database holds
+`--scenarios` scenarios, `--running` of them running with `--nodes` nodes each:
+  - legacy: the previous functions, which open a connection per call and run the query on the event loop, blocking
+    every other request (and the node status ingestion) until SQLite returns.
+  - pooled: the functions of `nebula.controller.database`, which run on the long-lived connections of a
+    `DatabasePool` in their own threads.
+
+Reports the requests served per second, their latency since they arrived, and the event-loop lag (how late the loop
+wakes up a task sleeping for a short interval, measured with `LoopLagMonitor`).
+
+Usage:
+    python -m analysis.benchmarks.controller_database [--rate 50 100 150 200] [--duration 5] [--readers 2]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from analysis.benchmarks.utils import print_table
+from nebula.controller import database
+from nebula.core.utils.looplag import LoopLagMonitor
+
+PROBE_INTERVAL = 0.005
+USER = "ADMIN"
+
+LEGACY_SCENARIOS_SQL = """
+    SELECT name, username, title, start_time, model, dataset, rounds, status FROM scenarios
+    ORDER BY
+        CASE
+            WHEN start_time IS NULL OR start_time = '' THEN 1
+            ELSE 0
+        END,
+        strftime(
+            '%Y-%m-%d %H:%M:%S',
+            substr(start_time, 7, 4) || '-' || substr(start_time, 4, 2) || '-' || substr(start_time, 1, 2) || ' '
+            || substr(start_time, 12, 8)
+        );
+"""
+
+
+def legacy_fetch(db_file_location: str, sql: str, parameters=(), one: bool = False):
+    # What each of the previous functions did: a connection per call, used from the event loop
+    with sqlite3.connect(db_file_location) as conn:
+        conn.row_factory = sqlite3.Row
+        c = conn.cursor()
+        c.execute(sql, parameters)
+        return c.fetchone() if one else c.fetchall()
+
+
+async def legacy_scenarios():
+    result = legacy_fetch(database.scenario_db_file_location, LEGACY_SCENARIOS_SQL)
+    for scenario in result:
+        if scenario["status"] == "running":
+            rounds = legacy_fetch(
+                database.scenario_db_file_location,
+                "SELECT rounds FROM scenarios WHERE name = ?;",
+                (scenario["name"],),
+                one=True,
+            )["rounds"]
+            nodes = legacy_fetch(
+                database.node_db_file_location, "SELECT round FROM nodes WHERE scenario = ?;", (scenario["name"],)
+            )
+            assert not all(str(node["round"]) == str(rounds) for node in nodes)
+    running = legacy_fetch(
+        database.scenario_db_file_location, "SELECT * FROM scenarios WHERE status = ?;", ("running",), one=True
+    )
+    return result, running
+
+
+async def legacy_nodes(scenario_name: str):
+    return legacy_fetch(
+        database.node_db_file_location,
+        "SELECT * FROM nodes WHERE scenario = ? ORDER BY CAST(idx AS INTEGER) ASC;",
+        (scenario_name,),
+    )
+
+
+async def pooled_scenarios():
+    result = await database.get_all_scenarios_and_check_completed(username=USER, role="admin")
+    running = await database.get_running_scenario()
+    return result, running
+
+
+async def pooled_nodes(scenario_name: str):
+    return await database.list_nodes_by_scenario_name(scenario_name)
+
+
+def populate(scenarios: int, running: int, nodes: int) -> list[str]:
+    running_names = [f"nebula_DFL_{i:05d}" for i in range(scenarios - running, scenarios)]
+    with sqlite3.connect(database.scenario_db_file_location) as conn:
+        conn.executemany(
+            "INSERT INTO scenarios (name, username, title, start_time, model, dataset, rounds, status, role) "
+            "VALUES (?, ?, ?, ?, 'MLP', 'MNIST', '10', ?, 'admin');",
+            [
+                (
+                    f"nebula_DFL_{i:05d}",
+                    USER,
+                    f"Scenario {i}",
+                    f"{i % 28 + 1:02d}/01/2026 10:{i % 60:02d}:00",
+                    "running" if f"nebula_DFL_{i:05d}" in running_names else "finished",
+                )
+                for i in range(scenarios)
+            ],
+        )
+    with sqlite3.connect(database.node_db_file_location) as conn:
+        conn.executemany(
+            "INSERT INTO nodes (uid, idx, ip, port, role, neighbors, latitude, longitude, timestamp, federation, "
+            "round, scenario, hash, malicious) "
+            "VALUES (?, ?, ?, ?, 'trainer', ?, '38.02', '-1.17', '2026-01-01 10:00:00', 'DFL', '5', ?, ?, 'False');",
+            [
+                (
+                    f"{name}-{idx}",
+                    str(idx),
+                    f"192.168.{j}.{idx + 2}",
+                    str(45000 + idx),
+                    " ".join(f"192.168.{j}.{n + 2}:{45000 + n}" for n in range(nodes) if n != idx),
+                    name,
+                    "0" * 32,
+                )
+                for j, name in enumerate(running_names)
+                for idx in range(nodes)
+            ],
+        )
+    return running_names
+
+
+def percentile(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+
+async def run(mode: str, rate: float, duration: float, running_names: list[str]) -> list:
+    scenarios, nodes = (legacy_scenarios, legacy_nodes) if mode == "legacy" else (pooled_scenarios, pooled_nodes)
+    latencies = {"scenarios": [], "nodes": []}
+
+    async def request(i: int, arrival: float):
+        if i % 2 == 0:
+            await scenarios()
+            latencies["scenarios"].append(time.perf_counter() - arrival)
+        else:
+            await nodes(running_names[i // 2 % len(running_names)])
+            latencies["nodes"].append(time.perf_counter() - arrival)
+
+    monitor = LoopLagMonitor(interval=PROBE_INTERVAL)
+    await monitor.start()
+    await asyncio.sleep(PROBE_INTERVAL * 4)
+    since = time.monotonic()
+    start = time.perf_counter()
+    tasks = []
+    for i in range(int(rate * duration)):
+        # Requests arrive on schedule: one delayed by a blocked loop counts as waiting since its arrival time
+        arrival = start + i / rate
+        await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+        tasks.append(asyncio.create_task(request(i, arrival)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    lag = monitor.get_stats(since=since, until=time.monotonic())
+    await monitor.stop()
+
+    return [
+        f"{rate:g}",
+        mode,
+        f"{len(tasks) / elapsed:.0f}",
+        f"{percentile(latencies['scenarios'], 50) * 1000:.1f}",
+        f"{percentile(latencies['scenarios'], 99) * 1000:.1f}",
+        f"{percentile(latencies['nodes'], 50) * 1000:.1f}",
+        f"{percentile(latencies['nodes'], 99) * 1000:.1f}",
+        f"{lag.mean * 1000:.1f}",
+        f"{lag.max * 1000:.1f}",
+    ]
+
+
+async def run_all(args) -> list[list]:
+    path = tempfile.mkdtemp(prefix="nebula_controller_db_")
+    os.environ["NEBULA_DB_READERS"] = str(args.readers)
+    try:
+        await database.initialize_databases(path)
+        running_names = populate(args.scenarios, args.running, args.nodes)
+        rows = []
+        for rate in args.rate:
+            for mode in ("legacy", "pooled"):
+                rows.append(await run(mode, rate, args.duration, running_names))
+        return rows
+    finally:
+        await database.close_databases()
+        shutil.rmtree(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", nargs="+", type=float, default=[50, 100, 150, 200], help="Requests per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds measured per run")
+    parser.add_argument("--scenarios", type=int, default=500, help="Scenarios stored")
+    parser.add_argument("--running", type=int, default=5, help="Running scenarios")
+    parser.add_argument("--nodes", type=int, default=50, help="Nodes of each running scenario")
+    parser.add_argument("--readers", type=int, default=2, help="Read-only connections of each pool")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run_all(args))
+
+    print(
+        f"\n{args.scenarios} scenarios, {args.running} running with {args.nodes} nodes each, {args.readers} readers, "
+        f"{args.duration:g} s per run, {os.cpu_count()} CPUs\n"
+    )
+    print_table(
+        [
+            "rate",
+            "mode",
+            "served/s",
+            "scenarios p50 ms",
+            "scenarios p99 ms",
+            "nodes p50 ms",
+            "nodes p99 ms",
+            "lag mean ms",
+            "lag max ms",
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
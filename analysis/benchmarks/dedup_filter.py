@@ -0,0 +1,111 @@
+"""
+Cost of detecting duplicate messages, with the previous md5 + deque approach and with `DuplicateFilter`.
+
+A stream of `N` small messages (a fraction of them copies of a recent message, as when the same message arrives
+through several neighbours) is checked with:
+  - legacy: `hashlib.md5(data).hexdigest()` and a membership test on a `deque(maxlen=capacity)` (O(capacity)).
+  - filter: `message_key(data)` and `DuplicateFilter.add` (O(1)).
+
+The time to compute the key of a single message is also reported for larger payloads (model messages).
+
+Usage:
+    python -m analysis.benchmarks.dedup_filter [--messages 10000 100000 1000000] [--capacity 10000]
+                                              [--duplicates 0.3] [--legacy-max 100000]
+"""
+
+import argparse
+import collections
+import hashlib
+import os
+import random
+import time
+
+from analysis.benchmarks.utils import print_table, timeit
+from nebula.core.network.dedupfilter import DuplicateFilter, message_key
+
+MESSAGE_BYTES = 200
+PAYLOAD_SIZES_MB = (0.001, 1, 10, 50)
+
+
+def make_stream(total: int, duplicates: float, window: int = 1000) -> list[bytes]:
+    """
+    Build a stream of messages where a fraction are copies of one of the last `window` new messages.
+    """
+    rng = random.Random(0)
+    padding = os.urandom(MESSAGE_BYTES - 8)
+    stream, recent = [], collections.deque(maxlen=window)
+    for i in range(total):
+        if recent and rng.random() < duplicates:
+            stream.append(rng.choice(recent))
+        else:
+            message = i.to_bytes(8, "little") + padding
+            recent.append(message)
+            stream.append(message)
+    return stream
+
+
+def legacy_filter(stream: list[bytes], capacity: int) -> int:
+    seen = collections.deque(maxlen=capacity)
+    rejected = 0
+    for data in stream:
+        key = hashlib.md5(data).hexdigest()
+        if key in seen:
+            rejected += 1
+            continue
+        seen.append(key)
+    return rejected
+
+
+def new_filter(stream: list[bytes], capacity: int) -> tuple[int, DuplicateFilter]:
+    dedup = DuplicateFilter(capacity=capacity)
+    rejected = 0
+    for data in stream:
+        if not dedup.add(message_key(data)):
+            rejected += 1
+    return rejected, dedup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--capacity", type=int, default=10000, help="Keys remembered (max_local_messages)")
+    parser.add_argument("--duplicates", type=float, default=0.3, help="Fraction of duplicated messages")
+    parser.add_argument("--legacy-max", type=int, default=100_000, help="Largest stream run with the legacy filter")
+    args = parser.parse_args()
+
+    rows = []
+    for total in args.messages:
+        stream = make_stream(total, args.duplicates)
+        new_time, (rejected, dedup) = timeit(new_filter, stream, args.capacity, repeat=1)
+        stats = dedup.get_stats()
+        if total <= args.legacy_max:
+            legacy_time, legacy_rejected = timeit(legacy_filter, stream, args.capacity, repeat=1)
+            assert legacy_rejected == rejected, (legacy_rejected, rejected)
+            legacy = f"{legacy_time / total * 1e6:.2f}"
+        else:
+            legacy = "skipped"
+        rows.append([
+            f"{total:,}",
+            legacy,
+            f"{new_time / total * 1e6:.2f}",
+            f"{stats.hit_rate:.1%}",
+            stats.size,
+            f"{stats.memory / 1024:.0f}",
+        ])
+
+    print(f"Per message, capacity {args.capacity}, {MESSAGE_BYTES}-byte messages\n")
+    print_table(["messages", "legacy us", "filter us", "hit rate", "entries", "filter KB"], rows)
+
+    rows = []
+    for size_mb in PAYLOAD_SIZES_MB:
+        payload = os.urandom(int(size_mb * 1024 * 1024))
+        md5_time, _ = timeit(lambda: hashlib.md5(payload).hexdigest(), repeat=5)
+        key_time, _ = timeit(message_key, payload, repeat=5)
+        rows.append([f"{size_mb:g}", f"{md5_time * 1e6:.1f}", f"{key_time * 1e6:.1f}"])
+
+    print("\nKey of a single message\n")
+    print_table(["payload MB", "md5 us", "message_key us"], rows)
+
+
+if __name__ == "__main__":
+    main()
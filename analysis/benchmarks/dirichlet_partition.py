@@ -0,0 +1,148 @@
+"""
+Controller time to build the Dirichlet (non-IID) partitions of a scenario, from 10 to 1000 participants.
+
+A CIFAR-100-shaped set of labels (50000 train and 10000 test samples, 100 classes) is partitioned with:
+  - legacy: the previous implementation, which builds the index lists of every client at every attempt, counts the
+    samples of each class with a scan of the partition per client and label, and collects the labels of each
+    partition with a list comprehension.
+  - vectorized: `NebulaDataset.dirichlet_partition`, `postprocess_partition` and `get_local_test_indices_map`
+    (labels grouped with one argsort, only sample counts drawn at each attempt, class counts with bincount).
+
+Both produce the same partitions for the same seed, which is checked for every size. Reports the seconds spent on
+each step.
+
+Usage:
+    python -m analysis.benchmarks.dirichlet_partition [--clients 10 100 500 1000] [--alpha 0.5] [--min-samples 10]
+"""
+
+import argparse
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from analysis.benchmarks.utils import print_table
+from nebula.core.datasets.nebuladataset import NebulaDataset
+
+SEED = 42
+
+
+def legacy_dirichlet_partition(y_data, num_clients, alpha, min_samples_size, max_iter=100):
+    unique_labels = np.unique(y_data)
+    class_indices = {}
+    base_rng = np.random.default_rng(SEED)
+    for label in unique_labels:
+        idx = np.where(y_data == label)[0]
+        base_rng.shuffle(idx)
+        class_indices[label] = idx
+
+    for iteration in range(1, max_iter + 1):
+        rng = np.random.default_rng(SEED + iteration)
+        temp_indices_per_partition = [[] for _ in range(num_clients)]
+        for label in unique_labels:
+            label_idx = class_indices[label]
+            proportions = rng.dirichlet([alpha] * num_clients)
+            counts = (proportions * len(label_idx)).astype(int)
+            remainder = len(label_idx) - counts.sum()
+            if remainder > 0:
+                for idx in rng.choice(num_clients, size=remainder, replace=False):
+                    counts[idx] += 1
+            start = 0
+            for client_idx, count in enumerate(counts):
+                temp_indices_per_partition[client_idx].extend(label_idx[start : start + count])
+                start += count
+        if min(len(indices) for indices in temp_indices_per_partition) >= min_samples_size:
+            return {i: indices for i, indices in enumerate(temp_indices_per_partition)}
+    raise ValueError(f"No partition with {min_samples_size} samples per client")
+
+
+def legacy_postprocess_partition(partition, y_data, min_samples_per_class=10):
+    new_partition = {client: list(indices) for client, indices in partition.items()}
+    for label in np.unique(y_data):
+        client_counts = {}
+        for client, indices in new_partition.items():
+            client_counts[client] = np.sum(np.array(y_data)[indices] == label)
+        donors = [client for client, count in client_counts.items() if 0 < count < min_samples_per_class]
+        recipients = [client for client, count in client_counts.items() if count >= min_samples_per_class]
+        if not recipients:
+            recipients = [max(client_counts, key=client_counts.get)]
+        best_recipient = max(recipients, key=lambda c: client_counts[c])
+        for donor in donors:
+            donor_indices = new_partition[donor]
+            donor_label_indices = [idx for idx in donor_indices if y_data[idx] == label]
+            new_partition[donor] = [idx for idx in donor_indices if y_data[idx] != label]
+            new_partition[best_recipient].extend(donor_label_indices)
+    return new_partition
+
+
+def legacy_local_test_indices_map(train_targets, test_targets, train_indices_map):
+    local_test_indices_map = {}
+    test_targets = np.array(test_targets)
+    for participant_id, indices in train_indices_map.items():
+        train_labels = np.array([train_targets[idx] for idx in indices])
+        local_test_indices_map[participant_id] = np.where(np.isin(test_targets, train_labels))[0].tolist()
+    return local_test_indices_map
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", nargs="+", type=int, default=[10, 100, 500, 1000], help="Participants")
+    parser.add_argument("--alpha", type=float, default=0.5, help="Dirichlet concentration")
+    parser.add_argument("--min-samples", type=int, default=10, help="Minimum samples per participant")
+    parser.add_argument("--classes", type=int, default=100, help="Classes of the dataset")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    train = SimpleNamespace(targets=rng.integers(0, args.classes, 50000).tolist())
+    test = SimpleNamespace(targets=rng.integers(0, args.classes, 10000).tolist())
+    y_data = np.asarray(train.targets)
+
+    rows = []
+    for clients in args.clients:
+        dataset = NebulaDataset.__new__(NebulaDataset)
+        dataset.seed, dataset.partitions_number = SEED, clients
+        dataset.train_set, dataset.test_set = train, test
+
+        legacy_map, legacy_partition = timed(legacy_dirichlet_partition, y_data, clients, args.alpha, args.min_samples)
+        new_map, new_partition = timed(
+            dataset.dirichlet_partition, train, alpha=args.alpha, min_samples_size=args.min_samples
+        )
+        legacy_post, legacy_postprocess = timed(legacy_postprocess_partition, legacy_map, y_data)
+        new_post, new_postprocess = timed(dataset.postprocess_partition, new_map, y_data)
+        dataset.train_indices_map = new_map
+        legacy_local, legacy_test_map = timed(legacy_local_test_indices_map, train.targets, test.targets, legacy_map)
+        new_local, new_test_map = timed(dataset.get_local_test_indices_map)
+
+        same = (
+            {c: [int(i) for i in indices] for c, indices in legacy_map.items()} == new_map
+            and {c: [int(i) for i in indices] for c, indices in legacy_post.items()} == new_post
+            and legacy_local == new_local
+        )
+        legacy_total = legacy_partition + legacy_postprocess + legacy_test_map
+        new_total = new_partition + new_postprocess + new_test_map
+        for mode, times in (
+            ("legacy", (legacy_partition, legacy_postprocess, legacy_test_map, legacy_total)),
+            ("vectorized", (new_partition, new_postprocess, new_test_map, new_total)),
+        ):
+            rows.append([
+                clients,
+                mode,
+                *(f"{t:.3f}" for t in times),
+                f"{legacy_total / times[-1]:.1f}x",
+                "yes" if same else "NO",
+            ])
+
+    print(f"{len(y_data)} train / {len(test.targets)} test samples, {args.classes} classes, alpha {args.alpha}\n")
+    print_table(
+        ["clients", "mode", "partition s", "postprocess s", "local test map s", "total s", "speedup", "same"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
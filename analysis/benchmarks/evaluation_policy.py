@@ -0,0 +1,150 @@
+"""
+Round time of a node with each evaluation policy.
+
+An MNIST-shaped train partition and global test set of random pixels are used to run `--rounds` rounds of a trainer
+node with the MNIST MLP, following the calls of the node: evaluation, one epoch of training, then the wait for the
+updates of the neighbours (a sleep of `--wait` seconds, during which overlapped evaluations run). Policies:
+  - full: every round evaluates the full local and global test sets before training (the previous behaviour).
+  - every 2: only even rounds are evaluated.
+  - sampled: a fixed stratified sample of `--test-samples` samples of each test set is evaluated.
+  - overlap: the model is copied when the round starts and evaluated while waiting for the neighbours.
+  - sampled + overlap.
+
+Reports the mean round time, the time the rounds were blocked by evaluations and the time saved per round, as
+measured by `EvaluationPolicy` (the metric logged by the nodes) and compared to the full policy.
+
+Usage:
+    python -m analysis.benchmarks.evaluation_policy [--rounds 6] [--wait 1.0] [--test-samples 1000]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import warnings
+
+import h5py
+import numpy as np
+import torch
+
+from analysis.benchmarks.partition_format import DATASETS, RandomImages
+from analysis.benchmarks.training_session import BenchmarkLightning, make_config
+from analysis.benchmarks.utils import print_table
+from nebula.core.datasets.datamodule import DataModule
+from nebula.core.datasets.mnist.mnist import MNISTPartitionHandler
+from nebula.core.datasets.nebuladataset import NebulaDataset
+from nebula.core.models.mnist.mlp import MNISTModelMLP
+from nebula.core.training.evaluationpolicy import EvaluationPolicy
+
+BATCH_SIZE = 32
+POLICIES = {
+    "full": {},
+    "every 2": {"interval": 2},
+    "sampled": {"sampled": True},
+    "overlap": {"overlap": True},
+    "sampled + overlap": {"sampled": True, "overlap": True},
+}
+
+
+def write_dataset(path: str, train_samples: int) -> tuple[str, str]:
+    _, test_shape, mode, _ = DATASETS["mnist"]
+    writer = NebulaDataset.__new__(NebulaDataset)
+    files = []
+    for split, shape, seed in (("train", (train_samples, *test_shape[1:]), 0), ("test", test_shape, 1)):
+        dataset = RandomImages(shape, mode, seed=seed)
+        file_name = os.path.join(path, f"mnist_{split}.h5")
+        with h5py.File(file_name, "w") as f:
+            writer.save_samples(dataset, range(len(dataset)), f, f"{split}_data")
+            f.create_dataset(f"{split}_targets", data=np.array(dataset.targets))
+        files.append(file_name)
+    return tuple(files)
+
+
+async def run(train_file: str, test_file: str, log_dir: str, policy: dict, args) -> tuple[list[float], list]:
+    train_set = MNISTPartitionHandler(train_file, "train", config=None)
+    test_set = MNISTPartitionHandler(test_file, "test", config=None)
+    train_indices = list(range(len(train_set)))
+    datamodule = DataModule(
+        train_set,
+        train_indices,
+        test_set,
+        list(range(len(test_set))),
+        train_set,
+        train_indices,
+        None,
+        BATCH_SIZE,
+        tensor_cache=True,
+        persistent=True,
+        test_samples=args.test_samples if policy.get("sampled") else None,
+    )
+    trainer = BenchmarkLightning(MNISTModelMLP(), datamodule, config=make_config(True, log_dir))
+    evaluation = EvaluationPolicy(
+        trainer,
+        interval=policy.get("interval", 1),
+        samples=args.test_samples if policy.get("sampled") else None,
+        overlap=policy.get("overlap", False),
+    )
+    trainer.create_trainer()
+    rounds, stats = [], []
+    for round in range(args.rounds):
+        start = time.perf_counter()
+        trainer.on_round_start()
+        await evaluation.evaluate(round)
+        await trainer.train()
+        # Engine._waiting_model_updates, with the neighbours sending their updates after `--wait` seconds
+        task = evaluation.start_deferred()
+        await asyncio.sleep(args.wait)
+        await evaluation.finish_deferred(task)
+        trainer.on_round_end()
+        rounds.append(time.perf_counter() - start)
+        stats.append(evaluation.get_stats(reset=True))
+    return rounds, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=6, help="Rounds per policy")
+    parser.add_argument("--wait", type=float, default=1.0, help="Seconds waiting for the neighbour updates")
+    parser.add_argument("--train-samples", type=int, default=2000, help="Samples of the train partition")
+    parser.add_argument("--test-samples", type=int, default=1000, help="Samples of each test set (sampled policies)")
+    args = parser.parse_args()
+
+    for name in ("lightning", "lightning.pytorch", "lightning.fabric"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    warnings.filterwarnings("ignore")
+    torch.manual_seed(0)
+    results = {}
+    path = tempfile.mkdtemp(prefix="nebula_evaluation_policy_")
+    try:
+        train_file, test_file = write_dataset(path, args.train_samples)
+        for name, policy in POLICIES.items():
+            results[name] = asyncio.run(run(train_file, test_file, path, policy, args))
+    finally:
+        shutil.rmtree(path)
+
+    # The first round pays one-off costs (first trainer, first copy of the test sets)
+    baseline = statistics.mean(results["full"][0][1:])
+    rows = []
+    for name, (rounds, stats) in results.items():
+        round_time = statistics.mean(rounds[1:])
+        rows.append([
+            name,
+            f"{round_time * 1000:.0f}",
+            f"{statistics.mean(s.blocking for s in stats[1:]) * 1000:.0f}",
+            f"{statistics.mean(s.saved for s in stats[1:]) * 1000:.0f}",
+            f"{(baseline - round_time) * 1000:.0f}",
+        ])
+
+    print(
+        f"{args.train_samples} train samples, {args.rounds} rounds, {args.wait} s waiting for neighbours, "
+        f"{torch.get_num_threads()} threads\n"
+    )
+    print_table(["policy", "round ms", "blocking eval ms", "saved ms (metric)", "saved ms (vs full)"], rows)
+
+
+if __name__ == "__main__":
+    main()
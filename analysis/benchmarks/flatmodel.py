@@ -0,0 +1,111 @@
+"""
+Cost of the FlatModel representation and speed-up of the operations using it, for every bundled model.
+
+For each model, measures:
+  - build: time to copy a state dict into a FlatModel (done once per received update).
+  - view: time to get a state dict back from a FlatModel (views of its buffer, no copy).
+  - fedavg: FedAvg weighted sum of `--updates` updates given as state dicts and as FlatModels (without the
+    `gc.collect()` done by `FedAvg.run_aggregation`, which takes the same time for both).
+  - metrics: the similarity metrics computed by the reputation module between the local model and an update,
+    given as state dicts and as FlatModels.
+
+Usage:
+    python -m analysis.benchmarks.flatmodel [--updates 10] [--repeat 3] [--models mnist/MNISTModelMLP ...]
+"""
+
+import argparse
+
+import torch
+
+from analysis.benchmarks.utils import iter_bundled_models, make_config, print_table, timeit
+from nebula.core.aggregation.fedavg import FedAvg
+from nebula.core.utils.flatmodel import FlatModel
+from nebula.core.utils.helper import (
+    cosine_metric,
+    euclidean_metric,
+    jaccard_metric,
+    manhattan_metric,
+    minkowski_metric,
+    pearson_correlation_metric,
+)
+
+
+def make_updates(template: dict, total: int) -> list[dict]:
+    """
+    Build `total` perturbed copies of a state dict.
+    """
+    updates = []
+    for _ in range(total):
+        updates.append({
+            layer: param + 0.01 * torch.randn_like(param) if param.is_floating_point() else param.clone()
+            for layer, param in template.items()
+        })
+    return updates
+
+
+def fedavg(aggregator: FedAvg, updates: list) -> dict:
+    accum = None
+    for update in updates:
+        accum = aggregator.fold_update(accum, update, 1)
+    return aggregator.finish_aggregation(accum, len(updates))
+
+
+def similarity_metrics(local_model, received_model) -> dict:
+    return {
+        "cosine": cosine_metric(local_model, received_model, similarity=True),
+        "euclidean": euclidean_metric(local_model, received_model, similarity=True),
+        "manhattan": manhattan_metric(local_model, received_model, similarity=True),
+        "pearson_correlation": pearson_correlation_metric(local_model, received_model, similarity=True),
+        "jaccard": jaccard_metric(local_model, received_model, similarity=True),
+        "minkowski": minkowski_metric(local_model, received_model, p=2, similarity=True),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=10, help="Updates aggregated by FedAvg")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions of each measurement (best is kept)")
+    parser.add_argument("--models", nargs="*", help="Only benchmark these models (dataset/class)")
+    args = parser.parse_args()
+
+    aggregator = FedAvg(config=make_config())
+    rows = []
+    for name, model in iter_bundled_models():
+        if args.models and name not in args.models:
+            continue
+        template = {layer: param.detach().clone() for layer, param in model.state_dict().items()}
+        updates = make_updates(template, args.updates)
+
+        build, flats = timeit(lambda: [FlatModel.from_state_dict(u) for u in updates], repeat=args.repeat)
+        view, _ = timeit(lambda: [f.state_dict() for f in flats], repeat=args.repeat)
+
+        fedavg_dict, expected = timeit(fedavg, aggregator, updates, repeat=args.repeat)
+        fedavg_flat, result = timeit(fedavg, aggregator, flats, repeat=args.repeat)
+        assert all(torch.allclose(expected[layer], result[layer], atol=1e-5) for layer in expected)
+
+        local = FlatModel.from_state_dict(template)
+        metrics_dict, expected = timeit(similarity_metrics, template, updates[0], repeat=args.repeat)
+        metrics_flat, result = timeit(similarity_metrics, local, flats[0], repeat=args.repeat)
+        assert all(abs(expected[k] - result[k]) < 1e-4 for k in expected), (expected, result)
+
+        rows.append([
+            name,
+            f"{sum(p.numel() for p in template.values()):,}",
+            len(template),
+            f"{build / len(updates) * 1000:.2f}",
+            f"{view / len(flats) * 1000:.3f}",
+            f"{fedavg_dict * 1000:.1f}",
+            f"{fedavg_flat * 1000:.1f}",
+            f"{metrics_dict * 1000:.1f}",
+            f"{metrics_flat * 1000:.1f}",
+        ])
+
+    print(f"Times in ms (best of {args.repeat}); fedavg over {args.updates} updates\n")
+    print_table(
+        ["model", "params", "layers", "build", "view", "fedavg dict", "fedavg flat", "metrics dict", "metrics flat"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Krum aggregation time for a growing number of CIFAR-10 ResNet updates.
+
+Compares the previous implementation (a Python double loop calling `numpy.linalg.norm` on every layer
+of every ordered pair) with the vectorized `Krum` aggregator. The vectorized scores are checked against
+a per-pair reference implementation of the Krum score for the sizes where it is affordable.
+
+To fit hundreds of updates in memory, every update is an overlapping window of a single random buffer,
+so updates are distinct but share storage.
+
+Usage:
+    python -m analysis.benchmarks.krum [--updates 10 50 200] [--legacy-max 50] [--check-max 50] [--multikrum 5]
+"""
+
+import argparse
+
+import numpy
+import torch
+
+from analysis.benchmarks.utils import make_config, print_table, timeit
+from nebula.core.aggregation.krum import Krum
+from nebula.core.models.cifar10.resnet import CIFAR10ModelResNet
+
+
+def make_updates(template: dict, total: int, stride: int = 1024) -> dict:
+    """
+    Build `total` distinct updates with the layout of `template` as overlapping windows of one buffer.
+    """
+    size = sum(param.numel() for param in template.values())
+    buffer = torch.randn(size + total * stride) * 0.01
+    updates = {}
+    for i in range(total):
+        flat = buffer[i * stride : i * stride + size]
+        params, offset = {}, 0
+        for layer, param in template.items():
+            if param.is_floating_point():
+                params[layer] = flat[offset : offset + param.numel()].view(param.shape)
+            else:
+                params[layer] = param.clone()
+            offset += param.numel()
+        updates[f"node{i}"] = (params, 1)
+    return updates
+
+
+def legacy_krum(models):
+    models = list(models.values())
+    total_models = len(models)
+    distance_list = [0 for _ in range(total_models)]
+    min_index, min_distance_sum = 0, float("inf")
+    for i in range(total_models):
+        m1, _ = models[i]
+        for j in range(total_models):
+            m2, _ = models[j]
+            distance = 0
+            if i != j:
+                for layer in m1:
+                    distance += numpy.linalg.norm(m1[layer] - m2[layer])
+            distance_list[i] += distance
+        if min_distance_sum > distance_list[i]:
+            min_distance_sum = distance_list[i]
+            min_index = i
+    return models[min_index][0]
+
+
+def reference_scores(aggregator: Krum, models) -> torch.Tensor:
+    params = [m for m, _ in models.values()]
+    total = len(params)
+    distances = torch.zeros((total, total), dtype=torch.float64)
+    for i in range(total):
+        for j in range(i + 1, total):
+            distances[i, j] = distances[j, i] = sum(
+                torch.sum((params[i][layer].double() - params[j][layer].double()) ** 2) for layer in params[i]
+            )
+    return aggregator.get_scores(distances)
+
+
+def main(sizes: list[int], legacy_max: int, check_max: int, multikrum: int):
+    krum = Krum(config=make_config())
+    multi = Krum(config=make_config(krum_m=multikrum))
+
+    template = CIFAR10ModelResNet().state_dict()
+    rows = []
+    for total in sizes:
+        updates = make_updates(template, total)
+        vectorized, result = timeit(krum.run_aggregation, updates, repeat=1)
+        multi_time, _ = timeit(multi.run_aggregation, updates, repeat=1)
+
+        legacy = "-"
+        if total <= legacy_max:
+            legacy_time, _ = timeit(legacy_krum, updates, repeat=1)
+            legacy = f"{legacy_time:.2f}"
+
+        match = "-"
+        if total <= check_max:
+            expected = reference_scores(krum, updates)
+            scores = krum.get_scores(krum.get_pairwise_distances([m for m, _ in updates.values()]))
+            selected = list(updates.values())[int(torch.argmin(expected))][0]
+            match = torch.allclose(scores, expected, rtol=1e-4) and all(
+                torch.equal(result[layer], selected[layer].float()) for layer in result
+            )
+
+        speedup = f"{float(legacy) / vectorized:.0f}x" if legacy != "-" else "-"
+        rows.append([total, legacy, f"{vectorized:.2f}", f"{multi_time:.2f}", speedup, match])
+        del updates
+
+    print(f"CIFAR-10 ResNet ({sum(p.numel() for p in template.values()) / 1e6:.1f}M parameters)\n")
+    print_table(["Updates", "Legacy (s)", "Krum (s)", f"Multi-Krum m={multikrum} (s)", "Speed-up", "Scores match"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, nargs="+", default=[10, 50, 200], help="Number of updates")
+    parser.add_argument("--legacy-max", type=int, default=50, help="Largest number of updates run with the legacy loop")
+    parser.add_argument("--check-max", type=int, default=50, help="Largest number of updates checked against the reference")
+    parser.add_argument("--multikrum", type=int, default=5, help="Updates averaged by Multi-Krum")
+    args = parser.parse_args()
+    main(args.updates, args.legacy_max, args.check_max, args.multikrum)
@@ -0,0 +1,164 @@
+"""
+Startup time and memory of the nodes of a local scenario, started as independent processes or forked from a pool.
+
+`N` nodes are started on this machine:
+  - process: each node is a new Python process that imports the node dependencies and then listens on its port
+    (as the process deployment does with `python nebula/core/node.py`).
+  - pool: the dependencies are imported once and each node is forked from that process (as `NodePool` does in the
+    simulation deployment).
+
+Reports the time until each node listens, its RSS and its USS (memory only used by that node, the rest of the
+RSS being shared with other processes), and the time until every node listens.
+
+Usage:
+    python -m analysis.benchmarks.node_pool [--nodes 4] [--modules nebula.core.node]
+"""
+
+import argparse
+import importlib
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import psutil
+
+BASE_PORT = 46001
+
+
+def _is_listening(pid: int, port: int) -> bool:
+    try:
+        connections = psutil.Process(pid).net_connections(kind="tcp")
+    except psutil.Error:
+        return False
+    return any(conn.status == psutil.CONN_LISTEN and conn.laddr.port == port for conn in connections)
+
+
+def _serve(port: int):
+    """Listen on `port` until terminated, as a node waiting for its neighbours."""
+    server = socket.create_server(("127.0.0.1", port))  # noqa: F841
+    while True:
+        time.sleep(60)
+
+
+def _child(port: int, modules: list[str]):
+    for module in modules:
+        importlib.import_module(module)
+    _serve(port)
+
+
+def _wait_listening(nodes: dict[int, tuple[int, float]], timeout: float = 300) -> dict[int, float]:
+    ready, deadline = {}, time.monotonic() + timeout
+    while len(ready) < len(nodes) and time.monotonic() < deadline:
+        for port, (pid, _) in nodes.items():
+            if port not in ready and _is_listening(pid, port):
+                ready[port] = time.monotonic()
+        time.sleep(0.01)
+    return ready
+
+
+def _memory(pid: int) -> tuple[float, float]:
+    memory = psutil.Process(pid).memory_full_info()
+    return memory.rss / 1024**2, memory.uss / 1024**2
+
+
+def run_process(n: int, modules: list[str]) -> tuple[list[tuple], float]:
+    nodes, processes = {}, []
+    start = time.monotonic()
+    for i in range(n):
+        port = BASE_PORT + i
+        process = subprocess.Popen([
+            sys.executable,
+            "-m",
+            "analysis.benchmarks.node_pool",
+            "--child",
+            str(port),
+            "--modules",
+            *modules,
+        ])
+        processes.append(process)
+        nodes[port] = (process.pid, time.monotonic())
+    return _collect(nodes, start, lambda: [p.terminate() or p.wait() for p in processes])
+
+
+def run_pool(n: int, modules: list[str]) -> tuple[list[tuple], float]:
+    start = time.monotonic()
+    # The pool pays the imports once, before forking any node
+    for module in modules:
+        importlib.import_module(module)
+    nodes = {}
+    for i in range(n):
+        port = BASE_PORT + i
+        forked = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            _serve(port)
+        nodes[port] = (pid, forked)
+
+    def stop():
+        for pid, _ in nodes.values():
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0)
+
+    return _collect(nodes, start, stop)
+
+
+def _collect(nodes: dict[int, tuple[int, float]], start: float, stop) -> tuple[list[tuple], float]:
+    try:
+        ready = _wait_listening(nodes)
+        total = max(ready.values()) - start if len(ready) == len(nodes) else float("nan")
+        rows = []
+        for port, (pid, launched) in nodes.items():
+            rss, uss = _memory(pid)
+            rows.append((ready.get(port, float("nan")) - launched, rss, uss))
+        return rows, total
+    finally:
+        stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=4, help="Nodes started")
+    parser.add_argument("--modules", nargs="+", default=["nebula.core.node"], help="Modules imported by each node")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        _child(args.child, args.modules)
+        return
+    if not hasattr(os, "fork"):
+        sys.exit("The node pool needs os.fork")
+
+    # Warm up the file cache, so that neither mode pays for reading the modules from disk
+    subprocess.run([sys.executable, "-c", "; ".join(f"import {module}" for module in args.modules)], check=True)
+
+    table = []
+    # Independent processes first: this process has not imported the modules yet
+    for mode, run in (("process", run_process), ("pool", run_pool)):
+        rows, total = run(args.nodes, args.modules)
+        startup, rss, uss = zip(*rows)
+        table.append([
+            mode,
+            f"{statistics.mean(startup):.2f}",
+            f"{max(startup):.2f}",
+            f"{total:.2f}",
+            f"{statistics.mean(rss):.0f}",
+            f"{statistics.mean(uss):.0f}",
+            f"{sum(uss):.0f}",
+        ])
+
+    # Imported last: the benchmark utils import torch, which the pool has to pay for like the processes
+    from analysis.benchmarks.utils import print_table
+
+    print(f"{args.nodes} nodes importing {', '.join(args.modules)}, {os.cpu_count()} CPUs\n")
+    print_table(
+        ["mode", "startup mean s", "startup max s", "all listening s", "RSS MB/node", "USS MB/node", "USS MB total"],
+        table,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Scenario-scoped node queries over a history of 10k nodes, with the previous `nodes` schema or the migrated one.
+
+The nodes database holds `--scenarios` scenarios of `--nodes` nodes each (10k nodes by default), most of them from
+finished scenarios. `--requests` monitor requests list the nodes of random scenarios and compute whether each node
+is online (it reported its status in the last `NODE_ONLINE_TIMEOUT` seconds):
+  - legacy: the previous schema (`uid` as primary key, every column TEXT). The query scans the whole table for the
+    scenario and sorts by `CAST(idx AS INTEGER)`, and the monitor parses the timestamp of every row with `strptime`.
+  - migrated: the same file after `initialize_databases` migrates it: (scenario, uid) primary key, an index on
+    (scenario, idx), numeric columns and `last_seen`, so `list_nodes_by_scenario_name` searches the index and
+    computes `online` in SQL.
+
+Both run on a `DatabasePool`. Reports the time to migrate the table, the query plans and the latency of the requests.
+
+Usage:
+    python -m analysis.benchmarks.node_queries [--scenarios 500] [--nodes 20] [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from analysis.benchmarks.utils import print_table
+from nebula.controller import database
+from nebula.controller.dbpool import DatabasePool
+
+LEGACY_SCHEMA = """
+    CREATE TABLE nodes (
+        uid TEXT PRIMARY KEY,
+        idx TEXT,
+        ip TEXT,
+        port TEXT,
+        role TEXT,
+        neighbors TEXT,
+        latitude TEXT,
+        longitude TEXT,
+        timestamp TEXT,
+        federation TEXT,
+        round TEXT,
+        scenario TEXT,
+        hash TEXT,
+        malicious TEXT
+    );
+"""
+LEGACY_LIST_SQL = "SELECT * FROM nodes WHERE scenario = ? ORDER BY CAST(idx AS INTEGER) ASC;"
+# The query of `list_nodes_by_scenario_name`
+MIGRATED_LIST_SQL = "SELECT *, IFNULL(last_seen >= ?, 0) AS online FROM nodes WHERE scenario = ? ORDER BY idx ASC;"
+
+
+def populate(path: str, scenarios: int, nodes: int) -> list[str]:
+    names = [f"nebula_DFL_{i:05d}" for i in range(scenarios)]
+    now = datetime.datetime.now()
+    with sqlite3.connect(path) as conn:
+        conn.execute(LEGACY_SCHEMA)
+        conn.executemany(
+            "INSERT INTO nodes VALUES "
+            "(?, ?, ?, ?, 'trainer', ?, '38.023522', '-1.174389', ?, 'DFL', ?, ?, ?, 'False');",
+            [
+                (
+                    f"{i:040x}{idx:024x}",
+                    str(idx),
+                    f"192.168.{idx // 250}.{idx % 250 + 2}",
+                    str(45000 + idx),
+                    " ".join(f"192.168.0.{n + 2}:{45000 + n}" for n in range(min(nodes, 8)) if n != idx),
+                    # The last scenario is running: its nodes reported a moment ago
+                    str(now - datetime.timedelta(seconds=idx if i == scenarios - 1 else (scenarios - i) * 3600)),
+                    "10",
+                    name,
+                    "0" * 32,
+                )
+                for i, name in enumerate(names)
+                for idx in range(nodes)
+            ],
+        )
+    return names
+
+
+async def legacy_monitor(pool: DatabasePool, scenario_name: str) -> list[bool]:
+    nodes = await pool.fetchall(LEGACY_LIST_SQL, (scenario_name,))
+    # The previous computation of the monitor of the frontend
+    online = []
+    for node in nodes:
+        timestamp = datetime.datetime.strptime(node["timestamp"], "%Y-%m-%d %H:%M:%S.%f")
+        online.append((datetime.datetime.now() - timestamp) <= datetime.timedelta(seconds=25))
+    return online
+
+
+async def migrated_monitor(scenario_name: str) -> list[bool]:
+    nodes = await database.list_nodes_by_scenario_name(scenario_name)
+    return [bool(node["online"]) for node in nodes]
+
+
+def query_plan(path: str, sql: str, parameters: tuple) -> str:
+    with sqlite3.connect(path) as conn:
+        return "; ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", parameters))
+
+
+def percentile(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+
+async def measure(monitor, names: list[str], requests: int) -> tuple[list[float], int]:
+    rng = random.Random(0)
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await monitor(rng.choice(names))
+        latencies.append(time.perf_counter() - start)
+    # The running scenario, whose nodes are all online
+    online_running = sum(await monitor(names[-1]))
+    return latencies, online_running
+
+
+def summary(latencies: list[float], nodes: int) -> list[str]:
+    return [
+        f"{len(latencies) / sum(latencies):.0f}",
+        f"{percentile(latencies, 50) * 1000:.2f}",
+        f"{percentile(latencies, 99) * 1000:.2f}",
+        f"{len(latencies) * nodes / sum(latencies):.0f}",
+    ]
+
+
+async def run_all(args) -> tuple[list[list], list[str], float]:
+    path = tempfile.mkdtemp(prefix="nebula_node_queries_")
+    node_db = os.path.join(path, "nodes.db")
+    try:
+        names = populate(node_db, args.scenarios, args.nodes)
+        pool = DatabasePool(node_db, database.PRAGMA_SETTINGS)
+        await pool.open()
+        try:
+            plans = [f"legacy:   {query_plan(node_db, LEGACY_LIST_SQL, ('',))}"]
+            latencies, online = await measure(lambda name: legacy_monitor(pool, name), names, args.requests)
+        finally:
+            await pool.close()
+        rows = [["legacy", *summary(latencies, args.nodes), f"{online}/{args.nodes}"]]
+
+        start = time.perf_counter()
+        await database.initialize_databases(path)
+        migration = time.perf_counter() - start
+        try:
+            plans.append(f"migrated: {query_plan(node_db, MIGRATED_LIST_SQL, (0, ''))}")
+            latencies, online = await measure(migrated_monitor, names, args.requests)
+        finally:
+            await database.close_databases()
+        rows.append(["migrated", *summary(latencies, args.nodes), f"{online}/{args.nodes}"])
+        return rows, plans, migration
+    finally:
+        shutil.rmtree(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", type=int, default=500, help="Scenarios stored")
+    parser.add_argument("--nodes", type=int, default=20, help="Nodes per scenario")
+    parser.add_argument("--requests", type=int, default=2000, help="Monitor requests measured")
+    args = parser.parse_args()
+
+    rows, plans, migration = asyncio.run(run_all(args))
+
+    print(f"\n{args.scenarios * args.nodes} nodes in {args.scenarios} scenarios, {args.requests} monitor requests")
+    print(f"Migration of the table: {migration * 1000:.0f} ms (including the rest of initialize_databases)\n")
+    print("\n".join(plans) + "\n")
+    print_table(["schema", "requests/s", "p50 ms", "p99 ms", "nodes/s", "online (running scenario)"], rows)
+
+
+if __name__ == "__main__":
+    main()
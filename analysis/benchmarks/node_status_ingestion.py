@@ -0,0 +1,170 @@
+"""
+Sustained node status updates per second the controller can store, with hundreds of nodes reporting at once.
+
+`--reporters` simulated nodes report their status (see `StatusEncoder`) in a loop, each waiting for the response
+before sending the next one, for `--duration` seconds:
+  - legacy: every report is written as the previous `/nodes/{scenario}/update` path did (`legacy_update_node_record`):
+    a new connection, a SELECT, an INSERT or UPDATE, a commit and a second SELECT, under a global lock.
+  - batched: reports go through `NodeStatusIngestor`, which keeps the latest report of each node and writes the
+    pending ones in one upsert transaction every `--flush-ms` milliseconds.
+
+The frontend is not notified in either mode, so only the database path is measured. Reports the updates stored per
+second, the response latency of the reporters, the transactions committed and the reports coalesced.
+
+Usage:
+    python -m analysis.benchmarks.node_status_ingestion [--reporters 100 500] [--duration 10] [--flush-ms 50 100]
+"""
+
+import argparse
+import asyncio
+import copy
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import aiosqlite
+
+from analysis.benchmarks.utils import print_table
+from nebula.addons.statusreport import StatusEncoder, status_snapshot
+from nebula.controller import database
+from nebula.controller.nodestatus import NodeStatusIngestor, node_record
+
+SCENARIO = "benchmark"
+
+_node_lock = asyncio.Lock()
+
+
+async def legacy_update_node_record(record: tuple):
+    """The previous `database.update_node_record`, taking the values in the order of `NODE_COLUMNS`."""
+    node_uid, scenario = record[0], record[11]
+    async with _node_lock, aiosqlite.connect(database.node_db_file_location) as conn:
+        conn.row_factory = aiosqlite.Row
+        _c = await conn.cursor()
+        await _c.execute("SELECT * FROM nodes WHERE uid = ? AND scenario = ?;", (node_uid, scenario))
+        if await _c.fetchone() is None:
+            await _c.execute(
+                f"INSERT INTO nodes ({', '.join(database.NODE_COLUMNS)}) VALUES ({', '.join('?' * len(record))});",
+                record,
+            )
+        else:
+            columns = [column for column in database.NODE_COLUMNS if column not in ("uid", "scenario")]
+            values = [value for column, value in zip(database.NODE_COLUMNS, record) if column in columns]
+            await _c.execute(
+                f"UPDATE nodes SET {', '.join(f'{c} = ?' for c in columns)} WHERE uid = ? AND scenario = ?;",
+                (*values, node_uid, scenario),
+            )
+        await conn.commit()
+        await _c.execute("SELECT * FROM nodes WHERE uid = ? AND scenario = ?;", (node_uid, scenario))
+        updated_row = await _c.fetchone()
+        return dict(updated_row) if updated_row else None
+
+
+def make_status(idx: int) -> dict:
+    return {
+        "scenario_args": {"name": SCENARIO, "federation": "DFL"},
+        "device_args": {"uid": f"{idx:064x}", "idx": idx, "role": "trainer", "malicious": False},
+        "network_args": {
+            "ip": f"192.168.{idx // 250}.{idx % 250 + 2}",
+            "port": 45000 + idx,
+            "neighbors": " ".join(f"192.168.0.{n}:4500{n}" for n in range(2, 10)),
+        },
+        "mobility_args": {"latitude": 38.023522, "longitude": -1.174389},
+        "federation_args": {"round": 0},
+        "tracking_args": {"run_hash": "0" * 32},
+    }
+
+
+async def legacy_submit(config: dict, encoder: StatusEncoder):
+    await legacy_update_node_record(node_record(status_snapshot(config), str(time.time()), time.time()))
+
+
+def batched_submit(ingestor: NodeStatusIngestor):
+    async def submit(config: dict, encoder: StatusEncoder):
+        report = encoder.encode(status_snapshot(config))
+        # The controller parses a new dictionary from every request
+        await ingestor.submit(copy.deepcopy(report))
+        encoder.ack(report["version"])
+
+    return submit
+
+
+async def reporter(idx: int, submit, deadline: float, latencies: list[float]):
+    config, encoder = make_status(idx), StatusEncoder()
+    while time.perf_counter() < deadline:
+        config["federation_args"]["round"] += 1
+        start = time.perf_counter()
+        await submit(config, encoder)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(reporters: int, duration: float, flush_ms: float | None) -> tuple[list[float], float, object]:
+    path = tempfile.mkdtemp(prefix="nebula_node_status_")
+    ingestor = None
+    try:
+        await database.initialize_databases(path)
+        if flush_ms is None:
+            submit = legacy_submit
+        else:
+            # The stats of the whole run are read at the end, so the periodic logs must not reset them
+            ingestor = NodeStatusIngestor(
+                database.nodes_db, flush_interval=flush_ms / 1000, stats_interval=float("inf")
+            )
+            await ingestor.start()
+            submit = batched_submit(ingestor)
+        latencies = []
+        start = time.perf_counter()
+        await asyncio.gather(*(reporter(idx, submit, start + duration, latencies) for idx in range(reporters)))
+        elapsed = time.perf_counter() - start
+        stats = None
+        if ingestor is not None:
+            await ingestor.stop()
+            stats = ingestor.get_stats()
+        with sqlite3.connect(database.node_db_file_location) as conn:
+            rows = conn.execute("SELECT COUNT(*) FROM nodes WHERE scenario = ?;", (SCENARIO,)).fetchone()[0]
+        assert rows == reporters, f"{rows} nodes stored, {reporters} expected"
+        return latencies, elapsed, stats
+    finally:
+        await database.close_databases()
+        shutil.rmtree(path)
+
+
+def percentile(values: list[float], q: float) -> float:
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+
+async def run_all(args) -> list[list]:
+    # A single event loop: the lock of `legacy_update_node_record` is bound to the first loop that uses it
+    rows = []
+    for reporters in args.reporters:
+        for flush_ms in (None, *args.flush_ms):
+            latencies, elapsed, stats = await run(reporters, args.duration, flush_ms)
+            rows.append([
+                reporters,
+                "legacy" if flush_ms is None else f"batched {flush_ms:g} ms",
+                f"{len(latencies) / elapsed:.0f}",
+                f"{percentile(latencies, 50) * 1000:.1f}",
+                f"{percentile(latencies, 99) * 1000:.1f}",
+                len(latencies) if stats is None else stats.flushes,
+                0 if stats is None else stats.coalesced,
+            ])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reporters", nargs="+", type=int, default=[100, 500], help="Nodes reporting at once")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds measured per run")
+    parser.add_argument("--flush-ms", nargs="+", type=float, default=[50, 100], help="Flush intervals (batched)")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run_all(args))
+
+    print(f"{args.duration:g} s per run, {os.cpu_count()} CPUs\n")
+    print_table(["reporters", "mode", "updates/s", "p50 ms", "p99 ms", "transactions", "coalesced"], rows)
+
+
+if __name__ == "__main__":
+    main()
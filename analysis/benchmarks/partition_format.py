@@ -0,0 +1,158 @@
+"""
+Load time and memory of participant partitions stored as pickled samples or as memory-mapped arrays.
+
+An MNIST-shaped (60000 28x28 images) and a CIFAR-shaped (50000 32x32x3 images) dataset of random pixels are split
+into `N` IID partitions plus a global test set, and written like `NebulaDataset.save_partitions` does:
+  - pickle: a pickled list of (PIL image, label) samples (the previous format).
+  - array: a contiguous uint8 array, memory-mapped by `NebulaPartitionHandler`.
+
+Each participant is a process forked from this one that loads its train partition and the global test set with
+the handler of the dataset, reads every test sample once (as an evaluation does) and reports the time taken and
+its memory. `--concurrent` participants run at the same time, so the pages they share count only once in USS.
+
+Usage:
+    python -m analysis.benchmarks.partition_format [--partitions 100] [--concurrent 10] [--datasets mnist cifar10]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import h5py
+import numpy as np
+import psutil
+from PIL import Image
+from torch.utils.data import Dataset
+
+from analysis.benchmarks.utils import print_table
+from nebula.core.datasets.cifar10.cifar10 import CIFAR10PartitionHandler
+from nebula.core.datasets.mnist.mnist import MNISTPartitionHandler
+from nebula.core.datasets.nebuladataset import NebulaDataset
+
+DATASETS = {
+    "mnist": ((60000, 28, 28), (10000, 28, 28), "L", MNISTPartitionHandler),
+    "cifar10": ((50000, 32, 32, 3), (10000, 32, 32, 3), None, CIFAR10PartitionHandler),
+}
+
+
+class RandomImages(Dataset):
+    """Image dataset shaped like the torchvision ones: uint8 `data`, `targets`, and PIL samples."""
+
+    def __init__(self, shape: tuple, mode: str | None, seed: int):
+        rng = np.random.default_rng(seed)
+        self.data = rng.integers(0, 256, size=shape, dtype=np.uint8)
+        self.targets = rng.integers(0, 10, size=shape[0]).tolist()
+        self.mode = mode
+        self.transform = None
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, idx):
+        return Image.fromarray(self.data[idx], mode=self.mode), self.targets[idx]
+
+
+def write_partitions(path: str, fmt: str, train: RandomImages, test: RandomImages, partitions: int):
+    writer = NebulaDataset.__new__(NebulaDataset)
+    save = writer.save_samples if fmt == "array" else lambda ds, idx, f, name: writer.save_partition(
+        [ds[i] for i in idx], f, name
+    )
+    with h5py.File(os.path.join(path, "global_test.h5"), "w") as f:
+        save(test, range(len(test)), f, "test_data")
+        f["test_data"].attrs["num_classes"] = 10
+        f.create_dataset("test_targets", data=np.array(test.targets), compression="gzip")
+    for p, indices in enumerate(np.array_split(np.random.default_rng(0).permutation(len(train)), partitions)):
+        with h5py.File(os.path.join(path, f"participant_{p}_train.h5"), "w") as f:
+            save(train, indices, f, "train_data")
+            f["train_data"].attrs["num_classes"] = 10
+            f.create_dataset("train_targets", data=np.array([train.targets[i] for i in indices]), compression="gzip")
+
+
+def _participant(path: str, p: int, handler, result_fd: int, release_fd: int):
+    start = time.perf_counter()
+    train_set = handler(os.path.join(path, f"participant_{p}_train.h5"), "train", config=None)
+    test_set = handler(os.path.join(path, "global_test.h5"), "test", config=None)
+    loaded = time.perf_counter() - start
+    for i in range(len(test_set)):
+        test_set[i]
+    evaluated = time.perf_counter() - start - loaded
+    memory = psutil.Process().memory_full_info()
+    os.write(result_fd, f"{loaded} {evaluated} {memory.rss} {memory.uss}\n".encode())
+    # Stay alive until every participant of the group has measured its memory
+    os.read(release_fd, 1)
+
+
+def load_partitions(path: str, handler, partitions: int, concurrent: int) -> list[list[float]]:
+    results = []
+    for first in range(0, partitions, concurrent):
+        result_r, result_w = os.pipe()
+        release_r, release_w = os.pipe()
+        pids = []
+        for p in range(first, min(first + concurrent, partitions)):
+            pid = os.fork()
+            if pid == 0:
+                os.close(result_r)
+                os.close(release_w)
+                try:
+                    _participant(path, p, handler, result_w, release_r)
+                finally:
+                    os._exit(0)
+            pids.append(pid)
+        os.close(result_w)
+        os.close(release_r)
+        with os.fdopen(result_r) as reader:
+            for _ in pids:
+                results.append([float(value) for value in reader.readline().split()])
+        # Closing the write end releases every participant of the group
+        os.close(release_w)
+        for pid in pids:
+            os.waitpid(pid, 0)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--partitions", type=int, default=100, help="Participants (train partitions)")
+    parser.add_argument("--concurrent", type=int, default=10, help="Participants loaded at the same time")
+    parser.add_argument("--datasets", nargs="+", choices=list(DATASETS), default=list(DATASETS))
+    args = parser.parse_args()
+
+    rows = []
+    for name in args.datasets:
+        train_shape, test_shape, mode, handler = DATASETS[name]
+        train, test = RandomImages(train_shape, mode, seed=0), RandomImages(test_shape, mode, seed=1)
+        for fmt in ("pickle", "array"):
+            path = tempfile.mkdtemp(prefix=f"nebula_{name}_{fmt}_")
+            try:
+                start = time.perf_counter()
+                write_partitions(path, fmt, train, test, args.partitions)
+                written = time.perf_counter() - start
+                size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+                results = load_partitions(path, handler, args.partitions, args.concurrent)
+            finally:
+                shutil.rmtree(path)
+            loaded, evaluated, rss, uss = (list(column) for column in zip(*results))
+            rows.append([
+                name,
+                fmt,
+                f"{written:.1f}",
+                f"{size / 1024**2:.0f}",
+                f"{statistics.mean(loaded) * 1000:.0f}",
+                f"{max(loaded) * 1000:.0f}",
+                f"{statistics.mean(evaluated) * 1000:.0f}",
+                f"{statistics.mean(rss) / 1024**2:.0f}",
+                f"{statistics.mean(uss) / 1024**2:.1f}",
+            ])
+
+    print(f"{args.partitions} partitions, {args.concurrent} participants at a time, {os.cpu_count()} CPUs\n")
+    print_table(
+        ["dataset", "format", "write s", "files MB", "load ms", "load max ms", "test pass ms", "RSS MB", "USS MB"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compression work of a model fan-out through the `PayloadCache`, for each codec of `message_args.compression`.
+
+The propagator reserves one serialized model for `--destinations` neighbors and every connection asks the cache for
+the compressed payload, as `Connection.send` does, with the codec it was configured with. Each codec is measured
+alone (every connection uses it) and in a mixed run in which the connections use the codecs in turn.
+
+The benchmark exits with status 1 if any codec is compressed more than once per message, i.e. if a destination did
+not reuse the payload compressed for the first one.
+
+Usage:
+    python -m analysis.benchmarks.payload_cache [--codecs lz4 zstd-3 zlib] [--destinations 8]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from analysis.benchmarks.utils import print_table, serialize_state_dict
+from nebula.core.models.cifar10.resnet import CIFAR10ModelResNet
+from nebula.core.network.codec import PayloadCodec
+from nebula.core.network.payloadcache import PayloadCache, PayloadCacheStats
+
+
+async def fan_out(message: bytes, codecs: list[str], destinations: int, round: int) -> tuple[float, PayloadCacheStats]:
+    cache = PayloadCache()
+    encoders = {name: PayloadCodec(name) for name in codecs}
+
+    def compress(data: bytes, compression: str) -> bytes:
+        return encoders[compression].compress(data)
+
+    async def send(compression: str) -> bytes:
+        try:
+            return await cache.compress(message, compression, compress)
+        finally:
+            cache.release(message)
+
+    cache.reserve(message, destinations, round=round)
+    start = time.perf_counter()
+    payloads = await asyncio.gather(*(send(codecs[i % len(codecs)]) for i in range(destinations)))
+    elapsed = time.perf_counter() - start
+    for i, payload in enumerate(payloads):
+        assert encoders[codecs[i % len(codecs)]].decompress(payload) == message
+    return elapsed, cache.get_stats(round)
+
+
+def main(codecs: list[str], destinations: int) -> int:
+    message = serialize_state_dict(CIFAR10ModelResNet().state_dict())
+    runs = [[codec] for codec in codecs] + ([codecs] if len(codecs) > 1 else [])
+
+    rows, failed = [], []
+    for round, run in enumerate(runs):
+        elapsed, stats = asyncio.run(fan_out(message, run, destinations, round))
+        expected = min(len(run), destinations)
+        if stats.compressions != expected or stats.reuses != destinations - expected:
+            failed.append("+".join(run))
+        rows.append([
+            "+".join(run),
+            stats.compressions,
+            stats.reuses,
+            f"{stats.cpu_time_saved * 1000:.0f}",
+            f"{stats.bytes_saved / (1024**2):.1f}",
+            f"{elapsed * 1000:.0f}",
+        ])
+
+    print(f"CIFAR-10 ResNet ({len(message) / (1024**2):.1f} MB) sent to {destinations} destinations\n")
+    print_table(["codecs", "compressions", "reuses", "CPU saved (ms)", "MB saved", "fan-out (ms)"], rows)
+    if failed:
+        print(f"\nFAIL: payloads compressed more than once per codec with {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--codecs", nargs="+", default=["lz4", "zstd-3", "zlib"], help="Codecs of the connections")
+    parser.add_argument("--destinations", type=int, default=8, help="Destinations of the message")
+    args = parser.parse_args()
+    sys.exit(main(args.codecs, args.destinations))
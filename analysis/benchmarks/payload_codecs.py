@@ -0,0 +1,63 @@
+"""
+Bytes on the wire and encode/decode latency of the payload codecs for every bundled model.
+
+The legacy pipeline (gzip inside `serialize_model` followed by zlib in the connection) is
+included as a reference. The last columns estimate the end-to-end time of one model
+transfer (encode + transmission + decode) for several link speeds, to help choosing
+`message_args.compression` for a scenario.
+
+Usage:
+    python -m analysis.benchmarks.payload_codecs [--codecs none lz4 zstd-1 zstd-3 zlib] [--links 100 1000 10000]
+"""
+
+import argparse
+import gzip
+import zlib
+
+from analysis.benchmarks.utils import iter_bundled_models, print_table, serialize_state_dict, timeit
+from nebula.core.network.codec import PayloadCodec
+
+
+def _legacy_encode(raw: bytes) -> bytes:
+    return zlib.compress(gzip.compress(raw))
+
+
+def _legacy_decode(data: bytes) -> bytes:
+    return gzip.decompress(zlib.decompress(data))
+
+
+def main(codecs: list[str], links: list[int]):
+    rows = []
+    for name, model in iter_bundled_models():
+        raw = serialize_state_dict(model.state_dict())
+        pipelines = [("legacy (gzip+zlib)", _legacy_encode, _legacy_decode)]
+        for codec_name in codecs:
+            codec = PayloadCodec(codec_name)
+            pipelines.append((codec_name, codec.compress, codec.decompress))
+
+        for pipeline, encode, decode in pipelines:
+            encode_time, encoded = timeit(encode, raw)
+            decode_time, decoded = timeit(decode, encoded)
+            assert decoded == raw
+            transfer = [encode_time + decode_time + len(encoded) * 8 / (mbps * 1e6) for mbps in links]
+            rows.append((
+                name,
+                pipeline,
+                f"{len(encoded) / (1024**2):.2f}",
+                f"{len(encoded) / len(raw):.2f}",
+                f"{encode_time * 1000:.1f}",
+                f"{decode_time * 1000:.1f}",
+                *(f"{t * 1000:.0f}" for t in transfer),
+            ))
+    print_table(
+        ["model", "codec", "wire (MB)", "ratio", "encode (ms)", "decode (ms)", *(f"@{mbps}Mbps (ms)" for mbps in links)],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--codecs", nargs="+", default=["none", "lz4", "zstd-1", "zstd-3", "zstd-9", "zlib"])
+    parser.add_argument("--links", type=int, nargs="+", default=[100, 1000, 10000], help="link speeds in Mbps")
+    args = parser.parse_args()
+    main(args.codecs, args.links)
@@ -0,0 +1,89 @@
+"""
+Peak memory of the receive path per message, relative to the payload size.
+
+A separate process sends uncompressed messages of increasing size over loopback with
+`Connection._send_chunks`, while this process reassembles them with the read path used by
+`Connection.handle_incoming_message`. Allocations are traced with `tracemalloc`, so the peak
+reflects the buffers held by the receiver for one message.
+
+Usage:
+    python -m analysis.benchmarks.receive_memory [--sizes 1 10 50 100] [--legacy]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tracemalloc
+import uuid
+
+from analysis.benchmarks.utils import print_table
+from nebula.core.network.connection import Connection
+
+
+def _sender(port: int, sizes: list[int], large_frames: bool):
+    async def send():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        conn = Connection(reader, writer, "sender", "127.0.0.1", port)
+        if large_frames:
+            conn._peer_frame_size = conn.MAX_FRAME_SIZE
+        for size in sizes:
+            payload = conn.DATA_TYPE_PREFIXES["bytes"] + os.urandom(size * 1024 * 1024)
+            await conn._send_chunks(uuid.uuid4().bytes, payload)
+            del payload
+        await reader.read()
+        writer.close()
+
+    asyncio.run(send())
+
+
+async def _receive_message(conn: Connection, buffer: bytearray) -> memoryview:
+    while True:
+        header = await conn._read_exactly(conn.HEADER_SIZE)
+        message_id, chunk_index, is_last_chunk, is_large_frame = conn._parse_header(header)
+        if is_large_frame:
+            await conn._read_frame(message_id, chunk_index)
+        else:
+            conn._store_chunk(message_id, chunk_index, await conn._read_chunk(buffer), is_last_chunk)
+        if is_last_chunk:
+            await conn._process_complete_message(message_id)
+            _, message = await conn.pending_messages_queue.get()
+            return message
+
+
+async def main(sizes: list[int], large_frames: bool):
+    accepted = asyncio.get_running_loop().create_future()
+    server = await asyncio.start_server(lambda r, w: accepted.set_result((r, w)), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    sender = multiprocessing.Process(target=_sender, args=(port, sizes, large_frames))
+    sender.start()
+
+    reader, writer = await accepted
+    conn = Connection(reader, writer, "receiver", "127.0.0.1", port)
+    buffer = bytearray(conn.MAX_CHUNK_SIZE)
+    rows = []
+    tracemalloc.start()
+    for size in sizes:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        message = await _receive_message(conn, buffer)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        payload_size = len(message)
+        del message
+        rows.append((size, f"{peak / (1024**2):.1f}", f"{peak / payload_size:.2f}x"))
+    tracemalloc.stop()
+
+    writer.close()
+    await writer.wait_closed()
+    server.close()
+    await asyncio.to_thread(sender.join)
+    print(f"Framing: {'large frames' if large_frames else 'legacy chunks'}")
+    print_table(["payload (MB)", "peak (MB)", "peak / payload"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50, 100], help="payload sizes in MB")
+    parser.add_argument("--legacy", action="store_true", help="use the legacy 1 KB chunked framing")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, not args.legacy))
@@ -0,0 +1,113 @@
+"""
+Time and peak memory of the reputation "fraction of parameters changed" metric for one neighbour.
+
+Compares the previous implementation (every absolute difference appended to a Python list, a tensor rebuilt
+from it for the mean, and the differences recomputed to count the changed parameters) with
+`Reputation._calculate_parameter_changes`, checking that both give the same threshold and counts.
+
+Peak memory is the growth of the resident set size (VmHWM, reset through /proc/self/clear_refs), so it
+includes both Python objects and tensors. Linux only.
+
+Usage:
+    python -m analysis.benchmarks.reputation_fraction [--models cifar10/CIFAR10ModelResNet ...] [--repeat 3]
+"""
+
+import argparse
+import gc
+import time
+
+import torch
+
+from analysis.benchmarks.utils import iter_bundled_models, print_table
+from nebula.addons.reputation.reputation import Reputation
+
+
+def legacy_fraction_changed(local_params, received_params, prev_threshold):
+    differences = []
+    for key in local_params.keys():
+        if key in received_params:
+            diff = torch.abs(local_params[key].cpu() - received_params[key].cpu())
+            differences.extend(diff.flatten().tolist())
+
+    if not differences:
+        threshold = 0
+    else:
+        mean_threshold = torch.mean(torch.tensor(differences)).item()
+        threshold = (prev_threshold + mean_threshold) / 2 if prev_threshold is not None else mean_threshold
+
+    total_params, changed_params, changes_record = 0, 0, {}
+    for key in local_params.keys():
+        if key in received_params:
+            diff = torch.abs(local_params[key].cpu() - received_params[key].cpu())
+            total_params += diff.numel()
+            num_changed = torch.sum(diff > threshold).item()
+            changed_params += num_changed
+            if num_changed > 0:
+                changes_record[key] = num_changed
+    return threshold, changed_params, total_params, changes_record
+
+
+def _rss_kb(field: str) -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field):
+                return int(line.split()[1])
+    return 0
+
+
+def measure(fn, *args, repeat: int = 3):
+    """
+    Run `fn` several times, returning the best time, the largest RSS growth (MB) and the last result.
+    """
+    best, peak, result = float("inf"), 0.0, None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        before = _rss_kb("VmRSS")
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+        peak = max(peak, (_rss_kb("VmHWM") - before) / 1024)
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="*", help="Only benchmark these models (dataset/class)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions of each measurement (best is kept)")
+    args = parser.parse_args()
+
+    rows = []
+    for name, model in iter_bundled_models():
+        if args.models and name not in args.models:
+            continue
+        local = {layer: param.detach().clone() for layer, param in model.state_dict().items()}
+        received = {
+            layer: param + 0.01 * torch.randn_like(param) if param.is_floating_point() else param.clone()
+            for layer, param in local.items()
+        }
+
+        legacy_time, legacy_mem, expected = measure(legacy_fraction_changed, local, received, 0.005, repeat=args.repeat)
+        new_time, new_mem, result = measure(
+            Reputation._calculate_parameter_changes, local, received, 0.005, repeat=args.repeat
+        )
+        assert abs(expected[0] - result[0]) < 1e-6 * max(1.0, expected[0]), (expected[0], result[0])
+        assert abs(expected[1] - result[1]) <= 1e-4 * expected[2], (expected[1], result[1])
+
+        rows.append([
+            name,
+            f"{expected[2]:,}",
+            f"{legacy_time * 1000:.1f}",
+            f"{new_time * 1000:.1f}",
+            f"{legacy_mem:.1f}",
+            f"{new_mem:.1f}",
+        ])
+
+    print(f"Per neighbour, best of {args.repeat}\n")
+    print_table(["model", "params", "legacy ms", "new ms", "legacy peak MB", "new peak MB"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Latency of control messages sent while models are being written, with and without the outbound send queue.
+
+Several models of consecutive rounds are sent to the same neighbour over a loopback TCP connection (as when
+propagation outpaces a slow link), while alive messages are sent every few milliseconds:
+  - legacy: every message is written by its own task calling `Connection._send_chunks`, so all of them race on
+    the stream writer and every model is written.
+  - queue: messages go through the `SendQueue` of the connection and are written by `process_send_queue`, so
+    control messages are interleaved between the frames of a model and superseded models are not written.
+
+Reports the latency of the alive messages, the time until the model of the last round is received and the
+amount of model data written. Each mode is run once to warm up and then `--repeat` times, reporting the median.
+
+Usage:
+    python -m analysis.benchmarks.send_queue [--models 4] [--size 20] [--controls 50] [--interval 0.002]
+                                             [--framing large] [--repeat 3]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from analysis.benchmarks.utils import print_table
+from nebula.core.network.connection import Connection
+from nebula.core.network.sendqueue import OutboundMessage, SendLane, classify_message
+from nebula.core.pb import nebula_pb2
+
+SOURCE = "127.0.0.1:45001"
+
+
+def model_message(round: int, size: int) -> bytes:
+    wrapper = nebula_pb2.Wrapper(source=SOURCE)
+    wrapper.model_message.parameters = bytes(size)
+    wrapper.model_message.weight = 1
+    wrapper.model_message.round = round
+    return wrapper.SerializeToString()
+
+
+def alive_message(index: int) -> bytes:
+    wrapper = nebula_pb2.Wrapper(source=SOURCE)
+    wrapper.control_message.action = nebula_pb2.ControlMessage.Action.ALIVE
+    wrapper.control_message.log = str(index)
+    return wrapper.SerializeToString()
+
+
+async def _receive(conn: Connection, controls: int, last_round: int, received: dict):
+    buffer = bytearray(conn.MAX_CHUNK_SIZE)
+    while len(received["controls"]) < controls or last_round not in received["models"]:
+        header = await conn._read_exactly(conn.HEADER_SIZE)
+        message_id, chunk_index, is_last_chunk, is_large_frame = conn._parse_header(header)
+        if is_large_frame:
+            await conn._read_frame(message_id, chunk_index)
+        else:
+            conn._store_chunk(message_id, chunk_index, await conn._read_chunk(buffer), is_last_chunk)
+        if not is_last_chunk:
+            continue
+        await conn._process_complete_message(message_id)
+        _, message = await conn.pending_messages_queue.get()
+        now = time.perf_counter()
+        lane, _, round = classify_message(message)
+        if lane == SendLane.MODEL:
+            received["models"][round] = now
+            received["model_bytes"] += len(message)
+        else:
+            wrapper = nebula_pb2.Wrapper.FromString(bytes(message))
+            received["controls"][int(wrapper.control_message.log)] = now
+
+
+async def _send_legacy(sender: Connection, data: bytes):
+    await sender._update_activity()
+    await sender._send_chunks(uuid.uuid4().bytes, sender.DATA_TYPE_PREFIXES["pb"] + data)
+
+
+async def _send_queued(sender: Connection, data: bytes):
+    lane, key, round = classify_message(data)
+    message = OutboundMessage(sender.DATA_TYPE_PREFIXES["pb"] + data, lane, key, round)
+    if await sender._send_queue.put(message):
+        await message.sent
+
+
+async def _measure(mode: str, models: list[bytes], controls: int, interval: float, large_frames: bool) -> dict:
+    accepted = asyncio.get_running_loop().create_future()
+    server = await asyncio.start_server(lambda r, w: accepted.set_result((r, w)), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    peer_reader, peer_writer = await accepted
+
+    sender = Connection(reader, writer, "sender", "127.0.0.1", port)
+    receiver = Connection(peer_reader, peer_writer, "receiver", "127.0.0.1", port)
+    if large_frames:
+        sender._peer_frame_size = receiver.MAX_FRAME_SIZE
+    send = _send_legacy if mode == "legacy" else _send_queued
+    if mode == "queue":
+        sender._running.set()
+        send_task = asyncio.create_task(sender.process_send_queue())
+
+    received = {"controls": {}, "models": {}, "model_bytes": 0}
+    receive_task = asyncio.create_task(_receive(receiver, controls, len(models) - 1, received))
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(send(sender, data)) for data in models]
+    sent = {}
+    for index in range(controls):
+        sent[index] = time.perf_counter()
+        tasks.append(asyncio.create_task(send(sender, alive_message(index))))
+        await asyncio.sleep(interval)
+    await receive_task
+    await asyncio.gather(*tasks)
+
+    if mode == "queue":
+        send_task.cancel()
+        await asyncio.gather(send_task, return_exceptions=True)
+    writer.close()
+    peer_writer.close()
+    server.close()
+
+    latencies = [received["controls"][index] - sent[index] for index in sent]
+    return {
+        "mean": statistics.mean(latencies),
+        "max": max(latencies),
+        "last_model": received["models"][len(models) - 1] - start,
+        "models": len(received["models"]),
+        "model_mb": received["model_bytes"] / (1024**2),
+    }
+
+
+async def main(args):
+    models = [model_message(round, int(args.size * 1024 * 1024)) for round in range(args.models)]
+    runs = {"legacy": [], "queue": []}
+    for run in range(args.repeat + 1):
+        for mode, results in runs.items():
+            result = await _measure(mode, models, args.controls, args.interval, args.framing == "large")
+            if run > 0:
+                results.append(result)
+
+    rows = []
+    for mode, results in runs.items():
+        result = {metric: statistics.median(r[metric] for r in results) for metric in results[0]}
+        rows.append([
+            mode,
+            f"{result['mean'] * 1000:.1f}",
+            f"{result['max'] * 1000:.1f}",
+            f"{result['last_model'] * 1000:.0f}",
+            f"{result['models']:.0f}/{args.models}",
+            f"{result['model_mb']:.0f}",
+        ])
+
+    print(
+        f"{args.models} models of {args.size:g} MB, {args.controls} alive messages every {args.interval * 1000:g} ms, "
+        f"{args.framing} framing\n"
+    )
+    print_table(["mode", "alive mean ms", "alive max ms", "last model ms", "models received", "model MB"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", type=int, default=4, help="Models of consecutive rounds sent to the neighbour")
+    parser.add_argument("--size", type=float, default=20, help="Size of each model, in MB")
+    parser.add_argument("--controls", type=int, default=50, help="Alive messages sent during the transfer")
+    parser.add_argument("--interval", type=float, default=0.002, help="Seconds between alive messages")
+    parser.add_argument("--framing", choices=("large", "legacy"), default="large")
+    parser.add_argument("--repeat", type=int, default=3, help="Measured runs of each mode")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,134 @@
+"""
+Bytes sent and JSON parsing CPU of the status reports of the nodes, with full configurations or delta reports.
+
+`--nodes` nodes built from `participant.json.example` report their status every tick for `--ticks` ticks (one tick
+is `report_frequency` seconds). The round advances every `--round-ticks` ticks, the neighbours of a node change
+every `--neighbor-ticks` ticks and a `--mobile` fraction of the nodes moves every tick:
+  - full: every report is the whole configuration of the node (the previous reports), from which the controller
+    extracts the status.
+  - delta: reports carry the fields changed since the last acknowledged report (`StatusEncoder`), with a full
+    snapshot every `status_snapshot_interval` reports, and the controller applies them (`StatusDecoder`).
+
+Reports the bytes sent per tick and the CPU time the controller spends parsing and applying the reports of a tick,
+both per 100 nodes.
+
+Usage:
+    python -m analysis.benchmarks.status_reports [--nodes 100] [--ticks 120] [--round-ticks 6] [--mobile 0.2]
+"""
+
+import argparse
+import copy
+import json
+import os
+import time
+
+from analysis.benchmarks.utils import print_table
+from nebula.addons.statusreport import SNAPSHOT_INTERVAL, StatusDecoder, StatusEncoder, status_snapshot
+
+EXAMPLE_CONFIG = os.path.join(os.path.dirname(__file__), "..", "..", "nebula", "frontend", "config")
+
+
+def make_configs(nodes: int) -> list[dict]:
+    with open(os.path.join(EXAMPLE_CONFIG, "participant.json.example")) as f:
+        example = json.load(f)
+    configs = []
+    for idx in range(nodes):
+        config = copy.deepcopy(example)
+        config["device_args"].update({"idx": idx, "uid": f"{idx:064x}", "role": "trainer"})
+        config["network_args"].update({"ip": f"192.168.{idx // 250}.{idx % 250 + 2}", "port": 45000 + idx})
+        config["scenario_args"]["name"] = "benchmark"
+        config["mobility_args"].update({"latitude": 38.023522, "longitude": -1.174389})
+        configs.append(config)
+    return configs
+
+
+def advance(configs: list[dict], tick: int, args):
+    for idx, config in enumerate(configs):
+        if tick % args.round_ticks == 0:
+            config["federation_args"]["round"] = tick // args.round_ticks
+        if (tick + idx) % args.neighbor_ticks == 0:
+            neighbors = [(idx + k * (tick + 1)) % len(configs) for k in range(1, 4)]
+            config["network_args"]["neighbors"] = " ".join(f"192.168.0.{n + 2}:{45000 + n}" for n in neighbors)
+            config["mobility_args"]["neighbors_distance"] = {f"192.168.0.{n + 2}:{45000 + n}": 0.1 for n in neighbors}
+        if idx < args.mobile * len(configs):
+            config["mobility_args"]["latitude"] += 1e-5
+            config["mobility_args"]["longitude"] -= 1e-5
+
+
+def run_full(configs: list[dict], args) -> tuple[int, float]:
+    sent, cpu = 0, 0.0
+    for tick in range(args.ticks):
+        advance(configs, tick, args)
+        payloads = [json.dumps(config) for config in configs]
+        sent += sum(len(payload) for payload in payloads)
+        start = time.process_time()
+        for payload in payloads:
+            status_snapshot(json.loads(payload))
+        cpu += time.process_time() - start
+    return sent, cpu
+
+
+def run_delta(configs: list[dict], args) -> tuple[int, float]:
+    encoders = [StatusEncoder(args.snapshot_interval) for _ in configs]
+    decoder = StatusDecoder()
+    sent, cpu = 0, 0.0
+    for tick in range(args.ticks):
+        advance(configs, tick, args)
+        reports = [encoder.encode(status_snapshot(config)) for encoder, config in zip(encoders, configs, strict=True)]
+        payloads = [json.dumps(report) for report in reports]
+        sent += sum(len(payload) for payload in payloads)
+        start = time.process_time()
+        for payload in payloads:
+            decoder.apply(json.loads(payload))
+        cpu += time.process_time() - start
+        for encoder, report in zip(encoders, reports, strict=True):
+            encoder.ack(report["version"])
+    return sent, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=100, help="Nodes reporting")
+    parser.add_argument("--ticks", type=int, default=120, help="Reports of each node")
+    parser.add_argument("--round-ticks", type=int, default=6, help="Ticks per round")
+    parser.add_argument("--neighbor-ticks", type=int, default=30, help="Ticks between changes of neighbours")
+    parser.add_argument("--mobile", type=float, default=0.2, help="Fraction of the nodes moving")
+    parser.add_argument("--snapshot-interval", type=int, default=SNAPSHOT_INTERVAL, help="Reports between snapshots")
+    args = parser.parse_args()
+
+    scale = 100 / (args.nodes * args.ticks)
+    results = {
+        "full": run_full(make_configs(args.nodes), args),
+        "delta": run_delta(make_configs(args.nodes), args),
+    }
+    full_sent, full_cpu = results["full"]
+    rows = []
+    for mode, (sent, cpu) in results.items():
+        rows.append([
+            mode,
+            f"{sent * scale / 1024:.1f}",
+            f"{sent / (args.nodes * args.ticks):.0f}",
+            f"{cpu * scale * 1000:.2f}",
+            f"{(full_sent - sent) * scale / 1024:.1f}",
+            f"{(full_cpu - cpu) * scale * 1000:.2f}",
+        ])
+
+    print(
+        f"{args.nodes} nodes, {args.ticks} ticks, round every {args.round_ticks} ticks, "
+        f"{args.mobile:.0%} of the nodes moving, snapshot every {args.snapshot_interval} reports\n"
+    )
+    print_table(
+        [
+            "mode",
+            "KiB/tick per 100 nodes",
+            "bytes/report",
+            "parse ms/tick per 100 nodes",
+            "KiB saved",
+            "parse ms saved",
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Event-loop stalls and CPU cost of reading system resources, on demand (previous behaviour) and from the
+background `SystemMonitor`.
+
+  - on demand: `psutil.cpu_percent(interval=1)` called on the event loop, as `get_cpu_usage` used to do.
+  - monitor: the monitor samples every `--interval` seconds off the loop, while readers call
+    `get_system_resources` (CPU, per-core CPU, memory, swap, network and GPU usage) every 10 ms.
+
+`LoopLagMonitor` measures how late the loop wakes up a task sleeping for a short interval. The CPU cost of the
+monitor is measured in a separate run without readers: the CPU time of the process divided by the wall time,
+minus the same ratio measured while the loop is idle.
+
+The benchmark exits with status 1 if the monitor stalls the loop for more than `--max-stall` or costs more than
+`--max-cpu` of a core.
+
+Usage:
+    python -m analysis.benchmarks.system_monitor [--duration 10] [--interval 1] [--max-stall 0.05] [--max-cpu 0.01]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import psutil
+
+from analysis.benchmarks.utils import print_table
+from nebula.core.situationalawareness.awareness.sautils.sasystemmonitor import SystemMonitor
+from nebula.core.utils.looplag import LoopLagMonitor
+
+PROBE_INTERVAL = 0.005
+READ_INTERVAL = 0.01
+
+
+async def _cpu(duration: float, interval: float | None) -> float:
+    monitor = SystemMonitor(interval=interval) if interval is not None else None
+    start_cpu, start = time.process_time(), time.monotonic()
+    if monitor is not None:
+        await monitor.start("benchmark")
+    await asyncio.sleep(duration)
+    if monitor is not None:
+        await monitor.stop("benchmark")
+    return (time.process_time() - start_cpu) / (time.monotonic() - start)
+
+
+async def _on_demand(calls: int) -> tuple[float, float]:
+    lag = LoopLagMonitor(interval=PROBE_INTERVAL)
+    await lag.start()
+    await asyncio.sleep(PROBE_INTERVAL * 4)
+    start = time.monotonic()
+    for _ in range(calls):
+        psutil.cpu_percent(interval=1)
+        await asyncio.sleep(0)
+    elapsed = time.monotonic() - start
+    await asyncio.sleep(PROBE_INTERVAL * 4)
+    await lag.stop()
+    return elapsed / calls, lag.get_stats().max
+
+
+async def _monitor(duration: float, interval: float) -> tuple[float, float, int, int]:
+    lag = LoopLagMonitor(interval=PROBE_INTERVAL)
+    await lag.start()
+    monitor = SystemMonitor(interval=interval)
+    start = time.monotonic()
+    await monitor.start("benchmark")
+    reads, read_time = 0, 0.0
+    while time.monotonic() - start < duration:
+        read_start = time.perf_counter()
+        await monitor.get_system_resources()
+        read_time += time.perf_counter() - read_start
+        reads += 1
+        await asyncio.sleep(READ_INTERVAL)
+    await monitor.stop("benchmark")
+    await lag.stop()
+    return read_time / reads, lag.get_stats().max, reads, len(monitor.get_window(duration + 1))
+
+
+def main(duration: float, interval: float, max_stall: float, max_cpu: float) -> int:
+    demand_time, demand_lag = asyncio.run(_on_demand(2))
+    read_time, monitor_lag, reads, samples = asyncio.run(_monitor(duration, interval))
+    cost = max(0.0, asyncio.run(_cpu(duration, interval)) - asyncio.run(_cpu(duration, None)))
+
+    print(f"{duration:g} s run, monitor sampling every {interval:g} s, {reads} reads, {samples} samples\n")
+    print_table(
+        ["mode", "read ms", "max loop lag ms", "CPU (% of a core)"],
+        [
+            ["on demand", f"{demand_time * 1000:.1f}", f"{demand_lag * 1000:.1f}", "-"],
+            ["monitor", f"{read_time * 1000:.3f}", f"{monitor_lag * 1000:.1f}", f"{cost:.2%}"],
+        ],
+    )
+    status = 0
+    if monitor_lag > max_stall:
+        print(f"\nFAIL: max loop lag with the monitor {monitor_lag * 1000:.1f} ms > {max_stall * 1000:.1f} ms")
+        status = 1
+    if cost > max_cpu:
+        print(f"\nFAIL: monitor CPU cost {cost:.2%} > {max_cpu:.2%}")
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10, help="Seconds the monitor runs")
+    parser.add_argument("--interval", type=float, default=1, help="Seconds between samples")
+    parser.add_argument("--max-stall", type=float, default=0.05, help="Maximum loop lag allowed (seconds)")
+    parser.add_argument("--max-cpu", type=float, default=0.01, help="Maximum CPU cost allowed (fraction of a core)")
+    args = parser.parse_args()
+    sys.exit(main(args.duration, args.interval, args.max_stall, args.max_cpu))
@@ -0,0 +1,112 @@
+"""
+Training throughput of a partition with and without the tensor cache of the partition handlers.
+
+An MNIST-shaped and a CIFAR-shaped partition of random pixels are written as arrays (as the controller does) and
+loaded with the handler of the dataset. The training DataLoader of a `DataModule` (num_workers=0, as configured
+by default) is iterated for `--epochs` epochs:
+  - per-sample: every sample goes through `Image.fromarray` and the torchvision transform of the handler.
+  - tensor cache: batches are gathered from a uint8 tensor and transformed at once (`data_args.tensor_cache`).
+
+Samples per second are reported for the DataLoader alone and for a training step (forward, backward and
+optimizer step) of the bundled CNN of the dataset.
+
+Usage:
+    python -m analysis.benchmarks.tensor_cache [--samples 6000] [--epochs 2] [--datasets mnist cifar10]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import h5py
+import numpy as np
+import torch
+
+from analysis.benchmarks.partition_format import DATASETS, RandomImages
+from analysis.benchmarks.utils import print_table
+from nebula.core.datasets.datamodule import DataModule
+from nebula.core.datasets.nebuladataset import NebulaDataset
+from nebula.core.models.cifar10.cnn import CIFAR10ModelCNN
+from nebula.core.models.mnist.cnn import MNISTModelCNN
+
+MODELS = {"mnist": MNISTModelCNN, "cifar10": CIFAR10ModelCNN}
+BATCH_SIZE = 32
+
+
+def write_partition(path: str, name: str, samples: int) -> str:
+    train_shape, _, mode, _ = DATASETS[name]
+    dataset = RandomImages((samples, *train_shape[1:]), mode, seed=0)
+    file_name = os.path.join(path, f"{name}_train.h5")
+    with h5py.File(file_name, "w") as f:
+        NebulaDataset.__new__(NebulaDataset).save_samples(dataset, range(samples), f, "train_data")
+        f.create_dataset("train_targets", data=np.array(dataset.targets))
+    return file_name
+
+
+def measure(handler, file_name: str, model, tensor_cache: bool, epochs: int) -> tuple[float, float]:
+    train_set = handler(file_name, "train", config=None)
+    indices = list(range(len(train_set)))
+    datamodule = DataModule(
+        train_set, indices, train_set, indices, train_set, indices, None, BATCH_SIZE, tensor_cache=tensor_cache
+    )
+    datamodule.setup("fit")
+    loader = datamodule.train_dataloader()
+    optimizer = model.configure_optimizers()
+    criterion = torch.nn.CrossEntropyLoss()
+
+    samples, start = 0, time.perf_counter()
+    for _ in range(epochs):
+        for x, _ in loader:
+            samples += len(x)
+    loading = samples / (time.perf_counter() - start)
+
+    samples, start = 0, time.perf_counter()
+    for _ in range(epochs):
+        for x, y in loader:
+            optimizer.zero_grad()
+            criterion(model(x), y).backward()
+            optimizer.step()
+            samples += len(x)
+    training = samples / (time.perf_counter() - start)
+    return loading, training
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=6000, help="Samples of the partition")
+    parser.add_argument("--epochs", type=int, default=2, help="Epochs measured")
+    parser.add_argument("--datasets", nargs="+", choices=list(MODELS), default=list(MODELS))
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    rows = []
+    path = tempfile.mkdtemp(prefix="nebula_tensor_cache_")
+    try:
+        for name in args.datasets:
+            file_name = write_partition(path, name, args.samples)
+            handler, model = DATASETS[name][3], MODELS[name]()
+            results = {}
+            for tensor_cache in (False, True):
+                # Warm-up epoch, then the measured ones
+                measure(handler, file_name, model, tensor_cache, 1)
+                results[tensor_cache] = measure(handler, file_name, model, tensor_cache, args.epochs)
+            for tensor_cache, (loading, training) in results.items():
+                rows.append([
+                    name,
+                    "tensor cache" if tensor_cache else "per-sample",
+                    f"{loading:,.0f}",
+                    f"{loading / results[False][0]:.1f}x",
+                    f"{training:,.0f}",
+                    f"{training / results[False][1]:.2f}x",
+                ])
+    finally:
+        shutil.rmtree(path)
+
+    print(f"{args.samples} samples, batch size {BATCH_SIZE}, {args.epochs} epochs, {torch.get_num_threads()} threads\n")
+    print_table(["dataset", "mode", "loader samples/s", "speedup", "train samples/s", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
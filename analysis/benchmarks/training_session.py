@@ -0,0 +1,170 @@
+"""
+Per-round overhead of the local training, with a new Lightning trainer per round or a persistent session.
+
+An MNIST-shaped partition of random pixels is trained for `--rounds` rounds of `--epochs` epochs with the MNIST MLP,
+following the calls a node makes each round (data module setup, a test and a training run, round end):
+  - per-round: a new trainer (and logger) for every run, loaders recreated and workers restarted each time.
+  - persistent: one trainer, loaders and workers kept across rounds (`training_args.persistent_session`).
+
+Both modes run with the loaders in the main process and with `--workers` worker processes. Reports the round time,
+the setup overhead measured by the trainer (trainer creation, data module setup and time until the first batch of
+the training and test runs) and the trainers created.
+
+Usage:
+    python -m analysis.benchmarks.training_session [--samples 2000] [--rounds 10] [--epochs 1] [--workers 2]
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import warnings
+from types import SimpleNamespace
+
+import torch
+from lightning.pytorch.loggers import Logger
+
+from analysis.benchmarks.tensor_cache import write_partition
+from analysis.benchmarks.utils import print_table
+from nebula.core.datasets.datamodule import DataModule
+from nebula.core.datasets.mnist.mnist import MNISTPartitionHandler
+from nebula.core.models.mnist.mlp import MNISTModelMLP
+from nebula.core.training.lightning import Lightning
+
+BATCH_SIZE = 32
+
+
+class MemoryLogger(Logger):
+    """Logger with the interface of `NebulaTensorBoardLogger` that discards the metrics."""
+
+    def __init__(self):
+        super().__init__()
+        self.local_step = 0
+        self.global_step = 0
+
+    @property
+    def name(self):
+        return "memory"
+
+    @property
+    def version(self):
+        return 0
+
+    def log_metrics(self, metrics, step=None):
+        pass
+
+    def log_hyperparams(self, params, *args, **kwargs):
+        pass
+
+    def log_data(self, data, step=None):
+        pass
+
+    def log_figure(self, figure, step=None, name=None):
+        pass
+
+
+class BenchmarkLightning(Lightning):
+    def create_logger(self):
+        self._logger = MemoryLogger()
+
+
+def make_config(persistent: bool, log_dir: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        participant={
+            "scenario_args": {"name": "benchmark", "random_seed": 42, "start_time": "0"},
+            "device_args": {"idx": 0, "accelerator": "cpu", "gpu_id": []},
+            "tracking_args": {"log_dir": log_dir, "local_tracking": "basic"},
+            "training_args": {"persistent_session": persistent},
+        }
+    )
+
+
+def run(file_name: str, log_dir: str, persistent: bool, workers: int, rounds: int, epochs: int) -> list[tuple]:
+    train_set = MNISTPartitionHandler(file_name, "train", config=None)
+    indices = list(range(len(train_set)))
+    datamodule = DataModule(
+        train_set,
+        indices,
+        train_set,
+        indices[: len(indices) // 4],
+        train_set,
+        indices[: len(indices) // 4],
+        None,
+        BATCH_SIZE,
+        num_workers=workers,
+        tensor_cache=True,
+        persistent=persistent,
+    )
+    trainer = BenchmarkLightning(MNISTModelMLP(), datamodule, config=make_config(persistent, log_dir))
+    trainer.set_epochs(epochs)
+    results = []
+    try:
+        trainer.create_trainer()
+        for _ in range(rounds):
+            start = time.perf_counter()
+            # The calls of a node during a round (see Engine._learning_cycle and the roles of the node)
+            trainer.on_round_start()
+            trainer.create_trainer()
+            trainer._test_sync()
+            trainer.create_trainer()
+            trainer._train_sync()
+            trainer.on_round_end()
+            stats = trainer.get_setup_stats(reset=True)
+            results.append((time.perf_counter() - start, stats.total, stats.trainers_created))
+    finally:
+        datamodule.close_loaders()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=2000, help="Samples of the partition")
+    parser.add_argument("--rounds", type=int, default=10, help="Rounds measured")
+    parser.add_argument("--epochs", type=int, default=1, help="Epochs per round")
+    parser.add_argument("--workers", type=int, default=2, help="DataLoader worker processes")
+    args = parser.parse_args()
+
+    # Lightning reports every run it starts
+    for name in ("lightning", "lightning.pytorch", "lightning.fabric"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    warnings.filterwarnings("ignore")
+    torch.manual_seed(0)
+    rows = []
+    path = tempfile.mkdtemp(prefix="nebula_training_session_")
+    try:
+        file_name = write_partition(path, "mnist", args.samples)
+        for workers in sorted({0, args.workers}):
+            results = {}
+            for persistent in (False, True):
+                # The first round pays one-off costs (imports, first trainer, first workers): reported apart
+                first, *rest = run(file_name, path, persistent, workers, args.rounds + 1, args.epochs)
+                results[persistent] = (first, rest)
+            for persistent, (first, rest) in results.items():
+                round_time, setup, created = (list(column) for column in zip(*rest))
+                rows.append([
+                    workers,
+                    "persistent" if persistent else "per-round",
+                    f"{first[0] * 1000:.0f}",
+                    f"{statistics.mean(round_time) * 1000:.0f}",
+                    f"{statistics.mean(setup) * 1000:.0f}",
+                    f"{statistics.mean(setup) / statistics.mean(round_time):.0%}",
+                    f"{sum(created) / len(created):.0f}",
+                ])
+    finally:
+        shutil.rmtree(path)
+
+    print(
+        f"{args.samples} samples, batch size {BATCH_SIZE}, {args.rounds} rounds of {args.epochs} epochs, "
+        f"{os.cpu_count()} CPUs\n"
+    )
+    print_table(
+        ["workers", "mode", "first round ms", "round ms", "setup ms", "setup share", "trainers/round"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
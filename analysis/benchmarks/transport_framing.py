@@ -0,0 +1,77 @@
+"""
+Throughput of the legacy chunked framing versus the negotiated large-frame transport.
+
+Each bundled model is serialized and sent over a loopback TCP connection using
+`Connection._send_chunks`, and reassembled on the other side with the same read path
+used by `Connection.handle_incoming_message`.
+
+Usage:
+    python -m analysis.benchmarks.transport_framing [--repeat 3]
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from analysis.benchmarks.utils import iter_bundled_models, print_table, serialize_state_dict
+from nebula.core.network.connection import Connection
+
+
+async def _receive(conn: Connection, expected: int):
+    buffer = bytearray(conn.MAX_CHUNK_SIZE)
+    for _ in range(expected):
+        while True:
+            header = await conn._read_exactly(conn.HEADER_SIZE)
+            message_id, chunk_index, is_last_chunk, is_large_frame = conn._parse_header(header)
+            if is_large_frame:
+                await conn._read_frame(message_id, chunk_index)
+            else:
+                conn._store_chunk(message_id, chunk_index, await conn._read_chunk(buffer), is_last_chunk)
+            if is_last_chunk:
+                await conn._process_complete_message(message_id)
+                await conn.pending_messages_queue.get()
+                break
+
+
+async def _measure(payload: bytes, large_frames: bool, repeat: int) -> float:
+    accepted = asyncio.get_running_loop().create_future()
+    server = await asyncio.start_server(lambda r, w: accepted.set_result((r, w)), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    peer_reader, peer_writer = await accepted
+
+    sender = Connection(reader, writer, "sender", "127.0.0.1", port)
+    receiver = Connection(peer_reader, peer_writer, "receiver", "127.0.0.1", port)
+    if large_frames:
+        sender._peer_frame_size = receiver.MAX_FRAME_SIZE
+
+    data = receiver.DATA_TYPE_PREFIXES["bytes"] + payload
+    start = time.perf_counter()
+    receive_task = asyncio.create_task(_receive(receiver, repeat))
+    for _ in range(repeat):
+        await sender._send_chunks(uuid.uuid4().bytes, data)
+    await receive_task
+    elapsed = time.perf_counter() - start
+
+    writer.close()
+    peer_writer.close()
+    server.close()
+    return len(payload) * repeat / elapsed / (1024**2)
+
+
+async def main(repeat: int):
+    rows = []
+    for name, model in iter_bundled_models():
+        payload = serialize_state_dict(model.state_dict())
+        legacy = await _measure(payload, large_frames=False, repeat=repeat)
+        large = await _measure(payload, large_frames=True, repeat=repeat)
+        rows.append((name, f"{len(payload) / (1024**2):.2f}", f"{legacy:.1f}", f"{large:.1f}", f"{large / legacy:.1f}x"))
+    print_table(["model", "size (MB)", "legacy (MB/s)", "large frames (MB/s)", "speed-up"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="messages sent per model and framing mode")
+    args = parser.parse_args()
+    asyncio.run(main(args.repeat))
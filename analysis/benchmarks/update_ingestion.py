@@ -0,0 +1,98 @@
+"""
+Event-loop latency while a burst of large model updates is decoded.
+
+A probe task sleeps for a short interval in a loop and records how late it wakes up, which is the
+delay that heartbeats, beacons and connection reads would suffer. Meanwhile `--updates` serialized
+models arrive at the same time and are decoded either directly on the event loop (as the engine
+used to do) or through `UpdateIngestor`.
+
+The benchmark exits with status 1 if the worst lag measured with the ingestor exceeds `--threshold`.
+
+Usage:
+    python -m analysis.benchmarks.update_ingestion [--updates 20] [--size 50] [--workers 2] [--threshold 0.1]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import torch
+
+from analysis.benchmarks.utils import print_table, serialize_state_dict
+from nebula.core.training.lightning import Lightning
+from nebula.core.training.updateingestor import UpdateIngestor
+
+PROBE_INTERVAL = 0.005
+
+
+class _Trainer:
+    deserialize_model = Lightning.deserialize_model
+
+
+async def _probe(lags: list[float], stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def _run(payloads: list[bytes], ingestor: UpdateIngestor | None) -> tuple[float, list[float]]:
+    trainer = _Trainer()
+
+    async def on_loop(data):
+        return trainer.deserialize_model(data)
+
+    decode = ingestor.deserialize if ingestor is not None else on_loop
+    lags, stop = [], asyncio.Event()
+    probe = asyncio.create_task(_probe(lags, stop))
+    await asyncio.sleep(PROBE_INTERVAL * 2)
+    start = time.perf_counter()
+    await asyncio.gather(*(decode(data) for data in payloads))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    return elapsed, lags
+
+
+def main(updates: int, size: int, workers: int, max_pending: int, threshold: float) -> int:
+    state_dict = {f"layer{i}.weight": torch.randn(size * 1024 * 1024 // 4 // 10) for i in range(10)}
+    payloads = [serialize_state_dict(state_dict) for _ in range(updates)]
+
+    rows = []
+    elapsed, lags = asyncio.run(_run(payloads, None))
+    rows.append(["event loop", f"{elapsed:.3f}", f"{max(lags) * 1000:.1f}", f"{sorted(lags)[len(lags) // 2] * 1000:.1f}"])
+
+    async def with_ingestor():
+        ingestor = UpdateIngestor(_Trainer(), max_workers=workers, max_pending=max_pending)
+        try:
+            return await _run(payloads, ingestor), ingestor.get_stats(None)
+        finally:
+            ingestor.shutdown()
+
+    (elapsed, lags), stats = asyncio.run(with_ingestor())
+    worst = max(lags)
+    rows.append([f"ingestor ({workers} workers)", f"{elapsed:.3f}", f"{worst * 1000:.1f}", f"{sorted(lags)[len(lags) // 2] * 1000:.1f}"])
+
+    print(f"{updates} updates of {size} MB arriving together\n")
+    print_table(["Decoding", "Total (s)", "Max lag (ms)", "Median lag (ms)"], rows)
+    print(
+        f"\nIngestor stages: wait {stats.wait:.3f}s, decompress {stats.decompress:.3f}s, "
+        f"unpickle {stats.unpickle:.3f}s, materialize {stats.materialize:.3f}s, max update {stats.max_total:.3f}s"
+    )
+    if worst > threshold:
+        print(f"\nFAIL: max loop lag {worst * 1000:.1f} ms exceeds {threshold * 1000:.1f} ms")
+        return 1
+    print(f"\nOK: max loop lag {worst * 1000:.1f} ms below {threshold * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=20, help="Number of updates arriving together")
+    parser.add_argument("--size", type=int, default=50, help="Size of each update in MB")
+    parser.add_argument("--workers", type=int, default=2, help="Ingestor worker threads")
+    parser.add_argument("--max-pending", type=int, default=4, help="Ingestor maximum pending updates")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Maximum acceptable loop lag in seconds")
+    args = parser.parse_args()
+    sys.exit(main(args.updates, args.size, args.workers, args.max_pending, args.threshold))
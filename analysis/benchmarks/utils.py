@@ -0,0 +1,93 @@
+import importlib
+import inspect
+import io
+import pkgutil
+import time
+from types import SimpleNamespace
+
+import torch
+
+import nebula.core.models
+from nebula.core.models.nebulamodel import NebulaModel
+
+
+def iter_bundled_models():
+    """
+    Yield every model bundled in `nebula/core/models` that can be built with its default arguments.
+
+    Yields:
+        tuple[str, NebulaModel]: The model name (dataset/class) and an instance of the model.
+    """
+    for module_info in pkgutil.walk_packages(nebula.core.models.__path__, nebula.core.models.__name__ + "."):
+        module = importlib.import_module(module_info.name)
+        for name, cls in inspect.getmembers(module, inspect.isclass):
+            if not issubclass(cls, NebulaModel) or cls is NebulaModel or cls.__module__ != module.__name__:
+                continue
+            try:
+                model = cls()
+            except Exception as e:
+                print(f"Skipping {name}: {e}")
+                continue
+            yield f"{module_info.name.split('.')[-2]}/{name}", model
+
+
+def make_config(**aggregator_args) -> SimpleNamespace:
+    """
+    Build the minimal participant configuration needed to instantiate an aggregator outside a node.
+
+    Args:
+        **aggregator_args: Entries of `aggregator_args` (e.g., krum_f=2).
+
+    Returns:
+        SimpleNamespace: Object exposing a `participant` dictionary, like `Config`.
+    """
+    return SimpleNamespace(
+        participant={
+            "network_args": {"addr": "127.0.0.1:45000"},
+            "scenario_args": {"federation": "DFL"},
+            "aggregator_args": {"aggregation_timeout": 60, **aggregator_args},
+            "defense_args": {"reputation": {"enabled": False}},
+        }
+    )
+
+
+def serialize_state_dict(state_dict) -> bytes:
+    """
+    Serialize a state_dict with `torch.save` (no compression).
+
+    Args:
+        state_dict (dict): The model parameters.
+
+    Returns:
+        bytes: The serialized parameters.
+    """
+    buffer = io.BytesIO()
+    torch.save(state_dict, buffer)
+    return buffer.getvalue()
+
+
+def timeit(fn, *args, repeat=3, **kwargs):
+    """
+    Run `fn` several times and return the best wall-clock time with the last result.
+
+    Returns:
+        tuple[float, Any]: Best elapsed time in seconds and the value returned by `fn`.
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def print_table(headers, rows):
+    """
+    Print rows as a fixed-width text table.
+    """
+    widths = [max([len(str(h))] + [len(str(r[i])) for r in rows]) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths, strict=False)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths, strict=False)))
@@ -0,0 +1,169 @@
+"""
+Delivery of the frontend broadcasts to 50 WebSocket clients when one of them is slow.
+
+`--nodes` nodes send a node update every `--interval` seconds for `--duration` seconds, each one broadcast to
+`--clients` simulated WebSocket clients from its own request task (as the frontend does). Sending a message to a
+client takes `--send-ms` milliseconds, except for one client in the middle of the list, which takes `--slow-ms`:
+  - legacy: the previous `ConnectionManager`, which awaits the send to each client one after another and keeps
+    every message in a dict keyed by its second.
+  - broadcaster: `Broadcaster`, with a bounded queue and a delivery task per client, where the latest update of a
+    node replaces its pending one, and a history of numbered messages.
+
+Reports the time the update requests wait for the broadcast, the delay until the other clients receive an update,
+the updates the slow client receives, the messages still pending for it at the end and the messages kept in the
+history.
+
+Usage:
+    python -m analysis.benchmarks.websocket_broadcast [--clients 50] [--nodes 100] [--duration 5] [--slow-ms 200]
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import statistics
+import time
+
+from analysis.benchmarks.utils import print_table
+from nebula.frontend.broadcaster import Broadcaster
+
+
+class LegacyConnectionManager:
+    def __init__(self):
+        self.historic_messages = {}
+        self.active_connections = []
+
+    def add_message(self, message):
+        current_timestamp = datetime.datetime.fromtimestamp(time.time()).strftime("%Y-%m-%d %H:%M:%S")
+        self.historic_messages.update({current_timestamp: json.loads(message)})
+
+    async def broadcast(self, message: str):
+        self.add_message(message)
+        for connection in self.active_connections:
+            await connection.send_text(message)
+
+
+class SimulatedClient:
+    """WebSocket whose sends take `delay` seconds, one at a time, recording when each update arrives."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.delays: list[float] = []
+        self._lock = asyncio.Lock()
+
+    async def send_text(self, text: str):
+        async with self._lock:
+            await asyncio.sleep(self.delay)
+        message = json.loads(text)
+        now = time.perf_counter()
+        self.delays.append(now - message["sent_at"])
+
+
+def percentile(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+
+async def run(manager, args) -> dict:
+    clients = [SimulatedClient(args.send_ms / 1000) for _ in range(args.clients)]
+    slow = clients[len(clients) // 2]
+    slow.delay = args.slow_ms / 1000
+    if isinstance(manager, Broadcaster):
+        for client in clients:
+            manager.register(client)
+    else:
+        manager.active_connections = list(clients)
+
+    waits, requests = [], {}
+
+    async def request(uid: int, start: float):
+        update = {"type": "node_update", "scenario_name": "benchmark", "uid": uid, "round": 0, "sent_at": start}
+        await manager.broadcast(json.dumps(update))
+        waits.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    updates = 0
+    while time.perf_counter() - start < args.duration:
+        for uid in range(args.nodes):
+            task_start = time.perf_counter()
+            task = asyncio.create_task(request(uid, task_start))
+            requests[task] = task_start
+            task.add_done_callback(requests.pop)
+            updates += 1
+        await asyncio.sleep(args.interval)
+    end = time.perf_counter()
+    # Messages waiting to be sent to the slow client: a pending request each (legacy) or its queue (broadcaster)
+    backlog = len(manager._clients[slow][0]) if isinstance(manager, Broadcaster) else len(requests)
+    # Requests still waiting when the run ends count as waiting until then
+    for task, task_start in list(requests.items()):
+        waits.append(end - task_start)
+        task.cancel()
+    if isinstance(manager, Broadcaster):
+        for client in clients:
+            manager.disconnect(client)
+    others = [delay for client in clients if client is not slow for delay in client.delays]
+    return {
+        "updates": updates,
+        "waits": waits,
+        "others": others,
+        "slow_received": len(slow.delays),
+        "slow_backlog": backlog,
+        "history": len(manager.history) if isinstance(manager, Broadcaster) else len(manager.historic_messages),
+    }
+
+
+async def run_all(args) -> list[list]:
+    rows = []
+    for name, manager in (("legacy", LegacyConnectionManager()), ("broadcaster", Broadcaster())):
+        result = await run(manager, args)
+        rows.append([
+            name,
+            result["updates"],
+            f"{percentile(result['waits'], 50) * 1000:.1f}",
+            f"{percentile(result['waits'], 99) * 1000:.1f}",
+            f"{percentile(result['others'], 50) * 1000:.1f}" if result["others"] else "-",
+            f"{percentile(result['others'], 99) * 1000:.1f}" if result["others"] else "-",
+            len(result["others"]),
+            result["slow_received"],
+            result["slow_backlog"],
+            result["history"],
+        ])
+        if isinstance(manager, Broadcaster):
+            stats = manager.get_stats()
+            print(f"broadcaster: {stats.merged} merged, {stats.dropped} dropped, {stats.sent} sent")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50, help="WebSocket clients")
+    parser.add_argument("--nodes", type=int, default=100, help="Nodes sending updates")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between the updates of a node")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds of updates")
+    parser.add_argument("--send-ms", type=float, default=0.0, help="Milliseconds to send a message to a client")
+    parser.add_argument("--slow-ms", type=float, default=200.0, help="Milliseconds to send a message to the slow one")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run_all(args))
+    print(
+        f"\n{args.clients} clients (1 taking {args.slow_ms:g} ms per message), {args.nodes} nodes updating every "
+        f"{args.interval:g} s for {args.duration:g} s\n"
+    )
+    print_table(
+        [
+            "mode",
+            "updates",
+            "request p50 ms",
+            "request p99 ms",
+            "others p50 ms",
+            "others p99 ms",
+            "others received",
+            "slow received",
+            "slow backlog",
+            "history",
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,11 @@ This package consists of several modules that handle different aspects of the ne
    - Responsible for collecting and reporting data during the simulation.
    - It tracks various system metrics, including node status and network performance, and periodically sends updates to a controller or dashboard for analysis and monitoring.
 
-5. `topologymanager.py`:
+5. `statusreport.py`:
+   - Defines the status reported by the nodes and encodes it as deltas over the last acknowledged report.
+   - It is shared by the reporter, the controller and the frontend, which apply the deltas to the status they know of each node.
+
+6. `topologymanager.py`:
    - Manages the topology of the network.
    - It handles the creation and maintenance of the network's structure (e.g., nodes and their connections), including generating different types of topologies like ring, random, or fully connected based on simulation parameters.
 
@@ -187,6 +187,9 @@ class NonTargetedSamplePoisoningStrategy(DataPoisoningStrategy):
             new_dataset.targets = np.array(new_dataset.targets)
         else:
             new_dataset.targets = new_dataset.targets.copy()
+        if isinstance(new_dataset.data, np.ndarray):
+            # Array partitions are mapped read-only, and poisoned samples are tensors
+            new_dataset.data = list(new_dataset.data)
 
         num_indices = len(indices)
         num_poisoned = int(poisoned_percent * num_indices / 100.0)
@@ -294,6 +297,9 @@ class TargetedSamplePoisoningStrategy(DataPoisoningStrategy):
             new_dataset.targets = np.array(new_dataset.targets)
         else:
             new_dataset.targets = new_dataset.targets.copy()
+        if isinstance(new_dataset.data, np.ndarray):
+            # Array partitions are mapped read-only, and poisoned samples are tensors
+            new_dataset.data = list(new_dataset.data)
 
         for i in indices:
             if int(new_dataset.targets[i]) == int(self.target_label):
@@ -1,14 +1,15 @@
 import asyncio
-import importlib
 import json
 import logging
-import os
 import sys
 from typing import TYPE_CHECKING
 
 import aiohttp
 import psutil
 
+from nebula.addons.statusreport import SNAPSHOT_INTERVAL, StatusEncoder, status_snapshot
+from nebula.core.situationalawareness.awareness.sautils.sasystemmonitor import SystemMonitor
+
 if TYPE_CHECKING:
     pass
 
@@ -69,6 +70,10 @@ class Reporter:
         self.acc_packets_recv = 0
         self._running = asyncio.Event()
         self._reporter_task = None  # Track the background task
+        self._system_monitor = SystemMonitor()
+        self._status_encoder = StatusEncoder(
+            self.config.participant["reporter_args"].get("status_snapshot_interval", SNAPSHOT_INTERVAL)
+        )
 
     @property
     def cm(self):
@@ -116,6 +121,7 @@ class Reporter:
             - The reporter loop runs in the background, ensuring continuous data updates.
         """
         self._running.set()
+        await self._system_monitor.start("reporter")
         await asyncio.sleep(self.grace_time)
         self._reporter_task = asyncio.create_task(self.run_reporter(), name="Reporter_run_reporter")
         return self._reporter_task
@@ -211,6 +217,7 @@ class Reporter:
                 pass
             self._reporter_task = None
             logging.info("🛑  Reporter background task cancelled")
+        await self._system_monitor.stop("reporter")
 
     async def __report_data_queue(self):
         """
@@ -243,12 +250,15 @@ class Reporter:
         """
         Sends the participant's status to the controller.
 
-        This asynchronous function transmits the current participant configuration to the controller's
-        URL endpoint. It handles both client and general exceptions to ensure robust communication
-        with the controller, retrying in case of errors.
+        This asynchronous function transmits the status of the participant (the fields of `STATUS_FIELDS`) to the
+        controller's URL endpoint. Only the fields changed since the last report acknowledged by the controller are
+        sent, with a full snapshot every `status_snapshot_interval` reports. It handles both client and general
+        exceptions to ensure robust communication with the controller, retrying in case of errors.
 
         Functionality:
-            - Initiates a session to post participant data to the controller.
+            - Encodes the status of the participant as a delta over the last acknowledged report.
+            - Initiates a session to post the report to the controller.
+            - Sends a full snapshot right away when the controller cannot apply the delta (status 409).
             - Logs the response status, indicating issues when status is non-200.
             - Retries after a short delay in case of connection errors or unhandled exceptions.
 
@@ -263,50 +273,58 @@ class Reporter:
             - Delays for 5 seconds upon general exceptions to avoid rapid retry loops.
         """
         try:
-            async with (
-                aiohttp.ClientSession() as session,
-                session.post(
-                    self.url,
-                    data=json.dumps(self.config.participant),
-                    headers={
-                        "Content-Type": "application/json",
-                        "User-Agent": f"NEBULA Participant {self.config.participant['device_args']['idx']}",
-                    },
-                ) as response,
-            ):
-                if response.status != 200:
-                    logging.error(
-                        f"Error received from controller: {response.status} (probably there is overhead in the controller, trying again in the next round)"
-                    )
-                    text = await response.text()
-                    logging.debug(text)
+            async with aiohttp.ClientSession() as session:
+                status = status_snapshot(self.config.participant)
+                response_status = await self.__post_status(session, self._status_encoder.encode(status))
+                if response_status == 409:
+                    # The controller lost track of this participant (e.g., it restarted)
+                    self._status_encoder.reset()
+                    await self.__post_status(session, self._status_encoder.encode(status))
         except aiohttp.ClientError:
             logging.exception(f"Error connecting to the controller at {self.url}")
         except Exception:
             logging.exception("Error sending status to controller, will try again in a few seconds")
             await asyncio.sleep(5)
 
+    async def __post_status(self, session, report):
+        async with session.post(
+            self.url,
+            data=json.dumps(report),
+            headers={
+                "Content-Type": "application/json",
+                "User-Agent": f"NEBULA Participant {self.config.participant['device_args']['idx']}",
+            },
+        ) as response:
+            if response.status == 200:
+                self._status_encoder.ack(report["version"])
+            elif response.status != 409:
+                logging.error(
+                    f"Error received from controller: {response.status} (probably there is overhead in the controller, trying again in the next round)"
+                )
+                text = await response.text()
+                logging.debug(text)
+            return response.status
+
     async def __report_resources(self):
         """
         Reports system resource usage metrics.
 
-        This asynchronous function gathers and logs CPU usage data for the participant's device,
-        and attempts to retrieve the CPU temperature (Linux systems only). Additionally, it measures
-        CPU usage specifically for the current process.
+        This asynchronous function logs the CPU, memory, network and GPU usage of the participant's device
+        and of the node process, and attempts to retrieve the CPU temperature (Linux systems only).
 
         Functionality:
-            - Gathers total CPU usage (percentage) and attempts to retrieve CPU temperature.
-            - Uses `psutil` for non-blocking access to system data on Linux.
-            - Records CPU usage of the current process for finer monitoring.
+            - Reads the latest sample of the `SystemMonitor`, which samples the resources in the background,
+              so no measurement interval has to be waited for.
+            - Attempts to retrieve the CPU temperature and the disk usage.
 
         Parameters:
             - None
 
         Notes:
             - On non-Linux platforms, CPU temperature will default to 0.
-            - Uses `asyncio.to_thread` to call CPU and sensor readings without blocking the event loop.
+            - Uses `asyncio.to_thread` to read the sensors without blocking the event loop.
         """
-        cpu_percent = psutil.cpu_percent()
+        sample = await self._system_monitor.get_latest()
         cpu_temp = 0
         try:
             if sys.platform == "linux":
@@ -315,23 +333,12 @@ class Reporter:
         except Exception:  # noqa: S110
             pass
 
-        pid = os.getpid()
-        cpu_percent_process = await asyncio.to_thread(psutil.Process(pid).cpu_percent, interval=1)
-
-        process = psutil.Process(pid)
-        memory_process = await asyncio.to_thread(lambda: process.memory_info().rss / (1024**2))
-        memory_percent_process = process.memory_percent()
-        memory_info = await asyncio.to_thread(psutil.virtual_memory)
-        memory_percent = memory_info.percent
-        memory_used = memory_info.used / (1024**2)
-
         disk_percent = psutil.disk_usage("/").percent
 
-        net_io_counters = await asyncio.to_thread(psutil.net_io_counters)
-        bytes_sent = net_io_counters.bytes_sent
-        bytes_recv = net_io_counters.bytes_recv
-        packets_sent = net_io_counters.packets_sent
-        packets_recv = net_io_counters.packets_recv
+        bytes_sent = sample.bytes_sent
+        bytes_recv = sample.bytes_recv
+        packets_sent = sample.packets_sent
+        packets_recv = sample.packets_recv
 
         if self.first_net_metrics:
             bytes_sent_diff = 0
@@ -358,13 +365,13 @@ class Reporter:
         current_connections = await self.cm.get_addrs_current_connections(only_direct=True)
 
         resources = {
-            "W-CPU/CPU global (%)": cpu_percent,
-            "W-CPU/CPU process (%)": cpu_percent_process,
+            "W-CPU/CPU global (%)": sample.cpu_percent,
+            "W-CPU/CPU process (%)": sample.process_cpu_percent,
             "W-CPU/CPU temperature (°)": cpu_temp,
-            "Z-RAM/RAM global (%)": memory_percent,
-            "Z-RAM/RAM global (MB)": memory_used,
-            "Z-RAM/RAM process (%)": memory_percent_process,
-            "Z-RAM/RAM process (MB)": memory_process,
+            "Z-RAM/RAM global (%)": sample.memory_percent,
+            "Z-RAM/RAM global (MB)": sample.memory_used,
+            "Z-RAM/RAM process (%)": sample.process_memory_percent,
+            "Z-RAM/RAM process (MB)": sample.process_memory,
             "Y-Disk/Disk (%)": disk_percent,
             "X-Network/Network (MB sent)": round(self.acc_bytes_sent / (1024**2), 3),
             "X-Network/Network (MB received)": round(self.acc_bytes_recv / (1024**2), 3),
@@ -374,37 +381,15 @@ class Reporter:
         }
         self.trainer.logger.log_data(resources)
 
-        if importlib.util.find_spec("pynvml") is not None:
-            try:
-                import pynvml
-
-                await asyncio.to_thread(pynvml.nvmlInit)
-                devices = await asyncio.to_thread(pynvml.nvmlDeviceGetCount)
-                for i in range(devices):
-                    handle = await asyncio.to_thread(pynvml.nvmlDeviceGetHandleByIndex, i)
-                    gpu_percent = (await asyncio.to_thread(pynvml.nvmlDeviceGetUtilizationRates, handle)).gpu
-                    gpu_temp = await asyncio.to_thread(
-                        pynvml.nvmlDeviceGetTemperature,
-                        handle,
-                        pynvml.NVML_TEMPERATURE_GPU,
-                    )
-                    gpu_mem = await asyncio.to_thread(pynvml.nvmlDeviceGetMemoryInfo, handle)
-                    gpu_mem_percent = round(gpu_mem.used / gpu_mem.total * 100, 3)
-                    gpu_power = await asyncio.to_thread(pynvml.nvmlDeviceGetPowerUsage, handle) / 1000.0
-                    gpu_clocks = await asyncio.to_thread(pynvml.nvmlDeviceGetClockInfo, handle, pynvml.NVML_CLOCK_SM)
-                    gpu_memory_clocks = await asyncio.to_thread(
-                        pynvml.nvmlDeviceGetClockInfo, handle, pynvml.NVML_CLOCK_MEM
-                    )
-                    gpu_fan_speed = await asyncio.to_thread(pynvml.nvmlDeviceGetFanSpeed, handle)
-                    gpu_info = {
-                        f"W-GPU/GPU{i} (%)": gpu_percent,
-                        f"W-GPU/GPU{i} temperature (°)": gpu_temp,
-                        f"W-GPU/GPU{i} memory (%)": gpu_mem_percent,
-                        f"W-GPU/GPU{i} power": gpu_power,
-                        f"W-GPU/GPU{i} clocks": gpu_clocks,
-                        f"W-GPU/GPU{i} memory clocks": gpu_memory_clocks,
-                        f"W-GPU/GPU{i} fan speed": gpu_fan_speed,
-                    }
-                    self.trainer.logger.log_data(gpu_info)
-            except Exception:  # noqa: S110
-                pass
+        for gpu in sample.gpu or []:
+            i = gpu["gpu"]
+            gpu_info = {
+                f"W-GPU/GPU{i} (%)": gpu["gpu_usage"],
+                f"W-GPU/GPU{i} temperature (°)": gpu["temperature"],
+                f"W-GPU/GPU{i} memory (%)": round(gpu["memory_used"] / gpu["memory_total"] * 100, 3),
+                f"W-GPU/GPU{i} power": gpu["power"],
+                f"W-GPU/GPU{i} clocks": gpu["clocks"],
+                f"W-GPU/GPU{i} memory clocks": gpu["memory_clocks"],
+                f"W-GPU/GPU{i} fan speed": gpu["fan_speed"],
+            }
+            self.trainer.logger.log_data({name: value for name, value in gpu_info.items() if value is not None})
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import random
 import time
@@ -9,6 +10,7 @@ from typing import TYPE_CHECKING
 from nebula.addons.functions import print_msg_box
 from nebula.core.eventmanager import EventManager
 from nebula.core.nebulaevents import AggregationEvent, RoundStartEvent, UpdateReceivedEvent, DuplicatedMessageEvent
+from nebula.core.utils.flatmodel import align_models
 from nebula.core.utils.helper import (
     cosine_metric,
     euclidean_metric,
@@ -2005,6 +2007,8 @@ class Reputation:
             ("jaccard", jaccard_metric),
         ]
         
+        # Flatten the local model once so the metrics compare it with received FlatModels as single vectors
+        local_model = align_models([local_model, received_model])[0]
         similarity_values = {}
         
         for name, metric_func in similarity_functions:
@@ -2074,11 +2078,8 @@ class Reputation:
         parameters_local = self._engine.trainer.get_model_parameters()
         
         prev_threshold = self._get_previous_threshold(source, current_round)
-        differences = self._calculate_parameter_differences(parameters_local, decoded_model)
-        current_threshold = self._calculate_threshold(differences, prev_threshold)
-        
-        changed_params, total_params, changes_record = self._count_changed_parameters(
-            parameters_local, decoded_model, current_threshold
+        current_threshold, changed_params, total_params, changes_record = await asyncio.to_thread(
+            self._calculate_parameter_changes, parameters_local, decoded_model, prev_threshold
         )
         
         fraction_changed = changed_params / total_params if total_params > 0 else 0.0
@@ -2107,47 +2108,38 @@ class Reputation:
             return self.fraction_of_params_changed[source][current_round - 1][-1]["threshold"]
         return None
 
-    def _calculate_parameter_differences(self, local_params: dict, received_params: dict) -> list:
-        """Calculate absolute differences between local and received parameters."""
-        differences = []
-        for key in local_params.keys():
-            if key in received_params:
-                local_tensor = local_params[key].cpu()
-                received_tensor = received_params[key].cpu()
-                diff = torch.abs(local_tensor - received_tensor)
-                differences.extend(diff.flatten().tolist())
-        return differences
-
-    def _calculate_threshold(self, differences: list, prev_threshold: float) -> float:
-        """Calculate the threshold for determining parameter changes."""
-        if not differences:
-            return 0
-            
-        mean_threshold = torch.mean(torch.tensor(differences)).item()
-        if prev_threshold is not None:
-            return (prev_threshold + mean_threshold) / 2
-        return mean_threshold
-
-    def _count_changed_parameters(self, local_params: dict, received_params: dict, threshold: float) -> tuple:
-        """Count the number of parameters that changed above the threshold."""
-        total_params = 0
-        changed_params = 0
-        changes_record = {}
-        
-        for key in local_params.keys():
-            if key in received_params:
-                local_tensor = local_params[key].cpu()
-                received_tensor = received_params[key].cpu()
-                diff = torch.abs(local_tensor - received_tensor)
-                total_params += diff.numel()
-                
-                num_changed = torch.sum(diff > threshold).item()
-                changed_params += num_changed
-                
+    @staticmethod
+    def _calculate_parameter_changes(local_params: dict, received_params: dict, prev_threshold: float) -> tuple:
+        """
+        Count the parameters that changed between the local and received models.
+
+        The absolute differences are computed once per layer and kept as tensors: their mean gives the threshold
+        (averaged with the previous one, if any) and the parameters above it are counted from the same tensors.
+
+        Returns:
+            tuple: (threshold, changed_params, total_params, changes_record), where changes_record maps each layer
+                   with changes to its number of changed parameters.
+        """
+        with torch.no_grad():
+            differences = {}
+            for key in local_params.keys():
+                if key in received_params:
+                    differences[key] = torch.abs(local_params[key].cpu() - received_params[key].cpu())
+
+            total_params = sum(diff.numel() for diff in differences.values())
+            if total_params == 0:
+                return 0, 0, 0, {}
+
+            mean_threshold = (sum(diff.sum(dtype=torch.float64) for diff in differences.values()) / total_params).item()
+            threshold = (prev_threshold + mean_threshold) / 2 if prev_threshold is not None else mean_threshold
+
+            changes_record = {}
+            for key, diff in differences.items():
+                num_changed = torch.count_nonzero(diff > threshold).item()
                 if num_changed > 0:
                     changes_record[key] = num_changed
-                    
-        return changed_params, total_params, changes_record
+
+        return threshold, sum(changes_record.values()), total_params, changes_record
 
     def _store_fraction_data(self, source: str, current_round: int, data: dict):
         """Store fraction data in the internal data structure."""
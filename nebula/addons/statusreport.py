@@ -0,0 +1,168 @@
+import copy
+
+# Fields of the participant configuration shown by the controller and the frontend: name -> (section, key)
+STATUS_FIELDS = {
+    "uid": ("device_args", "uid"),
+    "idx": ("device_args", "idx"),
+    "role": ("device_args", "role"),
+    "malicious": ("device_args", "malicious"),
+    "ip": ("network_args", "ip"),
+    "port": ("network_args", "port"),
+    "neighbors": ("network_args", "neighbors"),
+    "latitude": ("mobility_args", "latitude"),
+    "longitude": ("mobility_args", "longitude"),
+    "neighbors_distance": ("mobility_args", "neighbors_distance"),
+    "federation": ("scenario_args", "federation"),
+    "name": ("scenario_args", "name"),
+    "round": ("federation_args", "round"),
+    "run_hash": ("tracking_args", "run_hash"),
+}
+
+SNAPSHOT_INTERVAL = 20
+
+
+class StatusDesyncError(Exception):
+    """The delta of a status report does not apply to the version known by the receiver."""
+
+
+def status_snapshot(participant: dict) -> dict:
+    """
+    Extract the status of a node from its configuration.
+
+    Args:
+        participant (dict): Configuration of the node (`config.participant`).
+
+    Returns:
+        dict: Value of each field of `STATUS_FIELDS` (missing ones are None), copied so later changes to the
+            configuration do not alter it.
+    """
+    return {
+        name: copy.deepcopy(participant.get(section, {}).get(key)) for name, (section, key) in STATUS_FIELDS.items()
+    }
+
+
+def full_report(status: dict) -> dict:
+    """
+    Status report carrying every field, without version, as built from the configurations sent by older nodes.
+
+    Args:
+        status (dict): Status of the node.
+
+    Returns:
+        dict: The report.
+    """
+    return {"uid": status["uid"], "version": None, "base": None, "fields": status}
+
+
+class StatusEncoder:
+    """
+    Builds the status reports of a node, carrying only the fields changed since the last acknowledged report.
+
+    A report is a dictionary with the `uid` of the node, its `version` (increasing), the `base` version it applies to
+    (None for a full snapshot) and the `fields` to set. The receiver acknowledges a report by accepting it; the
+    sender then calls `ack` with its version. Every `snapshot_interval` reports, after `reset` (the receiver lost
+    track of the node) and until a first report is acknowledged, a full snapshot is sent.
+    """
+
+    def __init__(self, snapshot_interval: int = SNAPSHOT_INTERVAL):
+        """
+        Args:
+            snapshot_interval (int): Reports between full snapshots.
+        """
+        self.snapshot_interval = max(1, snapshot_interval)
+        self._version = 0
+        self._sent = None
+        self._acked = None
+        self._acked_version = None
+        self._since_snapshot = 0
+
+    def encode(self, status: dict) -> dict:
+        """
+        Args:
+            status (dict): Current status of the node (see `status_snapshot`).
+
+        Returns:
+            dict: The report to send.
+        """
+        self._version += 1
+        self._since_snapshot += 1
+        if self._acked is None or self._since_snapshot >= self.snapshot_interval:
+            base, fields = None, status
+            self._since_snapshot = 0
+        else:
+            base = self._acked_version
+            fields = {name: value for name, value in status.items() if self._acked.get(name) != value}
+        self._sent = (self._version, status)
+        return {"uid": status["uid"], "version": self._version, "base": base, "fields": fields}
+
+    def ack(self, version: int):
+        """
+        Record that the receiver accepted a report.
+
+        Args:
+            version (int): Version of the report.
+        """
+        if self._sent is not None and self._sent[0] == version:
+            self._acked_version, self._acked = self._sent
+            self._sent = None
+
+    def reset(self):
+        """Send a full snapshot next, after the receiver rejected a delta."""
+        self._acked = None
+        self._acked_version = None
+
+
+class StatusDecoder:
+    """
+    Rebuilds the status of each node from its reports (see `StatusEncoder`).
+    """
+
+    def __init__(self):
+        self._nodes: dict[str, tuple[int | None, dict]] = {}
+
+    def apply(self, report: dict) -> dict:
+        """
+        Apply a report to the status known for its node.
+
+        Args:
+            report (dict): Status report.
+
+        Returns:
+            dict: The status of the node after the report.
+
+        Raises:
+            StatusDesyncError: If the report is a delta over a version other than the last one applied for the node.
+        """
+        uid = report["uid"]
+        if report["base"] is None:
+            status = dict(report["fields"])
+        else:
+            known = self._nodes.get(uid)
+            if known is None or known[0] != report["base"]:
+                raise StatusDesyncError(
+                    f"Status report {report['version']} of {uid} applies to version {report['base']}, "
+                    f"known version is {None if known is None else known[0]}"
+                )
+            status = {**known[1], **report["fields"]}
+        self._nodes[uid] = (report["version"], status)
+        # A copy: the known status is replaced, never modified, by later reports
+        return dict(status)
+
+    def discard(self, uid: str):
+        """Forget the status of a node, whose next report must be a full snapshot."""
+        self._nodes.pop(uid, None)
+
+    def discard_scenario(self, scenario_name: str | None = None) -> list[str]:
+        """
+        Forget the status of the nodes of a scenario (e.g., when it finishes or is removed).
+
+        Args:
+            scenario_name (str | None): Name of the scenario, or None to forget every node.
+
+        Returns:
+            list[str]: The uids of the nodes forgotten.
+        """
+        uids = [uid for uid, (_, status) in self._nodes.items() if scenario_name in (None, status.get("name"))]
+        for uid in uids:
+            del self._nodes[uid]
+        return uids
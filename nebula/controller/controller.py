@@ -1,6 +1,5 @@
 import argparse
 import asyncio
-import datetime
 import importlib
 import ipaddress
 import json
@@ -114,8 +113,26 @@ async def lifespan(app: FastAPI):
 
     configure_logger(controller_log)
 
+    from nebula.controller import database
+    from nebula.controller.nodestatus import NodeStatusIngestor
+
+    # Status reports of the nodes, written in batches (see NodeStatusIngestor)
+    flush_ms = float(os.environ.get("NEBULA_NODE_STATUS_FLUSH_MS", 100))
+    app.state.node_status = NodeStatusIngestor(
+        database.nodes_db,
+        flush_interval=flush_ms / 1000,
+        frontend_url=lambda scenario_name: (
+            f"http://{os.environ['NEBULA_CONTROLLER_NAME']}_nebula-frontend"
+            f"/platform/dashboard/{scenario_name}/node/update"
+        ),
+    )
+    await app.state.node_status.start()
+
     yield
 
+    await app.state.node_status.stop()
+    await database.close_databases()
+
 
 # Initialize FastAPI app outside the Controller class
 app = FastAPI(lifespan=lifespan)
@@ -353,6 +370,7 @@ async def stop_scenario(
         - Removes Docker containers and network resources tied to the scenario and user.
         - Sets the scenario's status to "finished" in the database.
         - Optionally finalizes all active scenarios if the 'all' flag is set.
+        - Forgets the status known for the nodes of the finished scenarios (see `NodeStatusIngestor.discard`).
     
     Args:
         scenario_name (str): Name of the scenario to stop.
@@ -374,12 +392,13 @@ async def stop_scenario(
     )
     try:
         if all:
-            scenario_set_all_status_to_finished()
+            await scenario_set_all_status_to_finished()
         else:
-            scenario_set_status_to_finished(scenario_name)
+            await scenario_set_status_to_finished(scenario_name)
     except Exception as e:
         logging.exception(f"Error setting scenario {scenario_name} to finished: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
+    app.state.node_status.discard(None if all else scenario_name)
 
 
 @app.post("/scenarios/remove")
@@ -399,8 +418,9 @@ async def remove_scenario(
     from nebula.controller.scenarios import ScenarioManagement
 
     try:
-        remove_scenario_by_name(scenario_name)
+        await remove_scenario_by_name(scenario_name)
         ScenarioManagement.remove_files_by_scenario(scenario_name)
+        app.state.node_status.discard(scenario_name)
     except Exception as e:
         logging.exception(f"Error removing scenario {scenario_name}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -426,11 +446,11 @@ async def get_scenarios(
     from nebula.controller.database import get_all_scenarios_and_check_completed, get_running_scenario
 
     try:
-        scenarios = get_all_scenarios_and_check_completed(username=user, role=role)
+        scenarios = await get_all_scenarios_and_check_completed(username=user, role=role)
         if role == "admin":
-            scenario_running = get_running_scenario()
+            scenario_running = await get_running_scenario()
         else:
-            scenario_running = get_running_scenario(username=user)
+            scenario_running = await get_running_scenario(username=user)
     except Exception as e:
         logging.exception(f"Error obtaining scenarios: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -468,7 +488,7 @@ async def update_scenario(
 
     try:
         scenario = Scenario.from_dict(scenario)
-        scenario_update_record(scenario_name, start_time, end_time, scenario, status, role, username)
+        await scenario_update_record(scenario_name, start_time, end_time, scenario, status, role, username)
     except Exception as e:
         logging.exception(f"Error updating scenario {scenario_name}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -494,12 +514,13 @@ async def set_scenario_status_to_finished(
 
     try:
         if all:
-            scenario_set_all_status_to_finished()
+            await scenario_set_all_status_to_finished()
         else:
-            scenario_set_status_to_finished(scenario_name)
+            await scenario_set_status_to_finished(scenario_name)
     except Exception as e:
         logging.exception(f"Error setting scenario {scenario_name} to finished: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
+    app.state.node_status.discard(None if all else scenario_name)
 
     return {"message": f"Scenario {scenario_name} status set to finished successfully"}
 
@@ -518,7 +539,7 @@ async def get_running_scenario(get_all: bool = False):
     from nebula.controller.database import get_running_scenario
 
     try:
-        return get_running_scenario(get_all=get_all)
+        return await get_running_scenario(get_all=get_all)
     except Exception as e:
         logging.exception(f"Error obtaining running scenario: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -544,7 +565,7 @@ async def check_scenario(
     from nebula.controller.database import check_scenario_with_role
 
     try:
-        allowed = check_scenario_with_role(role, scenario_name)
+        allowed = await check_scenario_with_role(role, scenario_name)
         return {"allowed": allowed}
     except Exception as e:
         logging.exception(f"Error checking scenario with role: {e}")
@@ -569,7 +590,7 @@ async def get_scenario_by_name(
     from nebula.controller.database import get_scenario_by_name
 
     try:
-        scenario = get_scenario_by_name(scenario_name)
+        scenario = await get_scenario_by_name(scenario_name)
     except Exception as e:
         logging.exception(f"Error obtaining scenario {scenario_name}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -595,7 +616,7 @@ async def list_nodes_by_scenario_name(
     from nebula.controller.database import list_nodes_by_scenario_name
 
     try:
-        nodes = list_nodes_by_scenario_name(scenario_name)
+        nodes = await list_nodes_by_scenario_name(scenario_name)
     except Exception as e:
         logging.exception(f"Error obtaining nodes: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -614,53 +635,35 @@ async def update_nodes(
     """
     Updates the configuration of a node in the database and notifies the frontend.
 
+    The update is a status report with the fields changed since the last report of the node (see `StatusEncoder`),
+    or the whole configuration of the node. It is queued and written with the pending updates of the other nodes (see
+    `NodeStatusIngestor`). The response is sent once it is stored; the frontend is notified in the background.
+
     Args:
         scenario_name (str): The scenario to which the node belongs.
         request (Request): The HTTP request containing the node data.
 
     Returns:
-        dict: Confirmation or response from the frontend.
+        dict: Confirmation message and the timestamp recorded for the update.
+
+    Raises:
+        HTTPException: 409 if the report is a delta over a status unknown to the controller, so the node sends a full
+            snapshot.
     """
-    from nebula.controller.database import update_node_record
+    from nebula.addons.statusreport import StatusDesyncError, full_report, status_snapshot
 
     try:
-        config = await request.json()
-        timestamp = datetime.datetime.now()
-        # Update the node in database
-        await update_node_record(
-            str(config["device_args"]["uid"]),
-            str(config["device_args"]["idx"]),
-            str(config["network_args"]["ip"]),
-            str(config["network_args"]["port"]),
-            str(config["device_args"]["role"]),
-            str(config["network_args"]["neighbors"]),
-            str(config["mobility_args"]["latitude"]),
-            str(config["mobility_args"]["longitude"]),
-            str(timestamp),
-            str(config["scenario_args"]["federation"]),
-            str(config["federation_args"]["round"]),
-            str(config["scenario_args"]["name"]),
-            str(config["tracking_args"]["run_hash"]),
-            str(config["device_args"]["malicious"]),
-        )
+        report = await request.json()
+        if "fields" not in report:
+            report = full_report(status_snapshot(report))
+        timestamp = await request.app.state.node_status.submit(report)
+    except StatusDesyncError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logging.exception(f"Error updating nodes: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-    url = (
-        f"http://{os.environ['NEBULA_CONTROLLER_NAME']}_nebula-frontend/platform/dashboard/{scenario_name}/node/update"
-    )
-
-    config["timestamp"] = str(timestamp)
-
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, json=config) as response:
-            if response.status == 200:
-                return await response.json()
-            else:
-                raise HTTPException(status_code=response.status, detail="Error posting data")
-
-    return {"message": "Nodes updated successfully in the database"}
+    return {"message": "Nodes updated successfully in the database", "timestamp": timestamp}
 
 
 @app.post("/nodes/{scenario_name}/done")
@@ -710,7 +713,7 @@ async def remove_nodes_by_scenario_name(scenario_name: str = Body(..., embed=Tru
     from nebula.controller.database import remove_nodes_by_scenario_name
 
     try:
-        remove_nodes_by_scenario_name(scenario_name)
+        await remove_nodes_by_scenario_name(scenario_name)
     except Exception as e:
         logging.exception(f"Error removing nodes: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -735,7 +738,7 @@ async def get_notes_by_scenario_name(
     from nebula.controller.database import get_notes
 
     try:
-        notes = get_notes(scenario_name)
+        notes = await get_notes(scenario_name)
     except Exception as e:
         logging.exception(f"Error obtaining notes {notes}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -757,7 +760,7 @@ async def update_notes_by_scenario_name(scenario_name: str = Body(..., embed=Tru
     from nebula.controller.database import save_notes
 
     try:
-        save_notes(scenario_name, notes)
+        await save_notes(scenario_name, notes)
     except Exception as e:
         logging.exception(f"Error updating notes: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -778,7 +781,7 @@ async def remove_notes_by_scenario_name(scenario_name: str = Body(..., embed=Tru
     from nebula.controller.database import remove_note
 
     try:
-        remove_note(scenario_name)
+        await remove_note(scenario_name)
     except Exception as e:
         logging.exception(f"Error removing notes: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -799,7 +802,7 @@ async def list_users_controller(all_info: bool = False):
     from nebula.controller.database import list_users
 
     try:
-        user_list = list_users(all_info)
+        user_list = await list_users(all_info)
         if all_info:
             # Convert each sqlite3.Row to a dictionary so that it is JSON serializable.
             user_list = [dict(user) for user in user_list]
@@ -825,7 +828,7 @@ async def get_user_by_scenario_name(
     from nebula.controller.database import get_user_by_scenario_name
 
     try:
-        user = get_user_by_scenario_name(scenario_name)
+        user = await get_user_by_scenario_name(scenario_name)
     except Exception as e:
         logging.exception(f"Error obtaining user {user}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -1030,7 +1033,7 @@ async def add_user_controller(user: str = Body(...), password: str = Body(...),
     from nebula.controller.database import add_user
 
     try:
-        add_user(user, password, role)
+        await add_user(user, password, role)
         return {"detail": "User added successfully"}
     except Exception as e:
         logging.exception(f"Error adding user: {e}")
@@ -1050,7 +1053,7 @@ async def remove_user_controller(user: str = Body(..., embed=True)):
     from nebula.controller.database import delete_user_from_db
 
     try:
-        delete_user_from_db(user)
+        await delete_user_from_db(user)
         return {"detail": "User deleted successfully"}
     except Exception as e:
         logging.exception(f"Error deleting user: {e}")
@@ -1072,7 +1075,7 @@ async def update_user_controller(user: str = Body(...), password: str = Body(...
     from nebula.controller.database import update_user
 
     try:
-        update_user(user, password, role)
+        await update_user(user, password, role)
         return {"detail": "User updated successfully"}
     except Exception as e:
         logging.exception(f"Error updating user: {e}")
@@ -1094,8 +1097,8 @@ async def verify_user_controller(user: str = Body(...), password: str = Body(...
 
     try:
         user_submitted = user.upper()
-        if (user_submitted in list_users()) and verify(user_submitted, password):
-            user_info = get_user_info(user_submitted)
+        if (user_submitted in await list_users()) and await verify(user_submitted, password):
+            user_info = await get_user_info(user_submitted)
             return {"user": user_submitted, "role": user_info[2]}
         else:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
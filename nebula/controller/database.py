@@ -4,16 +4,23 @@ import json
 import logging
 import os
 import sqlite3
+import time
 
 import aiosqlite
 from argon2 import PasswordHasher
 
+from nebula.controller.dbpool import READERS, DatabasePool
+
 user_db_file_location = None
 node_db_file_location = None
 scenario_db_file_location = None
 notes_db_file_location = None
 
-_node_lock = asyncio.Lock()
+# Connection pools of the databases, opened by `initialize_databases` and closed by `close_databases`
+users_db: DatabasePool | None = None
+nodes_db: DatabasePool | None = None
+scenarios_db: DatabasePool | None = None
+notes_db: DatabasePool | None = None
 
 PRAGMA_SETTINGS = [
     "PRAGMA journal_mode=WAL;",
@@ -24,6 +31,9 @@ PRAGMA_SETTINGS = [
     "PRAGMA cache_spill=0;",
 ]
 
+# Seconds since its last status report after which a node is shown as offline
+NODE_ONLINE_TIMEOUT = 25
+
 
 async def setup_database(db_file_location):
     """
@@ -77,6 +87,69 @@ async def ensure_columns(conn, table_name, desired_columns):
     await conn.commit()
 
 
+async def migrate_table(conn, table_name, create_command, desired_columns, primary_key):
+    """
+    Rebuilds a table whose primary key or column types differ from the desired ones, keeping its rows.
+
+    SQLite cannot change the primary key or the type of a column in place, so the table is renamed, created again
+    with `create_command` and its rows are copied into it, converted by the affinity of the new columns (e.g., the
+    text '3' is stored as the integer 3 in an INTEGER column). Columns the old table lacks are left empty, and
+    `ensure_columns` adds any other missing column afterwards. Rows with NULL in a column that is NOT NULL in the
+    desired schema (e.g., legacy nodes without a scenario) cannot be kept: they are dropped and counted in the log.
+
+    Args:
+        conn (aiosqlite.Connection): Active connection to the SQLite database.
+        table_name (str): Name of the table to check and rebuild.
+        create_command (str): CREATE TABLE IF NOT EXISTS statement of the table with the desired schema.
+        desired_columns (dict): Dictionary mapping column names to their SQL definitions.
+        primary_key (tuple[str]): Columns of the desired primary key, in order.
+
+    Returns:
+        bool: True if the table was rebuilt, False if it already had the desired schema.
+
+    Raises:
+        Exception: The error of the rebuild. The transaction is rolled back, so the table is left as it was.
+
+    Note:
+        The rebuild runs in a single transaction, committed when the rows are copied.
+    """
+    _c = await conn.execute(f"PRAGMA table_info({table_name});")
+    columns = await _c.fetchall()
+    existing_types = {row[1]: row[2].upper() for row in columns}
+    existing_key = tuple(row[1] for row in sorted((row for row in columns if row[5]), key=lambda row: row[5]))
+    desired_types = {name: definition.split()[0].upper() for name, definition in desired_columns.items()}
+    if existing_key == tuple(primary_key) and all(
+        existing_types.get(name, column_type) == column_type for name, column_type in desired_types.items()
+    ):
+        return False
+
+    logging.info(f"Migrating table {table_name} to its current schema")
+    copied = [name for name in existing_types if name in desired_columns]
+    not_null = [name for name in copied if "NOT NULL" in desired_columns[name].upper()]
+    where = " AND ".join(f"{name} IS NOT NULL" for name in not_null) or "1"
+    await conn.execute("BEGIN;")
+    try:
+        await conn.execute(f"ALTER TABLE {table_name} RENAME TO {table_name}_old;")
+        await conn.execute(create_command)
+        _c = await conn.execute(f"SELECT COUNT(*) FROM {table_name}_old WHERE NOT ({where});")
+        dropped = (await _c.fetchone())[0]
+        if dropped:
+            logging.warning(
+                f"Dropping {dropped} rows of table {table_name} with NULL in {', '.join(not_null)} during the migration"
+            )
+        await conn.execute(
+            f"INSERT OR REPLACE INTO {table_name} ({', '.join(copied)}) "
+            f"SELECT {', '.join(copied)} FROM {table_name}_old WHERE {where};"
+        )
+        await conn.execute(f"DROP TABLE {table_name}_old;")
+    except Exception as e:
+        await conn.rollback()
+        logging.exception(f"Error migrating table {table_name}, left unchanged: {e}")
+        raise
+    await conn.commit()
+    return True
+
+
 async def initialize_databases(databases_dir):
     """
     Initializes all required SQLite databases and their corresponding tables for the system.
@@ -85,7 +158,9 @@ async def initialize_databases(databases_dir):
         - Defines paths for user, node, scenario, and notes databases based on the provided directory.
         - Sets up each database with appropriate PRAGMA settings.
         - Creates necessary tables if they do not exist.
+        - Migrates tables whose primary key or column types changed, keeping their rows.
         - Ensures all expected columns are present in each table, adding any missing ones.
+        - Opens the connection pools used by the rest of the functions of this module.
         - Creates a default admin user if no users are present.
 
     Args:
@@ -95,6 +170,7 @@ async def initialize_databases(databases_dir):
         Default credentials (username and password) are taken from environment variables:
         - NEBULA_DEFAULT_USER
         - NEBULA_DEFAULT_PASSWORD
+        The read-only connections of each pool are taken from NEBULA_DB_READERS.
     """
     global user_db_file_location, node_db_file_location, scenario_db_file_location, notes_db_file_location
 
@@ -122,43 +198,55 @@ async def initialize_databases(databases_dir):
         await ensure_columns(conn, "users", desired_columns)
 
     async with aiosqlite.connect(node_db_file_location) as conn:
-        await conn.execute(
-            """
+        # The nodes of a scenario are looked up by scenario, and a node uid may appear in several scenarios
+        create_command = """
             CREATE TABLE IF NOT EXISTS nodes (
-                uid TEXT PRIMARY KEY,
-                idx TEXT,
+                uid TEXT NOT NULL,
+                idx INTEGER,
                 ip TEXT,
-                port TEXT,
+                port INTEGER,
                 role TEXT,
                 neighbors TEXT,
-                latitude TEXT,
-                longitude TEXT,
+                latitude REAL,
+                longitude REAL,
                 timestamp TEXT,
                 federation TEXT,
-                round TEXT,
-                scenario TEXT,
+                round INTEGER,
+                scenario TEXT NOT NULL,
                 hash TEXT,
-                malicious TEXT
+                malicious TEXT,
+                last_seen REAL,
+                PRIMARY KEY (scenario, uid)
             );
             """
-        )
+        await conn.execute(create_command)
         desired_columns = {
-            "uid": "TEXT PRIMARY KEY",
-            "idx": "TEXT",
+            "uid": "TEXT NOT NULL",
+            "idx": "INTEGER",
             "ip": "TEXT",
-            "port": "TEXT",
+            "port": "INTEGER",
             "role": "TEXT",
             "neighbors": "TEXT",
-            "latitude": "TEXT",
-            "longitude": "TEXT",
+            "latitude": "REAL",
+            "longitude": "REAL",
             "timestamp": "TEXT",
             "federation": "TEXT",
-            "round": "TEXT",
-            "scenario": "TEXT",
+            "round": "INTEGER",
+            "scenario": "TEXT NOT NULL",
             "hash": "TEXT",
             "malicious": "TEXT",
+            "last_seen": "REAL",
         }
+        await migrate_table(conn, "nodes", create_command, desired_columns, primary_key=("scenario", "uid"))
         await ensure_columns(conn, "nodes", desired_columns)
+        # Nodes stored before `last_seen` existed: their timestamp is a local time (str(datetime.datetime.now()))
+        await conn.execute(
+            "UPDATE nodes SET last_seen = (julianday(timestamp, 'utc') - 2440587.5) * 86400.0 "
+            "WHERE last_seen IS NULL AND timestamp IS NOT NULL;"
+        )
+        # Nodes of a scenario in the order they are listed
+        await conn.execute("CREATE INDEX IF NOT EXISTS nodes_scenario_idx ON nodes (scenario, idx);")
+        await conn.commit()
 
     async with aiosqlite.connect(scenario_db_file_location) as conn:
         await conn.execute(
@@ -269,15 +357,43 @@ async def initialize_databases(databases_dir):
         desired_columns = {"scenario": "TEXT PRIMARY KEY", "scenario_notes": "TEXT"}
         await ensure_columns(conn, "notes", desired_columns)
 
+    await open_databases(int(os.environ.get("NEBULA_DB_READERS", READERS)))
+
     username = os.environ.get("NEBULA_DEFAULT_USER", "admin")
     password = os.environ.get("NEBULA_DEFAULT_PASSWORD", "admin")
-    if not list_users():
-        add_user(username, password, "admin")
-    if not verify_hash_algorithm(username):
-        update_user(username, password, "admin")
+    if not await list_users():
+        await add_user(username, password, "admin")
+    if not await verify_hash_algorithm(username):
+        await update_user(username, password, "admin")
+
+
+async def open_databases(readers=READERS):
+    """
+    Opens the connection pools of the databases, which are kept until `close_databases` is called.
+
+    Args:
+        readers (int): Read-only connections of each pool.
+    """
+    global users_db, nodes_db, scenarios_db, notes_db
+
+    users_db = DatabasePool(user_db_file_location, PRAGMA_SETTINGS, readers)
+    nodes_db = DatabasePool(node_db_file_location, PRAGMA_SETTINGS, readers)
+    scenarios_db = DatabasePool(scenario_db_file_location, PRAGMA_SETTINGS, readers)
+    notes_db = DatabasePool(notes_db_file_location, PRAGMA_SETTINGS, readers)
+    for pool in (users_db, nodes_db, scenarios_db, notes_db):
+        await pool.open()
+
+
+async def close_databases():
+    """
+    Closes the connection pools opened by `initialize_databases`.
+    """
+    for pool in (users_db, nodes_db, scenarios_db, notes_db):
+        if pool is not None:
+            await pool.close()
 
 
-def list_users(all_info=False):
+async def list_users(all_info=False):
     """
     Retrieves a list of users from the users database.
 
@@ -287,11 +403,7 @@ def list_users(all_info=False):
     Returns:
         list: A list of usernames or full user records depending on the all_info flag.
     """
-    with sqlite3.connect(user_db_file_location) as conn:
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        c.execute("SELECT * FROM users")
-        result = c.fetchall()
+    result = await users_db.fetchall("SELECT * FROM users")
 
     if not all_info:
         result = [user["user"] for user in result]
@@ -299,7 +411,7 @@ def list_users(all_info=False):
     return result
 
 
-def get_user_info(user):
+async def get_user_info(user):
     """
     Fetches detailed information for a specific user from the users database.
 
@@ -309,18 +421,10 @@ def get_user_info(user):
     Returns:
         sqlite3.Row or None: A row containing the user's information if found, otherwise None.
     """
-    with sqlite3.connect(user_db_file_location) as conn:
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
+    return await users_db.fetchone("SELECT * FROM users WHERE user = ?", (user,))
 
-        command = "SELECT * FROM users WHERE user = ?"
-        c.execute(command, (user,))
-        result = c.fetchone()
 
-    return result
-
-
-def verify(user, password):
+async def verify(user, password):
     """
     Verifies whether the provided password matches the stored hashed password for a user.
 
@@ -331,21 +435,17 @@ def verify(user, password):
     Returns:
         bool: True if the password is correct, False otherwise.
     """
-    ph = PasswordHasher()
-    with sqlite3.connect(user_db_file_location) as conn:
-        c = conn.cursor()
-
-        c.execute("SELECT password FROM users WHERE user = ?", (user,))
-        result = c.fetchone()
-        if result:
-            try:
-                return ph.verify(result[0], password)
-            except:
-                return False
+    result = await users_db.fetchone("SELECT password FROM users WHERE user = ?", (user,))
+    if result:
+        try:
+            # Argon2 is deliberately slow: hashed outside the event loop
+            return await asyncio.to_thread(PasswordHasher().verify, result[0], password)
+        except:
+            return False
     return False
 
 
-def verify_hash_algorithm(user):
+async def verify_hash_algorithm(user):
     """
     Checks if the stored password hash for a user uses a supported Argon2 algorithm.
 
@@ -358,32 +458,25 @@ def verify_hash_algorithm(user):
     user = user.upper()
     argon2_prefixes = ("$argon2i$", "$argon2id$")
 
-    with sqlite3.connect(user_db_file_location) as conn:
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-
-        c.execute("SELECT password FROM users WHERE user = ?", (user,))
-        result = c.fetchone()
-        if result:
-            password_hash = result["password"]
-            return password_hash.startswith(argon2_prefixes)
+    result = await users_db.fetchone("SELECT password FROM users WHERE user = ?", (user,))
+    if result:
+        password_hash = result["password"]
+        return password_hash.startswith(argon2_prefixes)
 
     return False
 
 
-def delete_user_from_db(user):
+async def delete_user_from_db(user):
     """
     Deletes a user record from the users database.
 
     Args:
         user (str): The username of the user to be deleted.
     """
-    with sqlite3.connect(user_db_file_location) as conn:
-        c = conn.cursor()
-        c.execute("DELETE FROM users WHERE user = ?", (user,))
+    await users_db.execute("DELETE FROM users WHERE user = ?", (user,))
 
 
-def add_user(user, password, role):
+async def add_user(user, password, role):
     """
     Adds a new user to the users database with a hashed password.
 
@@ -392,16 +485,11 @@ def add_user(user, password, role):
         password (str): The plain text password to hash and store.
         role (str): The role assigned to the user.
     """
-    ph = PasswordHasher()
-    with sqlite3.connect(user_db_file_location) as conn:
-        c = conn.cursor()
-        c.execute(
-            "INSERT INTO users VALUES (?, ?, ?)",
-            (user.upper(), ph.hash(password), role),
-        )
+    password_hash = await asyncio.to_thread(PasswordHasher().hash, password)
+    await users_db.execute("INSERT INTO users VALUES (?, ?, ?)", (user.upper(), password_hash, role))
 
 
-def update_user(user, password, role):
+async def update_user(user, password, role):
     """
     Updates the password and role of an existing user in the users database.
 
@@ -410,16 +498,14 @@ def update_user(user, password, role):
         password (str): The new plain text password to hash and store.
         role (str): The new role to assign to the user.
     """
-    ph = PasswordHasher()
-    with sqlite3.connect(user_db_file_location) as conn:
-        c = conn.cursor()
-        c.execute(
-            "UPDATE users SET password = ?, role = ? WHERE user = ?",
-            (ph.hash(password), role, user.upper()),
-        )
+    password_hash = await asyncio.to_thread(PasswordHasher().hash, password)
+    await users_db.execute(
+        "UPDATE users SET password = ?, role = ? WHERE user = ?",
+        (password_hash, role, user.upper()),
+    )
 
 
-def list_nodes(scenario_name=None, sort_by="idx"):
+async def list_nodes(scenario_name=None, sort_by="idx"):
     """
     Retrieves a list of nodes from the nodes database, optionally filtered by scenario and sorted.
 
@@ -431,150 +517,76 @@ def list_nodes(scenario_name=None, sort_by="idx"):
         list or None: A list of sqlite3.Row objects representing nodes, or None if an error occurs.
     """
     try:
-        with sqlite3.connect(node_db_file_location) as conn:
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
-
-            if scenario_name:
-                command = "SELECT * FROM nodes WHERE scenario = ? ORDER BY " + sort_by + ";"
-                c.execute(command, (scenario_name,))
-            else:
-                command = "SELECT * FROM nodes ORDER BY " + sort_by + ";"
-                c.execute(command)
-
-            result = c.fetchall()
-
-            return result
+        if scenario_name:
+            command = "SELECT * FROM nodes WHERE scenario = ? ORDER BY " + sort_by + ";"
+            return await nodes_db.fetchall(command, (scenario_name,))
+        else:
+            command = "SELECT * FROM nodes ORDER BY " + sort_by + ";"
+            return await nodes_db.fetchall(command)
     except sqlite3.Error as e:
         print(f"Error occurred while listing nodes: {e}")
         return None
 
 
-def list_nodes_by_scenario_name(scenario_name):
+async def list_nodes_by_scenario_name(scenario_name, online_timeout=NODE_ONLINE_TIMEOUT):
     """
-    Fetches all nodes associated with a specific scenario, ordered by their index as integers.
+    Fetches all nodes associated with a specific scenario, ordered by their index.
+
+    Each row carries an `online` column, 1 if the node reported its status in the last `online_timeout` seconds
+    and 0 otherwise.
 
     Args:
         scenario_name (str): The name of the scenario to filter nodes by.
+        online_timeout (float): Seconds since its last report after which a node is considered offline.
 
     Returns:
         list or None: A list of sqlite3.Row objects for nodes in the scenario, or None if an error occurs.
     """
     try:
-        with sqlite3.connect(node_db_file_location) as conn:
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
-
-            command = "SELECT * FROM nodes WHERE scenario = ? ORDER BY CAST(idx AS INTEGER) ASC;"
-            c.execute(command, (scenario_name,))
-            result = c.fetchall()
-
-            return result
+        command = "SELECT *, IFNULL(last_seen >= ?, 0) AS online FROM nodes WHERE scenario = ? ORDER BY idx ASC;"
+        return await nodes_db.fetchall(command, (time.time() - online_timeout, scenario_name))
     except sqlite3.Error as e:
         print(f"Error occurred while listing nodes by scenario name: {e}")
         return None
 
 
-async def update_node_record(
-    node_uid,
-    idx,
-    ip,
-    port,
-    role,
-    neighbors,
-    latitude,
-    longitude,
-    timestamp,
-    federation,
-    federation_round,
-    scenario,
-    run_hash,
-    malicious,
-):
-    """
-    Inserts or updates a node record in the database for a given scenario, ensuring thread-safe access.
+NODE_COLUMNS = (
+    "uid",
+    "idx",
+    "ip",
+    "port",
+    "role",
+    "neighbors",
+    "latitude",
+    "longitude",
+    "timestamp",
+    "federation",
+    "round",
+    "scenario",
+    "hash",
+    "malicious",
+    "last_seen",
+)
+
+UPSERT_NODE_SQL = (
+    f"INSERT INTO nodes ({', '.join(NODE_COLUMNS)}) VALUES ({', '.join('?' for _ in NODE_COLUMNS)}) "
+    "ON CONFLICT(scenario, uid) DO UPDATE SET "
+    f"{', '.join(f'{c} = excluded.{c}' for c in NODE_COLUMNS if c not in ('scenario', 'uid'))};"
+)
+
+
+async def upsert_node_records(conn, records):
+    """
+    Inserts or updates several node records with a single statement, without committing.
 
     Args:
-        node_uid (str): Unique identifier of the node.
-        idx (str): Index or identifier within the scenario.
-        ip (str): IP address of the node.
-        port (str): Port used by the node.
-        role (str): Role of the node in the federation.
-        neighbors (str): Neighbors of the node (serialized).
-        latitude (str): Geographic latitude of the node.
-        longitude (str): Geographic longitude of the node.
-        timestamp (str): Timestamp of the last update.
-        federation (str): Federation identifier the node belongs to.
-        federation_round (str): Current federation round.
-        scenario (str): Scenario name the node is part of.
-        run_hash (str): Hash of the current run/state.
-        malicious (str): Indicator if the node is malicious.
+        conn (aiosqlite.Connection): Open connection to the nodes database.
+        records (list[tuple]): Values of the records, in the order of `NODE_COLUMNS`.
+    """
+    await conn.executemany(UPSERT_NODE_SQL, records)
 
-    Returns:
-        dict or None: The updated or inserted node record as a dictionary, or None if insertion/update failed.
-    """
-    global _node_lock
-    async with _node_lock:
-        async with aiosqlite.connect(node_db_file_location) as conn:
-            conn.row_factory = aiosqlite.Row
-            _c = await conn.cursor()
-
-            # Check if the node already exists
-            await _c.execute("SELECT * FROM nodes WHERE uid = ? AND scenario = ?;", (node_uid, scenario))
-            result = await _c.fetchone()
-
-            if result is None:
-                # Insert new node
-                await _c.execute(
-                    "INSERT INTO nodes (uid, idx, ip, port, role, neighbors, latitude, longitude, timestamp, federation, round, scenario, hash, malicious) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);",
-                    (
-                        node_uid,
-                        idx,
-                        ip,
-                        port,
-                        role,
-                        neighbors,
-                        latitude,
-                        longitude,
-                        timestamp,
-                        federation,
-                        federation_round,
-                        scenario,
-                        run_hash,
-                        malicious,
-                    ),
-                )
-            else:
-                # Update existing node
-                await _c.execute(
-                    "UPDATE nodes SET idx = ?, ip = ?, port = ?, role = ?, neighbors = ?, latitude = ?, longitude = ?, timestamp = ?, federation = ?, round = ?, hash = ?, malicious = ? WHERE uid = ? AND scenario = ?;",
-                    (
-                        idx,
-                        ip,
-                        port,
-                        role,
-                        neighbors,
-                        latitude,
-                        longitude,
-                        timestamp,
-                        federation,
-                        federation_round,
-                        run_hash,
-                        malicious,
-                        node_uid,
-                        scenario,
-                    ),
-                )
-
-            await conn.commit()
-
-            # Fetch the updated or newly inserted row
-            await _c.execute("SELECT * FROM nodes WHERE uid = ? AND scenario = ?;", (node_uid, scenario))
-            updated_row = await _c.fetchone()
-            return dict(updated_row) if updated_row else None
-
-
-def remove_all_nodes():
+
+async def remove_all_nodes():
     """
     Deletes all node records from the nodes database.
 
@@ -583,13 +595,10 @@ def remove_all_nodes():
     Returns:
         None
     """
-    with sqlite3.connect(node_db_file_location) as conn:
-        c = conn.cursor()
-        command = "DELETE FROM nodes;"
-        c.execute(command)
+    await nodes_db.execute("DELETE FROM nodes;")
 
 
-def remove_nodes_by_scenario_name(scenario_name):
+async def remove_nodes_by_scenario_name(scenario_name):
     """
     Deletes all nodes associated with a specific scenario from the database.
 
@@ -599,13 +608,10 @@ def remove_nodes_by_scenario_name(scenario_name):
     Returns:
         None
     """
-    with sqlite3.connect(node_db_file_location) as conn:
-        c = conn.cursor()
-        command = "DELETE FROM nodes WHERE scenario = ?;"
-        c.execute(command, (scenario_name,))
+    await nodes_db.execute("DELETE FROM nodes WHERE scenario = ?;", (scenario_name,))
 
 
-def get_all_scenarios(username, role, sort_by="start_time"):
+async def get_all_scenarios(username, role, sort_by="start_time"):
     """
     Retrieve all scenarios from the database filtered by user role and sorted by a specified field.
 
@@ -623,42 +629,30 @@ def get_all_scenarios(username, role, sort_by="start_time"):
         - Sorting by "start_time" applies custom datetime ordering.
         - Other sort fields are applied directly in the ORDER BY clause.
     """
-    with sqlite3.connect(scenario_db_file_location) as conn:
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        if role == "admin":
-            if sort_by == "start_time":
-                command = """
-                SELECT * FROM scenarios
-                ORDER BY strftime('%Y-%m-%d %H:%M:%S', substr(start_time, 7, 4) || '-' || substr(start_time, 4, 2) || '-' || substr(start_time, 1, 2) || ' ' || substr(start_time, 12, 8));
-                """
-                c.execute(command)
-            else:
-                command = "SELECT * FROM scenarios ORDER BY ?;"
-                c.execute(command, (sort_by,))
+    if role == "admin":
+        if sort_by == "start_time":
+            command = """
+            SELECT * FROM scenarios
+            ORDER BY strftime('%Y-%m-%d %H:%M:%S', substr(start_time, 7, 4) || '-' || substr(start_time, 4, 2) || '-' || substr(start_time, 1, 2) || ' ' || substr(start_time, 12, 8));
+            """
+            return await scenarios_db.fetchall(command)
         else:
-            if sort_by == "start_time":
-                command = """
-                SELECT * FROM scenarios
-                WHERE username = ?
-                ORDER BY strftime('%Y-%m-%d %H:%M:%S', substr(start_time, 7, 4) || '-' || substr(start_time, 4, 2) || '-' || substr(start_time, 1, 2) || ' ' || substr(start_time, 12, 8));
-                """
-                c.execute(command, (username,))
-            else:
-                command = "SELECT * FROM scenarios WHERE username = ? ORDER BY ?;"
-                c.execute(
-                    command,
-                    (
-                        username,
-                        sort_by,
-                    ),
-                )
-        result = c.fetchall()
-
-    return result
+            command = "SELECT * FROM scenarios ORDER BY ?;"
+            return await scenarios_db.fetchall(command, (sort_by,))
+    else:
+        if sort_by == "start_time":
+            command = """
+            SELECT * FROM scenarios
+            WHERE username = ?
+            ORDER BY strftime('%Y-%m-%d %H:%M:%S', substr(start_time, 7, 4) || '-' || substr(start_time, 4, 2) || '-' || substr(start_time, 1, 2) || ' ' || substr(start_time, 12, 8));
+            """
+            return await scenarios_db.fetchall(command, (username,))
+        else:
+            command = "SELECT * FROM scenarios WHERE username = ? ORDER BY ?;"
+            return await scenarios_db.fetchall(command, (username, sort_by))
 
 
-def get_all_scenarios_and_check_completed(username, role, sort_by="start_time"):
+async def get_all_scenarios_and_check_completed(username, role, sort_by="start_time"):
     """
     Retrieve all scenarios with detailed fields and update the status of running scenarios if their federation is completed.
 
@@ -678,66 +672,54 @@ def get_all_scenarios_and_check_completed(username, role, sort_by="start_time"):
             - If completed, updates the scenario status to "completed".
             - Refreshes the returned scenario list after updates.
     """
-    with sqlite3.connect(scenario_db_file_location) as conn:
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-
-        if role == "admin":
-            if sort_by == "start_time":
-                command = """
-                SELECT name, username, title, start_time, model, dataset, rounds, status FROM scenarios
-                ORDER BY
-                    CASE
-                        WHEN start_time IS NULL OR start_time = '' THEN 1
-                        ELSE 0
-                    END,
-                    strftime(
-                        '%Y-%m-%d %H:%M:%S',
-                        substr(start_time, 7, 4) || '-' || substr(start_time, 4, 2) || '-' || substr(start_time, 1, 2) || ' ' || substr(start_time, 12, 8)
-                    );
-                """
-                c.execute(command)
-            else:
-                command = "SELECT name, username, title, start_time, model, dataset, rounds, status FROM scenarios ORDER BY ?;"
-                c.execute(command, (sort_by,))
-            result = c.fetchall()
+    if role == "admin":
+        if sort_by == "start_time":
+            command = """
+            SELECT name, username, title, start_time, model, dataset, rounds, status FROM scenarios
+            ORDER BY
+                CASE
+                    WHEN start_time IS NULL OR start_time = '' THEN 1
+                    ELSE 0
+                END,
+                strftime(
+                    '%Y-%m-%d %H:%M:%S',
+                    substr(start_time, 7, 4) || '-' || substr(start_time, 4, 2) || '-' || substr(start_time, 1, 2) || ' ' || substr(start_time, 12, 8)
+                );
+            """
+            result = await scenarios_db.fetchall(command)
+        else:
+            command = "SELECT name, username, title, start_time, model, dataset, rounds, status FROM scenarios ORDER BY ?;"
+            result = await scenarios_db.fetchall(command, (sort_by,))
+    else:
+        if sort_by == "start_time":
+            command = """
+            SELECT name, username, title, start_time, model, dataset, rounds, status FROM scenarios
+            WHERE username = ?
+            ORDER BY
+                CASE
+                    WHEN start_time IS NULL OR start_time = '' THEN 1
+                    ELSE 0
+                END,
+                strftime(
+                    '%Y-%m-%d %H:%M:%S',
+                    substr(start_time, 7, 4) || '-' || substr(start_time, 4, 2) || '-' || substr(start_time, 1, 2) || ' ' || substr(start_time, 12, 8)
+                );
+            """
+            result = await scenarios_db.fetchall(command, (username,))
         else:
-            if sort_by == "start_time":
-                command = """
-                SELECT name, username, title, start_time, model, dataset, rounds, status FROM scenarios
-                WHERE username = ?
-                ORDER BY
-                    CASE
-                        WHEN start_time IS NULL OR start_time = '' THEN 1
-                        ELSE 0
-                    END,
-                    strftime(
-                        '%Y-%m-%d %H:%M:%S',
-                        substr(start_time, 7, 4) || '-' || substr(start_time, 4, 2) || '-' || substr(start_time, 1, 2) || ' ' || substr(start_time, 12, 8)
-                    );
-                """
-                c.execute(command, (username,))
-            else:
-                command = "SELECT name, username, title, start_time, model, dataset, rounds, status FROM scenarios WHERE username = ? ORDER BY ?;"
-                c.execute(
-                    command,
-                    (
-                        username,
-                        sort_by,
-                    ),
-                )
-            result = c.fetchall()
-
-        for scenario in result:
-            if scenario["status"] == "running":
-                if check_scenario_federation_completed(scenario["name"]):
-                    scenario_set_status_to_completed(scenario["name"])
-                    result = get_all_scenarios(username, role)
+            command = "SELECT name, username, title, start_time, model, dataset, rounds, status FROM scenarios WHERE username = ? ORDER BY ?;"
+            result = await scenarios_db.fetchall(command, (username, sort_by))
+
+    for scenario in result:
+        if scenario["status"] == "running":
+            if await check_scenario_federation_completed(scenario["name"]):
+                await scenario_set_status_to_completed(scenario["name"])
+                result = await get_all_scenarios(username, role)
 
     return result
 
 
-def scenario_update_record(name, start_time, end_time, scenario, status, role, username):
+async def scenario_update_record(name, start_time, end_time, scenario, status, role, username):
     """
     Insert a new scenario record or update an existing one in the database based on the scenario name.
 
@@ -754,15 +736,12 @@ def scenario_update_record(name, start_time, end_time, scenario, status, role, u
         - Checks if a scenario with the given name exists.
         - If not, inserts a new record with all scenario details.
         - If exists, updates the existing record with the provided data.
-        - Commits the transaction to persist changes.
+        - Commits the transaction to persist changes (the lookup and the write are a single transaction).
     """
-    with sqlite3.connect(scenario_db_file_location) as conn:
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-
+    async with scenarios_db.write() as conn:
         select_command = "SELECT * FROM scenarios WHERE name = ?;"
-        c.execute(select_command, (name,))
-        result = c.fetchone()
+        async with conn.execute(select_command, (name,)) as cursor:
+            result = await cursor.fetchone()
 
         if result is None:
             insert_command = """
@@ -814,7 +793,7 @@ def scenario_update_record(name, start_time, end_time, scenario, status, role, u
                     ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
                 );
             """
-            c.execute(
+            await conn.execute(
                 insert_command,
                 (
                     name,
@@ -909,7 +888,7 @@ def scenario_update_record(name, start_time, end_time, scenario, status, role, u
                     username = ?
                 WHERE name = ?;
             """
-            c.execute(
+            await conn.execute(
                 update_command,
                 (
                     start_time,
@@ -958,10 +937,8 @@ def scenario_update_record(name, start_time, end_time, scenario, status, role, u
                 ),
             )
 
-        conn.commit()
 
-
-def scenario_set_all_status_to_finished():
+async def scenario_set_all_status_to_finished():
     """
     Set the status of all currently running scenarios to "finished" and update their end time to the current datetime.
 
@@ -971,15 +948,13 @@ def scenario_set_all_status_to_finished():
         - Sets the end_time to the current timestamp.
         - Commits the changes to the database.
     """
-    with sqlite3.connect(scenario_db_file_location) as conn:
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        current_time = str(datetime.datetime.now())
-        c.execute("UPDATE scenarios SET status = 'finished', end_time = ? WHERE status = 'running';", (current_time,))
-        conn.commit()
+    current_time = str(datetime.datetime.now())
+    await scenarios_db.execute(
+        "UPDATE scenarios SET status = 'finished', end_time = ? WHERE status = 'running';", (current_time,)
+    )
 
 
-def scenario_set_status_to_finished(scenario_name):
+async def scenario_set_status_to_finished(scenario_name):
     """
     Set the status of a specific scenario to "finished" and update its end time to the current datetime.
 
@@ -991,17 +966,13 @@ def scenario_set_status_to_finished(scenario_name):
         - Sets the end_time to the current timestamp.
         - Commits the update to the database.
     """
-    with sqlite3.connect(scenario_db_file_location) as conn:
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        current_time = str(datetime.datetime.now())
-        c.execute(
-            "UPDATE scenarios SET status = 'finished', end_time = ? WHERE name = ?;", (current_time, scenario_name)
-        )
-        conn.commit()
+    current_time = str(datetime.datetime.now())
+    await scenarios_db.execute(
+        "UPDATE scenarios SET status = 'finished', end_time = ? WHERE name = ?;", (current_time, scenario_name)
+    )
 
 
-def scenario_set_status_to_completed(scenario_name):
+async def scenario_set_status_to_completed(scenario_name):
     """
     Set the status of a specific scenario to "completed".
 
@@ -1012,14 +983,10 @@ def scenario_set_status_to_completed(scenario_name):
         - Updates the scenario's status to "completed".
         - Commits the change to the database.
     """
-    with sqlite3.connect(scenario_db_file_location) as conn:
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        c.execute("UPDATE scenarios SET status = 'completed' WHERE name = ?;", (scenario_name,))
-        conn.commit()
+    await scenarios_db.execute("UPDATE scenarios SET status = 'completed' WHERE name = ?;", (scenario_name,))
 
 
-def get_running_scenario(username=None, get_all=False):
+async def get_running_scenario(username=None, get_all=False):
     """
     Retrieve running or completed scenarios from the database, optionally filtered by username.
 
@@ -1035,30 +1002,21 @@ def get_running_scenario(username=None, get_all=False):
         - Applies username filter if provided.
         - Returns either one or all matching records depending on get_all.
     """
-    with sqlite3.connect(scenario_db_file_location) as conn:
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-
-        if username:
-            command = """
-                SELECT * FROM scenarios
-                WHERE (status = ?) AND username = ?;
-            """
-            c.execute(command, ("running", username))
-
-            result = c.fetchone()
+    if username:
+        command = """
+            SELECT * FROM scenarios
+            WHERE (status = ?) AND username = ?;
+        """
+        return await scenarios_db.fetchone(command, ("running", username))
+    else:
+        command = "SELECT * FROM scenarios WHERE status = ?;"
+        if get_all:
+            return await scenarios_db.fetchall(command, ("running",))
         else:
-            command = "SELECT * FROM scenarios WHERE status = ?;"
-            c.execute(command, ("running",))
-            if get_all:
-                result = c.fetchall()
-            else:
-                result = c.fetchone()
-
-    return result
+            return await scenarios_db.fetchone(command, ("running",))
 
 
-def get_completed_scenario():
+async def get_completed_scenario():
     """
     Retrieve a single scenario with status "completed" from the database.
 
@@ -1068,17 +1026,10 @@ def get_completed_scenario():
     Behavior:
         - Fetches the first scenario found with status "completed".
     """
-    with sqlite3.connect(scenario_db_file_location) as conn:
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        command = "SELECT * FROM scenarios WHERE status = ?;"
-        c.execute(command, ("completed",))
-        result = c.fetchone()
-
-    return result
+    return await scenarios_db.fetchone("SELECT * FROM scenarios WHERE status = ?;", ("completed",))
 
 
-def get_scenario_by_name(scenario_name):
+async def get_scenario_by_name(scenario_name):
     """
     Retrieve a scenario record by its unique name.
 
@@ -1088,16 +1039,10 @@ def get_scenario_by_name(scenario_name):
     Returns:
         sqlite3.Row: The scenario record matching the given name, or None if not found.
     """
-    with sqlite3.connect(scenario_db_file_location) as conn:
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        c.execute("SELECT * FROM scenarios WHERE name = ?;", (scenario_name,))
-        result = c.fetchone()
+    return await scenarios_db.fetchone("SELECT * FROM scenarios WHERE name = ?;", (scenario_name,))
 
-    return result
 
-
-def get_user_by_scenario_name(scenario_name):
+async def get_user_by_scenario_name(scenario_name):
     """
     Retrieve the username associated with a given scenario name.
 
@@ -1107,16 +1052,12 @@ def get_user_by_scenario_name(scenario_name):
     Returns:
         str: The username linked to the specified scenario, or None if not found.
     """
-    with sqlite3.connect(scenario_db_file_location) as conn:
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        c.execute("SELECT username FROM scenarios WHERE name = ?;", (scenario_name,))
-        result = c.fetchone()
+    result = await scenarios_db.fetchone("SELECT username FROM scenarios WHERE name = ?;", (scenario_name,))
 
     return result["username"]
 
 
-def remove_scenario_by_name(scenario_name):
+async def remove_scenario_by_name(scenario_name):
     """
     Delete a scenario from the database by its unique name.
 
@@ -1127,14 +1068,10 @@ def remove_scenario_by_name(scenario_name):
         - Removes the scenario record matching the given name.
         - Commits the deletion to the database.
     """
-    with sqlite3.connect(scenario_db_file_location) as conn:
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        c.execute("DELETE FROM scenarios WHERE name = ?;", (scenario_name,))
-        conn.commit()
+    await scenarios_db.execute("DELETE FROM scenarios WHERE name = ?;", (scenario_name,))
 
 
-def check_scenario_federation_completed(scenario_name):
+async def check_scenario_federation_completed(scenario_name):
     """
     Check if all nodes in a given scenario have completed the required federation rounds.
 
@@ -1151,31 +1088,23 @@ def check_scenario_federation_completed(scenario_name):
         - Handles database errors and missing scenario cases gracefully.
     """
     try:
-        # Connect to the scenario database to get the total rounds for the scenario
-        with sqlite3.connect(scenario_db_file_location) as conn:
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
-            c.execute("SELECT rounds FROM scenarios WHERE name = ?;", (scenario_name,))
-            scenario = c.fetchone()
+        # Get the total rounds for the scenario
+        scenario = await scenarios_db.fetchone("SELECT rounds FROM scenarios WHERE name = ?;", (scenario_name,))
 
-            if not scenario:
-                raise ValueError(f"Scenario '{scenario_name}' not found.")
+        if not scenario:
+            raise ValueError(f"Scenario '{scenario_name}' not found.")
 
-            total_rounds = scenario["rounds"]
+        total_rounds = scenario["rounds"]
 
-        # Connect to the node database to check the rounds for each node
-        with sqlite3.connect(node_db_file_location) as conn:
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
-            c.execute("SELECT round FROM nodes WHERE scenario = ?;", (scenario_name,))
-            nodes = c.fetchall()
+        # Check the rounds for each node
+        nodes = await nodes_db.fetchall("SELECT round FROM nodes WHERE scenario = ?;", (scenario_name,))
 
-            if len(nodes) == 0:
-                return False
+        if len(nodes) == 0:
+            return False
 
-            # Check if all nodes have completed the total rounds
-            total_rounds_str = str(total_rounds)
-            return all(str(node["round"]) == total_rounds_str for node in nodes)
+        # Check if all nodes have completed the total rounds
+        total_rounds_str = str(total_rounds)
+        return all(str(node["round"]) == total_rounds_str for node in nodes)
 
     except sqlite3.Error as e:
         print(f"Database error: {e}")
@@ -1185,7 +1114,7 @@ def check_scenario_federation_completed(scenario_name):
         return False
 
 
-def check_scenario_with_role(role, scenario_name):
+async def check_scenario_with_role(role, scenario_name):
     """
     Verify if a scenario exists with a specific role and name.
 
@@ -1196,22 +1125,18 @@ def check_scenario_with_role(role, scenario_name):
     Returns:
         bool: True if a scenario with the given role and name exists, False otherwise.
     """
-    with sqlite3.connect(scenario_db_file_location) as conn:
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        c.execute(
-            "SELECT * FROM scenarios WHERE role = ? AND name = ?;",
-            (
-                role,
-                scenario_name,
-            ),
-        )
-        result = c.fetchone()
+    result = await scenarios_db.fetchone(
+        "SELECT * FROM scenarios WHERE role = ? AND name = ?;",
+        (
+            role,
+            scenario_name,
+        ),
+    )
 
     return result is not None
 
 
-def save_notes(scenario, notes):
+async def save_notes(scenario, notes):
     """
     Save or update notes associated with a specific scenario.
 
@@ -1225,23 +1150,20 @@ def save_notes(scenario, notes):
         - Handles SQLite integrity and general database errors gracefully.
     """
     try:
-        with sqlite3.connect(notes_db_file_location) as conn:
-            c = conn.cursor()
-            c.execute(
-                """
-                INSERT INTO notes (scenario, scenario_notes) VALUES (?, ?)
-                ON CONFLICT(scenario) DO UPDATE SET scenario_notes = excluded.scenario_notes;
-                """,
-                (scenario, notes),
-            )
-            conn.commit()
+        await notes_db.execute(
+            """
+            INSERT INTO notes (scenario, scenario_notes) VALUES (?, ?)
+            ON CONFLICT(scenario) DO UPDATE SET scenario_notes = excluded.scenario_notes;
+            """,
+            (scenario, notes),
+        )
     except sqlite3.IntegrityError as e:
         print(f"SQLite integrity error: {e}")
     except sqlite3.Error as e:
         print(f"SQLite error: {e}")
 
 
-def get_notes(scenario):
+async def get_notes(scenario):
     """
     Retrieve notes associated with a specific scenario.
 
@@ -1251,33 +1173,33 @@ def get_notes(scenario):
     Returns:
         sqlite3.Row or None: The notes record for the given scenario, or None if no notes exist.
     """
-    with sqlite3.connect(notes_db_file_location) as conn:
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        c.execute("SELECT * FROM notes WHERE scenario = ?;", (scenario,))
-        result = c.fetchone()
-
-    return result
+    return await notes_db.fetchone("SELECT * FROM notes WHERE scenario = ?;", (scenario,))
 
 
-def remove_note(scenario):
+async def remove_note(scenario):
     """
     Delete the note associated with a specific scenario.
 
     Parameters:
         scenario (str): The unique identifier of the scenario whose note should be removed.
     """
-    with sqlite3.connect(notes_db_file_location) as conn:
-        c = conn.cursor()
-        c.execute("DELETE FROM notes WHERE scenario = ?;", (scenario,))
-        conn.commit()
+    await notes_db.execute("DELETE FROM notes WHERE scenario = ?;", (scenario,))
 
 
 if __name__ == "__main__":
     """
     Entry point for the script to print the list of users.
 
-    When executed directly, this block calls the `list_users()` function
-    and prints its returned list of users.
+    When executed directly, this block opens the databases of the directory given as argument, calls the
+    `list_users()` function and prints its returned list of users.
     """
-    print(list_users())
+    import sys
+
+    async def main():
+        await initialize_databases(sys.argv[1] if len(sys.argv) > 1 else os.environ.get("NEBULA_DATABASES_DIR"))
+        try:
+            print(await list_users())
+        finally:
+            await close_databases()
+
+    asyncio.run(main())
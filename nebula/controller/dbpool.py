@@ -0,0 +1,112 @@
+import asyncio
+import contextlib
+import logging
+import sqlite3
+
+import aiosqlite
+
+READERS = 2
+# Statements kept compiled per connection: every query of the controller fits, so they are prepared once
+CACHED_STATEMENTS = 256
+
+
+class DatabasePool:
+    """
+    Long-lived connections to a SQLite database, shared by the coroutines of the controller.
+
+    Each connection runs its queries in its own thread (see `aiosqlite`), so the event loop never waits for SQLite.
+    The pool keeps:
+      - one writer connection, used by one transaction at a time (SQLite only allows one writer);
+      - `readers` read-only connections, handed out to concurrent readers. In WAL mode they read the last committed
+        state while a transaction is being written.
+
+    The pragmas are applied once per connection, when the pool is opened, and every connection keeps its prepared
+    statements (`CACHED_STATEMENTS`), so repeated queries are not compiled again. Rows are `sqlite3.Row` objects.
+    """
+
+    def __init__(self, db_file_location: str, pragmas: list[str], readers: int = READERS):
+        """
+        Args:
+            db_file_location (str): Path of the database file.
+            pragmas (list[str]): PRAGMA statements applied to every connection.
+            readers (int): Read-only connections.
+        """
+        self.db_file_location = db_file_location
+        self.pragmas = pragmas
+        self.readers = max(1, readers)
+        self._writer = None
+        self._write_lock = asyncio.Lock()
+        self._idle_readers: asyncio.Queue = asyncio.Queue()
+        self._connections = []
+
+    async def open(self):
+        self._writer = await self._connect()
+        for _ in range(self.readers):
+            reader = await self._connect()
+            await reader.execute("PRAGMA query_only = ON;")
+            self._idle_readers.put_nowait(reader)
+
+    async def close(self):
+        for conn in self._connections:
+            try:
+                await conn.close()
+            except Exception as e:
+                logging.warning(f"Error closing connection to {self.db_file_location}: {e}")
+        self._connections = []
+        self._writer = None
+
+    @contextlib.asynccontextmanager
+    async def read(self):
+        """
+        Borrow a read-only connection, waiting for one if all of them are in use.
+
+        Yields:
+            aiosqlite.Connection: The connection.
+        """
+        conn = await self._idle_readers.get()
+        try:
+            yield conn
+        finally:
+            self._idle_readers.put_nowait(conn)
+
+    @contextlib.asynccontextmanager
+    async def write(self):
+        """
+        Run a transaction on the writer connection: committed when the block ends, rolled back if it raises.
+
+        Yields:
+            aiosqlite.Connection: The writer connection.
+        """
+        async with self._write_lock:
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+            await self._writer.commit()
+
+    async def fetchone(self, sql: str, parameters=()) -> sqlite3.Row | None:
+        async with self.read() as conn, conn.execute(sql, parameters) as cursor:
+            return await cursor.fetchone()
+
+    async def fetchall(self, sql: str, parameters=()) -> list[sqlite3.Row]:
+        async with self.read() as conn, conn.execute(sql, parameters) as cursor:
+            return await cursor.fetchall()
+
+    async def execute(self, sql: str, parameters=()) -> int:
+        """
+        Run a statement in its own transaction.
+
+        Returns:
+            int: Rows modified.
+        """
+        async with self.write() as conn, conn.execute(sql, parameters) as cursor:
+            return cursor.rowcount
+
+    async def _connect(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.db_file_location, cached_statements=CACHED_STATEMENTS)
+        conn.row_factory = sqlite3.Row
+        for pragma in self.pragmas:
+            await conn.execute(pragma)
+        self._connections.append(conn)
+        return conn
@@ -0,0 +1,287 @@
+import asyncio
+import datetime
+import logging
+import time
+from dataclasses import dataclass
+
+import aiohttp
+
+from nebula.addons.statusreport import SNAPSHOT_INTERVAL, StatusDecoder, StatusEncoder
+from nebula.controller.database import upsert_node_records
+from nebula.controller.dbpool import DatabasePool
+
+FLUSH_INTERVAL = 0.1
+STATS_INTERVAL = 60.0
+FORWARD_TIMEOUT = aiohttp.ClientTimeout(total=15)
+
+
+def node_record(status: dict, timestamp: str, last_seen: float) -> tuple:
+    """
+    Row of the `nodes` table for the status of a node.
+
+    Args:
+        status (dict): Status of the node (see `status_snapshot`).
+        timestamp (str): Time the report was received.
+        last_seen (float): The same time, in seconds since the epoch.
+
+    Returns:
+        tuple: Values of the columns, in the order of `NODE_COLUMNS`.
+    """
+    return (
+        str(status["uid"]),
+        status["idx"],
+        str(status["ip"]),
+        status["port"],
+        str(status["role"]),
+        str(status["neighbors"]),
+        status["latitude"],
+        status["longitude"],
+        timestamp,
+        str(status["federation"]),
+        status["round"],
+        str(status["name"]),
+        str(status["run_hash"]),
+        str(status["malicious"]),
+        last_seen,
+    )
+
+
+@dataclass
+class NodeStatusStats:
+    """
+    Activity of the node status ingestion.
+
+    Attributes:
+        received (int): Status reports received.
+        coalesced (int): Reports replaced by a newer report of the same node before being written.
+        flushes (int): Transactions committed.
+        written (int): Rows written.
+        failures (int): Flushes that could not be committed.
+        flush_time (float): Seconds spent writing and committing.
+        max_batch (int): Largest number of rows written in a single transaction.
+    """
+
+    received: int = 0
+    coalesced: int = 0
+    flushes: int = 0
+    written: int = 0
+    failures: int = 0
+    flush_time: float = 0.0
+    max_batch: int = 0
+
+
+class NodeStatusIngestor:
+    """
+    Writes the status reports of the nodes to the database in batches.
+
+    Every node reports its status periodically. Writing each report on its own (a connection, a
+    transaction and an fsync per report, under a global lock) serializes all of them. The ingestor keeps the latest
+    report of each node and, every `flush_interval` seconds, writes the pending ones in a single transaction with an
+    upsert, over the writer connection of the nodes database pool (see `DatabasePool`).
+
+    Reports carry only the fields changed since the last report of the node accepted by the controller (see
+    `StatusEncoder`), and are applied to the status known for the node as they arrive.
+
+    A request reporting a status waits until its report (or a newer one of the same node) is committed, so a
+    successful response still means the status is stored. Once committed, the latest status of each node is
+    forwarded to the frontend with a shared HTTP session, without making the nodes wait for it, again as a delta over
+    the last status the frontend accepted.
+
+    The activity of the ingestion (`NodeStatusStats`) is logged every `stats_interval` seconds, starting a new
+    measurement period each time, and when it stops.
+    """
+
+    def __init__(
+        self,
+        db: DatabasePool,
+        flush_interval: float = FLUSH_INTERVAL,
+        frontend_url=None,
+        snapshot_interval: int = SNAPSHOT_INTERVAL,
+        stats_interval: float = STATS_INTERVAL,
+    ):
+        """
+        Args:
+            db (DatabasePool): Pool of the nodes database.
+            flush_interval (float): Seconds between transactions.
+            frontend_url (callable | None): Function returning the URL of the frontend that receives the updates of
+                a scenario, or None to not forward them.
+            snapshot_interval (int): Reports forwarded to the frontend between full snapshots of a node.
+            stats_interval (float): Seconds between logs of the ingestion activity.
+        """
+        self.db = db
+        self.flush_interval = flush_interval
+        self.frontend_url = frontend_url
+        self.snapshot_interval = snapshot_interval
+        self._decoder = StatusDecoder()
+        self._frontend_encoders: dict[str, StatusEncoder] = {}
+        self._forward_lock = asyncio.Lock()
+        self._pending: dict[str, tuple[tuple, dict, list[asyncio.Future]]] = {}
+        self._wakeup = asyncio.Event()
+        self._session = None
+        self._task = None
+        self._forwarding = set()
+        self._flush_lock = asyncio.Lock()
+        self._stats = NodeStatusStats()
+        self.stats_interval = stats_interval
+        self._stats_since = time.monotonic()
+
+    async def start(self):
+        if self.frontend_url is not None:
+            self._session = aiohttp.ClientSession(timeout=FORWARD_TIMEOUT)
+        self._task = asyncio.create_task(self._run(), name="node_status_ingestor")
+
+    async def stop(self):
+        """Write the pending reports and release the HTTP session. The pool is left open."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            await self._flush()
+        if self._forwarding:
+            await asyncio.gather(*self._forwarding, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self._log_stats(reset=False)
+
+    async def submit(self, report: dict) -> str:
+        """
+        Apply the status report of a node and wait until the resulting status is stored.
+
+        Args:
+            report (dict): Status report (see `StatusEncoder`).
+
+        Returns:
+            str: The timestamp recorded for the report.
+
+        Raises:
+            StatusDesyncError: If the report is a delta over a status the controller does not know.
+            KeyError: If the status lacks a field of the `nodes` table.
+            Exception: The error of the transaction, if it could not be committed.
+        """
+        status = self._decoder.apply(report)
+        received = time.time()
+        timestamp = str(datetime.datetime.fromtimestamp(received))
+        record = node_record(status, timestamp, received)
+        status["timestamp"] = timestamp
+        future = asyncio.get_running_loop().create_future()
+        uid = record[0]
+        self._stats.received += 1
+        previous = self._pending.get(uid)
+        waiters = [future]
+        if previous is not None:
+            self._stats.coalesced += 1
+            waiters = previous[2] + waiters
+        self._pending[uid] = (record, status, waiters)
+        self._wakeup.set()
+        await future
+        return timestamp
+
+    def discard(self, scenario_name: str | None = None):
+        """
+        Forget the status of the nodes of a scenario and the last status forwarded to the frontend for them.
+
+        Args:
+            scenario_name (str | None): Name of the scenario that finished or was removed, or None for every scenario.
+        """
+        for uid in self._decoder.discard_scenario(scenario_name):
+            self._frontend_encoders.pop(uid, None)
+
+    def get_stats(self, reset: bool = False) -> NodeStatusStats:
+        """
+        Args:
+            reset (bool): Start a new measurement period after returning the stats.
+
+        Returns:
+            NodeStatusStats: The activity since the last reset.
+        """
+        stats = self._stats
+        if reset:
+            self._stats = NodeStatusStats()
+        return stats
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Reports arriving during the interval are written in the same transaction
+            await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            # Stopping the ingestor must not interrupt a transaction, whose reports would be lost
+            await asyncio.shield(self._flush())
+            if time.monotonic() - self._stats_since >= self.stats_interval:
+                self._log_stats(reset=True)
+
+    def _log_stats(self, reset: bool):
+        elapsed = time.monotonic() - self._stats_since
+        stats = self.get_stats(reset=reset)
+        if reset:
+            self._stats_since = time.monotonic()
+        if not stats.received and not stats.failures:
+            return
+        logging.info(
+            f"Node status ingestion | last {elapsed:.0f}s | received: {stats.received}, "
+            f"coalesced: {stats.coalesced}, written: {stats.written} in {stats.flushes} transactions "
+            f"(max batch: {stats.max_batch}, avg: {stats.flush_time / max(stats.flushes, 1) * 1000:.1f} ms), "
+            f"failed transactions: {stats.failures}"
+        )
+
+    async def _flush(self):
+        async with self._flush_lock:
+            if self._pending:
+                # Reports arriving during the transaction wait for the next one
+                pending, self._pending = self._pending, {}
+                await self._write(pending)
+
+    async def _write(self, pending: dict):
+        start = time.perf_counter()
+        try:
+            async with self.db.write() as conn:
+                await upsert_node_records(conn, [record for record, _, _ in pending.values()])
+        except Exception as e:
+            logging.exception(f"Error writing {len(pending)} node status reports: {e}")
+            self._stats.failures += 1
+            for _, _, waiters in pending.values():
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+            return
+        self._stats.flushes += 1
+        self._stats.written += len(pending)
+        self._stats.max_batch = max(self._stats.max_batch, len(pending))
+        self._stats.flush_time += time.perf_counter() - start
+        for _, _, waiters in pending.values():
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+        if self._session is not None:
+            task = asyncio.create_task(self._forward([status for _, status, _ in pending.values()]))
+            self._forwarding.add(task)
+            task.add_done_callback(self._forwarding.discard)
+
+    async def _forward(self, statuses: list[dict]):
+        # One batch at a time, so the frontend receives the reports of each node in order
+        async with self._forward_lock:
+            await asyncio.gather(*(self._forward_status(status) for status in statuses))
+
+    async def _forward_status(self, status: dict):
+        encoder = self._frontend_encoders.get(status["uid"])
+        if encoder is None:
+            encoder = self._frontend_encoders[status["uid"]] = StatusEncoder(self.snapshot_interval)
+        url = self.frontend_url(status["name"])
+        try:
+            for _ in range(2):
+                report = encoder.encode(status)
+                async with self._session.post(url, json=report) as response:
+                    if response.status == 200:
+                        encoder.ack(report["version"])
+                        return
+                    if response.status != 409:
+                        logging.warning(f"Error forwarding node status to the frontend: {response.status}")
+                        return
+                # The frontend lost track of the node (e.g., it restarted): send a full snapshot
+                encoder.reset()
+        except Exception as e:
+            logging.warning(f"Error forwarding node status to the frontend: {e}")
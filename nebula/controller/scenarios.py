@@ -109,6 +109,7 @@ class Scenario:
         sar_training,
         sar_training_policy,
         physical_ips=None,
+        payload_codec=None,
     ):
         """
         Initialize a Scenario instance.
@@ -161,6 +162,8 @@ class Scenario:
             sar_training (bool): Wheter SAR training is enabled.
             sar_training_policy (str): Training policy for SAR.
             physical_ips (list, optional): List of physical IPs for nodes. Defaults to None.
+            payload_codec (str, optional): Compressor applied to message payloads (e.g., "none", "lz4", "zstd-3").
+                Defaults to None (participant default).
         """
         self.scenario_title = scenario_title
         self.scenario_description = scenario_description
@@ -234,6 +237,7 @@ class Scenario:
         self.sar_training = sar_training
         self.sar_training_policy = sar_training_policy
         self.physical_ips = physical_ips
+        self.payload_codec = payload_codec
 
     def attack_node_assign(
         self,
@@ -711,6 +715,8 @@ class ScenarioManagement:
             participant_config["mobility_args"]["scheme_mobility"] = self.scenario.scheme_mobility
             participant_config["mobility_args"]["round_frequency"] = self.scenario.round_frequency
             participant_config["reporter_args"]["report_status_data_queue"] = self.scenario.report_status_data_queue
+            if self.scenario.payload_codec:
+                participant_config["message_args"]["compression"] = self.scenario.payload_codec
             participant_config["mobility_args"]["topology_type"] = self.scenario.topology
             if self.scenario.with_sa:
                 participant_config["situational_awareness"] = {
@@ -1048,12 +1054,12 @@ class ScenarioManagement:
         dataset.initialize_dataset()
         logging.info(f"Splitting {dataset_name} dataset... Done")
 
-        if self.scenario.deployment in ["docker", "process", "physical"]:
+        if self.scenario.deployment in ["docker", "process", "simulation", "physical"]:
             if self.scenario.deployment == "docker":
                 self.start_nodes_docker()
             elif self.scenario.deployment == "physical":
                 self.start_nodes_physical()
-            elif self.scenario.deployment == "process":
+            elif self.scenario.deployment in ["process", "simulation"]:
                 self.start_nodes_process()
             else:
                 raise ValueError(f"Unknown deployment type: {self.scenario.deployment}")
@@ -1275,7 +1281,9 @@ class ScenarioManagement:
             - On Windows, it creates a PowerShell script that launches each node as a background
               process, redirects output and error streams to log files, and records process IDs.
             - On Unix-like systems, it creates a bash script that launches each node in the
-              background, redirects output, and stores PIDs in a file.
+              background, redirects output, and stores PIDs in a file. With the simulation
+              deployment, the script launches a single node pool (nebula/core/nodepool.py) that
+              forks every node from a process where the dependencies are already imported.
         - Sets executable permissions for the generated script.
 
         Raises:
@@ -1308,6 +1316,9 @@ class ScenarioManagement:
             with open(f"{self.config_dir}/participant_{node['device_args']['idx']}.json", "w") as f:
                 json.dump(node, f, indent=4)
 
+        if self.scenario.deployment == "simulation" and self.host_platform == "windows":
+            logging.warning("The simulation deployment needs os.fork, starting the nodes as independent processes")
+
         try:
             if self.host_platform == "windows":
                 commands = """
@@ -1341,6 +1352,20 @@ class ScenarioManagement:
                 with open(f"{self.config_dir}/current_scenario_commands.ps1", "w") as f:
                     f.write(commands)
                 os.chmod(f"{self.config_dir}/current_scenario_commands.ps1", 0o755)
+            elif self.scenario.deployment == "simulation":
+                commands = '#!/bin/bash\n\nPID_FILE="$(dirname "$0")/current_scenario_pids.txt"\n\n> $PID_FILE\n\n'
+                config_files = " ".join(
+                    f"{self.root_path}/app/config/{self.scenario_name}/participant_{node['device_args']['idx']}.json"
+                    for node in self.config.participants
+                )
+                commands += f'echo "Running {len(self.config.participants)} nodes in a node pool..."\n'
+                commands += f"python {self.root_path}/nebula/core/nodepool.py {config_files} &\n"
+                commands += "echo $! >> $PID_FILE\n\n"
+                commands += 'echo "Node pool started. PID stored in $PID_FILE"\n'
+
+                with open(f"{self.config_dir}/current_scenario_commands.sh", "w") as f:
+                    f.write(commands)
+                os.chmod(f"{self.config_dir}/current_scenario_commands.sh", 0o755)
             else:
                 commands = '#!/bin/bash\n\nPID_FILE="$(dirname "$0")/current_scenario_pids.txt"\n\n> $PID_FILE\n\n'
                 sorted_participants = sorted(
@@ -1,8 +1,10 @@
 import asyncio
 import logging
+import time
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
 
+from nebula.core.aggregation.computeexecutor import factory_compute_executor
 from nebula.core.aggregation.updatehandlers.updatehandler import factory_update_handler
 from nebula.core.eventmanager import EventManager
 from nebula.core.nebulaevents import AggregationEvent
@@ -16,6 +18,10 @@ class AggregatorException(Exception):
     pass
 
 class Aggregator(ABC):
+    # Whether the aggregator can fold updates into a running aggregate as they arrive (see `fold_update`).
+    # Aggregators that need every update at once (e.g., robust aggregators) keep it disabled.
+    supports_streaming = False
+
     def __init__(self, config=None, engine=None):
         self.config = config
         self.engine: Engine = engine
@@ -27,7 +33,16 @@ class Aggregator(ABC):
         self._aggregation_done_lock = Locker(name="aggregation_done_lock", async_lock=True)
         self._aggregation_waiting_skip = asyncio.Event()
 
+        aggregator_args = self.config.participant["aggregator_args"]
+        self._compute_executor = factory_compute_executor(
+            aggregator_args.get("compute_executor", "thread"),
+            workers=aggregator_args.get("compute_workers", 1),
+            torch_threads=aggregator_args.get("compute_torch_threads"),
+        )
+        self._last_aggregation_window = None
+
         scenario = self.config.participant["scenario_args"]["federation"]
+        self._streaming = self._streaming_enabled(scenario)
         self._update_storage = factory_update_handler(scenario, self, self._addr)
 
     def __str__(self):
@@ -41,12 +56,91 @@ class Aggregator(ABC):
         """Federation type UpdateHandler (e.g. DFL-UpdateHandler, CFL-UpdateHandler...)"""
         return self._update_storage
 
+    @property
+    def compute(self):
+        """Compute executor running the CPU-bound work of the aggregator (aggregation and update folding)"""
+        return self._compute_executor
+
+    @property
+    def last_aggregation_window(self):
+        """`time.monotonic()` values when the last aggregation computation started and finished (None if none yet)"""
+        return self._last_aggregation_window
+
+    @property
+    def streaming(self):
+        """Whether updates are folded into a running aggregate as they arrive"""
+        return self._streaming
+
+    def _streaming_enabled(self, scenario):
+        """
+        Check whether the streaming aggregation mode (`aggregator_args.streaming`) can be used.
+
+        Streaming keeps only the running aggregate in memory, so it is disabled when the aggregator
+        needs every update at once, when the federation is not DFL, when other modules (reputation,
+        situational awareness) inspect the individual models of the round, or when the node runs an
+        attack (model attacks replace `run_aggregation`, which streaming does not call).
+
+        Args:
+            scenario (str): Federation type of the scenario.
+
+        Returns:
+            bool: True if updates can be aggregated as they arrive.
+        """
+        if not self.config.participant["aggregator_args"].get("streaming", False):
+            return False
+        if not self.supports_streaming:
+            logging.warning(f"[{self.__class__.__name__}] Streaming aggregation not supported, storing all updates")
+        elif scenario != "DFL":
+            logging.warning(f"[{self.__class__.__name__}] Streaming aggregation only available in DFL federations")
+        elif (
+            self.config.participant["defense_args"]["reputation"]["enabled"]
+            or "situational_awareness" in self.config.participant
+        ):
+            logging.warning(
+                f"[{self.__class__.__name__}] Streaming aggregation disabled, reputation or situational awareness need the individual updates"
+            )
+        elif self.config.participant.get("adversarial_args", {}).get("attack_params", {}).get(
+            "attacks", "No Attack"
+        ) not in (None, "No Attack"):
+            logging.warning(f"[{self.__class__.__name__}] Streaming aggregation disabled, attacks need run_aggregation")
+        else:
+            logging.info(f"[{self.__class__.__name__}] Streaming aggregation enabled")
+            return True
+        return False
+
     @abstractmethod
     def run_aggregation(self, models):
         if len(models) == 0:
             logging.error("Trying to aggregate models when there are no models")
             return None
 
+    def fold_update(self, accum, model, weight):
+        """
+        Fold a single update into the running aggregate of the round (streaming mode).
+
+        Args:
+            accum (dict | None): Running aggregate, None for the first update of the round.
+            model (dict): Model parameters of the update.
+            weight (float): Weight of the update.
+
+        Returns:
+            dict: The updated running aggregate.
+        """
+        raise NotImplementedError
+
+    def finish_aggregation(self, accum, total_weight):
+        """
+        Turn the running aggregate of the round into the aggregated model (streaming mode).
+
+        Args:
+            accum (dict): Running aggregate built by `fold_update`.
+            total_weight (float): Sum of the weights of the folded updates.
+
+        Returns:
+            dict: The aggregated model parameters.
+        """
+        raise NotImplementedError
+
     async def init(self):
         await self.us.init(self.engine.rb.get_role_name(True))
 
@@ -99,7 +193,8 @@ class Aggregator(ABC):
         It uses an asynchronous lock to coordinate access and includes an early exit mechanism if all
         updates are received before the timeout. Once the condition is satisfied, it releases the lock,
         collects the updates, identifies any missing nodes, and publishes an `AggregationEvent`.
-        Finally, it runs the aggregation algorithm and returns the result.
+        Finally, it runs the aggregation algorithm through the compute executor (off the event loop by
+        default) and returns the result.
 
         Returns:
             Any: The result of the aggregation process, as returned by `run_aggregation`.
@@ -142,6 +237,7 @@ class Aggregator(ABC):
 
         await self.us.stop_notifying_updates()
         updates = await self.us.get_round_updates()
+        round_aggregate = await self.us.get_round_aggregate() if self.streaming else None
         if not updates:
             logging.info(f"🔄  get_aggregation | No updates has been received..resolving conflict to continue...")
             updates = {self._addr: await self.engine.resolve_missing_updates()}
@@ -154,7 +250,12 @@ class Aggregator(ABC):
 
         agg_event = AggregationEvent(updates, self._federation_nodes, missing_nodes)
         await EventManager.get_instance().publish_node_event(agg_event)
-        aggregated_result = self.run_aggregation(updates)
+        start = time.monotonic()
+        if round_aggregate is not None:
+            aggregated_result = await self.compute.run(self.finish_aggregation, *round_aggregate)
+        else:
+            aggregated_result = await self.compute.run(self.run_aggregation, updates)
+        self._last_aggregation_window = (start, time.monotonic())
         return aggregated_result
 
     def print_model_size(self, model):
@@ -171,6 +272,12 @@ class Aggregator(ABC):
     async def notify_all_updates_received(self):
         self._aggregation_waiting_skip.set()
 
+    def shutdown(self):
+        """
+        Stop the compute executor of the aggregator.
+        """
+        self.compute.shutdown()
+
 
 def create_aggregator(config, engine) -> Aggregator:
     from nebula.core.aggregation.fedavg import FedAvg
@@ -0,0 +1,123 @@
+import asyncio
+import functools
+import logging
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+
+class ComputeExecutorException(Exception):
+    pass
+
+
+class ComputeExecutor(ABC):
+    """
+    Runs the CPU-bound work of an aggregator (e.g., `run_aggregation`, `fold_update`) on behalf of the event loop.
+
+    Aggregators submit their work through `run`, so the place where it executes can be changed without touching
+    the aggregation algorithms.
+    """
+
+    @abstractmethod
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run `fn(*args, **kwargs)` and return its result.
+
+        Raises:
+            Any exception raised by `fn`.
+        """
+        pass
+
+    def shutdown(self):
+        """
+        Release the resources of the executor.
+        """
+        pass
+
+
+class InlineComputeExecutor(ComputeExecutor):
+    """
+    Runs the work directly on the event loop, blocking it until the work is done (previous behaviour).
+    """
+
+    async def run(self, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+
+class ThreadComputeExecutor(ComputeExecutor):
+    """
+    Runs the work on a dedicated pool of threads, so the event loop keeps serving connections, heartbeats and
+    timers while an aggregation is in progress.
+
+    Torch releases the GIL inside its kernels, so most of the aggregation runs in parallel with the loop. The
+    number of intra-op threads used by torch can be limited while the work runs (`torch_threads`), leaving cores
+    for the rest of the node. The torch setting is process-wide, so it is restored when the work finishes.
+    """
+
+    def __init__(self, max_workers: int = 1, torch_threads: int | None = None):
+        """
+        Args:
+            max_workers (int): Threads running work. With a single thread, work is run in submission order.
+            torch_threads (int | None): Intra-op threads used by torch while running work (None to keep the current value).
+        """
+        self.max_workers = max(1, max_workers)
+        self.torch_threads = torch_threads
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="aggregation_compute")
+        self._torch_threads_lock = threading.Lock()
+        self._running = 0
+        self._previous_torch_threads = None
+
+    async def run(self, fn, *args, **kwargs):
+        call = functools.partial(self._call, fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    def _call(self, fn, *args, **kwargs):
+        if self.torch_threads is None:
+            return fn(*args, **kwargs)
+        self._limit_torch_threads()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._restore_torch_threads()
+
+    def _limit_torch_threads(self):
+        with self._torch_threads_lock:
+            if self._running == 0:
+                self._previous_torch_threads = torch.get_num_threads()
+                torch.set_num_threads(self.torch_threads)
+            self._running += 1
+
+    def _restore_torch_threads(self):
+        with self._torch_threads_lock:
+            self._running -= 1
+            if self._running == 0:
+                torch.set_num_threads(self._previous_torch_threads)
+
+    def shutdown(self):
+        logging.info("Shutting down aggregation compute executor...")
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def factory_compute_executor(executor: str = "thread", workers: int = 1, torch_threads: int | None = None) -> ComputeExecutor:
+    """
+    Create the compute executor used by an aggregator.
+
+    Args:
+        executor (str): "thread" to run the work off the event loop, "inline" to run it on the event loop.
+        workers (int): Threads of the "thread" executor.
+        torch_threads (int | None): Intra-op torch threads of the "thread" executor.
+
+    Returns:
+        ComputeExecutor: The executor.
+
+    Raises:
+        ComputeExecutorException: If the executor type is unknown.
+    """
+    if executor == "thread":
+        return ThreadComputeExecutor(max_workers=workers, torch_threads=torch_threads)
+    elif executor == "inline":
+        return InlineComputeExecutor()
+    else:
+        raise ComputeExecutorException(f"Compute executor {executor} not found")
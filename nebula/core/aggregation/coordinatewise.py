@@ -0,0 +1,117 @@
+from collections.abc import Callable, Mapping
+
+import torch
+
+from nebula.core.utils.flatmodel import FlatModel
+
+# Upper bound for the temporaries created while reducing a block of coordinates
+CHUNK_BYTES = 256 * 1024 * 1024
+
+
+def flatten_updates(models_params: list[Mapping]) -> tuple[torch.Tensor, FlatModel]:
+    """
+    Stack the parameters of several models into one contiguous (n, P) tensor.
+
+    Each row holds the vector of a model (see `FlatModel`), so the tensor keeps the floating point dtype of the
+    models (e.g., float16 or bfloat16 models are not upcast). Entries outside the vector (e.g.,
+    `num_batches_tracked`) are not included.
+
+    Args:
+        models_params (list[Mapping]): FlatModels or state dicts of the models, all with the same layers.
+
+    Returns:
+        tuple[torch.Tensor, FlatModel]: The (n, P) tensor and the model whose layout the rows follow.
+    """
+    reference = FlatModel.from_state_dict(models_params[0])
+    matrix = torch.empty((len(models_params), reference.vector.numel()), dtype=reference.vector.dtype)
+    with torch.no_grad():
+        for row, params in zip(matrix, models_params, strict=False):
+            if reference.same_layout(params):
+                row.copy_(params.vector)
+                continue
+            for spec in reference.vector_layers:
+                start = spec.offset // spec.dtype.itemsize
+                row[start : start + spec.numel].copy_(params[spec.name].reshape(-1))
+    return matrix, reference
+
+
+def reduce_coordinates(
+    matrix: torch.Tensor, reducer: Callable[[torch.Tensor], torch.Tensor], chunk_bytes: int = CHUNK_BYTES
+) -> torch.Tensor:
+    """
+    Apply a coordinate-wise reduction to a (n, P) tensor, one block of columns at a time.
+
+    Each block is converted to float32 before being reduced, so its size is chosen to keep the block and the
+    temporaries of the reduction (about four copies) within `chunk_bytes`.
+
+    Args:
+        matrix (torch.Tensor): The (n, P) tensor of stacked parameters.
+        reducer (Callable): Function reducing a float32 (n, c) block along dim 0 into c values.
+        chunk_bytes (int): Memory budget for a block and its temporaries.
+
+    Returns:
+        torch.Tensor: The P reduced coordinates, in float32.
+    """
+    total_models, total_params = matrix.shape
+    chunk_size = max(1, chunk_bytes // (4 * 4 * total_models))
+    result = torch.empty(total_params, dtype=torch.float32)
+    with torch.no_grad():
+        for start in range(0, total_params, chunk_size):
+            block = matrix[:, start : start + chunk_size].to(torch.float32)
+            result[start : start + chunk_size] = reducer(block)
+    return result
+
+
+def coordinatewise_aggregation(
+    models_params: list[dict], reducer: Callable[[torch.Tensor], torch.Tensor], chunk_bytes: int = CHUNK_BYTES
+) -> dict:
+    """
+    Aggregate models coordinate by coordinate.
+
+    Args:
+        models_params (list[Mapping]): FlatModels or state dicts of the models.
+        reducer (Callable): Function reducing a float32 (n, c) block along dim 0 into c values.
+        chunk_bytes (int): Memory budget for a block and its temporaries.
+
+    Returns:
+        dict: The aggregated state dict, with float32 parameters.
+    """
+    matrix, reference = flatten_updates(models_params)
+    accum = FlatModel.zeros_like(reference, dtype=torch.float32)
+    accum.vector[: matrix.shape[1]] = reduce_coordinates(matrix, reducer, chunk_bytes)
+    del matrix
+
+    for spec in reference.extra_layers:
+        stacked = torch.stack([params[spec.name].reshape(-1) for params in models_params]).to(torch.float64)
+        accum[spec.name].copy_(reducer(stacked).view(spec.shape))
+    return accum.state_dict()
+
+
+def median(block: torch.Tensor) -> torch.Tensor:
+    """
+    Coordinate-wise median of a (n, c) block; the mean of the two middle values when n is even.
+    """
+    total_models = block.shape[0]
+    if total_models % 2 == 1:
+        return torch.kthvalue(block, (total_models + 1) // 2, dim=0).values
+    middle = torch.topk(block, total_models // 2 + 1, dim=0, largest=False, sorted=True).values[-2:]
+    return middle.mean(dim=0)
+
+
+def trimmed_mean(beta: int) -> Callable[[torch.Tensor], torch.Tensor]:
+    """
+    Coordinate-wise mean of a (n, c) block after removing its `beta` largest and `beta` smallest values.
+
+    If there are no more than 2 * beta values, the mean of all of them is used.
+    """
+
+    def reducer(block: torch.Tensor) -> torch.Tensor:
+        total_models = block.shape[0]
+        if beta == 0 or total_models <= 2 * beta:
+            return block.mean(dim=0)
+        total = block.sum(dim=0)
+        total -= torch.topk(block, beta, dim=0, largest=True, sorted=False).values.sum(dim=0)
+        total -= torch.topk(block, beta, dim=0, largest=False, sorted=False).values.sum(dim=0)
+        return total / (total_models - 2 * beta)
+
+    return reducer
@@ -1,8 +1,7 @@
-import gc
-
 import torch
 
 from nebula.core.aggregation.aggregator import Aggregator
+from nebula.core.utils.flatmodel import FlatModel
 
 
 class FedAvg(Aggregator):
@@ -12,6 +11,8 @@ class FedAvg(Aggregator):
     Year: 2016
     """
 
+    supports_streaming = True
+
     def __init__(self, config=None, **kwargs):
         super().__init__(config, **kwargs)
 
@@ -25,20 +26,24 @@ class FedAvg(Aggregator):
         if total_samples == 0:
             raise ValueError("Total number of samples must be greater than zero.")
 
-        last_model_params = models[-1][0]
-        accum = {layer: torch.zeros_like(param, dtype=torch.float32) for layer, param in last_model_params.items()}
-
-        with torch.no_grad():
-            for model_parameters, weight in models:
-                normalized_weight = weight / total_samples
-                for layer in accum:
-                    accum[layer].add_(
-                        model_parameters[layer].to(accum[layer].dtype),
-                        alpha=normalized_weight,
-                    )
+        accum = None
+        for model_parameters, weight in models:
+            accum = self.fold_update(accum, model_parameters, weight / total_samples)
 
         del models
-        gc.collect()
 
         # self.print_model_size(accum)
-        return accum
+        return accum.state_dict()
+
+    def fold_update(self, accum, model, weight):
+        if accum is None:
+            accum = FlatModel.zeros_like(model, dtype=torch.float32)
+        return accum.add_(model, alpha=weight)
+
+    def finish_aggregation(self, accum, total_weight):
+        if total_weight == 0:
+            raise ValueError("Total number of samples must be greater than zero.")
+
+        with torch.no_grad():
+            accum.vector.div_(total_weight)
+        return accum.state_dict()
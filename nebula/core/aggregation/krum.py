@@ -1,51 +1,99 @@
-import numpy
+import logging
+
 import torch
 
 from nebula.core.aggregation.aggregator import Aggregator
+from nebula.core.utils.flatmodel import FlatModel, align_models, aligned_segments
+
+# Upper bound for the (n, chunk) blocks of stacked parameters used to compute the pairwise distances
+CHUNK_BYTES = 256 * 1024 * 1024
 
 
 class Krum(Aggregator):
     """
-    Aggregator: Krum
+    Aggregator: Krum / Multi-Krum
     Authors: Peva Blanchard et al.
     Year: 2017
     Note: https://papers.nips.cc/paper/2017/hash/f4b9ec30ad9f68f89b29639786cb62ef-Abstract.html
+
+    Each update is scored with the sum of its squared distances to its n - f - 2 closest updates, where f is
+    the number of Byzantine updates tolerated. Krum returns the update with the lowest score, while
+    Multi-Krum averages the m updates with the lowest scores.
+
+    Parameters (aggregator_args):
+        krum_f (int, optional): Byzantine updates tolerated. Defaults to the largest f satisfying n > 2f + 2.
+        krum_m (int, optional): Updates selected and averaged (1 for Krum). Defaults to 1.
     """
 
-    def __init__(self, config=None, **kwargs):
+    def __init__(self, config=None, f=None, m=None, **kwargs):
         super().__init__(config, **kwargs)
+        aggregator_args = self.config.participant["aggregator_args"]
+        self.f = f if f is not None else aggregator_args.get("krum_f")
+        self.m = m if m is not None else aggregator_args.get("krum_m", 1)
+
+    def get_pairwise_distances(self, models_params):
+        """
+        Compute the squared Euclidean distances between every pair of models.
+
+        The parameters (the whole vector of FlatModels, or each layer of state dicts) are stacked into (n, chunk)
+        blocks that respect `CHUNK_BYTES`, and the distances are accumulated from the Gram matrix of each block.
+        Blocks are centered on their mean model first, which leaves the distances unchanged and avoids
+        cancellation errors between similar models.
+
+        Args:
+            models_params (list[Mapping]): FlatModels or state dicts of the models.
+
+        Returns:
+            torch.Tensor: (n, n) float64 matrix of squared distances.
+        """
+        total_models = len(models_params)
+        gram = torch.zeros((total_models, total_models), dtype=torch.float64)
+        chunk_size = max(1, CHUNK_BYTES // (4 * total_models))
+
+        with torch.no_grad():
+            for segment in aligned_segments(models_params):
+                for start in range(0, segment[0].numel(), chunk_size):
+                    block = torch.stack([flat[start : start + chunk_size] for flat in segment]).float()
+                    block -= block.mean(dim=0)
+                    gram += (block @ block.T).double()
+
+        norms = gram.diagonal()
+        return (norms.unsqueeze(0) + norms.unsqueeze(1) - 2 * gram).clamp_(min=0)
+
+    def get_scores(self, distances):
+        """
+        Compute the Krum score of every model.
+
+        Args:
+            distances (torch.Tensor): (n, n) matrix of squared distances.
+
+        Returns:
+            torch.Tensor: Score of each model (sum of the squared distances to its n - f - 2 closest models).
+        """
+        total_models = distances.shape[0]
+        if total_models == 1:
+            return torch.zeros(1, dtype=distances.dtype)
+
+        f = self.f if self.f is not None else max(0, (total_models - 3) // 2)
+        closest = min(max(1, total_models - f - 2), total_models - 1)
+        if total_models <= 2 * f + 2:
+            logging.warning(f"[Krum] {total_models} updates cannot tolerate f={f}, using the {closest} closest updates")
+
+        distances = distances.clone().fill_diagonal_(float("inf"))
+        return torch.topk(distances, closest, dim=1, largest=False).values.sum(dim=1)
 
     def run_aggregation(self, models):
         super().run_aggregation(models)
 
-        models = list(models.values())
-
-        accum = {layer: torch.zeros_like(param).float() for layer, param in models[-1][0].items()}
-        total_models = len(models)
-        distance_list = [0 for i in range(0, total_models)]
-        min_index = 0
-        min_distance_sum = float("inf")
-
-        for i in range(0, total_models):
-            m1, _ = models[i]
-            for j in range(0, total_models):
-                m2, _ = models[j]
-                distance = 0
-                if i == j:
-                    distance = 0
-                else:
-                    for layer in m1:
-                        l1 = m1[layer]
-
-                        l2 = m2[layer]
-                        distance += numpy.linalg.norm(l1 - l2)
-                distance_list[i] += distance
-
-            if min_distance_sum > distance_list[i]:
-                min_distance_sum = distance_list[i]
-                min_index = i
-        m, _ = models[min_index]
-        for layer in m:
-            accum[layer] = accum[layer] + m[layer]
-
-        return accum
+        sources = list(models.keys())
+        models_params = align_models([m for m, _ in models.values()])
+
+        scores = self.get_scores(self.get_pairwise_distances(models_params))
+        selected = torch.argsort(scores)[: max(1, min(self.m, len(models_params)))].tolist()
+        logging.info(f"[Krum] Selected updates: {[sources[i] for i in selected]}")
+
+        accum = FlatModel.zeros_like(models_params[selected[0]], dtype=torch.float32)
+        for i in selected:
+            accum.add_(models_params[i], alpha=1 / len(selected))
+
+        return accum.state_dict()
@@ -46,6 +46,11 @@ class DFLUpdateHandler(UpdateHandler):
 
     This handler manages the reception, storage, and tracking of model updates from federation nodes
     during asynchronous rounds. It supports partial updates, late arrivals, and maintains update history.
+
+    When the aggregator runs in streaming mode, each update expected in the round is folded into a running
+    aggregate as soon as it arrives and its model is released, so only one aggregate (plus the updates that
+    arrive early for the next round) is kept in memory. The first update of each source is the one folded;
+    further updates from that source are kept aside and folded at the beginning of the next round.
     """
     
     def __init__(self, aggregator, addr, buffersize=MAX_UPDATE_BUFFER_SIZE):
@@ -70,6 +75,12 @@ class DFLUpdateHandler(UpdateHandler):
         self._notification = False
         self._missing_ones = set()
         self._nodes_using_historic = set()
+        self._streaming = aggregator.streaming
+        self._round_open = False
+        self._round_accum = None
+        self._round_weight = 0.0
+        self._round_folded: dict[str, Update] = {}
+        self._round_aggregate = None
 
     @property
     def us(self):
@@ -99,6 +110,8 @@ class DFLUpdateHandler(UpdateHandler):
         await self._updates_storage_lock.acquire_async()
         self._sources_expected = federation_nodes.copy()
         self._sources_received.clear()
+        if self._streaming:
+            self._open_round()
 
         # Initialize new nodes
         for fn in federation_nodes:
@@ -133,7 +146,12 @@ class DFLUpdateHandler(UpdateHandler):
                     if (last_updt and node_storage[-1] and last_updt != node_storage[-1]) or (
                         node_storage[-1] and not last_updt
                     ):
+                        if self._streaming and node_storage[-1].model is None:
+                            # Folded into the aggregate of a previous round that was never retrieved
+                            continue
                         self._sources_received.add(se)
+                        if self._streaming:
+                            await self._fold(node_storage[-1])
                         logging.info(
                             f"Update already received from source: {se} | ({len(self._sources_received)}/{len(self._sources_expected)}) Updates received"
                         )
@@ -160,6 +178,8 @@ class DFLUpdateHandler(UpdateHandler):
                 last_update_used = self.us[source][0]
                 self.us[source][1].append(updt)
                 self.us[source] = (last_update_used, self.us[source][1])
+                if self._streaming and self._round_open and source not in self._round_folded:
+                    await self._fold(updt)
                 logging.info(
                     f"Storage Update | source={source} | round={round} | weight={weight} | federation nodes: {self._sources_expected}"
                 )
@@ -194,6 +214,11 @@ class DFLUpdateHandler(UpdateHandler):
             self._missing_ones.clear()
 
         self._nodes_using_historic.clear()
+        if self._streaming:
+            updates = self._close_round()
+            await self._updates_storage_lock.release_async()
+            return updates
+
         updates = {}
         for sr in self._sources_received:
             source_historic = self.us[sr][1]
@@ -211,6 +236,62 @@ class DFLUpdateHandler(UpdateHandler):
         await self._updates_storage_lock.release_async()
         return updates
 
+    async def get_round_aggregate(self):
+        """
+        Retrieve the running aggregate of the round, built in streaming mode.
+
+        Returns:
+            tuple[dict, float] | None: The running aggregate and its total weight, or None if no update was folded.
+        """
+        round_aggregate = self._round_aggregate
+        self._round_aggregate = None
+        return round_aggregate
+
+    def _open_round(self):
+        """
+        Start a new running aggregate, discarding the one of the previous round if it was not retrieved.
+        """
+        self._round_open = True
+        self._round_accum = None
+        self._round_weight = 0.0
+        self._round_folded.clear()
+        self._round_aggregate = None
+
+    async def _fold(self, updt: Update):
+        """
+        Fold an update into the running aggregate of the round and release its model.
+
+        Args:
+            updt (Update): The update to fold, whose source has not been folded yet this round.
+        """
+        self._round_accum = await self.agg.compute.run(self.agg.fold_update, self._round_accum, updt.model, updt.weight)
+        self._round_weight += updt.weight
+        self._round_folded[updt.source] = updt
+        updt.model = None
+
+    def _close_round(self):
+        """
+        Close the running aggregate of the round, leaving it ready for `get_round_aggregate`.
+
+        Updates received from now on are kept until the next round starts.
+
+        Returns:
+            dict: A dictionary mapping the folded node IDs to (None, weight) tuples.
+        """
+        updates = {}
+        for sr, updt in self._round_folded.items():
+            if sr in self.us:
+                self.us[sr] = (updt, self.us[sr][1])  # Folded update is the last one used by the source
+            updates[sr] = (None, updt.weight)
+        if self._round_folded:
+            self._round_aggregate = (self._round_accum, self._round_weight)
+            logging.info(f"Streaming aggregation | {len(self._round_folded)} updates folded | weight={self._round_weight}")
+        self._round_open = False
+        self._round_accum = None
+        self._round_weight = 0.0
+        self._round_folded.clear()
+        return updates
+
     async def notify_federation_update(self, updt_nei_event: UpdateNeighborEvent):
         """
         Handle federation node join/leave events.
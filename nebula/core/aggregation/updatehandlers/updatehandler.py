@@ -105,6 +105,18 @@ class UpdateHandler(ABC):
         """
         raise NotImplementedError
 
+    async def get_round_aggregate(self) -> tuple[dict, float] | None:
+        """
+        Retrieves the running aggregate built while the updates of the round were received.
+
+        Only handlers that fold updates as they arrive (streaming aggregation) build it.
+
+        Returns:
+            tuple[dict, float] | None: The running aggregate and the total weight folded into it,
+                                       or None if no update was folded this round.
+        """
+        return None
+
 
 def factory_update_handler(updt_handler, aggregator, addr) -> UpdateHandler:
     from nebula.core.aggregation.updatehandlers.cflupdatehandler import CFLUpdateHandler
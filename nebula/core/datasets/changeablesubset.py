@@ -16,5 +16,11 @@ class ChangeableSubset(Subset):
             return self.dataset[[self.indices[i] for i in idx]]
         return self.dataset[self.indices[idx]]
 
+    def __getitems__(self, indices):
+        # Batched access (used by the DataLoader) is forwarded to the dataset, as Subset does
+        if callable(getattr(self.dataset, "__getitems__", None)):
+            return self.dataset.__getitems__([self.indices[idx] for idx in indices])
+        return [self.dataset[self.indices[idx]] for idx in indices]
+
     def __len__(self):
         return len(self.indices)
@@ -1,8 +1,9 @@
 import logging
 
+import numpy as np
 import torch
 from lightning import LightningDataModule
-from torch.utils.data import DataLoader, RandomSampler, random_split
+from torch.utils.data import DataLoader, RandomSampler, default_collate, random_split
 
 from nebula.config.config import TRAINING_LOGGER
 from nebula.core.datasets.changeablesubset import ChangeableSubset
@@ -10,6 +11,78 @@ from nebula.core.datasets.changeablesubset import ChangeableSubset
 logging_training = logging.getLogger(TRAINING_LOGGER)
 
 
+def collate_batch(batch):
+    """
+    Collate a list of samples, or return as is a batch the dataset already built (a tuple, see the tensor cache
+    of `NebulaPartitionHandler`).
+    """
+    if isinstance(batch, tuple):
+        return batch
+    return default_collate(batch)
+
+
+def stratified_sample(indices, labels, samples, seed=42):
+    """
+    Pick a fixed sample of `indices` keeping the proportion of each label.
+
+    Args:
+        indices: Indices to sample from.
+        labels: Label of each of the indices, or None to sample uniformly.
+        samples (int): Size of the sample.
+        seed (int): Seed of the sample.
+
+    Returns:
+        list[int]: The sampled indices, in increasing order.
+    """
+    indices = np.asarray(indices)
+    if samples >= len(indices):
+        return indices.tolist()
+    rng = np.random.default_rng(seed)
+    if labels is None:
+        return np.sort(rng.choice(indices, samples, replace=False)).tolist()
+    labels = np.asarray(labels)
+    classes, counts = np.unique(labels, return_counts=True)
+    shares = counts * samples / len(indices)
+    quotas = np.floor(shares).astype(int)
+    # The samples left by rounding down go to the labels with the largest remainders
+    quotas[np.argsort(quotas - shares)[: samples - quotas.sum()]] += 1
+    chosen = [rng.choice(indices[labels == c], quota, replace=False) for c, quota in zip(classes, quotas)]
+    return np.sort(np.concatenate(chosen)).tolist()
+
+
+class PersistentDataLoader(DataLoader):
+    """
+    DataLoader whose worker processes outlive the Lightning runs that iterate it.
+
+    With `persistent_workers`, a DataLoader keeps its workers in `_iterator` between epochs, but Lightning shuts
+    them down (and drops `_iterator`) at the end of every `fit` and `test`. This loader keeps its iterator apart,
+    so the workers are started once and reset for each new pass, whatever the number of runs.
+    """
+
+    _worker_iterator = None
+
+    def __iter__(self):
+        if self.num_workers == 0 or not self.persistent_workers:
+            return super().__iter__()
+        if self._worker_iterator is None:
+            self._worker_iterator = self._get_iterator()
+        else:
+            self._worker_iterator._reset(self)
+        return self._worker_iterator
+
+    def __getstate__(self):
+        # Worker processes cannot be pickled (e.g. the loaders stored by the trustworthiness addon)
+        state = self.__dict__.copy()
+        state.pop("_worker_iterator", None)
+        return state
+
+    def close(self):
+        """Shut down the worker processes, if any."""
+        if self._worker_iterator is not None:
+            self._worker_iterator._shutdown_workers()
+            self._worker_iterator = None
+
+
 class DataModule(LightningDataModule):
     def __init__(
         self,
@@ -24,6 +97,9 @@ class DataModule(LightningDataModule):
         num_workers=0,
         val_percent=0.1,
         seed=42,
+        tensor_cache=False,
+        persistent=False,
+        test_samples=None,
     ):
         super().__init__()
         self.train_set = train_set
@@ -37,6 +113,20 @@ class DataModule(LightningDataModule):
         self.val_percent = val_percent
         self.seed = seed
         self._samples_per_label = samples_per_label
+        # Keep the subsets, the loaders and their workers from one round to the next (training_args.persistent_session)
+        self.persistent = persistent
+        self.pin_memory = persistent and torch.cuda.is_available()
+        self._loaders = {}
+        self._fit_source = None
+        # Fixed stratified sample of each test set, served instead of the full sets while `sampled_test` is set
+        # (training_args.evaluation_samples)
+        self.test_samples = test_samples
+        self.sampled_test = False
+
+        if tensor_cache:
+            for dataset in (train_set, test_set, local_test_set):
+                if hasattr(dataset, "enable_tensor_cache"):
+                    dataset.enable_tensor_cache()
 
         self.model_weight = None
 
@@ -46,12 +136,16 @@ class DataModule(LightningDataModule):
         self.data_val = None
         self.global_te_subset = None
         self.local_te_subset = None
+        self.global_te_sample = None
+        self.local_te_sample = None
         
     def get_samples_per_label(self):
         return self._samples_per_label
 
     def setup(self, stage=None):
-        if stage in (None, "fit"):
+        if stage in (None, "fit") and not self._fit_ready():
+            self.close_loaders("train", "val")
+            self._fit_source = (self.train_set, self.train_set_indices)
             tr_subset = ChangeableSubset(
                 self.train_set,
                 self.train_set_indices,
@@ -77,12 +171,29 @@ class DataModule(LightningDataModule):
 
             self.model_weight = len(self.data_train)
 
-        if stage in (None, "test"):
+        if stage in (None, "test") and not (self.persistent and self.global_te_subset is not None):
             # Test sets
+            self.close_loaders("test")
             self.global_te_subset = ChangeableSubset(self.test_set, self.test_set_indices)
             self.local_te_subset = ChangeableSubset(self.local_test_set, self.local_test_set_indices)
+            if self.test_samples:
+                self.global_te_sample = self._test_sample(self.test_set, self.test_set_indices)
+                self.local_te_sample = self._test_sample(self.local_test_set, self.local_test_set_indices)
+
+    def _fit_ready(self):
+        # The train and validation subsets are only rebuilt if an attack replaced the train set
+        return (
+            self.persistent
+            and self.data_train is not None
+            and self._fit_source is not None
+            and self._fit_source[0] is self.train_set
+            and self._fit_source[1] is self.train_set_indices
+        )
 
     def teardown(self, stage=None):
+        # Persistent subsets and loaders are kept for the next round
+        if self.persistent:
+            return
         # Teardown the datasets
         if stage in (None, "fit"):
             self.data_train = None
@@ -91,6 +202,13 @@ class DataModule(LightningDataModule):
         if stage in (None, "test"):
             self.global_te_subset = None
             self.local_te_subset = None
+            self.global_te_sample = None
+            self.local_te_sample = None
+
+    def _test_sample(self, dataset, indices):
+        targets = getattr(dataset, "targets", None)
+        labels = np.asarray(targets)[np.asarray(indices)] if targets is not None and len(indices) else None
+        return ChangeableSubset(dataset, stratified_sample(indices, labels, self.test_samples, self.seed))
 
     def train_dataloader(self):
         if self.data_train is None:
@@ -98,14 +216,7 @@ class DataModule(LightningDataModule):
                 "Train dataset not initialized. Please call setup('fit') before requesting train_dataloader."
             )
         logging_training.info(f"Train set size: {len(self.data_train)}")
-        return DataLoader(
-            self.data_train,
-            batch_size=self.batch_size,
-            shuffle=True,
-            num_workers=self.num_workers,
-            drop_last=True,
-            pin_memory=False,
-        )
+        return self._dataloader("train", self.data_train, shuffle=True)
 
     def val_dataloader(self):
         if self.data_val is None:
@@ -113,40 +224,66 @@ class DataModule(LightningDataModule):
                 "Validation dataset not initialized. Please call setup('fit') before requesting val_dataloader."
             )
         logging_training.info(f"Validation set size: {len(self.data_val)}")
-        return DataLoader(
-            self.data_val,
-            batch_size=self.batch_size,
-            shuffle=False,
-            num_workers=self.num_workers,
-            drop_last=True,
-            pin_memory=False,
-        )
+        return self._dataloader("val", self.data_val)
 
     def test_dataloader(self):
         if self.local_te_subset is None or self.global_te_subset is None:
             raise ValueError(
                 "Test datasets not initialized. Please call setup('test') before requesting test_dataloader."
             )
+        if self.sampled_test and self.local_te_sample is not None and self.global_te_sample is not None:
+            logging_training.info(f"Local test sample size: {len(self.local_te_sample)}")
+            logging_training.info(f"Global test sample size: {len(self.global_te_sample)}")
+            return [
+                self._dataloader("test_local_sample", self.local_te_sample),
+                self._dataloader("test_global_sample", self.global_te_sample),
+            ]
         logging_training.info(f"Local test set size: {len(self.local_te_subset)}")
         logging_training.info(f"Global test set size: {len(self.global_te_subset)}")
         return [
-            DataLoader(
-                self.local_te_subset,
+            self._dataloader("test_local", self.local_te_subset),
+            self._dataloader("test_global", self.global_te_subset),
+        ]
+
+    def _dataloader(self, name, dataset, shuffle=False):
+        if not self.persistent:
+            return DataLoader(
+                dataset,
                 batch_size=self.batch_size,
-                shuffle=False,
+                shuffle=shuffle,
                 num_workers=self.num_workers,
                 drop_last=True,
                 pin_memory=False,
-            ),
-            DataLoader(
-                self.global_te_subset,
+                collate_fn=collate_batch,
+            )
+        loader = self._loaders.get(name)
+        if loader is None or loader.dataset is not dataset:
+            if loader is not None:
+                loader.close()
+            loader = PersistentDataLoader(
+                dataset,
                 batch_size=self.batch_size,
-                shuffle=False,
+                shuffle=shuffle,
                 num_workers=self.num_workers,
                 drop_last=True,
-                pin_memory=False,
-            ),
-        ]
+                pin_memory=self.pin_memory,
+                collate_fn=collate_batch,
+                persistent_workers=self.num_workers > 0,
+            )
+            self._loaders[name] = loader
+        return loader
+
+    def close_loaders(self, *names):
+        """
+        Shut down the workers of the persistent loaders (all of them if no name is given) and forget them.
+
+        Args:
+            *names (str): Loaders to close: "train", "val", "test_local" or "test_global". "test" closes both
+                test loaders.
+        """
+        for name in list(self._loaders):
+            if not names or name in names or name.split("_")[0] in names:
+                self._loaders.pop(name).close()
 
     def bootstrap_dataloader(self):
         if self.data_val is None:
@@ -167,4 +304,5 @@ class DataModule(LightningDataModule):
             num_workers=self.num_workers,
             drop_last=True,
             pin_memory=False,
+            collate_fn=collate_batch,
         )
@@ -1,9 +1,10 @@
 import copy
+import mmap
 import os
 import pickle
 from abc import ABC, abstractmethod
 from types import SimpleNamespace
-from typing import Any
+from typing import Any, NamedTuple
 import time
 
 import h5py
@@ -13,7 +14,7 @@ import numpy as np
 import seaborn as sns
 from sklearn.manifold import TSNE
 from sklearn.model_selection import train_test_split
-from torch.utils.data import Dataset
+from torch.utils.data import Dataset, default_collate
 
 matplotlib.use("Agg")
 plt.switch_backend("Agg")
@@ -21,6 +22,7 @@ plt.switch_backend("Agg")
 import logging
 
 from nebula.config.config import TRAINING_LOGGER
+from nebula.core.datasets.tensorcache import TensorBatchCache
 from nebula.core.utils.deterministic import enable_deterministic
 
 logging_training = logging.getLogger(TRAINING_LOGGER)
@@ -34,9 +36,42 @@ def wait_for_file(file_path):
     return
 
 
+class MappedArray(NamedTuple):
+    """
+    Location of an array stored contiguously (uncompressed) in a file, which can be memory-mapped.
+    """
+
+    path: str
+    dtype: str
+    shape: tuple
+    offset: int
+
+    def open(self) -> np.ndarray:
+        """Map the array read-only. The pages are shared by every process mapping the same file."""
+        # A plain view is indexed faster than the memmap subclass
+        mapped = np.memmap(self.path, dtype=np.dtype(self.dtype), mode="r", shape=self.shape, offset=self.offset)
+        return np.asarray(mapped)
+
+    @classmethod
+    def of(cls, data) -> "MappedArray | None":
+        """Location of `data` if it is a whole array opened with `open`, None otherwise."""
+        base = getattr(data, "base", None)
+        if not isinstance(base, np.memmap) or not isinstance(base.base, mmap.mmap) or base.shape != data.shape:
+            return None
+        return cls(base.filename, base.dtype.str, base.shape, base.offset)
+
+
 class NebulaPartitionHandler(Dataset, ABC):
     """
     A class to handle the loading of datasets from HDF5 files.
+
+    Partitions are stored in one of two formats:
+      - array: fixed-shape uint8 samples in a contiguous dataset, which is memory-mapped instead of read, so
+        every participant on a machine shares the pages of the global test set.
+      - pickle: a pickled list of samples (legacy format, and fallback for datasets that are not arrays).
+
+    With the tensor cache enabled, the DataLoader gets whole batches (`__getitems__`) gathered from a uint8
+    tensor of the partition and transformed at once, instead of transforming each sample.
     """
 
     def __init__(
@@ -59,6 +94,10 @@ class NebulaPartitionHandler(Dataset, ABC):
         self.num_classes = None
         self.length = None
 
+        self.tensor_cache = False
+        self._batch_cache = None
+        self._batch_cache_built = False
+
         self.load_data()
 
     def load_data(self):
@@ -88,9 +127,43 @@ class NebulaPartitionHandler(Dataset, ABC):
     def __del__(self):
         self.close()
 
+    def __getstate__(self):
+        # DataLoader workers (and copies of the dataset) map the file again instead of receiving the data
+        state = self.__dict__.copy()
+        mapped = MappedArray.of(state.get("data"))
+        if mapped is not None:
+            state["data"] = mapped
+        # The cache is rebuilt on first use, from the data of the copy
+        state["_batch_cache"], state["_batch_cache_built"] = None, False
+        return state
+
+    def __setstate__(self, state):
+        if isinstance(state.get("data"), MappedArray):
+            state["data"] = state["data"].open()
+        self.__dict__.update(state)
+
     def __len__(self):
         return self.length
 
+    def enable_tensor_cache(self):
+        """
+        Serve batches from a tensor cache of the partition (see `TensorBatchCache`), built on first use.
+        Partitions whose samples or transforms are not supported keep transforming each sample.
+        """
+        self.tensor_cache = True
+        self._batch_cache, self._batch_cache_built = None, False
+
+    def __getitems__(self, indices):
+        if not self.tensor_cache:
+            return [self[idx] for idx in indices]
+        if not self._batch_cache_built:
+            self._batch_cache = TensorBatchCache.build(self.data, self.targets, self.transform, self.target_transform)
+            self._batch_cache_built = True
+        if self._batch_cache is None:
+            # Collated here (as a tuple) like the cached batches, see `collate_batch` in the DataModule
+            return tuple(default_collate([self[idx] for idx in indices]))
+        return self._batch_cache.get_batch(indices)
+
     def __getitem__(self, idx):
         data = self.data[idx]
         # Persist the modified targets (if any) during the training process
@@ -101,6 +174,7 @@ class NebulaPartitionHandler(Dataset, ABC):
         """
         Set the data and targets for the dataset.
         """
+        self._batch_cache, self._batch_cache_built = None, False
         try:
             # Input validation
             if data is None or targets is None:
@@ -156,6 +230,13 @@ class NebulaPartitionHandler(Dataset, ABC):
             elif typ == "pickle_bytes":
                 logging_training.info(f"Loading compressed pickled bytes object from {name}")
                 return pickle.loads(item[()])
+            elif typ == "array":
+                offset = item.id.get_offset()
+                if offset is None or item.chunks is not None:
+                    # Empty (never written) or not stored contiguously: it cannot be mapped
+                    return item[()]
+                logging_training.info(f"Mapping array {name} of shape {item.shape}")
+                return MappedArray(self.file_path, item.dtype.str, item.shape, offset).open()
             else:
                 logging_training.warning(f"[NebulaPartitionHandler] Unknown type encountered: {typ} for item {name}")
                 return item[()]
@@ -419,16 +500,63 @@ class NebulaDataset:
         """
         try:
             local_test_indices_map = {}
-            test_targets = np.array(self.test_set.targets)
+            train_targets = self._get_targets(self.train_set)
+            test_targets = self._get_targets(self.test_set)
+            # Labels of both sets as codes, to mark the labels of each participant in a boolean table
+            labels, codes = np.unique(np.concatenate([train_targets, test_targets]), return_inverse=True)
+            train_codes, test_codes = codes[: len(train_targets)], codes[len(train_targets) :]
             for participant_id in range(self.partitions_number):
-                train_labels = np.array([self.train_set.targets[idx] for idx in self.train_indices_map[participant_id]])
-                indices = np.where(np.isin(test_targets, train_labels))[0].tolist()
-                local_test_indices_map[participant_id] = indices
+                present = np.zeros(len(labels), dtype=bool)
+                present[train_codes[np.asarray(self.train_indices_map[participant_id], dtype=np.int64)]] = True
+                local_test_indices_map[participant_id] = np.flatnonzero(present[test_codes]).tolist()
             return local_test_indices_map
         except Exception as e:
             logging.exception(f"Error in get_local_test_indices_map: {e}")
             raise
 
+    @staticmethod
+    def get_array_data(dataset, indices) -> np.ndarray | None:
+        """
+        Get the samples of `indices` as a uint8 array, if the dataset stores them that way.
+
+        Torchvision image datasets (MNIST, CIFAR...) keep every raw image in `data`, a uint8 array (or tensor) of
+        fixed shape, from which `dataset[i]` builds a PIL image. Taking the rows directly avoids building (and
+        pickling) an image per sample, and lets the partition be stored as an array.
+
+        Returns:
+            np.ndarray | None: The samples, or None if the dataset does not store its samples as a uint8 array.
+        """
+        data = getattr(dataset, "data", None)
+        if data is None or getattr(dataset, "transform", None) is not None:
+            return None
+        if hasattr(data, "numpy"):
+            data = data.numpy()
+        if not isinstance(data, np.ndarray) or data.dtype != np.uint8 or len(data) != len(dataset):
+            return None
+        return data[np.asarray(indices, dtype=np.int64)]
+
+    def save_array(self, array, file, name):
+        """
+        Save an array as a contiguous, uncompressed dataset, so participants can memory-map it.
+        """
+        try:
+            ds = file.create_dataset(name, data=np.ascontiguousarray(array))
+            ds.attrs["__type__"] = "array"
+            logging.info(f"Saved array of shape {array.shape} ({array.nbytes / (1024 * 1024):.2f} MB) to {name}")
+        except Exception as e:
+            logging.exception(f"Error saving array to HDF5: {e}")
+            raise
+
+    def save_samples(self, dataset, indices, file, name):
+        """
+        Save the samples of `indices` as an array if possible, and as a pickled list of samples otherwise.
+        """
+        data = self.get_array_data(dataset, indices)
+        if data is not None:
+            self.save_array(data, file, name)
+        else:
+            self.save_partition([dataset[i] for i in indices], file, name)
+
     def save_partition(self, obj, file, name):
         try:
             logging.info(f"Saving pickled object of type {type(obj)}")
@@ -460,7 +588,7 @@ class NebulaDataset:
 
     def save_partitions(self):
         """
-        Save each partition data (train, test, and local test) to separate pickle files.
+        Save each partition data (train, test, and local test) to separate HDF5 files.
         The controller saves one file per partition for each data split.
         """
         try:
@@ -481,21 +609,20 @@ class NebulaDataset:
             file_name = os.path.join(path, "global_test.h5")
             with h5py.File(file_name, "w") as f:
                 indices = list(range(len(self.test_set)))
-                test_data = [self.test_set[i] for i in indices]
-                self.save_partition(test_data, f, "test_data")
+                self.save_samples(self.test_set, indices, f, "test_data")
                 f["test_data"].attrs["num_classes"] = self.num_classes
                 test_targets = np.array(self.test_set.targets)
                 f.create_dataset("test_targets", data=test_targets, compression="gzip")
 
+            all_train_targets = self._get_targets(self.train_set)
             for participant in range(self.partitions_number):
                 file_name = os.path.join(path, f"participant_{participant}_train.h5")
                 with h5py.File(file_name, "w") as f:
                     logging.info(f"Saving training data for participant {participant} in {file_name}")
                     indices = self.train_indices_map[participant]
-                    train_data = [self.train_set[i] for i in indices]
-                    self.save_partition(train_data, f, "train_data")
+                    self.save_samples(self.train_set, indices, f, "train_data")
                     f["train_data"].attrs["num_classes"] = self.num_classes
-                    train_targets = np.array([self.train_set.targets[i] for i in indices])
+                    train_targets = all_train_targets[np.asarray(indices, dtype=np.int64)]
                     f.create_dataset("train_targets", data=train_targets, compression="gzip")
                     logging.info(f"Partition saved for participant {participant}.")
 
@@ -768,85 +895,71 @@ class NebulaDataset:
         # Extract targets and unique labels.
         if not n_clients:
             y_data = self._get_targets(dataset)
-            unique_labels = np.unique(y_data)
+            positions = None
+            labels = y_data
         else:
             if verbose:
                 logging.info("Extracting dataset partition targets...")
-            # For hybrid dataset scenarios
+            # For hybrid dataset scenarios: the sample indices are the original ones of the subset
             y_data = dataset.targets
-            unique_labels = np.unique(y_data)
+            positions = dataset.real_indexes
+            labels = self._targets_reales[positions]
+        unique_labels = np.unique(y_data)
         if verbose:
             logging.info(f"Unique labels in dataset: {unique_labels}")
 
-        # For each class, get a shuffled list of indices.
-        class_indices = {}
+        # For each class, a shuffled array of indices: one stable argsort groups the indices by label in
+        # increasing order, as np.where(labels == label) does for each label
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], unique_labels, side="left")
+        ends = np.searchsorted(labels[order], unique_labels, side="right")
         base_rng = np.random.default_rng(self.seed)
-        for label in unique_labels:
-            if not n_clients:
-                idx = np.where(y_data == label)[0]
-            else:
-                ri = dataset.real_indexes
-                idx = np.where(self._targets_reales[ri] == label)[0]
-                idx = ri[idx]
-                # logging.info(f"attempting: {self._targets_reales[idx]}")
-
+        class_indices = []
+        for start, end in zip(bounds, ends):
+            idx = order[start:end] if positions is None else positions[order[start:end]]
             base_rng.shuffle(idx)
-            class_indices[label] = idx
-
-        # Prepare container for client indices.
-        indices_per_partition = [[] for _ in range(num_clients)]
-
-        def allocate_for_label(label_idx: np.ndarray, rng: np.random.Generator, n_clients) -> np.ndarray:
-            num_label_samples = len(label_idx)
-            if verbose:
-                logging.info(f"number of samples allocating {num_label_samples}")
-            if balanced:
-                proportions = np.full(n_clients, 1.0 / n_clients)
-            else:
-                proportions = rng.dirichlet([alpha] * n_clients)
-            sample_counts = (proportions * num_label_samples).astype(int)
-            remainder = num_label_samples - sample_counts.sum()
-            if remainder > 0:
-                extra_indices = rng.choice(n_clients, size=remainder, replace=False)
-                for idx in extra_indices:
-                    sample_counts[idx] += 1
-            if verbose:
-                logging.info(f"Samples allocated per client: {sample_counts}")
-            return sample_counts
-
+            class_indices.append(idx)
+        class_sizes = np.array([len(idx) for idx in class_indices])
+
+        def allocate(rng: np.random.Generator) -> np.ndarray:
+            # Samples of each label (rows) given to each client (columns). The random draws are made in the same
+            # order as the per-label allocation, so a seed gives the same partition
+            counts = np.empty((len(class_indices), num_clients), dtype=np.int64)
+            for row, num_label_samples in enumerate(class_sizes):
+                if balanced:
+                    proportions = np.full(num_clients, 1.0 / num_clients)
+                else:
+                    proportions = rng.dirichlet([alpha] * num_clients)
+                counts[row] = (proportions * num_label_samples).astype(int)
+                remainder = num_label_samples - counts[row].sum()
+                if remainder > 0:
+                    counts[row, rng.choice(num_clients, size=remainder, replace=False)] += 1
+            return counts
+
+        # Only the sample counts are drawn at each attempt: the partition is built once they are valid
         for iteration in range(1, max_iter + 1):
-            rng = np.random.default_rng(self.seed + iteration)
-            temp_indices_per_partition = [[] for _ in range(num_clients)]
-            for label in unique_labels:
-                label_idx = class_indices[label]
-                if verbose:
-                    logging.info(f"Calculating samples distribution for label: {label}")
-                counts = allocate_for_label(label_idx, rng, num_clients)
-                start = 0
-                for client_idx, count in enumerate(counts):
-                    end = start + count
-                    temp_indices_per_partition[client_idx].extend(label_idx[start:end])
-                    if verbose:
-                        logging.info(
-                            f"Counting check: {np.bincount(self._targets_reales[temp_indices_per_partition[client_idx]])}"
-                        )
-                    start = end
-
-            client_sizes = [len(indices) for indices in temp_indices_per_partition]
-            if min(client_sizes) >= min_samples_size:
-                indices_per_partition = temp_indices_per_partition
+            counts = allocate(np.random.default_rng(self.seed + iteration))
+            client_sizes = counts.sum(axis=0)
+            if client_sizes.min() >= min_samples_size:
                 if verbose:
                     logging.info(f"Partition successful at iteration {iteration}. Client sizes: {client_sizes}")
                 break
             if verbose:
                 logging.info(f"Iteration {iteration}: client sizes {client_sizes}")
-
         else:
             raise ValueError(
                 f"Could not create partitions with at least {min_samples_size} samples per client after {max_iter} iterations."
             )
-
-        initial_partition = {i: indices for i, indices in enumerate(indices_per_partition)}
+        if verbose:
+            logging.info(f"Samples allocated per label and client:\n{counts}")
+
+        # Each label is split in consecutive chunks, one per client. A stable sort by client keeps the samples of
+        # a client ordered by label, and by their shuffled position within each label
+        indices = np.concatenate(class_indices)
+        owners = np.repeat(np.tile(np.arange(num_clients), len(class_indices)), counts.ravel())
+        indices = indices[np.argsort(owners, kind="stable")]
+        splits = np.cumsum(client_sizes)[:-1]
+        initial_partition = {i: chunk.tolist() for i, chunk in enumerate(np.split(indices, splits))}
         final_partition = initial_partition  # self.postprocess_partition(initial_partition, y_data)
         return final_partition
 
@@ -883,37 +996,46 @@ class NebulaDataset:
         new_partition : dict[int, list[int]]
             The updated partition.
         """
-        # Copy partition so we can modify it.
-        new_partition = {client: list(indices) for client, indices in partition.items()}
-
-        # Iterate over each class.
-        for label in np.unique(y_data):
-            # For each client, count how many samples of this label exist.
-            client_counts = {}
-            for client, indices in new_partition.items():
-                client_counts[client] = np.sum(np.array(y_data)[indices] == label)
-
-            # Identify clients with fewer than min_samples_per_class but nonzero counts.
-            donors = [client for client, count in client_counts.items() if 0 < count < min_samples_per_class]
-            # Identify potential recipients: those with at least min_samples_per_class.
-            recipients = [client for client, count in client_counts.items() if count >= min_samples_per_class]
-            # If no client meets the threshold, choose the one with the highest count.
-            if not recipients:
-                best_recipient = max(client_counts, key=client_counts.get)
-                recipients = [best_recipient]
-            # Choose the recipient with the maximum count.
-            best_recipient = max(recipients, key=lambda c: client_counts[c])
-
-            # For each donor, remove samples of this label and reassign them.
-            for donor in donors:
-                donor_indices = new_partition[donor]
-                # Identify indices corresponding to this label.
-                donor_label_indices = [idx for idx in donor_indices if y_data[idx] == label]
-                # Remove these from the donor.
-                new_partition[donor] = [idx for idx in donor_indices if y_data[idx] != label]
-                # Add these to the best recipient.
-                new_partition[best_recipient].extend(donor_label_indices)
-
+        y_data = np.asarray(y_data)
+        clients = list(partition)
+        unique_labels, codes = np.unique(y_data, return_inverse=True)
+        num_labels = len(unique_labels)
+        sizes = [len(partition[client]) for client in clients]
+        indices = np.concatenate([np.asarray(partition[client], dtype=np.int64) for client in clients])
+        owners = np.repeat(np.arange(len(clients)), sizes)
+        sample_codes = codes[indices]
+
+        # Samples of each label held by each client
+        client_counts = np.bincount(owners * num_labels + sample_codes, minlength=len(clients) * num_labels).reshape(
+            len(clients), num_labels
+        )
+        # Clients with fewer than min_samples_per_class but nonzero samples of a label donate them to the client with
+        # the most samples of that label (the first one in case of a tie). Moving the samples of a label does not
+        # change the counts of the others, so every label is resolved from the initial counts.
+        donors = (client_counts > 0) & (client_counts < min_samples_per_class)
+        best_recipient = np.argmax(client_counts, axis=0)
+        donated = donors[owners, sample_codes]
+
+        # Each client keeps its other samples in order, then receives the donated samples ordered by label, donor and
+        # position. A recipient that is also a donor of the label (no client reaches the minimum) moves its own
+        # samples of the label to the end, before the ones of the other donors.
+        positions = np.arange(len(indices))
+        received = np.flatnonzero(donated)
+        targets = best_recipient[sample_codes[received]]
+        received = received[
+            np.lexsort((positions[received], owners[received], owners[received] != targets, sample_codes[received]))
+        ]
+        targets = best_recipient[sample_codes[received]]
+        received = received[np.argsort(targets, kind="stable")]
+        received_splits = np.cumsum(np.bincount(targets, minlength=len(clients)))[:-1]
+        kept = ~donated
+        kept_splits = np.cumsum(np.bincount(owners[kept], minlength=len(clients)))[:-1]
+
+        new_partition = {}
+        for client, own, extra in zip(
+            clients, np.split(indices[kept], kept_splits), np.split(indices[received], received_splits)
+        ):
+            new_partition[client] = own.tolist() + extra.tolist()
         return new_partition
 
     def homo_partition(self, dataset):
@@ -0,0 +1,177 @@
+import logging
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+import torch
+from PIL import Image
+from torchvision import transforms
+
+from nebula.config.config import TRAINING_LOGGER
+
+logging_training = logging.getLogger(TRAINING_LOGGER)
+
+
+@dataclass
+class BatchPipeline:
+    """
+    Batched equivalent of the torchvision transform of a partition handler.
+
+    Attributes:
+        crop_size (int | None): Output size of the random crop, or None if the samples are not cropped.
+        crop_padding (int): Zero padding added to every side before cropping.
+        flip_p (float): Probability of flipping each sample horizontally (0 if the samples are not flipped).
+        scale (torch.Tensor | None): Per-channel factor applied to the uint8 pixels (ToTensor and Normalize fused).
+        shift (torch.Tensor | None): Per-channel value subtracted after scaling.
+    """
+
+    crop_size: int | None = None
+    crop_padding: int = 0
+    flip_p: float = 0.0
+    scale: torch.Tensor | None = None
+    shift: torch.Tensor | None = None
+
+    @classmethod
+    def from_transform(cls, transform) -> "BatchPipeline | None":
+        """
+        Translate a transform made of RandomCrop, RandomHorizontalFlip, ToTensor and Normalize (in the order
+        torchvision applies them to PIL images).
+
+        Returns:
+            BatchPipeline | None: The pipeline, or None if the transform has other steps.
+        """
+        steps = transform.transforms if isinstance(transform, transforms.Compose) else [transform]
+        pipeline, to_tensor = cls(), False
+        for step in steps:
+            if isinstance(step, transforms.RandomCrop) and not to_tensor and pipeline.crop_size is None:
+                size, padding = step.size, cls._uniform_padding(step.padding)
+                if padding is None or size[0] != size[1] or step.fill != 0 or step.padding_mode != "constant":
+                    return None
+                if step.pad_if_needed:
+                    return None
+                pipeline.crop_size, pipeline.crop_padding = size[0], padding
+            elif isinstance(step, transforms.RandomHorizontalFlip) and not to_tensor:
+                pipeline.flip_p = step.p
+            elif isinstance(step, transforms.ToTensor) and not to_tensor:
+                to_tensor = True
+            elif isinstance(step, transforms.Normalize) and to_tensor and pipeline.scale is None:
+                mean = torch.as_tensor(step.mean, dtype=torch.float32).view(-1, 1, 1)
+                std = torch.as_tensor(step.std, dtype=torch.float32).view(-1, 1, 1)
+                pipeline.scale, pipeline.shift = 1 / (255 * std), mean / std
+            else:
+                return None
+        if not to_tensor:
+            return None
+        if pipeline.scale is None:
+            pipeline.scale, pipeline.shift = torch.tensor(1 / 255).view(1, 1, 1), torch.zeros(1, 1, 1)
+        return pipeline
+
+    @staticmethod
+    def _uniform_padding(padding) -> int | None:
+        # RandomCrop accepts None (no padding), an int or a sequence of 1, 2 or 4 sides; only the same padding on
+        # every side can be applied to the batch
+        if padding is None:
+            return 0
+        if isinstance(padding, int):
+            return padding
+        if isinstance(padding, (list, tuple)) and len(padding) in (1, 2, 4) and len(set(padding)) == 1:
+            if isinstance(padding[0], int):
+                return padding[0]
+        return None
+
+    def __call__(self, images: torch.Tensor) -> torch.Tensor:
+        """
+        Transform a batch of uint8 images (N, C, H, W) into normalized float images.
+        """
+        if self.crop_size is not None:
+            images = self._random_crop(images)
+        if self.flip_p > 0:
+            flip = torch.rand(len(images)) < self.flip_p
+            images = torch.where(flip.view(-1, 1, 1, 1), images.flip(-1), images)
+        # Gathered and permuted batches are not contiguous, which models calling `view` need
+        return images.contiguous().float().mul_(self.scale).sub_(self.shift)
+
+    def _random_crop(self, images: torch.Tensor) -> torch.Tensor:
+        p, size = self.crop_padding, self.crop_size
+        if p:
+            images = torch.nn.functional.pad(images, (p, p, p, p))
+        n, _, h, w = images.shape
+        top = torch.randint(0, h - size + 1, (n, 1, 1))
+        left = torch.randint(0, w - size + 1, (n, 1, 1))
+        rows = top + torch.arange(size).view(1, -1, 1)
+        cols = left + torch.arange(size).view(1, 1, -1)
+        # Advanced indices separated by the channel slice: the result is (N, size, size, C)
+        return images[torch.arange(n).view(-1, 1, 1), :, rows, cols].permute(0, 3, 1, 2)
+
+
+class TensorBatchCache:
+    """
+    Uint8 tensor with every sample of a partition, served in batches.
+
+    Instead of building a PIL image and running the transform for each sample, a batch is gathered from the
+    tensor with an index tensor and transformed at once with a `BatchPipeline`. Pixels are kept as uint8 (a view
+    of the partition when it is a memory-mapped array, so it is not copied) and normalized per batch.
+    """
+
+    def __init__(self, images: torch.Tensor, targets: torch.Tensor, pipeline: BatchPipeline):
+        """
+        Args:
+            images (torch.Tensor): Uint8 samples, (N, H, W) or (N, H, W, C).
+            targets (torch.Tensor): Label of each sample.
+            pipeline (BatchPipeline): Transform applied to each batch.
+        """
+        self.images = images
+        self.targets = targets
+        self.pipeline = pipeline
+
+    @classmethod
+    def build(cls, data, targets, transform, target_transform=None) -> "TensorBatchCache | None":
+        """
+        Build the cache of a partition.
+
+        Args:
+            data: The samples: a uint8 array, or a list of PIL images, uint8 arrays or (image, label) tuples.
+            targets: The label of each sample.
+            transform: The torchvision transform applied to each sample.
+            target_transform: The transform applied to each label (not supported).
+
+        Returns:
+            TensorBatchCache | None: The cache, or None if the samples or the transforms are not supported.
+        """
+        if transform is None or target_transform is not None or data is None or len(data) == 0:
+            return None
+        pipeline = BatchPipeline.from_transform(transform)
+        if pipeline is None:
+            logging_training.info(f"[TensorBatchCache] Transform not supported, serving single samples: {transform}")
+            return None
+        if not isinstance(data, np.ndarray):
+            samples = []
+            for sample in data:
+                if isinstance(sample, tuple):
+                    sample = sample[0]
+                if isinstance(sample, Image.Image):
+                    sample = np.asarray(sample)
+                if not isinstance(sample, np.ndarray):
+                    logging_training.info(f"[TensorBatchCache] Samples of type {type(sample)} not supported")
+                    return None
+                samples.append(sample)
+            data = np.stack(samples)
+        if data.dtype != np.uint8 or data.ndim not in (3, 4):
+            return None
+        with warnings.catch_warnings():
+            # Memory-mapped partitions are read-only, and the cache never writes to them
+            warnings.simplefilter("ignore", UserWarning)
+            images = torch.from_numpy(data)
+        return cls(images, torch.as_tensor(np.asarray(targets), dtype=torch.long), pipeline)
+
+    def get_batch(self, indices) -> tuple[torch.Tensor, torch.Tensor]:
+        """
+        Gather and transform the samples of `indices`.
+
+        Returns:
+            tuple[torch.Tensor, torch.Tensor]: The images (N, C, H, W) and their labels.
+        """
+        index = torch.as_tensor(indices, dtype=torch.long)
+        images = self.images.index_select(0, index)
+        images = images.unsqueeze(1) if images.dim() == 3 else images.permute(0, 3, 1, 2)
+        return self.pipeline(images), self.targets.index_select(0, index)
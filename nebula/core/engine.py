@@ -27,6 +27,9 @@ from nebula.core.nebulaevents import (
 from nebula.core.network.communications import CommunicationsManager
 from nebula.core.role import Role, factory_node_role
 from nebula.core.situationalawareness.situationalawareness import SituationalAwareness
+from nebula.core.training.evaluationpolicy import EvaluationPolicy
+from nebula.core.training.updateingestor import UpdateIngestor
+from nebula.core.utils.looplag import LoopLagMonitor
 from nebula.core.utils.locker import Locker
 
 logging.getLogger("requests").setLevel(logging.WARNING)
@@ -113,6 +116,19 @@ class Engine:
 
         self._trainer = trainer(model, datamodule, config=self.config)
         self._aggregator = create_aggregator(config=self.config, engine=self)
+        self._update_ingestor = UpdateIngestor(
+            self._trainer,
+            max_workers=config.participant["training_args"].get("ingestion_workers", 2),
+            max_pending=config.participant["training_args"].get("ingestion_max_pending", 4),
+        )
+        self._evaluation_policy = EvaluationPolicy(
+            self._trainer,
+            interval=config.participant["training_args"].get("evaluation_interval", 1),
+            samples=config.participant["training_args"].get("evaluation_samples"),
+            overlap=config.participant["training_args"].get("evaluation_overlap", False),
+        )
+        self._loop_lag_monitor = LoopLagMonitor()
+        self._round_start_monotonic = None
 
         self._secure_neighbors = []
         self._is_malicious = self.config.participant["adversarial_args"]["attack_params"]["attacks"] != "No Attack"
@@ -187,6 +203,16 @@ class Engine:
     def trainer(self):
         """Trainer"""
         return self._trainer
+
+    @property
+    def evaluation_policy(self):
+        """Evaluation Policy"""
+        return self._evaluation_policy
+
+    @property
+    def update_ingestor(self):
+        """Update Ingestor"""
+        return self._update_ingestor
     
     @property
     def rb(self):
@@ -251,7 +277,7 @@ class Engine:
     async def model_initialization_callback(self, source, message):
         logging.info(f"🤖  handle_model_message | Received model initialization from {source}")
         try:
-            model = self.trainer.deserialize_model(message.parameters)
+            model = await self.update_ingestor.deserialize(message.parameters, message.round)
             self.trainer.set_model_parameters(model, initialize=True)
             logging.info("🤖  Init Model | Model Parameters Initialized")
             self.set_initialization_status(True)
@@ -272,7 +298,7 @@ class Engine:
         if not self.get_federation_ready_lock().locked() and len(await self.get_federation_nodes()) == 0:
             logging.info("🤖  handle_model_message | There are no defined federation nodes")
             return
-        decoded_model = self.trainer.deserialize_model(message.parameters)
+        decoded_model = await self.update_ingestor.deserialize(message.parameters, message.round)
         updt_received_event = UpdateReceivedEvent(decoded_model, message.weight, source, message.round)
         await EventManager.get_instance().publish_node_event(updt_received_event)
 
@@ -558,7 +584,7 @@ class Engine:
             try:
                 logging.info("🤖  Initializing model...")
                 await asyncio.sleep(1)
-                model = self.trainer.deserialize_model(model_serialized)
+                model = await self.update_ingestor.deserialize(model_serialized, round)
                 self.trainer.set_model_parameters(model, initialize=True)
                 logging.info("Model Parameters Initialized")
                 self.set_initialization_status(True)
@@ -618,6 +644,7 @@ class Engine:
         This method ensures all critical and optional components are ready before
         the federated learning process starts.
         """
+        await self._loop_lag_monitor.start()
         await self.aggregator.init()
         if "situational_awareness" in self.config.participant:
             await self.sa.init()
@@ -742,7 +769,12 @@ class Engine:
         ensuring the model is synchronized with the federation's latest aggregated state.
         """
         logging.info(f"💤  Waiting convergence in round {self.round}.")
-        params = await self.aggregator.get_aggregation()
+        # An overlapped evaluation (see EvaluationPolicy) runs on a copy of the model while the updates arrive
+        evaluation = self.evaluation_policy.start_deferred()
+        try:
+            params = await self.aggregator.get_aggregation()
+        finally:
+            await self.evaluation_policy.finish_deferred(evaluation)
         if params is not None:
             logging.info(
                 f"_waiting_model_updates | Aggregation done for round {self.round}, including parameters in local model."
@@ -832,6 +864,7 @@ class Engine:
         while self.round is not None and self.round < self.total_rounds:
             async with self._round_in_process_lock:
                 current_time = time.time()
+                self._round_start_monotonic = time.monotonic()
                 print_msg_box(
                     msg=f"Round {self.round} of {self.total_rounds - 1} started (max. {self.total_rounds} rounds)",
                     indent=2,
@@ -862,6 +895,12 @@ class Engine:
                 current_time = time.time()
                 ree = RoundEndEvent(self.round, current_time)
                 await EventManager.get_instance().publish_node_event(ree)
+                self._log_ingestion_stats(self.round)
+                self._log_loop_lag(self.round)
+                self._log_message_filter_stats(self.round)
+                self._log_send_queue_stats(self.round)
+                self._log_training_setup(self.round)
+                self._log_evaluation_stats(self.round)
 
                 await self.get_round_lock().acquire_async()
 
@@ -886,6 +925,136 @@ class Engine:
         # Shutdown protocol
         await self._shutdown_protocol()
             
+    def _log_ingestion_stats(self, current_round):
+        """
+        Log the time spent decoding the model updates received during the current round.
+
+        Args:
+            current_round (int): The current round index.
+        """
+        stats = self.update_ingestor.get_stats(current_round)
+        if self.trainer.logger is None or not stats.updates:
+            return
+        self.trainer.logger.log_data(
+            {
+                "Ingestion/Updates": stats.updates,
+                "Ingestion/Failures": stats.failures,
+                "Ingestion/Wait (s)": stats.wait,
+                "Ingestion/Decompress (s)": stats.decompress,
+                "Ingestion/Unpickle (s)": stats.unpickle,
+                "Ingestion/Materialize (s)": stats.materialize,
+                "Ingestion/Max update (s)": stats.max_total,
+            },
+            step=current_round,
+        )
+
+    def _log_loop_lag(self, current_round):
+        """
+        Log the event loop lag measured during the current round and during its aggregation.
+
+        Args:
+            current_round (int): The current round index.
+        """
+        if self.trainer.logger is None:
+            return
+        round_lag = self._loop_lag_monitor.get_stats(since=self._round_start_monotonic)
+        metrics = {
+            "Loop/Mean lag (s)": round_lag.mean,
+            "Loop/Max lag (s)": round_lag.max,
+        }
+        if self.aggregator.last_aggregation_window is not None:
+            start, end = self.aggregator.last_aggregation_window
+            if start >= self._round_start_monotonic:
+                aggregation_lag = self._loop_lag_monitor.get_stats(since=start, until=end)
+                metrics["Aggregation/Time (s)"] = end - start
+                metrics["Aggregation/Max loop lag (s)"] = aggregation_lag.max
+        self.trainer.logger.log_data(metrics, step=current_round)
+
+    def _log_message_filter_stats(self, current_round):
+        """
+        Log the activity of the duplicate message filter since the node started.
+
+        Args:
+            current_round (int): The current round index.
+        """
+        if self.trainer.logger is None:
+            return
+        stats = self.cm.message_filter.get_stats()
+        self.trainer.logger.log_data(
+            {
+                "Messages/Checked": stats.checks,
+                "Messages/Duplicates": stats.duplicates,
+                "Messages/Duplicate rate": stats.hit_rate,
+                "Messages/Filter entries": stats.size,
+                "Messages/Filter KB": stats.memory / 1024,
+            },
+            step=current_round,
+        )
+
+    def _log_send_queue_stats(self, current_round):
+        """
+        Log the depth and wait time of each lane of the outbound queues during the current round.
+
+        Args:
+            current_round (int): The current round index.
+        """
+        if self.trainer.logger is None:
+            return
+        metrics = {}
+        for lane, stats in self.cm.get_send_queue_stats(reset=True).items():
+            name = lane.name.capitalize()
+            metrics.update({
+                f"Send/{name} depth": stats.depth,
+                f"Send/{name} max depth": stats.max_depth,
+                f"Send/{name} mean wait (s)": stats.mean_wait,
+                f"Send/{name} max wait (s)": stats.max_wait,
+                f"Send/{name} coalesced": stats.coalesced,
+            })
+        self.trainer.logger.log_data(metrics, step=current_round)
+
+    def _log_training_setup(self, current_round):
+        """
+        Log the fixed time spent preparing the local training during the current round.
+
+        Args:
+            current_round (int): The current round index.
+        """
+        if self.trainer.logger is None or not hasattr(self.trainer, "get_setup_stats"):
+            return
+        stats = self.trainer.get_setup_stats(reset=True)
+        self.trainer.logger.log_data(
+            {
+                "Training/Setup (s)": stats.total,
+                "Training/Trainer setup (s)": stats.trainer,
+                "Training/Data setup (s)": stats.datamodule,
+                "Training/Fit startup (s)": stats.fit_startup,
+                "Training/Test startup (s)": stats.test_startup,
+                "Training/Trainers created": stats.trainers_created,
+            },
+            step=current_round,
+        )
+
+    def _log_evaluation_stats(self, current_round):
+        """
+        Log the test passes of the current round and the wall-clock time saved by the evaluation policy.
+
+        Args:
+            current_round (int): The current round index.
+        """
+        stats = self.evaluation_policy.get_stats(reset=True)
+        if self.trainer.logger is None:
+            return
+        self.trainer.logger.log_data(
+            {
+                "Evaluation/Passes": stats.evaluations,
+                "Evaluation/Skipped": stats.skipped,
+                "Evaluation/Time (s)": stats.duration,
+                "Evaluation/Blocking time (s)": stats.blocking,
+                "Evaluation/Saved time (s)": stats.saved,
+            },
+            step=current_round,
+        )
+
     async def _shutdown_protocol(self):
         logging.info("Starting graceful shutdown process...")
         
@@ -944,6 +1113,18 @@ class Engine:
         except Exception as e:
             logging.exception("Error stopping situational awareness: %s", e)
 
+        # Stop update ingestion workers, aggregation workers and loop lag monitor
+        self.update_ingestor.shutdown()
+        self.aggregator.shutdown()
+        await self._loop_lag_monitor.stop()
+
+        # Stop the data loader workers kept between rounds (only trainers keeping them define shutdown)
+        if hasattr(self.trainer, "shutdown"):
+            try:
+                self.trainer.shutdown()
+            except Exception as e:
+                logging.exception("Error shutting down trainer: %s", e)
+
         # Task cleanup with improved handling
         logging.info("Starting graceful task cleanup...")
         tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
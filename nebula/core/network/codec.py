@@ -0,0 +1,95 @@
+import bz2
+import lzma
+import zlib
+
+import lz4.frame
+
+SUPPORTED_CODECS = ("none", "lz4", "zstd", "zlib", "bz2", "lzma")
+
+
+class PayloadCodec:
+    """
+    Compressor applied to message payloads right before framing.
+
+    Model payloads are serialized as raw tensor bytes by the trainer, so the codec is the only
+    compression stage on the wire. The codec is chosen per scenario through
+    `message_args.compression`, using the name of the algorithm optionally followed by a level:
+
+        - "none": payloads are sent uncompressed.
+        - "lz4" / "lz4-N": fast compression, suited to fast links.
+        - "zstd" / "zstd-N": balanced compression (level 3 by default), requires `zstandard`.
+        - "zlib" / "zlib-N", "bz2" / "bz2-N", "lzma" / "lzma-N": legacy compressors.
+
+    Raises:
+        ValueError: If the codec name or level is not valid.
+        ImportError: If the codec requires a package that is not installed.
+    """
+
+    def __init__(self, name: str = "zlib"):
+        self.name = name
+        algorithm, _, level = name.partition("-")
+        if algorithm not in SUPPORTED_CODECS:
+            raise ValueError(f"Unsupported compression method: {name}")
+        self.algorithm = algorithm
+        self.level = int(level) if level else None
+
+        if self.algorithm == "zstd":
+            try:
+                import zstandard
+            except ImportError as e:
+                raise ImportError("The 'zstd' codec requires the 'zstandard' package") from e
+            self._zstd = zstandard
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the codec actually compresses payloads."""
+        return self.algorithm != "none"
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        Compress a payload.
+
+        Args:
+            data (bytes): The raw payload (any bytes-like object).
+
+        Returns:
+            bytes: The compressed payload.
+        """
+        if self.algorithm == "none":
+            return bytes(data)
+        elif self.algorithm == "lz4":
+            return lz4.frame.compress(data, compression_level=self.level or 0)
+        elif self.algorithm == "zstd":
+            return self._zstd.ZstdCompressor(level=self.level or 3).compress(data)
+        elif self.algorithm == "zlib":
+            return zlib.compress(data, self.level if self.level is not None else -1)
+        elif self.algorithm == "bz2":
+            return bz2.compress(data, self.level or 9)
+        else:
+            return lzma.compress(data, preset=self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        """
+        Decompress a payload produced by `compress`.
+
+        Args:
+            data (bytes): The compressed payload (any bytes-like object).
+
+        Returns:
+            bytes: The raw payload.
+        """
+        if self.algorithm == "none":
+            return bytes(data)
+        elif self.algorithm == "lz4":
+            return lz4.frame.decompress(data)
+        elif self.algorithm == "zstd":
+            return self._zstd.ZstdDecompressor().decompress(data)
+        elif self.algorithm == "zlib":
+            return zlib.decompress(data)
+        elif self.algorithm == "bz2":
+            return bz2.decompress(data)
+        else:
+            return lzma.decompress(data)
@@ -1,5 +1,4 @@
 import asyncio
-import collections
 import logging
 from typing import TYPE_CHECKING
 
@@ -9,11 +8,14 @@ from nebula.core.eventmanager import EventManager
 from nebula.core.nebulaevents import MessageEvent, DuplicatedMessageEvent
 from nebula.core.network.blacklist import BlackList
 from nebula.core.network.connection import Connection
+from nebula.core.network.dedupfilter import DuplicateFilter
 from nebula.core.network.discoverer import Discoverer
 from nebula.core.network.externalconnection.externalconnectionservice import factory_connection_service
 from nebula.core.network.forwarder import Forwarder
 from nebula.core.network.messages import MessagesManager
+from nebula.core.network.payloadcache import PayloadCache
 from nebula.core.network.propagator import Propagator
+from nebula.core.network.sendqueue import SendLane, SendLaneStats
 from nebula.core.utils.locker import Locker
 
 if TYPE_CHECKING:
@@ -83,10 +85,10 @@ class CommunicationsManager:
         self._ready_connections_lock = Locker("ready_connections_lock", async_lock=True)
 
         self._mm = MessagesManager(addr=self.addr, config=self.config)
-        self.received_messages_hashes = collections.deque(
-            maxlen=self.config.participant["message_args"]["max_local_messages"]
+        self._message_filter = DuplicateFilter(
+            capacity=self.config.participant["message_args"]["max_local_messages"],
+            ttl=self.config.participant["message_args"].get("dedup_ttl"),
         )
-        self.receive_messages_lock = Locker(name="receive_messages_lock", async_lock=True)
 
         self._discoverer = Discoverer(addr=self.addr, config=self.config)
         # self._health = Health(addr=self.addr, config=self.config)
@@ -101,8 +103,7 @@ class CommunicationsManager:
 
         self.stop_network_engine = asyncio.Event()
         self.loop = asyncio.get_event_loop()
-        max_concurrent_tasks = 5
-        self.semaphore_send_model = asyncio.Semaphore(max_concurrent_tasks)
+        self._payload_cache = PayloadCache()
 
         self._blacklist = BlackList()
 
@@ -162,6 +163,20 @@ class CommunicationsManager:
         """
         return self._propagator
 
+    @property
+    def message_filter(self):
+        """
+        Returns the filter of recently received messages, used to discard duplicates.
+        """
+        return self._message_filter
+
+    @property
+    def payload_cache(self):
+        """
+        Returns the cache of compressed outgoing payloads shared by all connections.
+        """
+        return self._payload_cache
+
     @property
     def ecs(self):
         """
@@ -805,32 +820,32 @@ class CommunicationsManager:
 
     async def include_received_message_hash(self, hash_message, source):
         """
-        Adds a received message hash to the tracking list if it hasn't been seen before.
+        Adds a received message key to the duplicate filter if it hasn't been seen before.
 
         This prevents processing the same message multiple times in the network.
 
         Args:
-            hash_message (str): The hash of the received message.
+            hash_message (bytes): The key of the received message (see `message_key`).
+            source (str): Address from which the message was received.
 
         Returns:
-            bool: True if the hash was added (i.e., the message is new), False if it was already received.
+            bool: True if the key was added (i.e., the message is new), False if it was already received.
         """
         try:
-            await self.receive_messages_lock.acquire_async()
-            if hash_message in self.received_messages_hashes:
+            if not self.message_filter.add(hash_message):
                 logging.info("❗️  handle_incoming_message | Ignoring message already received.")
                 duplicated_event = DuplicatedMessageEvent(source, "Duplicated message received")
                 asyncio.create_task(EventManager.get_instance().publish_node_event(duplicated_event))
                 return False
-            self.received_messages_hashes.append(hash_message)
-            if len(self.received_messages_hashes) % 10000 == 0:
-                logging.info(f"📥  Received {len(self.received_messages_hashes)} messages")
+            if self.message_filter.checks % 10000 == 0:
+                stats = self.message_filter.get_stats()
+                logging.info(
+                    f"📥  Received {stats.checks} messages | Duplicates: {stats.hit_rate:.1%} | Filter: {stats.size} entries, {stats.memory / 1024:.0f} KB"
+                )
             return True
         except Exception as e:
             logging.exception(f"❗️  handle_incoming_message | Error including message hash: {e}")
             return False
-        finally:
-            await self.receive_messages_lock.release_async()
 
     async def send_message_to_neighbors(self, message, neighbors=None, interval=0):
         """
@@ -858,10 +873,14 @@ class CommunicationsManager:
         """
         Sends a message to a specific destination address, with optional compression for large messages.
 
+        The message is queued in the outbound queue of the connection, which writes control messages before
+        federation messages and models, and waits until it has been written (or superseded by a newer model).
+
         Args:
             dest_addr (str): The destination address of the message.
             message (Any): The message to send.
             message_type (str, optional): Type of message. If in _COMPRESSED_MESSAGES, it will be sent compressed.
+                Compressed messages reserved in the payload cache release their reference once the send finishes.
         """
         is_compressed = message_type in _COMPRESSED_MESSAGES
         if not is_compressed:
@@ -873,16 +892,40 @@ class CommunicationsManager:
                 logging.exception(f"❗️  Cannot send message {message} to {dest_addr}. Error: {e!s}")
                 await self.disconnect(dest_addr, mutual_disconnection=False)
         else:
-            async with self.semaphore_send_model:
-                try:
-                    conn = self.connections.get(dest_addr)
-                    if conn is None:
-                        logging.info(f"❗️  Connection with {dest_addr} not found")
-                        return
-                    await conn.send(data=message, is_compressed=True)
-                except Exception as e:
-                    logging.exception(f"❗️  Cannot send model to {dest_addr}: {e!s}")
-                    await self.disconnect(dest_addr, mutual_disconnection=False)
+            try:
+                conn = self.connections.get(dest_addr)
+                if conn is None:
+                    logging.info(f"❗️  Connection with {dest_addr} not found")
+                    return
+                await conn.send(data=message, is_compressed=True)
+            except Exception as e:
+                logging.exception(f"❗️  Cannot send model to {dest_addr}: {e!s}")
+                await self.disconnect(dest_addr, mutual_disconnection=False)
+            finally:
+                self.payload_cache.release(message)
+
+    def get_send_queue_stats(self, reset: bool = False) -> dict[SendLane, SendLaneStats]:
+        """
+        Return the activity of the outbound queues of all connections, merged per lane.
+
+        Args:
+            reset (bool): Start a new measurement period in every queue after taking the snapshot.
+
+        Returns:
+            dict[SendLane, SendLaneStats]: Queue depth (summed) and wait times (mean and worst) of each lane.
+        """
+        merged = {lane: SendLaneStats() for lane in SendLane}
+        for conn in list(self.connections.values()):
+            for lane, stats in conn.get_send_stats(reset=reset).items():
+                total = merged[lane]
+                total.depth += stats.depth
+                total.max_depth = max(total.max_depth, stats.max_depth)
+                total.sent += stats.sent
+                total.coalesced += stats.coalesced
+                total.blocked += stats.blocked
+                total.total_wait += stats.total_wait
+                total.max_wait = max(total.max_wait, stats.max_wait)
+        return merged
 
     async def establish_connection(self, addr, direct=True, reconnect=False, priority="medium"):
         """
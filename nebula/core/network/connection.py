@@ -1,17 +1,14 @@
 import asyncio
-import bz2
 import json
 import logging
-import lzma
 import time
 import uuid
-import zlib
 from dataclasses import dataclass
 from enum import Enum
 from typing import TYPE_CHECKING, Any
 
-import lz4.frame
-
+from nebula.core.network.codec import PayloadCodec
+from nebula.core.network.sendqueue import OutboundMessage, SendLane, SendLaneStats, SendQueue, classify_message
 from nebula.core.utils.locker import Locker
 
 if TYPE_CHECKING:
@@ -25,14 +22,27 @@ class ConnectionPriority(Enum):
 
 
 @dataclass
-class MessageChunk:
-    __slots__ = ["index", "data", "is_last"]
-    index: int
-    data: bytes
-    is_last: bool
+class MessageBuffer:
+    """
+    Reassembly buffer of a message being received.
+
+    Messages sent with large frames announce their total size, so `data` is preallocated once and
+    frames are read straight into it. Legacy chunked messages grow `data` as chunks arrive.
+    """
+
+    __slots__ = ["data", "size"]
+    data: bytearray
+    size: int
+
+
+class ProtocolError(ValueError):
+    """Data received from the peer that breaks the framing protocol (malformed or oversized)."""
 
 
 MAX_INCOMPLETED_RECONNECTIONS = 3
+DEFAULT_MAX_FRAME_SIZE = 4 * 1024 * 1024  # 4 MB
+DEFAULT_MAX_MESSAGE_SIZE = 512 * 1024 * 1024  # 512 MB
+DEFAULT_SEND_QUEUE_SIZE = 100
 
 
 class Connection:
@@ -84,6 +94,7 @@ class Connection:
         self.active = active
         self.last_active = time.time()
         self.compression = compression
+        self.codec: PayloadCodec | None = None
         self.config = config
         self._cm = None
 
@@ -92,8 +103,11 @@ class Connection:
         self.read_task = None
         self.process_task = None
         self.inactivity_task = None
+        self.send_task = None
+        self.framing_task = None
+        self.drop_task = None
         self.pending_messages_queue = asyncio.Queue(maxsize=100)
-        self.message_buffers: dict[bytes, dict[int, MessageChunk]] = {}
+        self.message_buffers: dict[bytes, MessageBuffer] = {}
         self._prio: ConnectionPriority = ConnectionPriority(prio)
         self._inactivity = False
         self._last_activity = time.time()
@@ -111,6 +125,27 @@ class Connection:
         self.HEADER_SIZE = 21
         self.MAX_CHUNK_SIZE = 1024  # 1 KB
         self.BUFFER_SIZE = 1024  # 1 KB
+        self.READ_SIZE = 256 * 1024  # 256 KB
+
+        # Large-frame transport: length-prefixed frames without EOT, only used once the peer advertises support
+        self.FRAME_FLAG_LAST = 0x01
+        self.FRAME_FLAG_LARGE = 0x02
+        self.FRAMING_HELLO = b"NEBULA//FRAMING//"
+        self.MAX_FRAME_SIZE = DEFAULT_MAX_FRAME_SIZE
+        # Largest message accepted from a peer, so a bogus size cannot make the node allocate without bound
+        self.MAX_MESSAGE_SIZE = DEFAULT_MAX_MESSAGE_SIZE
+        self.large_frames = True
+        send_queue_size = DEFAULT_SEND_QUEUE_SIZE
+        if self.config is not None:
+            message_args = self.config.participant.get("message_args", {})
+            self.compression = message_args.get("compression", compression)
+            self.large_frames = message_args.get("framing", "large") == "large"
+            self.MAX_FRAME_SIZE = int(message_args.get("max_frame_size", DEFAULT_MAX_FRAME_SIZE))
+            self.MAX_MESSAGE_SIZE = int(message_args.get("max_message_size", DEFAULT_MAX_MESSAGE_SIZE))
+            send_queue_size = int(message_args.get("send_queue_size", DEFAULT_SEND_QUEUE_SIZE))
+        self._peer_frame_size: int | None = None
+        # Outbound messages are written by a single task, highest priority lane first
+        self._send_queue = SendQueue(maxsize=send_queue_size)
 
         self.incompleted_reconnections = 0
         self.forced_disconnection = False
@@ -200,6 +235,14 @@ class Connection:
     def get_ready(self):
         return self.federated_round != Connection.DEFAULT_FEDERATED_ROUND
 
+    def get_frame_size(self) -> int | None:
+        """
+        Return the negotiated large-frame size, or None if the legacy chunked framing is in use.
+        """
+        if not self.large_frames or self._peer_frame_size is None:
+            return None
+        return min(self.MAX_FRAME_SIZE, self._peer_frame_size)
+
     def get_direct(self):
         """
         Check if the connection is marked as direct ( a.k.a neighbor ).
@@ -236,15 +279,53 @@ class Connection:
         Start the connection by launching asynchronous tasks for handling incoming messages,
         processing the message queue, and monitoring connection inactivity.
 
-        This method creates three asyncio tasks:
+        This method creates four asyncio tasks:
         1. `handle_incoming_message` - reads and handles incoming data from the connection.
         2. `process_message_queue` - processes messages queued for sending or further handling.
-        3. `_monitor_inactivity` - periodically checks if the connection has been inactive and updates its state accordingly.
+        3. `process_send_queue` - writes the outbound messages, highest priority lane first.
+        4. `_monitor_inactivity` - periodically checks if the connection has been inactive and updates its state accordingly.
+
+        If large frames are enabled, the supported frame size is also advertised to the peer.
         """
         self._running.set()
         self.read_task = asyncio.create_task(self.handle_incoming_message(), name=f"Connection {self.addr} reader")
         self.process_task = asyncio.create_task(self.process_message_queue(), name=f"Connection {self.addr} processor")
+        self.send_task = asyncio.create_task(self.process_send_queue(), name=f"Connection {self.addr} sender")
         self.inactivity_task = asyncio.create_task(self._monitor_inactivity())
+        if self.large_frames:
+            self.framing_task = asyncio.create_task(self._advertise_framing(), name=f"Connection {self.addr} framing")
+            self.framing_task.add_done_callback(self._on_framing_task_done)
+
+    async def _advertise_framing(self) -> None:
+        """
+        Advertise large-frame support to the peer.
+
+        The advertisement travels as a raw bytes message using the legacy chunked framing, so peers
+        without large-frame support simply log and discard it and keep receiving legacy chunks.
+        """
+        await self.send(self.FRAMING_HELLO + str(self.MAX_FRAME_SIZE).encode(), pb=False)
+
+    def _on_framing_task_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logging.error(f"❗️  Error advertising large frames to {self.addr}: {task.exception()}")
+
+    def _on_framing_advertisement(self, message: bytes) -> None:
+        """
+        Enable large frames towards the peer after receiving its framing advertisement.
+
+        Args:
+            message (bytes): The advertisement, containing the maximum frame size the peer accepts.
+        """
+        try:
+            peer_frame_size = int(bytes(message[len(self.FRAMING_HELLO) :]))
+        except ValueError:
+            peer_frame_size = 0
+        if peer_frame_size <= 0:
+            # Legacy chunks keep being sent to the peer
+            logging.warning(f"Invalid framing advertisement from {self.addr}")
+            return
+        self._peer_frame_size = peer_frame_size
+        logging.info(f"Connection [framing]: {self.addr} accepts large frames (frame size: {self.get_frame_size()})")
 
     async def stop(self):
         """
@@ -253,13 +334,15 @@ class Connection:
 
         This method performs the following steps:
         - Sets a flag indicating the disconnection was forced.
-        - Cancels the read and process tasks if they exist, awaiting their cancellation and logging any cancellation exceptions.
+        - Closes the outbound queue, so the messages waiting to be sent are resolved as not sent.
+        - Cancels the read, process, send and framing tasks if they exist, awaiting their cancellation and logging any cancellation exceptions.
         - Closes the writer stream safely, awaiting its closure and logging any errors that occur during the closing process.
         """
         self._running.clear()
         logging.info(f"❗️  Connection [stopped]: {self.addr} (id: {self.id})")
         self.forced_disconnection = True
-        tasks = [self.read_task, self.process_task, self.inactivity_task]
+        await self._send_queue.close()
+        tasks = [self.read_task, self.process_task, self.send_task, self.inactivity_task, self.framing_task]
         for task in tasks:
             if task is not None:
                 task.cancel()
@@ -344,15 +427,17 @@ class Connection:
 
         This method handles:
         - Preparing the data for transmission, including optional protobuf serialization, encoding, and compression.
-        - Appending a message ID and sending the data in chunks over the writer stream.
-        - Updating the activity timestamp before sending.
+        - Queuing the data in the lane of its message type (control, federation or model), waiting for room if
+          the lane is full. A queued model is superseded by a newer model of the same source.
+        - Waiting until the send task has written the data (or dropped it because it was superseded).
         - Attempting reconnection in case of failure if the connection is direct.
 
         Args:
             data (Any): The data to be sent.
             pb (bool): If True, data is serialized using Protobuf; otherwise, it is encoded as plain text. Defaults to True.
             encoding_type (str): The character encoding used if pb is False. Defaults to "utf-8".
-            is_compressed (bool): If True, the encoded data will be compressed before sending. Defaults to False.
+            is_compressed (bool): If True, the encoded data will be compressed before sending (once per message
+                when the message was reserved in the payload cache). Defaults to False.
         """
         if self.writer is None:
             logging.error("Cannot send data, writer is None")
@@ -364,19 +449,23 @@ class Connection:
             return
 
         try:
-            message_id = uuid.uuid4().bytes
             data_prefix, encoded_data = self._prepare_data(data, pb, encoding_type)
+            lane, key, round = classify_message(encoded_data) if pb else (SendLane.CONTROL, None, None)
+
+            if is_compressed and self.compression == "none":
+                is_compressed = False
 
             if is_compressed:
-                encoded_data = await asyncio.to_thread(self._compress, encoded_data, self.compression)
+                encoded_data = await self.cm.payload_cache.compress(encoded_data, self.compression, self._compress)
                 if encoded_data is None:
                     return
                 data_to_send = data_prefix + encoded_data + self.COMPRESSION_CHAR
             else:
                 data_to_send = data_prefix + encoded_data
 
-            await self._update_activity()
-            await self._send_chunks(message_id, data_to_send)
+            message = OutboundMessage(data_to_send, lane, key, round)
+            if await self._send_queue.put(message):
+                await message.sent
         except Exception as e:
             logging.exception(f"Error sending data: {e}")
             if self.direct and not await self.cm.learning_finished():
@@ -384,6 +473,60 @@ class Connection:
             elif await self.cm.learning_finished():
                 logging.info(f"Not attempting reconnection to {self.addr} because learning cycle has finished")
 
+    async def process_send_queue(self) -> None:
+        """
+        Continuously writes the messages of the outbound queue, highest priority lane first.
+        """
+        try:
+            while await self.is_running():
+                message = await self._send_queue.get()
+                if message is not None:
+                    await self._write_message(message)
+        except asyncio.CancelledError:
+            logging.info("process_send_queue cancelled during shutdown.")
+            return
+
+    async def _write_message(self, message: OutboundMessage) -> None:
+        """
+        Writes a message taken from the outbound queue and resolves its `sent` future.
+
+        Errors are handed to the sender of the message through the future, so it can react as if it had
+        written the message itself.
+        """
+        try:
+            await self._update_activity()
+            await self._send_chunks(uuid.uuid4().bytes, message.data, message.lane)
+        except Exception as e:
+            if not message.sent.done():
+                message.sent.set_exception(e)
+        else:
+            if not message.sent.done():
+                message.sent.set_result(True)
+
+    async def _send_urgent(self, lane: SendLane) -> None:
+        """
+        Writes the queued messages with a higher priority than `lane` between two chunks of a message of `lane`.
+
+        The receiver reassembles messages by their ID, so chunks of different messages can be interleaved.
+        """
+        while self._send_queue.has_pending(above=lane):
+            message = await self._send_queue.get(above=lane)
+            if message is None:
+                return
+            await self._write_message(message)
+
+    def get_send_stats(self, reset: bool = False) -> dict[SendLane, SendLaneStats]:
+        """
+        Return the queue depth and wait time of each lane of the outbound queue.
+
+        Args:
+            reset (bool): Start a new measurement period after taking the snapshot.
+
+        Returns:
+            dict[SendLane, SendLaneStats]: The statistics of each lane.
+        """
+        return self._send_queue.get_stats(reset=reset)
+
     def _prepare_data(self, data: Any, pb: bool, encoding_type: str) -> tuple[bytes, bytes]:
         """
         Prepares the data for transmission by determining its format and encoding it accordingly.
@@ -410,30 +553,41 @@ class Connection:
         else:
             raise ValueError(f"Unknown data type to send: {type(data)}")
 
+    def _get_codec(self, compression: str) -> PayloadCodec | None:
+        """
+        Returns the payload codec for the given compression method, creating it if needed.
+
+        Args:
+            compression (str): The codec name (see `PayloadCodec`).
+
+        Returns:
+            PayloadCodec | None: The codec, or None if the compression method is unsupported.
+        """
+        if self.codec is None or self.codec.name != compression:
+            try:
+                self.codec = PayloadCodec(compression)
+            except (ValueError, ImportError) as e:
+                logging.error(f"Unsupported compression method: {compression} ({e})")
+                return None
+        return self.codec
+
     def _compress(self, data: bytes, compression: str) -> bytes | None:
         """
         Compresses the given byte data using the specified compression algorithm.
 
         Args:
             data (bytes): The raw data to compress.
-            compression (str): The compression method to use ("lz4", "zlib", "bz2", or "lzma").
+            compression (str): The codec to use ("lz4", "zstd", "zlib", "bz2" or "lzma", optionally with a level).
 
         Returns:
             bytes | None: The compressed data, or None if the compression method is unsupported.
         """
-        if compression == "lz4":
-            return lz4.frame.compress(data)
-        elif compression == "zlib":
-            return zlib.compress(data)
-        elif compression == "bz2":
-            return bz2.compress(data)
-        elif compression == "lzma":
-            return lzma.compress(data)
-        else:
-            logging.error(f"Unsupported compression method: {compression}")
+        codec = self._get_codec(compression)
+        if codec is None:
             return None
+        return codec.compress(data)
 
-    async def _send_chunks(self, message_id: bytes, data: bytes) -> None:
+    async def _send_chunks(self, message_id: bytes, data: bytes, lane: SendLane = SendLane.CONTROL) -> None:
         """
         Sends the encoded data over the connection in fixed-size chunks.
 
@@ -441,10 +595,19 @@ class Connection:
         a flag indicating if it's the last chunk, and the size of the chunk.
         An end-of-transmission (EOT) character is appended to each chunk.
 
+        If the peer advertised large-frame support, the data is sent with `_send_frames` instead. Queued messages
+        with a higher priority than `lane` are written between chunks.
+
         Args:
             message_id (bytes): Unique identifier for the message being sent.
             data (bytes): The complete data payload to be split into chunks and transmitted.
+            lane (SendLane): Lane of the message being sent.
         """
+        frame_size = self.get_frame_size()
+        if frame_size is not None:
+            await self._send_frames(message_id, data, frame_size, lane)
+            return
+
         chunk_size = self._calculate_chunk_size(len(data))
         num_chunks = (len(data) + chunk_size - 1) // chunk_size
 
@@ -460,9 +623,46 @@ class Connection:
 
             self.writer.write(chunk_with_header)
             await self.writer.drain()
+            if not is_last_chunk and self._send_queue.has_pending(above=lane):
+                await self._send_urgent(lane)
 
             # logging.debug(f"Sent message {message_id.hex()} | chunk {chunk_index+1}/{num_chunks} | size: {len(chunk)} bytes")
 
+    async def _send_frames(
+        self, message_id: bytes, data: bytes, frame_size: int, lane: SendLane = SendLane.CONTROL
+    ) -> None:
+        """
+        Sends the encoded data as variable-size, length-prefixed frames.
+
+        Frames share the chunk header layout (message ID, frame index, flags and size) but set the
+        large-frame flag and carry no EOT character. The first frame also carries the total message
+        size, so the receiver can preallocate the reassembly buffer. Header and payload are handed to the transport
+        together with `writelines`, slicing the payload through a memoryview to avoid copies, and the
+        writer is drained once per frame. Queued messages with a higher priority than `lane` are written between frames.
+
+        Args:
+            message_id (bytes): Unique identifier for the message being sent.
+            data (bytes): The complete data payload to be transmitted.
+            frame_size (int): Maximum payload size of each frame.
+            lane (SendLane): Lane of the message being sent.
+        """
+        view = memoryview(data)
+        num_frames = max(1, (len(view) + frame_size - 1) // frame_size)
+
+        for frame_index in range(num_frames):
+            frame = view[frame_index * frame_size : (frame_index + 1) * frame_size]
+            flags = self.FRAME_FLAG_LARGE
+            if frame_index == num_frames - 1:
+                flags |= self.FRAME_FLAG_LAST
+
+            header = message_id + frame_index.to_bytes(4, "big") + bytes((flags,)) + len(frame).to_bytes(4, "big")
+            if frame_index == 0:
+                header += len(view).to_bytes(8, "big")
+            self.writer.writelines((header, frame))
+            await self.writer.drain()
+            if not flags & self.FRAME_FLAG_LAST and self._send_queue.has_pending(above=lane):
+                await self._send_urgent(lane)
+
     def _calculate_chunk_size(self, data_size: int) -> int:
         return self.BUFFER_SIZE
 
@@ -476,7 +676,8 @@ class Connection:
         prevent false inactivity flags and resets reconnection counters.
 
         If the message is complete (`is_last_chunk` is True), the full message
-        is processed. On errors, reconnection is attempted if appropriate.
+        is processed. On errors, reconnection is attempted if appropriate. Malformed
+        or oversized data (`ProtocolError`) drops the connection instead.
 
         Exceptions:
             asyncio.CancelledError: Raised when the task is cancelled externally.
@@ -490,16 +691,28 @@ class Connection:
                     await asyncio.sleep(0.1)
                     continue
                 header = await self._read_exactly(self.HEADER_SIZE)
-                message_id, chunk_index, is_last_chunk = self._parse_header(header)
-                chunk_data = await self._read_chunk(reusable_buffer)
+                message_id, chunk_index, is_last_chunk, is_large_frame = self._parse_header(header)
+                if is_large_frame:
+                    await self._read_frame(message_id, chunk_index)
+                else:
+                    chunk_data = await self._read_chunk(reusable_buffer)
+                    self._store_chunk(message_id, chunk_index, chunk_data, is_last_chunk)
                 await self._update_activity()
-                self._store_chunk(message_id, chunk_index, chunk_data, is_last_chunk)
                 self.incompleted_reconnections = 0
                 if is_last_chunk:
                     await self._process_complete_message(message_id)
         except asyncio.CancelledError:
             logging.info("handle_incoming_message cancelled during shutdown.")
             return
+        except ProtocolError as e:
+            # A peer sending malformed data is not reconnected: the connection is dropped
+            logging.error(f"❗️  Dropping connection with {self.addr}: {e}")
+            self.message_buffers.clear()
+            self.forced_disconnection = True
+            # Closing the connection cancels this task, so it runs on its own
+            self.drop_task = asyncio.create_task(
+                self.cm.terminate_failed_reconnection(self), name=f"Connection {self.addr} drop"
+            )
         except ConnectionError as e:
             logging.exception(f"Connection closed while reading: {e}")
         except Exception as e:
@@ -511,7 +724,7 @@ class Connection:
             elif await self.cm.learning_finished():
                 logging.info(f"Not attempting reconnection to {self.addr} because learning cycle has finished")
 
-    async def _read_exactly(self, num_bytes: int, max_retries: int = 3) -> bytes:
+    async def _read_exactly(self, num_bytes: int, max_retries: int = 3) -> bytearray:
         """
         Reads an exact number of bytes from the connection stream.
 
@@ -523,24 +736,43 @@ class Connection:
             max_retries (int): Number of times to retry on failure (default is 3).
 
         Returns:
-            bytes: The exact number of bytes read from the stream.
+            bytearray: The exact number of bytes read from the stream.
 
         Raises:
             ConnectionError: If the connection is closed before reading completes.
             asyncio.IncompleteReadError: If the stream ends before enough bytes are read.
             RuntimeError: If the maximum number of retries is exceeded.
         """
-        data = b""
-        remaining = num_bytes
+        data = bytearray(num_bytes)
+        await self._readinto(memoryview(data), max_retries)
+        return data
+
+    async def _readinto(self, view: memoryview, max_retries: int = 3) -> None:
+        """
+        Fills `view` with bytes read from the connection stream.
+
+        Data is copied from the stream in pieces of at most READ_SIZE bytes straight into the
+        destination buffer, so no intermediate message-sized objects are created.
+
+        Args:
+            view (memoryview): Writable destination buffer.
+            max_retries (int): Number of times to retry on failure (default is 3).
+
+        Raises:
+            ConnectionError: If the connection is closed before reading completes.
+            asyncio.IncompleteReadError: If the stream ends before enough bytes are read.
+            RuntimeError: If the maximum number of retries is exceeded.
+        """
+        offset = 0
         for _ in range(max_retries):
             try:
-                while remaining > 0:
-                    chunk = await self.reader.read(min(remaining, self.BUFFER_SIZE))
+                while offset < len(view):
+                    chunk = await self.reader.read(min(len(view) - offset, self.READ_SIZE))
                     if not chunk:
                         raise ConnectionError("Connection closed while reading")
-                    data += chunk
-                    remaining -= len(chunk)
-                return data
+                    view[offset : offset + len(chunk)] = chunk
+                    offset += len(chunk)
+                return
             except asyncio.IncompleteReadError as e:
                 if _ == max_retries - 1:
                     raise
@@ -548,9 +780,9 @@ class Connection:
             except BrokenPipeError as e:
                 if not self.forced_disconnection:
                     logging.exception(f"Broken PIPE while reading: {e}")
-        raise RuntimeError("Max retries reached in _read_exactly")
+        raise RuntimeError("Max retries reached in _readinto")
 
-    def _parse_header(self, header: bytes) -> tuple[bytes, int, bool]:
+    def _parse_header(self, header: bytes) -> tuple[bytes, int, bool, bool]:
         """
         Parses the message header to extract metadata.
 
@@ -562,13 +794,16 @@ class Connection:
                 - message_id (bytes): A 16-byte unique identifier for the message.
                 - chunk_index (int): The index of the current chunk.
                 - is_last_chunk (bool): True if this is the final chunk of the message.
+                - is_large_frame (bool): True if the chunk is a large frame (no EOT character).
         """
-        message_id = header[:16]
+        message_id = bytes(header[:16])
         chunk_index = int.from_bytes(header[16:20], "big")
-        is_last_chunk = header[20] == 1
-        return message_id, chunk_index, is_last_chunk
+        flags = header[20]
+        is_last_chunk = bool(flags & self.FRAME_FLAG_LAST)
+        is_large_frame = bool(flags & self.FRAME_FLAG_LARGE)
+        return message_id, chunk_index, is_last_chunk, is_large_frame
 
-    async def _read_chunk(self, buffer: bytearray = None) -> bytes:
+    async def _read_chunk(self, buffer: bytearray = None) -> memoryview:
         """
         Reads a data chunk from the stream, validating its size and EOT marker.
 
@@ -577,7 +812,7 @@ class Connection:
                 If not provided, a new buffer of MAX_CHUNK_SIZE will be created.
 
         Returns:
-            bytes: The read chunk data (sliced from the buffer).
+            memoryview: The read chunk data (sliced from the buffer).
 
         Raises:
             ValueError: If the chunk size exceeds MAX_CHUNK_SIZE or if the EOT marker is invalid.
@@ -590,17 +825,52 @@ class Connection:
         chunk_size = int.from_bytes(chunk_size_bytes, "big")
 
         if chunk_size > self.MAX_CHUNK_SIZE:
-            raise ValueError(f"Chunk size {chunk_size} exceeds MAX_CHUNK_SIZE {self.MAX_CHUNK_SIZE}")
+            raise ProtocolError(f"Chunk size {chunk_size} exceeds MAX_CHUNK_SIZE {self.MAX_CHUNK_SIZE}")
 
-        chunk = await self._read_exactly(chunk_size)
-        buffer[:chunk_size] = chunk
+        await self._readinto(memoryview(buffer)[:chunk_size])
         eot = await self._read_exactly(len(self.EOT_CHAR))
 
         if eot != self.EOT_CHAR:
-            raise ValueError("Invalid EOT character")
+            raise ProtocolError("Invalid EOT character")
 
         return memoryview(buffer)[:chunk_size]
 
+    async def _read_frame(self, message_id: bytes, frame_index: int) -> None:
+        """
+        Reads a large frame from the stream straight into the message reassembly buffer.
+
+        The first frame of a message carries its total size, which is used to preallocate a single
+        buffer for the whole message. Subsequent frames are read into the unfilled part of that buffer.
+
+        Args:
+            message_id (bytes): Unique identifier for the message.
+            frame_index (int): Index of the current frame in the message.
+
+        Raises:
+            ProtocolError: If the frame size exceeds MAX_FRAME_SIZE, the announced message size exceeds
+                MAX_MESSAGE_SIZE, the frame overflows the announced message size or a continuation frame
+                arrives for an unknown message.
+            ConnectionError: If the connection is closed unexpectedly.
+        """
+        frame_size = int.from_bytes(await self._read_exactly(4), "big")
+        if frame_size > self.MAX_FRAME_SIZE:
+            raise ProtocolError(f"Frame size {frame_size} exceeds MAX_FRAME_SIZE {self.MAX_FRAME_SIZE}")
+
+        if frame_index == 0:
+            total_size = int.from_bytes(await self._read_exactly(8), "big")
+            if total_size > self.MAX_MESSAGE_SIZE:
+                raise ProtocolError(f"Message size {total_size} exceeds MAX_MESSAGE_SIZE {self.MAX_MESSAGE_SIZE}")
+            self.message_buffers[message_id] = MessageBuffer(bytearray(total_size), 0)
+        buffer = self.message_buffers.get(message_id)
+        if buffer is None:
+            raise ProtocolError(f"Frame {frame_index} of unknown message {message_id.hex()}")
+
+        if buffer.size + frame_size > len(buffer.data):
+            del self.message_buffers[message_id]
+            raise ProtocolError(f"Frame {frame_index} overflows message {message_id.hex()}")
+        await self._readinto(memoryview(buffer.data)[buffer.size : buffer.size + frame_size])
+        buffer.size += frame_size
+
     def _store_chunk(self, message_id: bytes, chunk_index: int, buffer: memoryview, is_last: bool) -> None:
         """
         Stores a received chunk in the internal message buffer for later assembly.
@@ -612,12 +882,19 @@ class Connection:
             is_last (bool): Whether this chunk is the final part of the message.
 
         Raises:
+            ProtocolError: If the message grows beyond MAX_MESSAGE_SIZE.
             Exception: Logs and removes the message buffer if an error occurs while storing.
         """
         if message_id not in self.message_buffers:
-            self.message_buffers[message_id] = {}
+            self.message_buffers[message_id] = MessageBuffer(bytearray(), 0)
+        if self.message_buffers[message_id].size + len(buffer) > self.MAX_MESSAGE_SIZE:
+            del self.message_buffers[message_id]
+            raise ProtocolError(f"Message {message_id.hex()} exceeds MAX_MESSAGE_SIZE {self.MAX_MESSAGE_SIZE}")
         try:
-            self.message_buffers[message_id][chunk_index] = MessageChunk(chunk_index, buffer.tobytes(), is_last)
+            # Chunks of a message are written in order by the sender, so they are appended as they arrive
+            message_buffer = self.message_buffers[message_id]
+            message_buffer.data += buffer
+            message_buffer.size += len(buffer)
             # logging.debug(f"Stored chunk {chunk_index} of message {message_id.hex()} | size: {len(data)} bytes")
         except Exception as e:
             if message_id in self.message_buffers:
@@ -626,25 +903,24 @@ class Connection:
 
     async def _process_complete_message(self, message_id: bytes) -> None:
         """
-        Reconstructs and processes a complete message from its stored chunks.
+        Processes a complete message from its reassembly buffer.
 
         Args:
             message_id (bytes): Unique identifier of the message.
 
         Behavior:
-            - Sorts and joins the chunks into a full message.
+            - Takes a memoryview over the reassembly buffer (no copy of the message).
             - Extracts the data type prefix and message content.
             - Decompresses the message if necessary.
             - Enqueues the message for further processing.
         """
-        chunks = sorted(self.message_buffers[message_id].values(), key=lambda x: x.index)
-        complete_message = b"".join(chunk.data for chunk in chunks)
-        del self.message_buffers[message_id]
+        message_buffer = self.message_buffers.pop(message_id)
+        complete_message = memoryview(message_buffer.data)[: message_buffer.size]
 
-        data_type_prefix = complete_message[:4]
+        data_type_prefix = bytes(complete_message[:4])
         message_content = complete_message[4:]
 
-        if message_content.endswith(self.COMPRESSION_CHAR):
+        if message_content[-len(self.COMPRESSION_CHAR) :] == self.COMPRESSION_CHAR:
             message_content = await asyncio.to_thread(
                 self._decompress,
                 message_content[: -len(self.COMPRESSION_CHAR)],
@@ -652,8 +928,9 @@ class Connection:
             )
             if message_content is None:
                 return
+            message_content = memoryview(message_content)
 
-        await self.pending_messages_queue.put((data_type_prefix, memoryview(message_content)))
+        await self.pending_messages_queue.put((data_type_prefix, message_content))
         # logging.debug(f"Processed complete message {message_id.hex()} | total size: {len(complete_message)} bytes")
 
     def _decompress(self, data: bytes, compression: str) -> bytes | None:
@@ -661,23 +938,16 @@ class Connection:
         Decompresses a byte stream using the specified compression algorithm.
 
         Args:
-            data (bytes): The compressed data.
-            compression (str): The compression method ("zlib", "bz2", "lzma", "lz4").
+            data (bytes | memoryview): The compressed data.
+            compression (str): The codec used by the sender ("lz4", "zstd", "zlib", "bz2" or "lzma").
 
         Returns:
             bytes | None: The decompressed data, or None if the method is unsupported or fails.
         """
-        if compression == "zlib":
-            return zlib.decompress(data)
-        elif compression == "bz2":
-            return bz2.decompress(data)
-        elif compression == "lzma":
-            return lzma.decompress(data)
-        elif compression == "lz4":
-            return lz4.frame.decompress(data)
-        else:
-            logging.error(f"Unsupported compression method: {compression}")
+        codec = self._get_codec(compression)
+        if codec is None:
             return None
+        return codec.decompress(data)
 
     async def process_message_queue(self) -> None:
         """
@@ -700,13 +970,13 @@ class Connection:
             logging.info("process_message_queue cancelled during shutdown.")
             return
 
-    async def _handle_message(self, data_type_prefix: bytes, message: bytes) -> None:
+    async def _handle_message(self, data_type_prefix: bytes, message: memoryview) -> None:
         """
         Dispatches a message to its corresponding handler based on the type prefix.
 
         Args:
             data_type_prefix (bytes): Indicates the format/type of the message.
-            message (bytes): The content of the message.
+            message (memoryview): The content of the message.
 
         Behavior:
             - Routes protobuf messages to the connection manager.
@@ -720,10 +990,13 @@ class Connection:
                 name=f"Connection {self.addr} message handler",
             )
         elif data_type_prefix == self.DATA_TYPE_PREFIXES["string"]:
-            logging.debug(f"Received string message: {message.decode('utf-8')}")
+            logging.debug(f"Received string message: {bytes(message).decode('utf-8')}")
         elif data_type_prefix == self.DATA_TYPE_PREFIXES["json"]:
-            logging.debug(f"Received JSON message: {json.loads(message.decode('utf-8'))}")
+            logging.debug(f"Received JSON message: {json.loads(bytes(message).decode('utf-8'))}")
         elif data_type_prefix == self.DATA_TYPE_PREFIXES["bytes"]:
+            if message[: len(self.FRAMING_HELLO)] == self.FRAMING_HELLO:
+                self._on_framing_advertisement(message)
+                return
             logging.debug(f"Received bytes message of length: {len(message)}")
         else:
             logging.error(f"Unknown data type prefix: {data_type_prefix}")
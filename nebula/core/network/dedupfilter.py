@@ -0,0 +1,140 @@
+import hashlib
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+# Payloads longer than SAMPLE_WINDOWS * WINDOW_BYTES are identified by evenly spaced windows instead of all their bytes
+SAMPLE_WINDOWS = 16
+WINDOW_BYTES = 4096
+
+
+def message_key(data: bytes | memoryview) -> bytes:
+    """
+    Compute a cheap identifier of a serialized message, used to detect duplicates.
+
+    Small messages are hashed completely. For large messages (e.g., model messages of tens of MB) only the
+    length and `SAMPLE_WINDOWS` evenly spaced windows of `WINDOW_BYTES` are hashed, so the cost does not grow
+    with the payload. The first window covers the source of the message and the last one the trailing fields
+    (e.g., the round and weight of a model message), and copies of a message forwarded through the network are
+    byte-identical, so they always get the same key.
+
+    Args:
+        data (bytes | memoryview): The serialized message.
+
+    Returns:
+        bytes: 16-byte identifier of the message.
+    """
+    size = len(data)
+    digest = hashlib.blake2b(size.to_bytes(8, "little"), digest_size=16)
+    if size <= SAMPLE_WINDOWS * WINDOW_BYTES:
+        digest.update(data)
+    else:
+        view = memoryview(data)
+        step = (size - WINDOW_BYTES) // (SAMPLE_WINDOWS - 1)
+        for i in range(SAMPLE_WINDOWS):
+            digest.update(view[i * step : i * step + WINDOW_BYTES])
+    return digest.digest()
+
+
+@dataclass
+class DuplicateFilterStats:
+    """
+    Activity of a duplicate filter since it was created.
+
+    Attributes:
+        checks (int): Messages checked.
+        duplicates (int): Messages rejected because they had already been seen.
+        evicted (int): Entries dropped because the filter was full.
+        expired (int): Entries dropped because they were older than the TTL.
+        size (int): Entries currently stored.
+        memory (int): Approximate memory used by the stored entries, in bytes.
+    """
+
+    checks: int = 0
+    duplicates: int = 0
+    evicted: int = 0
+    expired: int = 0
+    size: int = 0
+    memory: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of the checked messages that were duplicates."""
+        return self.duplicates / self.checks if self.checks else 0.0
+
+
+class DuplicateFilter:
+    """
+    Bounded set of recently seen message keys, with constant time lookups and evictions.
+
+    Keys are stored in insertion order with the time they were added. When the filter is full the oldest key is
+    evicted (FIFO), and keys older than `ttl` seconds are dropped when the filter is next used.
+    """
+
+    def __init__(self, capacity: int = 10000, ttl: float | None = None):
+        """
+        Args:
+            capacity (int): Maximum number of keys stored.
+            ttl (float | None): Seconds a key is remembered (None to keep it until it is evicted).
+        """
+        self.capacity = max(1, capacity)
+        self.ttl = ttl
+        self._entries: OrderedDict[bytes, float] = OrderedDict()
+        self._stats = DuplicateFilterStats()
+
+    def add(self, key: bytes) -> bool:
+        """
+        Add a key to the filter unless it has already been seen.
+
+        Args:
+            key (bytes): The key of the message (see `message_key`).
+
+        Returns:
+            bool: True if the key is new, False if it is a duplicate.
+        """
+        now = time.monotonic()
+        if self.ttl:
+            self._expire(now)
+        self._stats.checks += 1
+        if key in self._entries:
+            self._stats.duplicates += 1
+            return False
+        self._entries[key] = now
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self._stats.evicted += 1
+        return True
+
+    def _expire(self, now: float):
+        while self._entries:
+            key, added = next(iter(self._entries.items()))
+            if now - added < self.ttl:
+                break
+            del self._entries[key]
+            self._stats.expired += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def checks(self) -> int:
+        """Number of messages checked so far."""
+        return self._stats.checks
+
+    def get_stats(self) -> DuplicateFilterStats:
+        """
+        Return the statistics of the filter, including its current size and memory use.
+
+        Returns:
+            DuplicateFilterStats: A snapshot of the statistics.
+        """
+        self._stats.size = len(self._entries)
+        self._stats.memory = sys.getsizeof(self._entries)
+        if self._entries:
+            key, added = next(iter(self._entries.items()))
+            self._stats.memory += len(self._entries) * (sys.getsizeof(key) + sys.getsizeof(added))
+        return DuplicateFilterStats(**vars(self._stats))
@@ -1,9 +1,9 @@
-import hashlib
 import logging
 import traceback
 
 from nebula.core.nebulaevents import MessageEvent
 from nebula.core.network.actions import factory_message_action, get_action_name_from_value, get_actions_names
+from nebula.core.network.dedupfilter import message_key
 from nebula.core.pb import nebula_pb2
 
 
@@ -118,7 +118,7 @@ class MessagesManager:
         and prevents duplicate processing using message hashes.
 
         Args:
-            data (bytes): Serialized protobuf message bytes.
+            data (bytes | memoryview): Serialized protobuf message bytes.
             addr_from (str): Address from which the message was received.
         """
         not_processing_messages = {"control_message", "connection_message"}
@@ -151,7 +151,7 @@ class MessagesManager:
 
             # Message-specific forwarding and processing
             elif message_type in special_processing_messages:
-                if await self.cm.include_received_message_hash(hashlib.md5(data).hexdigest(), addr_from):
+                if await self.cm.include_received_message_hash(message_key(data), addr_from):
                     # Forward the message if required
                     if self._should_forward_message(message_type, message_wrapper):
                         await self.cm.forward_message(data, addr_from)
@@ -165,7 +165,7 @@ class MessagesManager:
                         await self.cm.handle_message(me)
             # Rest of messages
             else:
-                # if await self.cm.include_received_message_hash(hashlib.md5(data).hexdigest()):
+                # if await self.cm.include_received_message_hash(message_key(data)):
                 me = MessageEvent(
                     (msg_name, get_action_name_from_value(msg_name, message_data.action)), source, message_data
                 )
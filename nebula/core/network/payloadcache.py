@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+
+@dataclass
+class CachedPayload:
+    """
+    Compressed payload shared by every destination of the same outgoing message.
+
+    Attributes:
+        message (bytes): The original message, kept alive so its identity stays valid while cached.
+        refs (int): Number of pending sends that still need the payload.
+        round (int | None): Federation round in which the message was created.
+        tasks (dict[str, asyncio.Task]): Compression task of each codec, created by the first send that needs
+            the payload compressed with it.
+    """
+
+    message: bytes
+    refs: int
+    round: int | None
+    tasks: dict[str, asyncio.Task] = field(default_factory=dict)
+
+
+@dataclass
+class PayloadCacheStats:
+    """
+    Compression work shared through the payload cache during a round.
+
+    Attributes:
+        compressions (int): Payloads actually compressed.
+        reuses (int): Sends served from an already compressed payload.
+        cpu_time_saved (float): Compression CPU seconds avoided by reusing payloads.
+        bytes_saved (int): Raw bytes that did not have to be compressed again.
+    """
+
+    compressions: int = 0
+    reuses: int = 0
+    cpu_time_saved: float = 0.0
+    bytes_saved: int = 0
+
+
+class PayloadCache:
+    """
+    Shared cache of compressed outgoing payloads, used to compress a message once for all its destinations.
+
+    The sender of a fan-out (e.g., the Propagator) reserves the message for the number of destinations.
+    Each connection then asks the cache for the compressed payload: the first request compresses the message
+    off the event loop and the remaining ones reuse the result. Every destination releases its reference when
+    its send finishes (successfully or not), and the payload is dropped after the last release.
+
+    Messages are keyed by identity, so only the exact object that was reserved is served from the cache.
+    Messages that were not reserved are compressed directly, without being cached. Connections may use
+    different codecs (`message_args.compression`): the message is compressed once per codec.
+
+    Statistics are kept per round while the round has cached payloads, and for the last round whose payloads
+    were all released, so they can still be read once its sends finish.
+    """
+
+    def __init__(self):
+        self._entries: dict[int, CachedPayload] = {}
+        self._stats: dict[int | None, PayloadCacheStats] = {}
+
+    def reserve(self, message: bytes, destinations: int, round: int | None = None):
+        """
+        Reserve a message that is going to be sent compressed to several destinations.
+
+        Args:
+            message (bytes): The serialized message.
+            destinations (int): Number of sends that will request the compressed payload.
+            round (int | None): Round in which the message is sent, used to group statistics.
+        """
+        entry = self._entries.get(id(message))
+        if entry is not None and entry.message is message:
+            entry.refs += destinations
+        else:
+            self._entries[id(message)] = CachedPayload(message, destinations, round)
+
+    async def compress(self, message: bytes, compression: str, compress_fn: Callable) -> bytes | None:
+        """
+        Return the compressed payload of a message, compressing it only once per codec for all its destinations.
+
+        Args:
+            message (bytes): The serialized message.
+            compression (str): Compression method requested by the connection.
+            compress_fn (Callable): Function compressing `(data, compression)` into bytes.
+
+        Returns:
+            bytes | None: The compressed payload, or None if the compression method is unsupported.
+        """
+        entry = self._entries.get(id(message))
+        if entry is None or entry.message is not message:
+            return await asyncio.to_thread(compress_fn, message, compression)
+
+        stats = self._stats.setdefault(entry.round, PayloadCacheStats())
+        task = entry.tasks.get(compression)
+        if task is None:
+            task = entry.tasks[compression] = asyncio.create_task(
+                asyncio.to_thread(self._timed_compress, compress_fn, message, compression)
+            )
+            compressed, _ = await asyncio.shield(task)
+            stats.compressions += 1
+            return compressed
+
+        compressed, cpu_time = await asyncio.shield(task)
+        stats.reuses += 1
+        stats.cpu_time_saved += cpu_time
+        stats.bytes_saved += len(message)
+        return compressed
+
+    def release(self, message: bytes):
+        """
+        Release one reference to a reserved message, dropping the cached payload after the last one.
+
+        Args:
+            message (bytes): The serialized message.
+        """
+        entry = self._entries.get(id(message))
+        if entry is None or entry.message is not message:
+            return
+        entry.refs -= 1
+        if entry.refs <= 0:
+            del self._entries[id(message)]
+            stats = self._stats.get(entry.round, PayloadCacheStats())
+            logging.info(
+                f"📦  Payload cache | Released message of round {entry.round} | "
+                f"compressions: {stats.compressions}, reuses: {stats.reuses}, "
+                f"CPU saved: {stats.cpu_time_saved:.3f}s, bytes saved: {stats.bytes_saved / (1024**2):.2f} MB"
+            )
+            self._evict_stats(keep=entry.round)
+
+    def get_stats(self, round: int | None) -> PayloadCacheStats:
+        """
+        Return the statistics collected for a round.
+
+        Args:
+            round (int | None): The round of interest.
+
+        Returns:
+            PayloadCacheStats: Compression work performed and saved during the round (empty if the round is
+                unknown or its statistics were already evicted).
+        """
+        return self._stats.get(round, PayloadCacheStats())
+
+    def _evict_stats(self, keep: int | None):
+        # Statistics of rounds without cached payloads, except the round that has just been released
+        live = {entry.round for entry in self._entries.values()}
+        for round in [round for round in self._stats if round not in live and round != keep]:
+            del self._stats[round]
+
+    @staticmethod
+    def _timed_compress(compress_fn: Callable, message: bytes, compression: str) -> tuple[bytes | None, float]:
+        start = time.thread_time()
+        compressed = compress_fn(message, compression)
+        return compressed, time.thread_time() - start
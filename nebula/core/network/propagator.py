@@ -297,7 +297,7 @@ class Propagator:
         3. Identifies eligible neighbors.
         4. Updates history and checks for repeated statuses.
         5. Prepares and serializes the model payload.
-        6. Sends the model message to each eligible neighbor.
+        6. Sends the model message to each eligible neighbor, compressing it only once.
         7. Waits for the configured interval before concluding.
 
         Args:
@@ -346,6 +346,8 @@ class Propagator:
         round_number = -1 if strategy_id == "initialization" else current_round
         parameters = serialized_model
         message = self.cm.create_message("model", "", round_number, parameters, weight)
+        # Compress the model once and share the payload among all eligible neighbors
+        self.cm.payload_cache.reserve(message, len(eligible_neighbors), round=current_round)
         for neighbor_addr in eligible_neighbors:
             logging.info(
                 f"Sending model to {neighbor_addr} with round {await self.get_round()}: weight={weight} | size={sys.getsizeof(serialized_model) / (1024** 2) if serialized_model is not None else 0} MB"
@@ -354,8 +356,29 @@ class Propagator:
             # asyncio.create_task(self.cm.send_model(neighbor_addr, round_number, serialized_model, weight))
 
         await asyncio.sleep(self.interval)
+        self._log_payload_cache_stats(current_round)
         return True
 
+    def _log_payload_cache_stats(self, current_round):
+        """
+        Log the compression work saved by the payload cache during the current round.
+
+        Args:
+            current_round (int): The current round index.
+        """
+        if self.trainer.logger is None:
+            return
+        stats = self.cm.payload_cache.get_stats(current_round)
+        self.trainer.logger.log_data(
+            {
+                "Propagation/Compressions": stats.compressions,
+                "Propagation/Compression reuses": stats.reuses,
+                "Propagation/Compression CPU saved (s)": stats.cpu_time_saved,
+                "Propagation/Compression MB saved": stats.bytes_saved / (1024**2),
+            },
+            step=current_round,
+        )
+
     async def get_model_information(self, dest_addr, strategy_id: str, init=False):
         """
         Retrieve the serialized model payload and round metadata for making an offer to a node.
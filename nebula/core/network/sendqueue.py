@@ -0,0 +1,307 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+
+
+class SendLane(IntEnum):
+    """
+    Priority lanes of the outbound queue of a connection. Lower values are sent first.
+    """
+
+    CONTROL = 0
+    FEDERATION = 1
+    MODEL = 2
+
+
+# Field numbers of the `message` oneof of the protobuf Wrapper (see nebula.proto)
+_WRAPPER_LANES = {
+    2: SendLane.CONTROL,  # discovery_message
+    3: SendLane.CONTROL,  # control_message
+    4: SendLane.FEDERATION,  # federation_message
+    5: SendLane.MODEL,  # model_message
+    6: SendLane.CONTROL,  # connection_message
+    7: SendLane.CONTROL,  # response_message
+    8: SendLane.FEDERATION,  # reputation_message
+    9: SendLane.CONTROL,  # discover_message
+    10: SendLane.MODEL,  # offer_message
+    11: SendLane.CONTROL,  # link_message
+}
+_WRAPPER_SOURCE_FIELD = 1
+_WRAPPER_MODEL_FIELD = 5
+_MODEL_ROUND_FIELD = 3
+
+
+def _read_varint(data: memoryview, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _skip_field(data: memoryview, pos: int, wire_type: int) -> int:
+    if wire_type == 0:
+        return _read_varint(data, pos)[1]
+    if wire_type == 1:
+        return pos + 8
+    if wire_type == 2:
+        length, pos = _read_varint(data, pos)
+        return pos + length
+    if wire_type == 5:
+        return pos + 4
+    raise ValueError(f"Unsupported wire type {wire_type}")
+
+
+def _model_round(data: memoryview, start: int, end: int) -> int:
+    pos, round = start, 0
+    while pos < end:
+        tag, pos = _read_varint(data, pos)
+        if tag >> 3 == _MODEL_ROUND_FIELD and tag & 0x07 == 0:
+            value, pos = _read_varint(data, pos)
+            # int32 fields are encoded as 64-bit two's complement when negative
+            round = value - (1 << 64) if value >= 1 << 63 else value
+        else:
+            pos = _skip_field(data, pos, tag & 0x07)
+    return round
+
+
+def classify_message(data: bytes) -> tuple[SendLane, tuple | None, int | None]:
+    """
+    Find the lane of a serialized Wrapper message without parsing it.
+
+    Only the tags of the Wrapper (and, for model messages, of the ModelMessage) are walked, skipping the
+    content of the fields, so the cost does not depend on the size of the model parameters.
+
+    Args:
+        data (bytes): The serialized Wrapper message.
+
+    Returns:
+        tuple:
+            - SendLane: The lane of the message (CONTROL if the message cannot be classified).
+            - tuple | None: Key shared by the messages that supersede each other (model messages of the same
+              source), or None if the message is never coalesced.
+            - int | None: Round of model messages, None otherwise.
+    """
+    view = memoryview(data)
+    source, pos = b"", 0
+    try:
+        while pos < len(view):
+            tag, pos = _read_varint(view, pos)
+            field_number, wire_type = tag >> 3, tag & 0x07
+            if field_number == _WRAPPER_SOURCE_FIELD and wire_type == 2:
+                length, pos = _read_varint(view, pos)
+                source = bytes(view[pos : pos + length])
+                pos += length
+                continue
+            lane = _WRAPPER_LANES.get(field_number)
+            if lane is None or wire_type != 2:
+                pos = _skip_field(view, pos, wire_type)
+                continue
+            if field_number != _WRAPPER_MODEL_FIELD:
+                return lane, None, None
+            length, pos = _read_varint(view, pos)
+            round = _model_round(view, pos, pos + length)
+            # Initialization models (round -1) are never superseded
+            key = (source, field_number) if round >= 0 else None
+            return lane, key, round
+    except (IndexError, ValueError):
+        pass
+    return SendLane.CONTROL, None, None
+
+
+@dataclass
+class OutboundMessage:
+    """
+    Message waiting in the outbound queue of a connection.
+
+    Attributes:
+        data (bytes): The bytes to send (data type prefix, payload and compression marker).
+        lane (SendLane): Priority lane of the message.
+        key (tuple | None): Coalescing key (see `classify_message`).
+        round (int | None): Round of the message, used to decide which message supersedes the other.
+        enqueued (float): `time.monotonic()` value when the message was queued.
+        sent (asyncio.Future): Resolved with True once the message is written, or with False if it was
+            superseded or the queue was closed.
+    """
+
+    data: bytes
+    lane: SendLane
+    key: tuple | None = None
+    round: int | None = None
+    enqueued: float = field(default_factory=time.monotonic)
+    sent: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+@dataclass
+class SendLaneStats:
+    """
+    Activity of a lane of an outbound queue.
+
+    Attributes:
+        depth (int): Messages currently waiting.
+        max_depth (int): Largest number of messages that were waiting at the same time.
+        sent (int): Messages taken from the lane to be written.
+        coalesced (int): Messages dropped because a newer message superseded them.
+        blocked (int): Enqueues that had to wait for room in the lane.
+        total_wait (float): Seconds the sent messages spent waiting in the lane.
+        max_wait (float): Longest time a sent message spent waiting in the lane, in seconds.
+    """
+
+    depth: int = 0
+    max_depth: int = 0
+    sent: int = 0
+    coalesced: int = 0
+    blocked: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        """Mean time a sent message spent waiting in the lane, in seconds."""
+        return self.total_wait / self.sent if self.sent else 0.0
+
+
+class SendQueue:
+    """
+    Bounded outbound queue of a connection, with one FIFO lane per priority.
+
+    Messages are taken from the highest priority lane that is not empty, so control messages (alive, discover,
+    link...) are not delayed by the models queued before them. When a lane is full, `put` waits until the writer
+    makes room, which pushes back on the producers instead of piling up messages. A model message for a round
+    supersedes an unsent model of the same source and an older (or the same) round, which is dropped in place.
+    """
+
+    def __init__(self, maxsize: int | dict[SendLane, int] = 100):
+        """
+        Args:
+            maxsize (int | dict[SendLane, int]): Capacity of every lane, or of each lane.
+        """
+        if isinstance(maxsize, int):
+            maxsize = dict.fromkeys(SendLane, maxsize)
+        self.maxsize = {lane: max(1, maxsize.get(lane, 100)) for lane in SendLane}
+        self._lanes: dict[SendLane, deque[OutboundMessage]] = {lane: deque() for lane in SendLane}
+        self._latest: dict[tuple, OutboundMessage] = {}
+        self._stats = {lane: SendLaneStats() for lane in SendLane}
+        self._changed = asyncio.Condition()
+        self._closed = False
+
+    async def put(self, message: OutboundMessage) -> bool:
+        """
+        Queue a message, waiting for room in its lane if it is full.
+
+        Args:
+            message (OutboundMessage): The message to queue.
+
+        Returns:
+            bool: True if the message was queued, False if it was superseded or the queue is closed.
+        """
+        async with self._changed:
+            if self._coalesce(message):
+                return not message.sent.done()
+            lane = self._lanes[message.lane]
+            if len(lane) >= self.maxsize[message.lane]:
+                self._stats[message.lane].blocked += 1
+                await self._changed.wait_for(lambda: self._closed or len(lane) < self.maxsize[message.lane])
+                # A newer message may have been queued while waiting
+                if self._coalesce(message):
+                    return not message.sent.done()
+            if self._closed:
+                message.sent.set_result(False)
+                return False
+            lane.append(message)
+            if message.key is not None:
+                self._latest[message.key] = message
+            stats = self._stats[message.lane]
+            stats.max_depth = max(stats.max_depth, len(lane))
+            self._changed.notify_all()
+            return True
+
+    def _coalesce(self, message: OutboundMessage) -> bool:
+        queued = self._latest.get(message.key) if message.key is not None else None
+        if queued is None:
+            return False
+        stats = self._stats[message.lane]
+        stats.coalesced += 1
+        if message.round < queued.round:
+            # The queued message is already newer, so the one being queued is the superseded one
+            message.sent.set_result(False)
+            return True
+        lane = self._lanes[queued.lane]
+        lane[lane.index(queued)] = message
+        self._latest[message.key] = message
+        message.enqueued = queued.enqueued
+        queued.sent.set_result(False)
+        return True
+
+    async def get(self, above: SendLane | None = None) -> OutboundMessage | None:
+        """
+        Take the next message from the highest priority lane that is not empty.
+
+        Args:
+            above (SendLane | None): Only take messages from lanes with a higher priority than this one, without
+                waiting (used to interleave urgent messages within a large one). None to wait for any message.
+
+        Returns:
+            OutboundMessage | None: The message, or None if there is none (or the queue is closed).
+        """
+        async with self._changed:
+            if above is None:
+                await self._changed.wait_for(lambda: self._closed or any(self._lanes.values()))
+            for lane in SendLane:
+                if above is not None and lane >= above:
+                    break
+                if self._lanes[lane]:
+                    message = self._lanes[lane].popleft()
+                    if message.key is not None and self._latest.get(message.key) is message:
+                        del self._latest[message.key]
+                    wait = time.monotonic() - message.enqueued
+                    stats = self._stats[lane]
+                    stats.sent += 1
+                    stats.total_wait += wait
+                    stats.max_wait = max(stats.max_wait, wait)
+                    self._changed.notify_all()
+                    return message
+            return None
+
+    def has_pending(self, above: SendLane) -> bool:
+        """
+        Check, without waiting, if a lane with a higher priority than `above` has messages.
+        """
+        return any(self._lanes[lane] for lane in SendLane if lane < above)
+
+    async def close(self):
+        """
+        Close the queue, resolving the pending messages as not sent and waking up every waiting producer.
+        """
+        async with self._changed:
+            self._closed = True
+            for lane in self._lanes.values():
+                while lane:
+                    message = lane.popleft()
+                    if not message.sent.done():
+                        message.sent.set_result(False)
+            self._latest.clear()
+            self._changed.notify_all()
+
+    def get_stats(self, reset: bool = False) -> dict[SendLane, SendLaneStats]:
+        """
+        Return the statistics of every lane.
+
+        Args:
+            reset (bool): Start a new measurement period after taking the snapshot (the current depth is kept).
+
+        Returns:
+            dict[SendLane, SendLaneStats]: A snapshot of the statistics of each lane.
+        """
+        snapshot = {}
+        for lane, stats in self._stats.items():
+            stats.depth = len(self._lanes[lane])
+            snapshot[lane] = SendLaneStats(**vars(stats))
+            if reset:
+                self._stats[lane] = SendLaneStats(depth=stats.depth, max_depth=stats.depth)
+        return snapshot
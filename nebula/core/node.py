@@ -163,6 +163,9 @@ async def main(config: Config):
         num_workers=num_workers,
         batch_size=batch_size,
         samples_per_label=samples_per_label,
+        tensor_cache=config.participant["data_args"].get("tensor_cache", False),
+        persistent=config.participant["training_args"].get("persistent_session", False),
+        test_samples=config.participant["training_args"].get("evaluation_samples"),
     )
 
     trainer = None
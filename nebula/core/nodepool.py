@@ -0,0 +1,237 @@
+"""
+Pre-fork launcher hosting the participants of a scenario on one machine (simulation deployment).
+
+Starting every participant with `python nebula/core/node.py` makes each process import torch, lightning and the
+NEBULA modules on its own, which takes seconds per node and keeps a private copy of every imported module. The
+pool imports them once and forks one process per participant, so the nodes start in a fraction of a second and
+share the imported code and data copy-on-write.
+
+Each node still runs in its own process, with its own event loop, singletons (communications, events...) and TCP
+connections, so the protocol behaves exactly as in the process deployment. Nodes that start the federation are
+forked once the rest of the nodes are listening, instead of after fixed sleeps.
+
+Usage:
+    python nebula/core/nodepool.py <participant_0.json> [<participant_1.json> ...]
+"""
+
+import json
+import logging
+import os
+import random
+import signal
+import sys
+import time
+from dataclasses import dataclass
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import numpy as np
+import psutil
+import torch
+
+from nebula.config.config import Config
+from nebula.core.node import main as node_main
+
+READY_TIMEOUT = 120
+POLL_INTERVAL = 0.1
+
+
+@dataclass
+class PooledNode:
+    """
+    Participant hosted by the pool.
+
+    Attributes:
+        idx (int): Index of the participant.
+        config_path (str): Path of its configuration file.
+        port (int): Port where the node accepts connections.
+        start (bool): Whether the node starts the federation.
+        pid (int | None): PID of the node process, once forked.
+        forked (float | None): `time.monotonic()` value when the node was forked.
+        ready (float | None): `time.monotonic()` value when the node started listening.
+    """
+
+    idx: int
+    config_path: str
+    port: int
+    start: bool
+    pid: int | None = None
+    forked: float | None = None
+    ready: float | None = None
+
+    @property
+    def startup_time(self) -> float | None:
+        """Seconds from the fork until the node listened for connections."""
+        if self.forked is None or self.ready is None:
+            return None
+        return self.ready - self.forked
+
+
+class NodePool:
+    """
+    Forks the participants of a scenario from a process where the node dependencies are already imported.
+    """
+
+    def __init__(self, config_paths: list[str], ready_timeout: float = READY_TIMEOUT):
+        """
+        Args:
+            config_paths (list[str]): Configuration file of each participant.
+            ready_timeout (float): Seconds to wait for the nodes to listen before starting the federation anyway.
+        """
+        self.ready_timeout = ready_timeout
+        self.nodes: list[PooledNode] = []
+        for config_path in config_paths:
+            with open(config_path) as f:
+                participant = json.load(f)
+            self.nodes.append(
+                PooledNode(
+                    idx=participant["device_args"]["idx"],
+                    config_path=config_path,
+                    port=int(participant["network_args"]["port"]),
+                    start=participant["device_args"]["start"],
+                )
+            )
+        self.report_path = os.path.join(os.path.dirname(os.path.abspath(config_paths[0])), "nodepool_report.json")
+
+    def run(self) -> int:
+        """
+        Start every node, report their startup time and memory, and wait for them to finish.
+
+        Returns:
+            int: 0 if every node exited cleanly, 1 otherwise.
+        """
+        signal.signal(signal.SIGTERM, self._terminate)
+        # Same order as the process deployment: the nodes starting the federation go last
+        waiting = [node for node in self.nodes if not node.start]
+        starting = [node for node in self.nodes if node.start]
+        start = time.monotonic()
+        for node in sorted(waiting, key=lambda node: node.idx, reverse=True):
+            self._fork(node)
+        self._wait_ready(waiting)
+        for node in starting:
+            self._fork(node)
+        self._wait_ready(starting)
+        logging.info(f"All {len(self.nodes)} nodes started in {time.monotonic() - start:.2f} s")
+        self.report()
+        return self._wait()
+
+    def _fork(self, node: PooledNode):
+        node.forked = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            _run_node(node.config_path)
+        node.pid = pid
+        logging.info(f"Forked node {node.idx} (pid {pid})")
+
+    def _wait_ready(self, nodes: list[PooledNode]):
+        deadline = time.monotonic() + self.ready_timeout
+        pending = list(nodes)
+        while pending and time.monotonic() < deadline:
+            for node in list(pending):
+                if self._is_listening(node):
+                    node.ready = time.monotonic()
+                    pending.remove(node)
+            if pending:
+                time.sleep(POLL_INTERVAL)
+        for node in pending:
+            logging.warning(f"Node {node.idx} is not listening on port {node.port} after {self.ready_timeout} s")
+
+    @staticmethod
+    def _is_listening(node: PooledNode) -> bool:
+        try:
+            connections = psutil.Process(node.pid).net_connections(kind="tcp")
+        except psutil.Error:
+            return False
+        return any(conn.status == psutil.CONN_LISTEN and conn.laddr.port == node.port for conn in connections)
+
+    def report(self) -> list[dict]:
+        """
+        Log and store (in `nodepool_report.json`, next to the configuration files) the startup time and memory
+        of each node. USS is the memory only used by the node; the rest of its RSS is shared with the pool and
+        the other nodes.
+
+        Returns:
+            list[dict]: The report of each node.
+        """
+        rows = []
+        for node in sorted(self.nodes, key=lambda node: node.idx):
+            row = {"idx": node.idx, "pid": node.pid, "startup_time": node.startup_time, "rss_mb": None, "uss_mb": None}
+            try:
+                memory = psutil.Process(node.pid).memory_full_info()
+                row["rss_mb"] = memory.rss / 1024**2
+                row["uss_mb"] = memory.uss / 1024**2
+            except psutil.Error:
+                pass
+            rows.append(row)
+            logging.info(
+                f"Node {node.idx} | startup: {node.startup_time if node.startup_time is not None else float('nan'):.2f} s | "
+                f"RSS: {row['rss_mb'] or 0:.0f} MB | USS: {row['uss_mb'] or 0:.0f} MB"
+            )
+        try:
+            with open(self.report_path, "w") as f:
+                json.dump(rows, f, indent=2)
+        except OSError as e:
+            logging.warning(f"Could not write the node pool report: {e}")
+        return rows
+
+    def _wait(self) -> int:
+        status = 0
+        remaining = {node.pid: node for node in self.nodes if node.pid is not None}
+        while remaining:
+            try:
+                pid, exit_status = os.wait()
+            except ChildProcessError:
+                break
+            node = remaining.pop(pid, None)
+            if node is None:
+                continue
+            code = os.waitstatus_to_exitcode(exit_status)
+            logging.info(f"Node {node.idx} exited with code {code}")
+            if code != 0:
+                status = 1
+        return status
+
+    def _terminate(self, signum, frame):
+        logging.info("Stopping the node pool...")
+        for node in self.nodes:
+            if node.pid is not None:
+                try:
+                    os.kill(node.pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+        sys.exit(1)
+
+
+def _run_node(config_path: str):
+    """
+    Body of a forked node process. Never returns.
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # The node configures its own logging, which is skipped if the handlers of the pool are inherited
+    for handler in logging.root.handlers[:]:
+        logging.root.removeHandler(handler)
+    # Forked processes inherit the random state of the pool: start from fresh entropy, as a new process would
+    # (the dataset partition applies the scenario seed afterwards)
+    random.seed()
+    np.random.seed()
+    torch.seed()
+
+    code = 0
+    config = Config(entity="participant", participant_config_file=config_path)
+    try:
+        import asyncio
+
+        asyncio.run(node_main(config), debug=False)
+    except Exception as e:
+        logging.exception(f"Error starting node {config.participant['device_args']['idx']}: {e}")
+        code = 1
+    finally:
+        logging.shutdown()
+        os._exit(code)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - nodepool - %(message)s")
+    if sys.platform == "win32":
+        sys.exit("The node pool needs os.fork, use the process deployment on Windows")
+    sys.exit(NodePool(sys.argv[1:]).run())
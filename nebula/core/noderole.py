@@ -237,7 +237,7 @@ class TrainerAggregatorRoleBehavior(RoleBehavior):
         return self._role.value
     
     async def extended_learning_cycle(self):
-        await self._engine.trainer.test()
+        await self._engine.evaluation_policy.evaluate(self._engine.round)
         await self._engine.trainning_in_progress_lock.acquire_async()
         await self._engine.trainer.train()
         await self._engine.trainning_in_progress_lock.release_async()
@@ -279,7 +279,7 @@ class AggregatorRoleBehavior(RoleBehavior):
         return self._role.value
     
     async def extended_learning_cycle(self):
-        await self._engine.trainer.test()
+        await self._engine.evaluation_policy.evaluate(self._engine.round)
             
         await self._engine._waiting_model_updates()
         
@@ -324,7 +324,7 @@ class ServerRoleBehavior(RoleBehavior):
         return self._role.value
         
     async def extended_learning_cycle(self):
-        await self._engine.trainer.test()
+        await self._engine.evaluation_policy.evaluate(self._engine.round)
 
         await self._engine._waiting_model_updates()
         
@@ -359,7 +359,7 @@ class TrainerRoleBehavior(RoleBehavior):
     async def extended_learning_cycle(self):
         logging.info("Waiting global update | Assign _waiting_global_update = True")
 
-        await self._engine.trainer.test()
+        await self._engine.evaluation_policy.evaluate(self._engine.round)
         await self._engine.trainer.train()
 
         mpe = ModelPropagationEvent(await self._engine.cm.get_addrs_current_connections(only_direct=True, myself=False), "stable")
@@ -135,6 +135,7 @@ class SAReasoner(ISAReasoner):
             sa_discovery (ISADiscovery): The discovery component to coordinate with.
         """
         self._sa_discovery = sa_discovery
+        await self._sys_monitor.start("sareasoner")
         await self._loading_sa_components()
         await EventManager.get_instance().subscribe_node_event(RoundEndEvent, self._process_round_end_event)
         await EventManager.get_instance().subscribe_node_event(AggregationEvent, self._process_aggregation_event)
@@ -398,4 +399,5 @@ class SAReasoner(ISAReasoner):
                 except Exception as e:
                     logging.warning(f"Error stopping SA component {component_name}: {e}")
 
+        await self._sys_monitor.stop("sareasoner")
         logging.info("✅  SAReasoner stopped successfully")
@@ -1,24 +1,81 @@
 import asyncio
+import logging
 import platform
+import time
+from collections import deque
+from dataclasses import dataclass, field
 
 import psutil
-from pynvml import (
-    nvmlDeviceGetCount,
-    nvmlDeviceGetHandleByIndex,
-    nvmlDeviceGetMemoryInfo,
-    nvmlDeviceGetUtilizationRates,
-    nvmlInit,
-    nvmlShutdown,
-)
+
+try:
+    import pynvml
+except ImportError:
+    pynvml = None
 
 from nebula.core.utils.locker import Locker
 
 
+@dataclass
+class SystemSample:
+    """
+    Resource usage of the host and of the node process at a point in time.
+
+    CPU percentages are measured since the previous sample. Network counters are cumulative since the host
+    started, so the traffic of a period is the difference between two samples.
+
+    Attributes:
+        timestamp (float): `time.monotonic()` value when the sample was taken.
+        cpu_percent (float): CPU usage of the host (%).
+        cpu_per_core (list[float]): CPU usage of each core (%).
+        process_cpu_percent (float): CPU usage of the node process (%, may exceed 100 with several cores).
+        memory_percent (float): RAM used in the host (%).
+        memory_used (float): RAM used in the host (MB).
+        process_memory (float): Resident memory of the node process (MB).
+        process_memory_percent (float): Resident memory of the node process (% of the host RAM).
+        swap_percent (float): Swap used in the host (%).
+        bytes_sent (int): Bytes sent by the host.
+        bytes_recv (int): Bytes received by the host.
+        packets_sent (int): Packets sent by the host.
+        packets_recv (int): Packets received by the host.
+        gpu (list[dict] | None): Usage of each GPU, or None if no GPU is available.
+    """
+
+    timestamp: float
+    cpu_percent: float
+    cpu_per_core: list[float]
+    process_cpu_percent: float
+    memory_percent: float
+    memory_used: float
+    process_memory: float
+    process_memory_percent: float
+    swap_percent: float
+    bytes_sent: int
+    bytes_recv: int
+    packets_sent: int
+    packets_recv: int
+    gpu: list[dict] | None = field(default=None)
+
+
 class SystemMonitor:
+    """
+    Samples the resource usage of the host (CPU, memory, network and GPU) in the background.
+
+    Every `interval` seconds a `SystemSample` is taken off the event loop and stored in a ring buffer holding the
+    last `history` samples. Readers (the SA reasoner, the neighbour policies, the reporter) get the latest sample
+    or the samples of a recent window instantly, instead of measuring on demand. CPU usage is measured between
+    consecutive samples, so no reader has to wait for a measurement interval.
+
+    The monitor is shared by the whole process: each owner (e.g., the reporter and the SA reasoner) starts and stops
+    its own subscription, and sampling runs while at least one owner is subscribed.
+    """
+
     _instance = None
-    _lock = Locker("communications_manager_lock", async_lock=False)
+    _lock = Locker("system_monitor_lock", async_lock=False)
 
-    def __new__(cls):
+    SAMPLE_INTERVAL = 1.0
+    HISTORY = 300
+
+    def __new__(cls, *args, **kwargs):
         with cls._lock:
             if cls._instance is None:
                 cls._instance = super().__new__(cls)
@@ -31,75 +88,208 @@ class SystemMonitor:
             raise ValueError("SystemMonitor has not been initialized yet.")
         return cls._instance
 
-    def __init__(self):
-        """Initialize the system monitor and check for GPU availability."""
-        if not hasattr(self, "_initialized"):  # To avoid reinitialization on subsequent calls
-            # Try to initialize NVIDIA library if available
+    def __init__(self, interval: float | None = None, history: int | None = None):
+        """
+        Initialize the system monitor and check for GPU availability.
+
+        The instance is shared, so later calls only change the interval and the history if the monitor is not
+        sampling. Otherwise, the running configuration is kept and a warning is logged if it differs.
+
+        Args:
+            interval (float | None): Seconds between samples (`SAMPLE_INTERVAL` by default).
+            history (int | None): Maximum number of samples kept (`HISTORY` by default).
+        """
+        if hasattr(self, "_initialized"):  # To avoid reinitialization on subsequent calls
+            self._configure(interval, history)
+            return
+        self.interval = interval if interval is not None else self.SAMPLE_INTERVAL
+        self._samples: deque[SystemSample] = deque(maxlen=history if history is not None else self.HISTORY)
+        self._process = psutil.Process()
+        self._task = None
+        self._owners: set[str] = set()
+        self._max_bandwidth = self._get_max_bandwidth_linux() if platform.system() == "Linux" else None
+        # Try to initialize NVIDIA library if available
+        try:
+            pynvml.nvmlInit()
+            self.gpu_available = True  # Flag to check if GPU is available
+        except Exception:
+            self.gpu_available = False  # If not, set GPU availability to False
+        # The first CPU measurements only set the reference point of the next ones
+        psutil.cpu_percent(percpu=True)
+        self._process.cpu_percent()
+        self._initialized = True
+
+    def _configure(self, interval: float | None, history: int | None):
+        changed_interval = interval is not None and interval != self.interval
+        changed_history = history is not None and history != self._samples.maxlen
+        if not changed_interval and not changed_history:
+            return
+        if self._task is not None:
+            logging.warning(
+                f"SystemMonitor is already sampling every {self.interval}s with a history of {self._samples.maxlen} "
+                f"samples, ignoring interval={interval} and history={history}"
+            )
+            return
+        if changed_interval:
+            self.interval = interval
+        if changed_history:
+            self._samples = deque(self._samples, maxlen=history)
+
+    async def start(self, owner: str):
+        """
+        Subscribe `owner` to the monitor, starting to sample in the background if it was not sampling.
+
+        Args:
+            owner (str): Name of the component using the monitor. Starting again with the same owner is a no-op.
+        """
+        self._owners.add(owner)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="system_monitor")
+
+    async def _run(self):
+        try:
+            while True:
+                try:
+                    await self._take_sample()
+                except Exception as e:
+                    logging.exception(f"Error sampling system resources: {e}")
+                await asyncio.sleep(self.interval)
+        except asyncio.CancelledError:
+            logging.info("System monitor stopped")
+
+    async def _take_sample(self) -> SystemSample:
+        sample = await asyncio.to_thread(self._sample)
+        self._samples.append(sample)
+        return sample
+
+    def _sample(self) -> SystemSample:
+        cpu_per_core = psutil.cpu_percent(percpu=True)
+        with self._process.oneshot():
+            process_cpu_percent = self._process.cpu_percent()
+            process_memory = self._process.memory_info().rss
+            process_memory_percent = self._process.memory_percent()
+        memory_info = psutil.virtual_memory()
+        net_io = psutil.net_io_counters()
+        return SystemSample(
+            timestamp=time.monotonic(),
+            cpu_percent=sum(cpu_per_core) / len(cpu_per_core) if cpu_per_core else 0.0,
+            cpu_per_core=cpu_per_core,
+            process_cpu_percent=process_cpu_percent,
+            memory_percent=memory_info.percent,
+            memory_used=memory_info.used / 1024**2,
+            process_memory=process_memory / 1024**2,
+            process_memory_percent=process_memory_percent,
+            swap_percent=psutil.swap_memory().percent,
+            bytes_sent=net_io.bytes_sent,
+            bytes_recv=net_io.bytes_recv,
+            packets_sent=net_io.packets_sent,
+            packets_recv=net_io.packets_recv,
+            gpu=self._sample_gpu() if self.gpu_available else None,
+        )
+
+    def _sample_gpu(self) -> list[dict]:
+        gpu_usage = []
+        for i in range(pynvml.nvmlDeviceGetCount()):
+            handle = pynvml.nvmlDeviceGetHandleByIndex(i)
+            memory_info = pynvml.nvmlDeviceGetMemoryInfo(handle)
+            utilization = pynvml.nvmlDeviceGetUtilizationRates(handle)
+            usage = {
+                "gpu": i,
+                "memory_used": memory_info.used / 1024**2,  # MB
+                "memory_total": memory_info.total / 1024**2,  # MB
+                "gpu_usage": utilization.gpu,
+            }
+            # Not every device reports these counters (e.g., passively cooled GPUs have no fan)
+            for name, read, *args in (
+                ("temperature", pynvml.nvmlDeviceGetTemperature, pynvml.NVML_TEMPERATURE_GPU),
+                ("power", pynvml.nvmlDeviceGetPowerUsage),  # mW
+                ("clocks", pynvml.nvmlDeviceGetClockInfo, pynvml.NVML_CLOCK_SM),
+                ("memory_clocks", pynvml.nvmlDeviceGetClockInfo, pynvml.NVML_CLOCK_MEM),
+                ("fan_speed", pynvml.nvmlDeviceGetFanSpeed),
+            ):
+                try:
+                    usage[name] = read(handle, *args)
+                except pynvml.NVMLError:
+                    usage[name] = None
+            if usage["power"] is not None:
+                usage["power"] /= 1000.0  # W
+            gpu_usage.append(usage)
+        return gpu_usage
+
+    async def stop(self, owner: str):
+        """
+        Unsubscribe `owner` from the monitor, stopping sampling after the last owner. The samples already taken are
+        kept.
+
+        Args:
+            owner (str): Name used to start the monitor.
+        """
+        self._owners.discard(owner)
+        if not self._owners:
+            await self._cancel()
+
+    async def _cancel(self):
+        if self._task is not None:
+            self._task.cancel()
             try:
-                nvmlInit()
-                self.gpu_available = True  # Flag to check if GPU is available
-            except Exception:
-                self.gpu_available = False  # If not, set GPU availability to False
-            self._initialized = True
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def get_latest(self) -> SystemSample:
+        """
+        Return the latest sample, taking one (off the event loop) if the monitor has not sampled yet.
+        """
+        if not self._samples:
+            return await self._take_sample()
+        return self._samples[-1]
+
+    def get_window(self, seconds: float) -> list[SystemSample]:
+        """
+        Return the samples taken during the last `seconds` seconds, oldest first.
+        """
+        since = time.monotonic() - seconds
+        return [sample for sample in self._samples if sample.timestamp >= since]
 
     async def get_cpu_usage(self):
         """Returns the CPU usage percentage."""
-        return psutil.cpu_percent(interval=1)
+        return (await self.get_latest()).cpu_percent
 
     async def get_cpu_per_core_usage(self):
         """Returns the CPU usage percentage per core."""
-        return psutil.cpu_percent(interval=1, percpu=True)
+        return (await self.get_latest()).cpu_per_core
 
     async def get_memory_usage(self):
         """Returns the percentage of used RAM memory."""
-        memory_info = psutil.virtual_memory()
-        return memory_info.percent
+        return (await self.get_latest()).memory_percent
 
     async def get_swap_memory_usage(self):
         """Returns the percentage of used swap memory."""
-        swap_info = psutil.swap_memory()
-        return swap_info.percent
+        return (await self.get_latest()).swap_percent
 
     async def get_network_usage(self, interval=5):
-        """Measures network usage over a time interval and returns bandwidth percentage usage."""
-        os_name = platform.system()
-
-        # Get max bandwidth (only implemented for Linux)
-        if os_name == "Linux":
-            max_bandwidth = self._get_max_bandwidth_linux()
-        else:
-            max_bandwidth = None
+        """
+        Returns the network usage over the last `interval` seconds, measured between the oldest and the latest
+        samples of that window (the returned interval is the time actually covered by the samples).
+        """
+        latest = await self.get_latest()
+        window = self.get_window(interval)
+        first = window[0] if window else latest
+        elapsed = latest.timestamp - first.timestamp
 
-        # Take first measurement
-        net_io_start = psutil.net_io_counters()
-        bytes_sent_start = net_io_start.bytes_sent
-        bytes_recv_start = net_io_start.bytes_recv
-
-        # Wait for the interval
-        await asyncio.sleep(interval)
-
-        # Take second measurement
-        net_io_end = psutil.net_io_counters()
-        bytes_sent_end = net_io_end.bytes_sent
-        bytes_recv_end = net_io_end.bytes_recv
-
-        # Calculate bytes transferred during interval
-        bytes_sent = bytes_sent_end - bytes_sent_start
-        bytes_recv = bytes_recv_end - bytes_recv_start
-        total_bytes = bytes_sent + bytes_recv
-
-        # Calculate bandwidth usage percentage
-        bandwidth_used_percent = self._calculate_bandwidth_usage(total_bytes, max_bandwidth, interval)
+        bytes_sent = latest.bytes_sent - first.bytes_sent
+        bytes_recv = latest.bytes_recv - first.bytes_recv
+        bandwidth_used_percent = self._calculate_bandwidth_usage(bytes_sent + bytes_recv, self._max_bandwidth, elapsed)
 
         return {
-            "interval": interval,
+            "interval": elapsed,
             "bytes_sent": bytes_sent,
             "bytes_recv": bytes_recv,
             "bandwidth_used_percent": bandwidth_used_percent,
-            "bandwidth_max": max_bandwidth,
+            "bandwidth_max": self._max_bandwidth,
         }
 
-    # TODO catched speed to avoid reading file
     def _get_max_bandwidth_linux(self, interface="eth0"):
         """Reads max bandwidth from /sys/class/net/{iface}/speed (Linux only)."""
         try:
@@ -107,7 +297,7 @@ class SystemMonitor:
                 speed = int(f.read().strip())  # In Mbps
                 return speed
         except Exception as e:
-            print(f"Could not read max bandwidth: {e}")
+            logging.debug(f"Could not read max bandwidth: {e}")
             return None
 
     def _calculate_bandwidth_usage(self, bytes_transferred, max_bandwidth_mbps, interval):
@@ -124,28 +314,12 @@ class SystemMonitor:
             usage_percentage = (current_usage_mbps / max_bandwidth_mbps) * 100
             return usage_percentage
         except Exception as e:
-            print(f"Error calculating bandwidth usage: {e}")
+            logging.debug(f"Error calculating bandwidth usage: {e}")
             return None
 
     async def get_gpu_usage(self):
         """Returns GPU usage stats if available, otherwise returns None."""
-        if not self.gpu_available:
-            return None  # No GPU available, return None
-
-        # If GPU is available, get the usage using pynvml
-        device_count = nvmlDeviceGetCount()
-        gpu_usage = []
-        for i in range(device_count):
-            handle = nvmlDeviceGetHandleByIndex(i)
-            memory_info = nvmlDeviceGetMemoryInfo(handle)
-            utilization = nvmlDeviceGetUtilizationRates(handle)
-            gpu_usage.append({
-                "gpu": i,
-                "memory_used": memory_info.used / 1024**2,  # MB
-                "memory_total": memory_info.total / 1024**2,  # MB
-                "gpu_usage": utilization.gpu,
-            })
-        return gpu_usage
+        return (await self.get_latest()).gpu
 
     async def get_system_resources(self):
         """Returns a dictionary with all system resource usage statistics."""
@@ -160,6 +334,8 @@ class SystemMonitor:
         return resources
 
     async def close(self):
-        """Closes the initialization of the NVIDIA library (if used)."""
+        """Stops sampling for every owner and closes the initialization of the NVIDIA library (if used)."""
+        self._owners.clear()
+        await self._cancel()
         if self.gpu_available:
-            nvmlShutdown()
+            pynvml.nvmlShutdown()
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class EvaluationStats:
+    """
+    Evaluations of the model done during a round.
+
+    Attributes:
+        evaluations (int): Test passes run.
+        skipped (int): Test passes skipped because the round was not due.
+        duration (float): Seconds spent running test passes.
+        blocking (float): Seconds the round waited for test passes (less than `duration` when they overlap with
+            the wait for the neighbour updates).
+        saved (float): Estimated seconds saved by the policy, compared to a blocking test pass over the full test
+            sets (as long as the last pass over them).
+    """
+
+    evaluations: int = 0
+    skipped: int = 0
+    duration: float = 0.0
+    blocking: float = 0.0
+    saved: float = 0.0
+
+
+class EvaluationPolicy:
+    """
+    Decides how the model is evaluated at the start of each round.
+
+    By default, every round runs a test pass over the local and the global test sets before training, which blocks
+    the round for as long as the pass lasts. The policy can make that pass cheaper:
+      - interval: only evaluate every `interval` rounds.
+      - samples: evaluate on a fixed stratified sample of each test set (see `DataModule.test_samples`).
+      - overlap: copy the model when the round starts and evaluate the copy while the node waits for the updates
+        of its neighbours, instead of before training.
+
+    The first evaluation always uses the full test sets: the duration of the last full pass is the reference the
+    saved time is computed against. The final test of the experiment is not affected by the policy (see
+    `Engine._learning_cycle`).
+    """
+
+    def __init__(self, trainer, interval: int = 1, samples: int | None = None, overlap: bool = False):
+        """
+        Args:
+            trainer: Trainer providing `async test()`. Sampled and overlapped passes also need `snapshot_model()`
+                and `async test(model, sampled)`, otherwise the full test sets are evaluated before training.
+            interval (int): Rounds between evaluations.
+            samples (int | None): Samples of each test set evaluated during the rounds, or None for all of them.
+            overlap (bool): Evaluate while waiting for the neighbour updates.
+        """
+        self.trainer = trainer
+        self.interval = max(1, interval)
+        supported = hasattr(trainer, "snapshot_model")
+        self.sampled = bool(samples) and supported
+        self.overlap = overlap and supported
+        self._snapshot = None
+        self._full_duration = None
+        self._stats = EvaluationStats()
+
+    def is_due(self, round: int) -> bool:
+        return round % self.interval == 0
+
+    async def evaluate(self, round: int):
+        """
+        Evaluate the model as the policy dictates, where the node used to run its test pass.
+
+        With `overlap`, only a copy of the model is taken: it is evaluated by `start_deferred`.
+
+        Args:
+            round (int): The current round.
+        """
+        if not self.is_due(round):
+            logging.info(f"[EvaluationPolicy] Skipping evaluation in round {round} (every {self.interval} rounds)")
+            self._stats.skipped += 1
+            self._stats.saved += self._full_duration or 0.0
+            return
+        if self.overlap:
+            self._snapshot = self.trainer.snapshot_model()
+            return
+        duration = await self._timed_test()
+        self._record(duration, duration)
+
+    def start_deferred(self) -> asyncio.Task | None:
+        """
+        Start evaluating the copy of the model taken in this round, if any, in a background task.
+
+        Returns:
+            asyncio.Task | None: The evaluation, to be passed to `finish_deferred`.
+        """
+        if self._snapshot is None:
+            return None
+        model, self._snapshot = self._snapshot, None
+        return asyncio.create_task(self._timed_test(model))
+
+    async def finish_deferred(self, task: asyncio.Task | None):
+        """
+        Wait for an evaluation started by `start_deferred`.
+
+        Args:
+            task (asyncio.Task | None): The evaluation.
+        """
+        if task is None:
+            return
+        start = time.perf_counter()
+        duration = await task
+        self._record(duration, time.perf_counter() - start)
+
+    def get_stats(self, reset: bool = False) -> EvaluationStats:
+        """
+        Args:
+            reset (bool): Start a new measurement period after returning the stats.
+
+        Returns:
+            EvaluationStats: The evaluations since the last reset.
+        """
+        stats = self._stats
+        if reset:
+            self._stats = EvaluationStats()
+        return stats
+
+    async def _timed_test(self, model=None) -> float:
+        # Sampled once the full test sets have been measured
+        sampled = self.sampled and self._full_duration is not None
+        start = time.perf_counter()
+        if sampled or model is not None:
+            await self.trainer.test(model=model, sampled=sampled)
+        else:
+            await self.trainer.test()
+        duration = time.perf_counter() - start
+        if not sampled:
+            self._full_duration = duration
+        return duration
+
+    def _record(self, duration: float, blocking: float):
+        self._stats.evaluations += 1
+        self._stats.duration += duration
+        self._stats.blocking += blocking
+        self._stats.saved += self._full_duration - blocking
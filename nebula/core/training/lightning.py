@@ -7,23 +7,28 @@ import io
 import logging
 import os
 import pickle
+import time
 import traceback
 from collections import OrderedDict
+from dataclasses import dataclass
 
 import torch
 from lightning import Trainer
-from lightning.pytorch.callbacks import ModelSummary, ProgressBar
+from lightning.pytorch.callbacks import Callback, ModelSummary, ProgressBar
 from lightning.pytorch.loggers import CSVLogger
 from torch.nn import functional as F
 
 from nebula.config.config import TRAINING_LOGGER
 from nebula.core.utils.deterministic import enable_deterministic
+from nebula.core.utils.flatmodel import FlatModel
 from nebula.core.utils.nebulalogger_tensorboard import NebulaTensorBoardLogger
 from nebula.core.nebulaevents import TestMetricsEvent
 from nebula.core.eventmanager import EventManager
 
 logging_training = logging.getLogger(TRAINING_LOGGER)
 
+GZIP_MAGIC = b"\x1f\x8b"
+
 
 class NebulaProgressBar(ProgressBar):
     """Nebula progress bar for training.
@@ -107,6 +112,53 @@ class NebulaProgressBar(ProgressBar):
             logging_training.info(f"Testing for Epoch {trainer.current_epoch} finished")
 
 
+class FirstBatchTimer(Callback):
+    """Records when the first batch of each `fit` or `test` starts, to measure the startup of the run."""
+
+    def __init__(self):
+        super().__init__()
+        self.first_batch = None
+
+    def on_train_start(self, trainer, pl_module):
+        self.first_batch = None
+
+    def on_test_start(self, trainer, pl_module):
+        self.first_batch = None
+
+    def on_train_batch_start(self, trainer, pl_module, batch, batch_idx):
+        if self.first_batch is None:
+            self.first_batch = time.perf_counter()
+
+    def on_test_batch_start(self, trainer, pl_module, batch, batch_idx, dataloader_idx=0):
+        if self.first_batch is None:
+            self.first_batch = time.perf_counter()
+
+
+@dataclass
+class TrainingSetupStats:
+    """
+    Fixed time spent preparing the local training of a round, before the first batch is trained.
+
+    Attributes:
+        trainers_created (int): Lightning trainers built.
+        trainer (float): Seconds spent creating trainers and loggers.
+        datamodule (float): Seconds spent setting up the train, validation and test subsets.
+        fit_startup (float): Seconds from the start of `fit` to its first training batch (loaders, workers,
+            optimizers and sanity validation).
+        test_startup (float): Seconds from the start of `test` to its first batch.
+    """
+
+    trainers_created: int = 0
+    trainer: float = 0.0
+    datamodule: float = 0.0
+    fit_startup: float = 0.0
+    test_startup: float = 0.0
+
+    @property
+    def total(self) -> float:
+        return self.trainer + self.datamodule + self.fit_startup + self.test_startup
+
+
 class ParameterSerializeError(Exception):
     """Custom exception for errors setting model parameters."""
 
@@ -135,6 +187,10 @@ class Lightning:
         self.idx = self.config.participant["device_args"]["idx"]
         self.log_dir = os.path.join(self.config.participant["tracking_args"]["log_dir"], self.experiment_name)
         self._logger = None
+        # Keep the trainer, the loaders and their workers across rounds (only the optimizers and epochs are reset)
+        self.persistent_session = self.config.participant["training_args"].get("persistent_session", False)
+        self._first_batch_timer = FirstBatchTimer()
+        self._setup_stats = TrainingSetupStats()
         self.create_logger()
         enable_deterministic(seed=self.config.participant["scenario_args"]["random_seed"])
 
@@ -172,8 +228,29 @@ class Lightning:
 
         self._logger = nebulalogger
 
+    def get_setup_stats(self, reset=False) -> TrainingSetupStats:
+        """
+        Args:
+            reset (bool): Start a new measurement period after returning the stats.
+
+        Returns:
+            TrainingSetupStats: The setup overhead since the last reset.
+        """
+        stats = self._setup_stats
+        if reset:
+            self._setup_stats = TrainingSetupStats()
+        return stats
+
     def create_trainer(self):
-        # Create a new trainer and logger for each round
+        if self.persistent_session and self._trainer is not None:
+            return
+        start = time.perf_counter()
+        self._create_trainer()
+        self._setup_stats.trainers_created += 1
+        self._setup_stats.trainer += time.perf_counter() - start
+
+    def _create_trainer(self):
+        # Create a new trainer and logger for each round (once with a persistent session)
         self.create_logger()
         num_gpus = len(self.config.participant["device_args"]["gpu_id"])
         if self.config.participant["device_args"]["accelerator"] == "gpu" and num_gpus > 0:
@@ -185,7 +262,7 @@ class Lightning:
                 gpu_index = self.config.participant["device_args"]["gpu_id"]
             logging_training.info(f"Creating trainer with accelerator GPU ({gpu_index})")
             self._trainer = Trainer(
-                callbacks=[ModelSummary(max_depth=1), NebulaProgressBar()],
+                callbacks=[ModelSummary(max_depth=1), NebulaProgressBar(), self._first_batch_timer],
                 max_epochs=self.epochs,
                 accelerator="gpu",
                 devices=gpu_index,
@@ -197,7 +274,7 @@ class Lightning:
         else:
             logging_training.info("Creating trainer with accelerator CPU")
             self._trainer = Trainer(
-                callbacks=[ModelSummary(max_depth=1), NebulaProgressBar()],
+                callbacks=[ModelSummary(max_depth=1), NebulaProgressBar(), self._first_batch_timer],
                 max_epochs=self.epochs,
                 accelerator="cpu",
                 devices="auto",
@@ -257,10 +334,10 @@ class Lightning:
 
     def serialize_model(self, model):
         # From https://pytorch.org/docs/stable/notes/serialization.html
+        # Raw tensor bytes: compression is applied once by the connection payload codec (message_args.compression)
         try:
             buffer = io.BytesIO()
-            with gzip.GzipFile(fileobj=buffer, mode="wb") as f:
-                torch.save(model, f, pickle_protocol=pickle.HIGHEST_PROTOCOL)
+            torch.save(model, buffer, pickle_protocol=pickle.HIGHEST_PROTOCOL)
             serialized_data = buffer.getvalue()
             buffer.close()
             del buffer
@@ -268,15 +345,31 @@ class Lightning:
         except Exception as e:
             raise ParameterSerializeError("Error serializing model") from e
 
-    def deserialize_model(self, data):
+    def deserialize_model(self, data, timings=None):
         # From https://pytorch.org/docs/stable/notes/serialization.html
+        # timings (dict, optional) receives the seconds spent in each stage: decompress, unpickle and materialize
         try:
+            start = time.perf_counter()
+            if data[:2] == GZIP_MAGIC:
+                # Payloads from peers that still gzip the serialized model
+                data = gzip.decompress(data)
+            decompressed = time.perf_counter()
             buffer = io.BytesIO(data)
-            with gzip.GzipFile(fileobj=buffer, mode="rb") as f:
-                params_dict = torch.load(f)
+            params_dict = torch.load(buffer)
             buffer.close()
             del buffer
-            return OrderedDict(params_dict)
+            loaded = time.perf_counter()
+            if all(isinstance(param, torch.Tensor) for param in params_dict.values()):
+                # One contiguous buffer per update, used by the vectorized aggregation and similarity code paths
+                params = FlatModel.from_state_dict(params_dict)
+            else:
+                params = OrderedDict(params_dict)
+            del params_dict
+            if timings is not None:
+                timings["decompress"] = decompressed - start
+                timings["unpickle"] = loaded - decompressed
+                timings["materialize"] = time.perf_counter() - loaded
+            return params
         except Exception as e:
             raise ParameterDeserializeError("Error decoding parameters") from e
 
@@ -303,18 +396,31 @@ class Lightning:
 
     def _train_sync(self):
         try:
+            if self.persistent_session:
+                # A new run of the same trainer: new optimizers (built by fit) and epochs counted from 0
+                self._trainer.fit_loop.epoch_progress.reset()
+                self._trainer.fit_loop.max_epochs = self.epochs
+            start = time.perf_counter()
+            self._first_batch_timer.first_batch = None
             self._trainer.fit(self.model, self.datamodule)
+            if self._first_batch_timer.first_batch is not None:
+                self._setup_stats.fit_startup += self._first_batch_timer.first_batch - start
         except Exception as e:
             logging_training.error(f"Error in _train_sync: {e}")
             tb = traceback.format_exc()
             logging_training.error(f"Traceback: {tb}")
             # If "raise", the exception will be managed by the main thread
 
-    async def test(self):
+    async def test(self, model=None, sampled=False):
+        """
+        Args:
+            model: Model evaluated instead of the current one (e.g. a copy from `snapshot_model`).
+            sampled (bool): Evaluate the sampled test sets of the data module instead of the full ones.
+        """
         try:
             self.create_trainer()
             logging.info(f"{'=' * 10} [Testing] Started (check training logs for progress) {'=' * 10}")
-            loss, accuracy = await asyncio.to_thread(self._test_sync)
+            loss, accuracy = await asyncio.to_thread(self._test_sync, model, sampled)
             logging.info(f"{'=' * 10} [Testing] Finished (check training logs for progress) {'=' * 10}")
             tme = TestMetricsEvent(loss, accuracy)
             await EventManager.get_instance().publish_addonevent(tme)
@@ -322,9 +428,15 @@ class Lightning:
             logging_training.error(f"Error testing model: {e}")
             logging_training.error(traceback.format_exc())
 
-    def _test_sync(self):
+    def _test_sync(self, model=None, sampled=False):
+        model = self.model if model is None else model
         try:
-            self._trainer.test(self.model, self.datamodule, verbose=True)
+            self._first_batch_timer.first_batch = None
+            self.datamodule.sampled_test = sampled
+            start = time.perf_counter()
+            self._trainer.test(model, self.datamodule, verbose=True)
+            if self._first_batch_timer.first_batch is not None:
+                self._setup_stats.test_startup += self._first_batch_timer.first_batch - start
             metrics = self._trainer.callback_metrics
             loss = metrics.get('val_loss/dataloader_idx_0', None).item()
             accuracy = metrics.get('val_accuracy/dataloader_idx_0', None).item()
@@ -335,8 +447,27 @@ class Lightning:
             logging_training.error(f"Traceback: {tb}")
             # If "raise", the exception will be managed by the main thread
             return None, None
+        finally:
+            self.datamodule.sampled_test = False
+            if model is not self.model:
+                # Keep counting the test passes of the node, whichever model was evaluated
+                for phase, number in model.global_number.items():
+                    if phase.startswith("Test"):
+                        self.model.global_number[phase] = number
+
+    def snapshot_model(self):
+        """
+        Returns:
+            A copy of the model, to evaluate its current parameters while the model keeps training.
+        """
+        return copy.deepcopy(self.model)
 
     def cleanup(self):
+        if self.persistent_session:
+            # The trainer and the data module are reused next round: Lightning already tore down its runs
+            gc.collect()
+            torch.cuda.empty_cache()
+            return
         if self._trainer is not None:
             self._trainer._teardown()
             del self._trainer
@@ -345,6 +476,20 @@ class Lightning:
         gc.collect()
         torch.cuda.empty_cache()
 
+    def shutdown(self):
+        """
+        Release the training resources kept between rounds at the end of the experiment: the worker processes of
+        the persistent data loaders and the reused Lightning trainer.
+        """
+        if self.datamodule is not None:
+            self.datamodule.close_loaders()
+            self.datamodule.teardown()
+        if self.persistent_session and self._trainer is not None:
+            self._trainer._teardown()
+            self._trainer = None
+        gc.collect()
+        torch.cuda.empty_cache()
+
     def get_model_weight(self):
         weight = self.datamodule.model_weight
         if weight is None:
@@ -352,7 +497,9 @@ class Lightning:
         return weight
 
     def on_round_start(self):
+        start = time.perf_counter()
         self.datamodule.setup()
+        self._setup_stats.datamodule += time.perf_counter() - start
         self._logger.log_data({"A-Round": self.round})
         # self.reporter.enqueue_data("Round", self.round)
 
@@ -1,5 +1,6 @@
 import logging
 import pickle
+import time
 import traceback
 
 from sklearn.metrics import accuracy_score
@@ -29,9 +30,12 @@ class Scikit:
             params = self.model.get_params()
         return pickle.dumps(params)
 
-    def deserialize_model(self, data):
+    def deserialize_model(self, data, timings=None):
         try:
+            start = time.perf_counter()
             params = pickle.loads(data)
+            if timings is not None:
+                timings["unpickle"] = time.perf_counter() - start
             return params
         except:
             raise Exception("Error decoding parameters")
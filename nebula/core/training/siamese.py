@@ -1,6 +1,7 @@
 import hashlib
 import io
 import logging
+import time
 import traceback
 from collections import OrderedDict
 
@@ -134,13 +135,19 @@ class Siamese:
         except:
             raise Exception("Error serializing model")
 
-    def deserialize_model(self, data):
+    def deserialize_model(self, data, timings=None):
         try:
+            start = time.perf_counter()
             buffer = io.BytesIO(data)
             # with gzip.GzipFile(fileobj=buffer, mode='rb') as f:
             #    params_dict = torch.load(f, map_location='cpu')
             params_dict = torch.load(buffer, map_location="cpu")
-            return OrderedDict(params_dict)
+            loaded = time.perf_counter()
+            params = OrderedDict(params_dict)
+            if timings is not None:
+                timings["unpickle"] = loaded - start
+                timings["materialize"] = time.perf_counter() - loaded
+            return params
         except:
             raise Exception("Error decoding parameters")
 
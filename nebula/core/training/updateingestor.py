@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+INGESTION_STAGES = ("decompress", "unpickle", "materialize")
+
+
+@dataclass
+class IngestionStats:
+    """
+    Time spent decoding the model updates received during a round.
+
+    Attributes:
+        updates (int): Updates decoded.
+        failures (int): Updates that could not be decoded.
+        wait (float): Seconds spent by updates waiting for a free decoding slot (backpressure).
+        decompress (float): Seconds spent decompressing payloads (legacy gzip payloads only).
+        unpickle (float): Seconds spent loading the serialized parameters.
+        materialize (float): Seconds spent copying the loaded tensors into the model representation used by the node.
+        max_total (float): Longest decoding time of a single update, excluding the wait.
+    """
+
+    updates: int = 0
+    failures: int = 0
+    wait: float = 0.0
+    decompress: float = 0.0
+    unpickle: float = 0.0
+    materialize: float = 0.0
+    max_total: float = 0.0
+
+
+class UpdateIngestor:
+    """
+    Decodes received model updates on a bounded pool of worker threads, off the event loop.
+
+    Deserializing a model (gunzip of legacy payloads and `torch.load`) takes from milliseconds to seconds
+    depending on the model size. Running it on the event loop stalls heartbeats, beacons, reads from other
+    connections and aggregation timers, so the ingestor hands it to a dedicated thread pool.
+
+    At most `max_pending` updates are decoded (or waiting for a worker) at the same time. Further updates
+    wait for a free slot before being submitted, so a burst of large updates cannot pile up decoded models in
+    memory faster than they are consumed.
+
+    The time spent on each stage is accumulated per round and can be retrieved with `get_stats`.
+    """
+
+    def __init__(self, trainer, max_workers: int = 2, max_pending: int = 4):
+        """
+        Args:
+            trainer: Trainer providing `deserialize_model(data, timings=None)`.
+            max_workers (int): Number of threads decoding updates.
+            max_pending (int): Maximum number of updates being decoded or queued for a worker.
+        """
+        self.trainer = trainer
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(self.max_workers, max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="update_ingestor")
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._stats: dict[int | None, IngestionStats] = defaultdict(IngestionStats)
+
+    async def deserialize(self, data: bytes, round: int | None = None):
+        """
+        Decode a serialized model in the worker pool.
+
+        Args:
+            data (bytes): Serialized model parameters.
+            round (int | None): Round of the update, used to group statistics.
+
+        Returns:
+            The decoded model parameters, as returned by the trainer.
+
+        Raises:
+            Any exception raised by the trainer while decoding the parameters.
+        """
+        stats = self._stats[round]
+        start = time.perf_counter()
+        async with self._slots:
+            stats.wait += time.perf_counter() - start
+            timings = {}
+            try:
+                model = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self._timed_deserialize, data, timings
+                )
+            except Exception:
+                stats.failures += 1
+                raise
+        stats.updates += 1
+        for stage in INGESTION_STAGES:
+            setattr(stats, stage, getattr(stats, stage) + timings.get(stage, 0.0))
+        stats.max_total = max(stats.max_total, timings["total"])
+        return model
+
+    def _timed_deserialize(self, data: bytes, timings: dict):
+        start = time.perf_counter()
+        model = self.trainer.deserialize_model(data, timings=timings)
+        timings["total"] = time.perf_counter() - start
+        return model
+
+    def get_stats(self, round: int | None) -> IngestionStats:
+        """
+        Return the statistics collected for a round.
+
+        Args:
+            round (int | None): The round of interest.
+
+        Returns:
+            IngestionStats: Decoding work performed during the round.
+        """
+        return self._stats[round]
+
+    def shutdown(self):
+        """
+        Stop the worker pool, cancelling the updates that are still waiting for a worker.
+        """
+        logging.info("Shutting down update ingestor...")
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,266 @@
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+import torch
+
+# Byte alignment of every layer inside the buffer, so any dtype can be viewed from it
+ALIGNMENT = 8
+
+
+@dataclass(frozen=True)
+class LayerSpec:
+    """
+    Location of a layer inside the buffer of a FlatModel.
+
+    Attributes:
+        name (str): Name of the layer in the state dict.
+        shape (torch.Size): Shape of the layer.
+        dtype (torch.dtype): Dtype of the layer.
+        offset (int): Byte offset of the layer in the buffer.
+        numel (int): Number of elements of the layer.
+    """
+
+    name: str
+    shape: torch.Size
+    dtype: torch.dtype
+    offset: int
+    numel: int
+
+
+def _buffer_order(entries: list[tuple[str, torch.Size, torch.dtype]]) -> tuple[list[str], int]:
+    """
+    Choose the buffer order of a set of layers: the floating point layers of the dtype holding most of the
+    parameters go first (forming the vector), followed by the rest, each group keeping the original order.
+
+    Args:
+        entries (list[tuple[str, torch.Size, torch.dtype]]): Name, shape and dtype of each layer, in original order.
+
+    Returns:
+        tuple[list[str], int]: The layer names in buffer order and the number of layers forming the vector.
+    """
+    totals = {}
+    for _, shape, dtype in entries:
+        if dtype.is_floating_point:
+            totals[dtype] = totals.get(dtype, 0) + shape.numel()
+    vector_dtype = max(totals, key=totals.get) if totals else None
+    vector_names = [name for name, _, dtype in entries if dtype == vector_dtype]
+    extra_names = [name for name, _, dtype in entries if dtype != vector_dtype]
+    return vector_names + extra_names, len(vector_names)
+
+
+class FlatModel(Mapping):
+    """
+    Model parameters stored in one contiguous buffer, plus an index with the offset, shape and dtype of each layer.
+
+    The floating point layers that share the most common dtype of the model are laid out first, so together they
+    can be used as a single 1-D tensor (`vector`) for vectorized operations. The remaining entries (e.g., integer
+    buffers like `num_batches_tracked`) follow in the same buffer and are listed in `extra_layers`.
+
+    Indexing a FlatModel returns a view of the buffer with the original shape and dtype, and layers are iterated in
+    their original order, so it can be used wherever a state dict is read (e.g., `load_state_dict`).
+    `state_dict()` returns the same views in a regular (mutable) OrderedDict.
+    """
+
+    __slots__ = ("buffer", "layers", "vector_layers", "extra_layers", "_index", "_vector")
+
+    def __init__(self, buffer: torch.Tensor, layers: list[LayerSpec], vector_layers: int, order: list[str] | None = None):
+        """
+        Args:
+            buffer (torch.Tensor): uint8 tensor holding every layer.
+            layers (list[LayerSpec]): Layers in buffer order.
+            vector_layers (int): Number of leading layers (same dtype, consecutive) forming `vector`.
+            order (list[str], optional): Original order of the layers. Defaults to the buffer order.
+        """
+        self.buffer = buffer
+        self.vector_layers = tuple(layers[:vector_layers])
+        self.extra_layers = tuple(layers[vector_layers:])
+        self._index = {spec.name: spec for spec in layers}
+        self.layers = tuple(self._index[name] for name in order) if order is not None else tuple(layers)
+        if self.vector_layers:
+            last = self.vector_layers[-1]
+            end = last.offset + last.numel * last.dtype.itemsize
+            self._vector = buffer[:end].view(last.dtype)
+        else:
+            self._vector = torch.empty(0)
+
+    @classmethod
+    def _allocate(cls, entries: list[tuple[str, torch.Size, torch.dtype]], buffer_order: list[str], vector_layers: int):
+        """
+        Create an uninitialized FlatModel.
+
+        Args:
+            entries (list[tuple[str, torch.Size, torch.dtype]]): Name, shape and dtype of each layer, in original order.
+            buffer_order (list[str]): Order of the layers in the buffer.
+            vector_layers (int): Number of leading layers (in buffer order) forming `vector`.
+        """
+        entries_by_name = {name: (shape, dtype) for name, shape, dtype in entries}
+        layers, offset = [], 0
+        for name in buffer_order:
+            shape, dtype = entries_by_name[name]
+            if len(layers) >= vector_layers:
+                offset = -(-offset // ALIGNMENT) * ALIGNMENT
+            layers.append(LayerSpec(name, shape, dtype, offset, shape.numel()))
+            offset += shape.numel() * dtype.itemsize
+        return cls(torch.empty(offset, dtype=torch.uint8), layers, vector_layers, [name for name, _, _ in entries])
+
+    @classmethod
+    def from_state_dict(cls, state_dict: Mapping) -> "FlatModel":
+        """
+        Copy a state dict into a new FlatModel (FlatModels are returned as they are).
+
+        Args:
+            state_dict (Mapping): Model parameters, all of them tensors.
+
+        Returns:
+            FlatModel: The flattened parameters, on CPU.
+        """
+        if isinstance(state_dict, FlatModel):
+            return state_dict
+
+        entries = [(name, tensor.shape, tensor.dtype) for name, tensor in state_dict.items()]
+        flat = cls._allocate(entries, *_buffer_order(entries))
+        with torch.no_grad():
+            for name, tensor in state_dict.items():
+                flat[name].copy_(tensor.detach())
+        return flat
+
+    @classmethod
+    def zeros_like(cls, other: Mapping, dtype: torch.dtype = torch.float32) -> "FlatModel":
+        """
+        Create a FlatModel of zeros with the layers of `other`, every layer stored as `dtype`.
+
+        The layers follow the buffer order `other` has (or would have once flattened), so the vector of `other` is
+        aligned with the first elements of the vector of the new model (which covers every layer).
+
+        Args:
+            other (Mapping): FlatModel or state dict providing the layers.
+            dtype (torch.dtype): Dtype of every layer of the new model.
+
+        Returns:
+            FlatModel: The new model, filled with zeros.
+        """
+        if isinstance(other, FlatModel):
+            entries = [(spec.name, spec.shape, dtype) for spec in other.layers]
+            buffer_order = [spec.name for spec in other.vector_layers + other.extra_layers]
+        else:
+            buffer_order, _ = _buffer_order([(name, tensor.shape, tensor.dtype) for name, tensor in other.items()])
+            entries = [(name, tensor.shape, dtype) for name, tensor in other.items()]
+        flat = cls._allocate(entries, buffer_order, len(buffer_order))
+        flat.buffer.zero_()
+        return flat
+
+    @property
+    def vector(self) -> torch.Tensor:
+        """1-D view of the layers in `vector_layers`."""
+        return self._vector
+
+    @property
+    def nbytes(self) -> int:
+        return self.buffer.numel()
+
+    def __getitem__(self, name: str) -> torch.Tensor:
+        spec = self._index[name]
+        return self.buffer[spec.offset : spec.offset + spec.numel * spec.dtype.itemsize].view(spec.dtype).view(spec.shape)
+
+    def __iter__(self):
+        return (spec.name for spec in self.layers)
+
+    def __len__(self) -> int:
+        return len(self.layers)
+
+    def __contains__(self, name) -> bool:
+        return name in self._index
+
+    def state_dict(self) -> OrderedDict:
+        """
+        Return the layers as an OrderedDict of views of the buffer (no copy).
+        """
+        return OrderedDict((spec.name, self[spec.name]) for spec in self.layers)
+
+    def same_layout(self, other) -> bool:
+        """
+        Check whether `other` is a FlatModel with the same layers, dtypes and buffer layout.
+        """
+        return isinstance(other, FlatModel) and (
+            self.vector_layers == other.vector_layers and self.extra_layers == other.extra_layers
+        )
+
+    def vector_prefix_of(self, other: "FlatModel") -> bool:
+        """
+        Check whether the layers of this vector are the first layers of the vector of `other`, in the same order.
+        """
+        if len(other.vector_layers) < len(self.vector_layers):
+            return False
+        return all(
+            mine.name == theirs.name and mine.numel == theirs.numel
+            for mine, theirs in zip(self.vector_layers, other.vector_layers, strict=False)
+        )
+
+    def add_(self, other: Mapping, alpha: float = 1) -> "FlatModel":
+        """
+        Add `alpha * other` to this model in place.
+
+        When the vector of `other` is aligned with the beginning of this vector (e.g., this model was created with
+        `zeros_like(other)`), its layers are added with a single operation.
+
+        Args:
+            other (Mapping): FlatModel or state dict with the same layers.
+            alpha (float): Multiplier of `other`.
+
+        Returns:
+            FlatModel: This model.
+        """
+        with torch.no_grad():
+            if isinstance(other, FlatModel) and other.vector_prefix_of(self):
+                self._vector[: other.vector.numel()].add_(other.vector, alpha=alpha)
+                remaining = other.extra_layers
+            else:
+                remaining = [self._index[name] for name in other]
+            for spec in remaining:
+                target = self[spec.name]
+                target.add_(other[spec.name].to(target.dtype), alpha=alpha)
+        return self
+
+    def __repr__(self):
+        return f"FlatModel(layers={len(self.layers)}, vector={self._vector.numel()}, bytes={self.nbytes})"
+
+
+def aligned_segments(models: list[Mapping]) -> list[list[torch.Tensor]]:
+    """
+    Group the parameters of several models into aligned 1-D segments.
+
+    If every model is a FlatModel with the same layout, the vectors form a single segment and each extra layer
+    another one. Otherwise each layer is a segment.
+
+    Args:
+        models (list[Mapping]): FlatModels or state dicts with the same layers.
+
+    Returns:
+        list[list[torch.Tensor]]: For each segment, the 1-D tensor of each model.
+    """
+    first = models[0]
+    if isinstance(first, FlatModel) and all(first.same_layout(m) for m in models[1:]):
+        segments = [[m.vector for m in models]] if first.vector.numel() else []
+        segments += [[m[spec.name].reshape(-1) for m in models] for spec in first.extra_layers]
+        return segments
+    return [[m[layer].reshape(-1) for m in models] for layer in first]
+
+
+def align_models(models: list[Mapping]) -> list[Mapping]:
+    """
+    Convert the state dicts of a group of models to FlatModels when at least one of them is already flat.
+
+    Received updates arrive as FlatModels while the local model is a regular state dict, so converting the few
+    state dicts lets `aligned_segments` process the whole group as single vectors. Groups made only of state
+    dicts are returned unchanged, to avoid copying every model.
+
+    Args:
+        models (list[Mapping]): FlatModels or state dicts with the same layers.
+
+    Returns:
+        list[Mapping]: The models, all of them FlatModels if any of them was.
+    """
+    if any(isinstance(m, FlatModel) for m in models):
+        return [FlatModel.from_state_dict(m) for m in models]
+    return models
@@ -4,6 +4,8 @@ from collections import OrderedDict
 
 import torch
 
+from nebula.core.utils.flatmodel import FlatModel
+
 
 def cosine_metric2(
     model1: OrderedDict[str, torch.Tensor],
@@ -35,6 +37,54 @@ def cosine_metric2(
         return None
 
 
+def _layer_blocks(model1, model2, truncate: bool = False):
+    """
+    Yield the layers shared by two models as pairs of aligned 1-D float tensors.
+
+    When both models are FlatModels with the same layout, their vectors are yielded as a single block covering
+    several layers (split into per-layer views with `_split_layers`), so no layer is copied or converted. Any other
+    layer is yielded on its own.
+
+    Args:
+        model1 (Mapping): FlatModel or state dict.
+        model2 (Mapping): FlatModel or state dict.
+        truncate (bool): Truncate the first dimension of mismatched layers to the shortest one.
+
+    Yields:
+        tuple[torch.Tensor, torch.Tensor, list[torch.Size]]: Values of each model and shapes of the layers in the block.
+    """
+    if isinstance(model1, FlatModel) and model1.same_layout(model2):
+        if model1.vector.numel():
+            yield model1.vector.float(), model2.vector.float(), [spec.shape for spec in model1.vector_layers]
+        layers = [spec.name for spec in model1.extra_layers]
+    else:
+        layers = list(model1)
+
+    for layer in layers:
+        if layer not in model2:
+            logging.info(f"Layer {layer} not found in model 2")
+            continue
+        l1 = model1[layer].detach().to("cpu")
+        l2 = model2[layer].detach().to("cpu")
+        if truncate and l1.shape != l2.shape:
+            # Adjust the shape of the smaller layer to match the larger layer
+            min_len = min(l1.shape[0], l2.shape[0])
+            l1, l2 = l1[:min_len], l2[:min_len]
+        yield l1.reshape(-1).float(), l2.reshape(-1).float(), [l1.shape]
+
+
+def _layer_pairs(model1, model2, truncate: bool = False):
+    """
+    Yield the layers shared by two models as (l1, l2, shape), with l1 and l2 1-D float tensors.
+    """
+    for block1, block2, shapes in _layer_blocks(model1, model2, truncate):
+        if len(shapes) == 1:
+            yield block1, block2, shapes[0]
+            continue
+        sizes = [shape.numel() for shape in shapes]
+        yield from zip(torch.split(block1, sizes), torch.split(block2, sizes), shapes, strict=False)
+
+
 def cosine_metric(model1: OrderedDict, model2: OrderedDict, similarity: bool = False) -> float | None:
     if model1 is None or model2 is None:
         logging.info("Cosine similarity cannot be computed due to missing model")
@@ -42,29 +92,39 @@ def cosine_metric(model1: OrderedDict, model2: OrderedDict, similarity: bool = F
 
     cos_similarities: list = []
 
-    for layer in model1:
-        if layer in model2:
-            l1 = model1[layer].to("cpu")
-            l2 = model2[layer].to("cpu")
-            if l1.shape != l2.shape:
-                # Adjust the shape of the smaller layer to match the larger layer
-                min_len = min(l1.shape[0], l2.shape[0])
-                l1, l2 = l1[:min_len], l2[:min_len]
-            cos = torch.nn.CosineSimilarity(dim=l1.dim() - 1)
-            cos_mean = torch.mean(cos(l1.float(), l2.float())).mean()
-            cos_similarities.append(cos_mean)
-        else:
-            logging.info(f"Layer {layer} not found in model 2")
+    with torch.no_grad():
+        for l1, l2, shape in _layer_pairs(model1, model2, truncate=True):
+            # Cosine similarity along the last dimension of the layer, as torch.nn.CosineSimilarity
+            row_length = shape[-1] if len(shape) else 1
+            products = torch.stack((l1 * l2, l1 * l1, l2 * l2)).view(3, -1, row_length)
+            rows = products @ torch.ones(row_length)
+            cos = rows[0] / torch.sqrt(torch.clamp(rows[1] * rows[2], min=1e-16))
+            cos_similarities.append(cos.mean())
 
     if cos_similarities:
-        cos = torch.Tensor(cos_similarities)
-        avg_cos = torch.mean(cos)
+        avg_cos = torch.mean(torch.stack(cos_similarities))
         relu_cos = torch.nn.functional.relu(avg_cos)  # relu to avoid negative values
         return relu_cos.item() if similarity else (1 - relu_cos.item())
     else:
         return None
 
 
+def _lp_scores(model1, model2, p: int, similarity: bool) -> list[torch.Tensor]:
+    """
+    Compute the L^p distance (or similarity) between each pair of layers of two models.
+    """
+    scores = []
+    with torch.no_grad():
+        for l1, l2, _ in _layer_pairs(model1, model2):
+            distance = torch.linalg.vector_norm(l1 - l2, ord=p)
+            if similarity:
+                norm_sum = torch.linalg.vector_norm(l1, ord=p) + torch.linalg.vector_norm(l2, ord=p)
+                scores.append(1 - torch.where(norm_sum != 0, distance / norm_sum, 0.0))
+            else:
+                scores.append(distance)
+    return scores
+
+
 def euclidean_metric(
     model1: OrderedDict[str, torch.Tensor],
     model2: OrderedDict[str, torch.Tensor],
@@ -74,31 +134,27 @@ def euclidean_metric(
     if model1 is None or model2 is None:
         return None
 
-    distances = []
-
-    for layer in model1:
-        if layer in model2:
-            l1 = model1[layer].detach().to("cpu").flatten().float()
-            l2 = model2[layer].detach().to("cpu").flatten().float()
-
-            if standardized:
-                std_l1, std_l2 = l1.std(), l2.std()
-                if std_l1 != 0:
-                    l1 = (l1 - l1.mean()) / std_l1
-                if std_l2 != 0:
-                    l2 = (l2 - l2.mean()) / std_l2
+    if not standardized:
+        distances = _lp_scores(model1, model2, p=2, similarity=similarity)
+    else:
+        distances = []
+        for l1, l2, _ in _layer_pairs(model1, model2):
+            std_l1, std_l2 = l1.std(), l2.std()
+            if std_l1 != 0:
+                l1 = (l1 - l1.mean()) / std_l1
+            if std_l2 != 0:
+                l2 = (l2 - l2.mean()) / std_l2
 
             distance = torch.norm(l1 - l2, p=2)
 
             if similarity:
                 norm_sum = torch.norm(l1, p=2) + torch.norm(l2, p=2)
-                similarity_score = 1 - (distance / norm_sum if norm_sum != 0 else 0)
-                distances.append(similarity_score.item())
+                distances.append(1 - torch.where(norm_sum != 0, distance / norm_sum, 0.0))
             else:
-                distances.append(distance.item())
+                distances.append(distance)
 
     if distances:
-        avg_distance = torch.mean(torch.tensor(distances, dtype=torch.float32, device="cpu"))
+        avg_distance = torch.mean(torch.stack(distances))
         return avg_distance.item() if not torch.isnan(avg_distance) else 0.0
     else:
         return None
@@ -113,23 +169,10 @@ def minkowski_metric(
     if model1 is None or model2 is None:
         return None
 
-    distances = []
-
-    for layer in model1:
-        if layer in model2:
-            l1 = model1[layer].detach().to("cpu").flatten().float()
-            l2 = model2[layer].detach().to("cpu").flatten().float()
-
-            distance = torch.norm(l1 - l2, p=p)
-            if similarity:
-                norm_sum = torch.norm(l1, p=p) + torch.norm(l2, p=p)
-                similarity_score = 1 - (distance / norm_sum if norm_sum != 0 else 0)
-                distances.append(similarity_score.item())
-            else:
-                distances.append(distance.item())
+    distances = _lp_scores(model1, model2, p=p, similarity=similarity)
 
     if distances:
-        avg_distance = torch.mean(torch.tensor(distances, dtype=torch.float32, device="cpu"))
+        avg_distance = torch.mean(torch.stack(distances))
         return avg_distance.item() if not torch.isnan(avg_distance) else 0.0
     else:
         return None
@@ -143,23 +186,10 @@ def manhattan_metric(
     if model1 is None or model2 is None:
         return None
 
-    distances = []
-
-    for layer in model1:
-        if layer in model2:
-            l1 = model1[layer].detach().to("cpu").flatten().float()
-            l2 = model2[layer].detach().to("cpu").flatten().float()
-
-            distance = torch.norm(l1 - l2, p=1)
-            if similarity:
-                norm_sum = torch.norm(l1, p=1) + torch.norm(l2, p=1)
-                similarity_score = 1 - (distance / norm_sum if norm_sum != 0 else 0)
-                distances.append(similarity_score.item())
-            else:
-                distances.append(distance.item())
+    distances = _lp_scores(model1, model2, p=1, similarity=similarity)
 
     if distances:
-        avg_distance = torch.mean(torch.tensor(distances, dtype=torch.float32, device="cpu"))
+        avg_distance = torch.mean(torch.stack(distances))
         return avg_distance.item()
     else:
         return None
@@ -175,31 +205,25 @@ def pearson_correlation_metric(
 
     correlations = []
 
-    for layer in model1:
-        if layer in model2:
-            l1 = model1[layer].detach().to("cpu").flatten().float()
-            l2 = model2[layer].detach().to("cpu").flatten().float()
-
-            if l1.shape != l2.shape:
-                min_len = min(l1.shape[0], l2.shape[0])
-                l1, l2 = l1[:min_len], l2[:min_len]
-
-            if torch.std(l1) == 0 or torch.std(l2) == 0:
-                continue
-
-            correlation = torch.corrcoef(torch.stack((l1, l2)))[0, 1]
-
-            if torch.isnan(correlation):
+    with torch.no_grad():
+        for l1, l2, _ in _layer_pairs(model1, model2, truncate=True):
+            if l1.numel() == 1:
+                # The correlation of single values is undefined (counted as 0)
                 correlation = torch.tensor(0.0)
+            else:
+                l1, l2 = l1 - l1.mean(), l2 - l2.mean()
+                var1, var2 = torch.dot(l1, l1), torch.dot(l2, l2)
+                if var1 == 0 or var2 == 0:
+                    continue
+                correlation = torch.clamp(torch.dot(l1, l2) / torch.sqrt(var1 * var2), -1, 1)
 
             if similarity:
-                adjusted_similarity = (correlation + 1) / 2
-                correlations.append(adjusted_similarity.item())
+                correlations.append((correlation + 1) / 2)
             else:
                 correlations.append(1 - (correlation + 1) / 2)
 
     if correlations:
-        avg_correlation = torch.mean(torch.tensor(correlations, dtype=torch.float32))
+        avg_correlation = torch.mean(torch.stack(correlations))
         return avg_correlation.item()
     else:
         return None
@@ -215,22 +239,19 @@ def jaccard_metric(
 
     jaccard_scores = []
 
-    for layer in model1:
-        if layer in model2:
-            l1 = model1[layer].detach().to("cpu").flatten().float()
-            l2 = model2[layer].detach().to("cpu").flatten().float()
-
-            intersection = torch.sum(torch.min(l1, l2))
-            union = torch.sum(torch.max(l1, l2))
+    with torch.no_grad():
+        for l1, l2, _ in _layer_pairs(model1, model2):
+            intersection = torch.sum(torch.minimum(l1, l2))
+            union = torch.sum(torch.maximum(l1, l2))
 
-            jaccard_sim = intersection / union if union != 0 else 0
+            jaccard_sim = torch.where(union != 0, intersection / union, 0.0)
             if similarity:
-                jaccard_scores.append(jaccard_sim.item())
+                jaccard_scores.append(jaccard_sim)
             else:
-                jaccard_scores.append(1 - jaccard_sim.item())
+                jaccard_scores.append(1 - jaccard_sim)
 
     if jaccard_scores:
-        avg_jaccard = torch.mean(torch.tensor(jaccard_scores, dtype=torch.float32, device="cpu"))
+        avg_jaccard = torch.mean(torch.stack(jaccard_scores))
         return avg_jaccard.item()
     else:
         return None
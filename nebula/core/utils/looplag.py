@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+
+
+@dataclass
+class LoopLagStats:
+    """
+    Event loop lag observed over a period of time.
+
+    Attributes:
+        samples (int): Number of lag measurements in the period.
+        mean (float): Mean lag, in seconds.
+        max (float): Worst lag, in seconds.
+    """
+
+    samples: int = 0
+    mean: float = 0.0
+    max: float = 0.0
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up a task that sleeps for a fixed interval.
+
+    The lag is the delay suffered by every callback scheduled on the loop (heartbeats, beacons, reads from
+    connections, timers), so it reveals work that blocks the loop, such as an aggregation or a model decoding
+    running on it. The latest measurements are kept with the time the task should have woken up, so the lag of
+    any recent period (a round, an aggregation) can be retrieved with `get_stats`.
+    """
+
+    def __init__(self, interval: float = 0.05, history: int = 4096):
+        """
+        Args:
+            interval (float): Seconds between measurements.
+            history (int): Maximum number of measurements kept.
+        """
+        self.interval = interval
+        self._samples: deque[tuple[float, float]] = deque(maxlen=history)
+        self._task = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="loop_lag_monitor")
+
+    async def _run(self):
+        try:
+            while True:
+                expected = time.monotonic() + self.interval
+                await asyncio.sleep(self.interval)
+                self._samples.append((expected, max(0.0, time.monotonic() - expected)))
+        except asyncio.CancelledError:
+            logging.info("Loop lag monitor stopped")
+
+    def get_stats(self, since: float | None = None, until: float | None = None) -> LoopLagStats:
+        """
+        Return the lag of the measurements whose delay overlaps a period of time.
+
+        Args:
+            since (float | None): `time.monotonic()` value where the period starts (None for the oldest measurement).
+            until (float | None): `time.monotonic()` value where the period ends (None for the latest measurement).
+
+        Returns:
+            LoopLagStats: The lag of the period.
+        """
+        lags = [
+            lag
+            for timestamp, lag in self._samples
+            if (since is None or timestamp + lag >= since) and (until is None or timestamp <= until)
+        ]
+        if not lags:
+            return LoopLagStats()
+        return LoopLagStats(samples=len(lags), mean=sum(lags) / len(lags), max=max(lags))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -7,7 +7,6 @@ import logging
 import os
 import signal
 import sys
-import time
 import zipfile
 from urllib.parse import urlencode
 
@@ -112,6 +111,8 @@ from fastapi.templating import Jinja2Templates
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.middleware.sessions import SessionMiddleware
 
+from nebula.addons.statusreport import StatusDecoder, StatusDesyncError
+from nebula.frontend.broadcaster import CLIENT_QUEUE_SIZE, HISTORY_SIZE, Broadcaster
 from nebula.utils import FileUtils
 
 logging.info(f"🚀  Starting Nebula Frontend on port {settings.port}")
@@ -143,37 +144,38 @@ app.add_middleware(
 app.mount("/platform/static", StaticFiles(directory="static"), name="static")
 
 
-class ConnectionManager:
+class ConnectionManager(Broadcaster):
     """
     Manages WebSocket client connections, broadcasts messages to all connected clients, and retains a history of exchanged messages.
 
+    Broadcasts are queued for each client and sent by a task per client (see `Broadcaster`), so a slow browser does
+    not delay the others. Only the latest pending update of each node is sent to a client that falls behind.
+
     Attributes:
-        historic_messages (dict[str, dict]): Stores each received or broadcast message keyed by timestamp (formatted as "%Y-%m-%d %H:%M:%S").
+        history (deque[dict]): The last broadcast messages, with their sequence number (`seq`) and timestamp.
         active_connections (list[WebSocket]): List of currently open WebSocket connections.
 
     Methods:
         async connect(websocket: WebSocket):
             Accepts a new WebSocket connection, registers it, and broadcasts a control message indicating the new client count.
         disconnect(websocket: WebSocket):
-            Removes the specified WebSocket from the active connections list if present.
-        add_message(message: str):
-            Parses the incoming JSON-formatted message string, timestamps it, and adds it to historic_messages.
+            Removes the specified WebSocket from the active connections and stops sending it messages.
         async send_personal_message(message: str, websocket: WebSocket):
             Sends a text message to a single WebSocket; on connection closure, cleans up the connection.
         async broadcast(message: str):
-            Logs the message via add_message, then iterates through active_connections to send the message to all clients;
-            collects and removes any connections that have been closed or error out, logging exceptions as needed.
-        get_historic() -> dict[str, dict]:
-            Returns the full history of timestamped messages.
+            Numbers the message, adds it to the history and queues it for every client.
+        get_historic(since: int) -> list[dict]:
+            Returns the messages of the history after the sequence number `since`.
     """
 
     def __init__(self):
-        self.historic_messages = {}
-        self.active_connections: list[WebSocket] = []
+        super().__init__(
+            queue_size=int(os.environ.get("NEBULA_FRONTEND_WS_QUEUE_SIZE", CLIENT_QUEUE_SIZE)),
+            history_size=int(os.environ.get("NEBULA_FRONTEND_WS_HISTORY_SIZE", HISTORY_SIZE)),
+        )
 
     async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+        await super().connect(websocket)
         message = {
             "type": "control",
             "message": f"Client #{len(self.active_connections)} connected",
@@ -183,45 +185,12 @@ class ConnectionManager:
         except:
             pass
 
-    def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-
-    def add_message(self, message):
-        current_timestamp = datetime.datetime.fromtimestamp(time.time()).strftime("%Y-%m-%d %H:%M:%S")
-        self.historic_messages.update({current_timestamp: json.loads(message)})
-
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        try:
-            await websocket.send_text(message)
-        except RuntimeError:
-            # Connection was closed, remove it from active connections
-            self.disconnect(websocket)
-
-    async def broadcast(self, message: str):
-        self.add_message(message)
-        disconnected_websockets = []
-
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except RuntimeError:
-                # Mark connection for removal
-                disconnected_websockets.append(connection)
-            except Exception as e:
-                logging.exception(f"Error broadcasting message: {e}")
-                disconnected_websockets.append(connection)
-
-        # Remove disconnected websockets
-        for websocket in disconnected_websockets:
-            self.disconnect(websocket)
-
-    def get_historic(self):
-        return self.historic_messages
-
 
 manager = ConnectionManager()
 
+# Status of the nodes, rebuilt from the reports forwarded by the controller
+node_status = StatusDecoder()
+
 
 @app.websocket("/platform/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: int):
@@ -610,6 +579,7 @@ async def stop_scenario_by_name(scenario_name, username, all=False):
     """
     url = f"http://{settings.controller_host}:{settings.controller_port}/scenarios/stop"
     data = {"scenario_name": scenario_name, "username": username, "all": all}
+    node_status.discard_scenario(None if all else scenario_name)
     return await controller_post(url, data)
 
 
@@ -673,6 +643,7 @@ async def scenario_set_status_to_finished(scenario_name, all=False):
     """
     url = f"http://{settings.controller_host}:{settings.controller_port}/scenarios/set_status_to_finished"
     data = {"scenario_name": scenario_name, "all": all}
+    node_status.discard_scenario(None if all else scenario_name)
     await controller_post(url, data)
 
 
@@ -688,6 +659,7 @@ async def remove_scenario_by_name(scenario_name):
     """
     url = f"http://{settings.controller_host}:{settings.controller_port}/scenarios/remove"
     data = {"scenario_name": scenario_name}
+    node_status.discard_scenario(scenario_name)
     await controller_post(url, data)
 
 
@@ -1028,21 +1000,21 @@ async def nebula_home(request: Request):
 
 
 @app.get("/platform/historic")
-async def nebula_ws_historic(session: dict = Depends(get_session)):
+async def nebula_ws_historic(since: int = 0, session: dict = Depends(get_session)):
     """
     Retrieve historical data for admin users.
 
     Parameters:
+        since (int): Sequence number (`seq`) of the last message the client received, to only get the later ones.
         session (dict): Session data extracted via dependency.
 
     Returns:
-        JSONResponse: Historical data if available, otherwise an error message.
+        JSONResponse: The messages after `since` and the sequence number of the last one if the history is not empty,
+            otherwise an error message.
     """
     if session.get("role") == "admin":
-        historic = manager.get_historic()
-        if historic:
-            pretty_historic = historic
-            return JSONResponse(content=pretty_historic)
+        if manager.history:
+            return JSONResponse(content={"seq": manager.seq, "messages": manager.get_historic(since)})
         else:
             return JSONResponse({"status": "error", "message": "Historic not found"})
 
@@ -1596,9 +1568,8 @@ async def nebula_dashboard_monitor(scenario_name: str, request: Request, session
         if nodes_list:
             formatted_nodes = []
             for node in nodes_list:
-                # Calculate initial status based on timestamp
-                timestamp = datetime.datetime.strptime(node["timestamp"], "%Y-%m-%d %H:%M:%S.%f")
-                is_online = (datetime.datetime.now() - timestamp) <= datetime.timedelta(seconds=25)
+                # Computed by the controller from the time of the last status report
+                is_online = bool(node["online"])
 
                 formatted_nodes.append({
                     "uid": node["uid"],
@@ -1690,37 +1661,43 @@ async def nebula_update_node(scenario_name: str, request: Request):
 
     Parameters:
         scenario_name (str): Name of the scenario.
-        request (Request): FastAPI request object containing a JSON payload with node update data.
+        request (Request): FastAPI request object containing a JSON payload with a status report of the node: the
+            fields changed since the last report accepted for the node (see `StatusEncoder`).
 
     Returns:
         JSONResponse: {"message": "Node updated", "status": "success"} on success.
 
     Raises:
         HTTPException: 400 Bad Request if the content type is not application/json.
+        HTTPException: 409 Conflict if the report is a delta over a status unknown to the frontend, so the controller
+            sends a full snapshot.
     """
     if request.method == "POST":
         if request.headers.get("content-type") == "application/json":
-            config = await request.json()
+            report = await request.json()
+            try:
+                node_state = node_status.apply(report)
+            except StatusDesyncError as e:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
             node_update = {
                 "type": "node_update",
                 "scenario_name": scenario_name,
-                "uid": config["device_args"]["uid"],
-                "idx": config["device_args"]["idx"],
-                "ip": config["network_args"]["ip"],
-                "port": str(config["network_args"]["port"]),
-                "role": config["device_args"]["role"],
-                "malicious": config["device_args"]["malicious"],
-                "neighbors": config["network_args"]["neighbors"],
-                "latitude": config["mobility_args"]["latitude"],
-                "longitude": config["mobility_args"]["longitude"],
-                "timestamp": config["timestamp"],
-                "federation": config["scenario_args"]["federation"],
-                "round": config["federation_args"]["round"],
-                "name": config["scenario_args"]["name"],
+                "uid": node_state["uid"],
+                "idx": node_state["idx"],
+                "ip": node_state["ip"],
+                "port": str(node_state["port"]),
+                "role": node_state["role"],
+                "neighbors": node_state["neighbors"],
+                "latitude": node_state["latitude"],
+                "longitude": node_state["longitude"],
+                "timestamp": node_state["timestamp"],
+                "federation": node_state["federation"],
+                "round": node_state["round"],
+                "name": node_state["name"],
                 "status": True,
-                "neighbors_distance": config["mobility_args"]["neighbors_distance"],
-                "malicious": str(config["device_args"]["malicious"]),
+                "neighbors_distance": node_state["neighbors_distance"],
+                "malicious": str(node_state["malicious"]),
             }
 
             try:
@@ -0,0 +1,243 @@
+import asyncio
+import collections
+import datetime
+import itertools
+import json
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from fastapi import WebSocket
+
+CLIENT_QUEUE_SIZE = 256
+HISTORY_SIZE = 5000
+SEND_TIMEOUT = 30
+
+
+@dataclass
+class BroadcastStats:
+    """
+    Activity of the broadcaster.
+
+    Attributes:
+        broadcasts (int): Messages broadcast.
+        sent (int): Messages sent to clients.
+        merged (int): Queued messages replaced by a newer message with the same key (e.g., the update of a node).
+        dropped (int): Queued messages discarded because the queue of a client was full.
+        disconnected (int): Clients disconnected because a send failed or timed out.
+    """
+
+    broadcasts: int = 0
+    sent: int = 0
+    merged: int = 0
+    dropped: int = 0
+    disconnected: int = 0
+
+
+def merge_key(message: dict):
+    """
+    Key under which queued messages replace each other: only the latest update of each node is worth sending.
+
+    Args:
+        message (dict): The message.
+
+    Returns:
+        tuple | None: The key, or None if the message must always be delivered.
+    """
+    if message.get("type") == "node_update" and "uid" in message:
+        return ("node_update", message.get("scenario_name"), message["uid"])
+    return None
+
+
+class ClientQueue:
+    """
+    Messages pending to be sent to a WebSocket client.
+
+    Bounded to `size` messages: a message with the merge key of a queued one replaces it (keeping its place), and
+    when the queue is full the oldest message is dropped. The client is lagging from the first message dropped until
+    its queue is drained.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.dropped = 0
+        self.lagging = False
+        self._messages: collections.OrderedDict = collections.OrderedDict()
+        self._ready = asyncio.Event()
+
+    def __len__(self):
+        return len(self._messages)
+
+    def put(self, key, text: str) -> tuple[bool, bool]:
+        """
+        Args:
+            key: Merge key of the message (see `merge_key`), or None.
+            text (str): The message.
+
+        Returns:
+            tuple[bool, bool]: Whether the message replaced a queued one, and whether a queued one was dropped.
+        """
+        if key is not None and key in self._messages:
+            self._messages[key] = text
+            return True, False
+        dropped = len(self._messages) >= self.size
+        if dropped:
+            self._messages.popitem(last=False)
+            self.dropped += 1
+        self._messages[key if key is not None else object()] = text
+        self._ready.set()
+        return False, dropped
+
+    async def get(self) -> str:
+        while not self._messages:
+            self.lagging = False
+            self._ready.clear()
+            await self._ready.wait()
+        _, text = self._messages.popitem(last=False)
+        return text
+
+
+class Broadcaster:
+    """
+    Sends messages to every connected WebSocket client without letting a slow client delay the others.
+
+    Each client has its own bounded queue (see `ClientQueue`) and a task that sends it the queued messages, so a
+    broadcast only queues the message. Every broadcast message gets a sequence number (the `seq` field) and is kept in
+    a history of the last `history_size` messages, from which clients can catch up with `get_historic(since)`.
+
+    A warning is logged when a client starts lagging (its queue is full and messages are dropped), and the messages
+    dropped for a client are logged with the activity of the broadcaster (`BroadcastStats`) when it disconnects.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = CLIENT_QUEUE_SIZE,
+        history_size: int = HISTORY_SIZE,
+        send_timeout: float = SEND_TIMEOUT,
+    ):
+        """
+        Args:
+            queue_size (int): Messages queued per client.
+            history_size (int): Messages kept in the history.
+            send_timeout (float): Seconds a send to a client may take before the client is disconnected.
+        """
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.history: collections.deque = collections.deque(maxlen=history_size)
+        self.seq = 0
+        self._clients: dict["WebSocket", tuple[ClientQueue, asyncio.Task]] = {}
+        self._stats = BroadcastStats()
+
+    @property
+    def active_connections(self) -> list["WebSocket"]:
+        return list(self._clients)
+
+    async def connect(self, websocket: "WebSocket"):
+        await websocket.accept()
+        self.register(websocket)
+
+    def register(self, websocket: "WebSocket"):
+        """
+        Start delivering broadcasts to an accepted WebSocket.
+
+        Args:
+            websocket (WebSocket): The connection.
+        """
+        queue = ClientQueue(self.queue_size)
+        task = asyncio.create_task(self._deliver(websocket, queue), name="broadcaster_deliver")
+        self._clients[websocket] = (queue, task)
+
+    def disconnect(self, websocket: "WebSocket"):
+        client = self._clients.pop(websocket, None)
+        if client is None:
+            return
+        if client[1] is not asyncio.current_task():
+            client[1].cancel()
+        stats = self._stats
+        logging.info(
+            f"WebSocket client {self._client_name(websocket)} disconnected ({client[0].dropped} messages dropped) | "
+            f"{len(self._clients)} clients | broadcasts: {stats.broadcasts}, sent: {stats.sent}, "
+            f"merged: {stats.merged}, dropped: {stats.dropped}, disconnected: {stats.disconnected}"
+        )
+
+    async def send_personal_message(self, message: str, websocket: "WebSocket"):
+        try:
+            await websocket.send_text(message)
+        except RuntimeError:
+            # Connection was closed, remove it from active connections
+            self.disconnect(websocket)
+
+    async def broadcast(self, message: str | dict):
+        """
+        Queue a message for every connected client and add it to the history.
+
+        Args:
+            message (str | dict): The message, or its JSON encoding.
+        """
+        if isinstance(message, str):
+            message = json.loads(message)
+        self.seq += 1
+        message = {**message, "seq": self.seq}
+        self.history.append({
+            "seq": self.seq,
+            "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "message": message,
+        })
+        self._stats.broadcasts += 1
+        key = merge_key(message)
+        text = json.dumps(message)
+        for websocket, (queue, _) in self._clients.items():
+            merged, dropped = queue.put(key, text)
+            self._stats.merged += merged
+            self._stats.dropped += dropped
+            if dropped and not queue.lagging:
+                queue.lagging = True
+                logging.warning(
+                    f"WebSocket client {self._client_name(websocket)} is lagging: its queue of {queue.size} messages "
+                    f"is full, dropping the oldest ones ({queue.dropped} dropped so far)"
+                )
+
+    def get_historic(self, since: int = 0) -> list[dict]:
+        """
+        Args:
+            since (int): Sequence number of the last message the caller has.
+
+        Returns:
+            list[dict]: The messages of the history after `since` (`seq`, `timestamp` and `message`), oldest first.
+        """
+        if not self.history or since < self.history[0]["seq"]:
+            return list(self.history)
+        # Sequence numbers are consecutive: the position of a message follows from its number
+        return list(itertools.islice(self.history, since - self.history[0]["seq"] + 1, None))
+
+    def get_stats(self, reset: bool = False) -> BroadcastStats:
+        """
+        Args:
+            reset (bool): Start a new measurement period after returning the stats.
+
+        Returns:
+            BroadcastStats: The activity since the last reset.
+        """
+        stats = self._stats
+        if reset:
+            self._stats = BroadcastStats()
+        return stats
+
+    @staticmethod
+    def _client_name(websocket: "WebSocket") -> str:
+        client = getattr(websocket, "client", None)
+        return f"{client[0]}:{client[1]}" if client else hex(id(websocket))
+
+    async def _deliver(self, websocket: "WebSocket", queue: ClientQueue):
+        while True:
+            text = await queue.get()
+            try:
+                await asyncio.wait_for(websocket.send_text(text), self.send_timeout)
+            except Exception as e:
+                if not isinstance(e, RuntimeError):
+                    logging.warning(f"Error sending message to WebSocket client, disconnecting it: {e!r}")
+                self._stats.disconnected += 1
+                self.disconnect(websocket)
+                return
+            self._stats.sent += 1
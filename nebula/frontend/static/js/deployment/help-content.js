@@ -3,6 +3,7 @@ const HelpContent = (function() {
     function initializePopovers() {
         const tooltipElements = {
             'processHelpIcon': 'Process deployment allows you to deploy participants in the same machine using different processes.',
+            'simulationHelpIcon': 'Simulation deployment runs every participant in the same machine from a shared node pool, which starts them faster and with less memory than independent processes (Linux and macOS).',
             'dockerHelpIcon': 'Docker deployment allows you to deploy participants in different containers.',
             'physicalDevicesHelpIcon': 'Physical devices deployment allows you to deploy participants in physical devices.',
             'architectureHelpIcon': architecture,
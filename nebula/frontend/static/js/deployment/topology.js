@@ -542,8 +542,9 @@ const TopologyManager = (function() {
             return;
         }
     
-        /*  Docker or Process → generate sintetic IPs                       */
-        const isProcess = document.getElementById("process-radio").checked;
+        /*  Docker, Process or Simulation → generate sintetic IPs                       */
+        const isProcess = document.getElementById("process-radio").checked
+            || document.getElementById("simulation-radio").checked;
         const baseIP = "192.168.50";
     
         gData.nodes.forEach((node, idx) => {